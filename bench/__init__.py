@@ -0,0 +1,12 @@
+"""
+libTARS 性能基准套件
+
+- fixtures: 在内存中构造公共参数、环成员、签名与追踪者份额（不读写密钥文件）
+- primitives: 各个原语的计时用例
+- runner: 参数扫描、JSON结果输出与基线回归比较
+- autotune: 测量本机开销，生成params.json同目录下的tuning.json
+
+用法: python -m bench run --sizes 1,10,100 -o bench_results.json
+      python -m bench autotune -p config/params.json
+或:   python libTARS_cli.py bench run ...
+"""
@@ -0,0 +1,210 @@
+"""
+机器调优：测量本机的点运算、预计算表和进程池开销，生成tuning.json
+
+- fixed_window: 固定底点表只构建一次、反复使用，取单次点乘最快且不超过内存预算的窗口
+- member_window: 环成员表每次加载环都要构建，约使用一次，取 构建 + 一次点乘 最小的窗口
+- ephemeral_window: C2表每个签名构建一次，签名时每个模拟成员使用一次，取 构建 + ring_size次点乘 最小的窗口
+- msm_arity: 对一组随机点比较不同分组大小的multi_multiply
+- parallel_threshold: 进程池一轮往返的开销摊到每个环成员的处理代价上
+- batch_lanes: 比较g1表multiply_many逐个标量的Jacobian实现与NumPy lane实现的单个标量耗时，
+  取NumPy不慢于前者的最小lane数（未安装NumPy时为0）
+- 缓存条目数按内存预算和单个条目的估计大小折算
+"""
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from sage.all import Integer
+from core.crypto import fqbatch
+from core.crypto.public_params import load_full_public_params, PowerTable, point_to_string
+from core.crypto.multiexp import multi_multiply
+from core.crypto.tuning import TuningProfile, FIELDS
+from core.entities import DEFAULT_PARAMS_PATH
+from .runner import measure, parse_int_list
+
+DEFAULT_WINDOWS = [2, 3, 4, 5, 6]
+DEFAULT_ARITIES = [1, 2, 3, 4]
+BATCH_LANES = [32, 64, 128, 256, 512, 1024]
+# 验证缓存单个条目（64字节十六进制键、时间戳、OrderedDict开销）的估计字节数
+VERIFICATION_ENTRY_BYTES = 200
+
+
+def _median(fn, repeat):
+    return statistics.median(measure(fn, repeat))
+
+
+def _noop(_):
+    return None
+
+
+def point_op_costs(pp, count=200):
+    """G1上单次点加、倍点的平均耗时（秒）"""
+    P = pp.g1
+    Q = pp.g1_table.multiply(Integer(pp.rand_int()))
+    start = time.perf_counter()
+    for _ in range(count):
+        P + Q
+    add = (time.perf_counter() - start) / count
+    start = time.perf_counter()
+    for _ in range(count):
+        2 * P
+    double = (time.perf_counter() - start) / count
+    return add, double
+
+
+def table_costs(pp, windows, repeat):
+    """每个窗口的 (构建耗时, 一次224位点乘耗时, 表项数)"""
+    P = pp.g1
+    costs = {}
+    for w in windows:
+        build = _median(lambda: PowerTable(P, window_size=w), repeat)
+        table = PowerTable(P, window_size=w)
+        ks = [Integer(v) for v in pp.scalars.rand_ints(repeat)]
+        it = iter(ks)
+        multiply = _median(lambda: table.multiply(next(it)), repeat)
+        costs[w] = (build, multiply, sum(len(block) for block in table.table))
+    return costs
+
+
+def batch_lane_costs(pp, repeat, lane_counts=BATCH_LANES):
+    """
+    g1表multiply_many中单个标量的耗时：(逐个标量的Jacobian实现, {lane数: NumPy实现})。
+    逐个标量的实现与批量大小无关，只在64个标量上测一次
+    """
+    table = pp.g1_table
+    previous = table.batch_lanes
+    try:
+        table.batch_lanes = 0
+        ks = pp.scalars.rand_ints(64)
+        jacobian = _median(lambda: table.multiply_many(ks), repeat) / len(ks)
+        table.batch_lanes = 1
+        lanes = {}
+        for count in lane_counts:
+            ks = pp.scalars.rand_ints(count)
+            lanes[count] = _median(lambda: table.multiply_many(ks), repeat) / count
+    finally:
+        table.batch_lanes = previous
+    return jacobian, lanes
+
+
+def pool_overhead(workers, rounds=3):
+    """进程池中每个工作进程完成一个空任务的一轮往返耗时（不含启动）"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_noop, range(workers)))
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            list(pool.map(_noop, range(workers)))
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def autotune(params_file=DEFAULT_PARAMS_PATH, windows=DEFAULT_WINDOWS, arities=DEFAULT_ARITIES,
+             ring_size=100, repeat=3, memory_mb=64, workers=None, log=None):
+    """
+    测量本机开销并返回TuningProfile（不写文件）
+    :param ring_size: 典型环大小，决定C2表的使用次数
+    :param memory_mb: 预计算表和缓存的内存预算（MB）
+    """
+    def report(message):
+        if log is not None:
+            log(message)
+
+    pp = load_full_public_params(params_file)
+    workers = workers or os.cpu_count() or 1
+    budget = memory_mb * 1024 * 1024
+    low, high = FIELDS['fixed_window'][1:]
+    windows = [w for w in windows if low <= w <= high]
+
+    add, double = point_op_costs(pp)
+    report(f"point add {add * 1e6:.1f}us, double {double * 1e6:.1f}us")
+
+    costs = table_costs(pp, windows, repeat)
+    for w, (build, multiply, entries) in costs.items():
+        report(f"window {w}: build {build * 1e3:.2f}ms, multiply {multiply * 1e3:.3f}ms, {entries} entries")
+    # 单个表项的估计大小：坐标的十进制文本长度（g2坐标最长，按g2估计）
+    entry_bytes = 2 * len(point_to_string(pp.g2))
+    # 三个固定底点表共用一半预算
+    fixed_candidates = [w for w in windows if 3 * costs[w][2] * entry_bytes <= budget / 2] or [min(windows)]
+    fixed_window = min(fixed_candidates, key=lambda w: costs[w][1])
+    member_window = min(windows, key=lambda w: costs[w][0] + costs[w][1])
+    ephemeral_window = min(windows, key=lambda w: costs[w][0] + ring_size * costs[w][1])
+
+    points = pp.g1_table.multiply_many(pp.scalars.rand_ints(16))
+    scalars = pp.scalars.rand_ints(16)
+    zero = pp.E(0)
+    arity_costs = {a: _median(lambda: multi_multiply(points, scalars, zero, arity=a), repeat) for a in arities}
+    for a, cost in arity_costs.items():
+        report(f"msm arity {a}: {cost * 1e3:.2f}ms for 16 terms")
+    msm_arity = min(arity_costs, key=arity_costs.get)
+
+    batch_lanes, lane_costs = 0, {}
+    if fqbatch.available():
+        jacobian_cost, lane_costs = batch_lane_costs(pp, repeat)
+        report(f"batched scalar multiply: jacobian {jacobian_cost * 1e6:.0f}us per scalar, numpy "
+               + ", ".join(f"{count} lanes {cost * 1e6:.0f}us" for count, cost in lane_costs.items()))
+        batch_lanes = min((count for count, cost in lane_costs.items() if cost <= jacobian_cost), default=0)
+    else:
+        report("numpy not installed, batched field arithmetic disabled")
+
+    overhead = pool_overhead(workers) if workers > 1 else 0.0
+    member_cost = costs[member_window][0] + costs[member_window][1]
+    parallel_threshold = max(1, math.ceil(overhead * workers / member_cost)) if overhead else FIELDS['parallel_threshold'][0]
+    report(f"process pool round trip {overhead * 1e3:.2f}ms with {workers} workers")
+
+    return TuningProfile(
+        fixed_window=fixed_window,
+        member_window=member_window,
+        ephemeral_window=ephemeral_window,
+        msm_arity=msm_arity,
+        parallel_threshold=parallel_threshold,
+        workers=workers,
+        point_cache_size=int(budget / 4 / entry_bytes),
+        batch_lanes=batch_lanes,
+        verification_cache_size=int(budget / 4 / VERIFICATION_ENTRY_BYTES),
+        machine={
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "point_add_seconds": add,
+            "point_double_seconds": double,
+            "pool_round_trip_seconds": overhead,
+            "table_costs": {str(w): {"build": c[0], "multiply": c[1]} for w, c in costs.items()},
+            "msm_costs": {str(a): cost for a, cost in arity_costs.items()},
+            "batch_lane_costs": {str(count): cost for count, cost in lane_costs.items()},
+        },
+    )
+
+
+def add_arguments(parser):
+    """为argparse子命令添加调优参数（CLI与python -m bench共用）"""
+    parser.add_argument("-p", "--params", help="System parameter file (params.json)")
+    parser.add_argument("--windows", type=parse_int_list, default=DEFAULT_WINDOWS, help="Window sizes to try, comma separated")
+    parser.add_argument("--arities", type=parse_int_list, default=DEFAULT_ARITIES, help="Multi-scalar group sizes to try, comma separated")
+    parser.add_argument("--ring-size", type=int, default=100, help="Typical ring size")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Repetitions per measurement")
+    parser.add_argument("--memory-mb", type=int, default=64, help="Memory budget for tables and caches in MB")
+    parser.add_argument("--workers", type=int, help="Process pool size (default: CPU count)")
+    parser.add_argument("-o", "--output", help="Write the profile here instead of tuning.json next to params.json")
+    parser.add_argument("--dry-run", action="store_true", help="Print the profile without writing it")
+
+
+def autotune_from_args(args):
+    """执行调优并写出tuning.json，返回进程退出码"""
+    params_file = args.params or DEFAULT_PARAMS_PATH
+    profile = autotune(params_file, windows=args.windows, arities=args.arities, ring_size=args.ring_size,
+                       repeat=args.repeat, memory_mb=args.memory_mb, workers=args.workers, log=print)
+    summary = {k: v for k, v in profile.to_dict().items() if k != "machine"}
+    print(json.dumps(summary, indent=2))
+    if not args.dry_run:
+        path = args.output or TuningProfile.path_for(params_file)
+        profile.save(path)
+        print(f"Tuning profile saved to {path}")
+    return 0
@@ -0,0 +1,86 @@
+"""基准测试夹具：在内存中构造环成员、签名和追踪者份额"""
+import hashlib
+from sage.all import Integer
+from core.crypto.public_params import load_full_public_params, PowerTable
+from core.crypto.nizk import ring_proof
+from core.entities.tracer import Tracer
+from core.entities.user import User
+from core.entities import DEFAULT_PARAMS_PATH
+
+
+def make_params(params_file=DEFAULT_PARAMS_PATH, seed=None):
+    """
+    加载公共参数，并用新的随机主密钥s替换Q，
+    这样基准测试可以自行生成追踪者份额而不依赖KGC密钥文件。
+    :param seed: 不为None时随机标量使用确定性序列，便于复现
+    :return: (pp, s)
+    """
+    pp = load_full_public_params(params_file)
+    if seed is not None:
+        pp.seed_scalars(seed)
+    s = Integer(pp.rand_int())
+    pp.Q = pp.g1_table.multiply(s)
+    pp.Q_table = pp.make_table(pp.Q)
+    return pp, s
+
+
+def make_ring(pp, size):
+    """
+    生成size个环成员（不落盘）
+    :return: (sk_list, Ring, Ring_table)
+    """
+    sk_list = [Integer(v) for v in pp.scalars.rand_ints(size)]
+    pk_list = pp.g2_table.multiply_many(sk_list)
+    pid_list = pp.g1_table.multiply_many(sk_list)
+    Ring = [pp.R(pk, pid) for pk, pid in zip(pk_list, pid_list)]
+    Ring_table = [PowerTable(pid, window_size=pp.tuning.member_window, batch_lanes=pp.tuning.batch_lanes) for pid in pid_list]
+    return sk_list, Ring, Ring_table
+
+
+def make_signature(pp, sk_list, Ring, Ring_table, message, index=1, event="default"):
+    """
+    按User.sign的流程在内存中生成签名，index从1开始
+    :return: (signature, C2_table)
+    """
+    event_hash = int(hashlib.sha256(event.encode('utf-8')).hexdigest(), 16)
+    sk = sk_list[index - 1]
+    pid = Ring[index - 1].public_id
+    k_int = Integer(pp.rand_int())
+    C1 = pp.g1_table.multiply(k_int)
+    C2 = pid + pp.Q_table.multiply(k_int)
+    T = pp.g1_table.multiply(Integer(event_hash))
+    C2_table = PowerTable(C2, window_size=pp.tuning.ephemeral_window)
+    proof = ring_proof(index, sk, k_int, message, C2_table, Ring_table, pp)
+    return ((C1, C2, T), proof), C2_table
+
+
+def make_tracers(pp, s, num_tracers, threshold):
+    """
+    对主密钥s做(threshold, num_tracers) Shamir分享，返回内存中的Tracer对象列表
+    """
+    modulus = int(pp.n)
+    poly_coeffs = [int(s)] + pp.scalars.rand_ints(threshold - 1)
+    tracers = []
+    for tracer_id in range(num_tracers):
+        x_i = tracer_id + 1
+        share = 0
+        for coeff in reversed(poly_coeffs):
+            share = (share * x_i + coeff) % modulus
+        tracer = Tracer(tracer_id, pp=pp, load_key=False)
+        tracer.x_i = x_i
+        tracer.d_share = share
+        tracer.pub_share = pp.g1_table.multiply(Integer(share))
+        tracer.proof = None
+        tracers.append(tracer)
+    return tracers
+
+
+def copy_proof(proof):
+    """verify_ring_proof 的输入按值复制，避免重复计时之间共享可变列表"""
+    (commit_schnorr, commit_okamoto), challenge, (response_schnorr, response_okamoto) = proof
+    return [(list(commit_schnorr), list(commit_okamoto)), list(challenge), (list(response_schnorr), list(response_okamoto))]
+
+
+def serialized(signature):
+    """返回签名的可JSON序列化dict"""
+    return User.serialize_signature(signature)
@@ -0,0 +1,200 @@
+"""各原语的计时用例"""
+import json
+from sage.all import Integer
+from core.crypto.public_params import PowerTable, CompactPowerTable, point_from_string, point_to_string
+from core.crypto.nizk import simulate, ring_proof, verify_ring_proof
+from core.crypto.schnorr import schnorr_proof
+from core.crypto.multiexp import simultaneous_multiply, MAX_ARITY
+from core.crypto.fq6 import G2TowerTable
+from core.crypto.pairing import TatePairing
+from core.entities.tracer import Tracer
+from core.entities.user import User
+from . import fixtures
+
+# 用例注册表: name -> (sweep, setup)
+#   sweep: None（与规模无关）、"ring"（按环大小扫描）或 "tracer"（按追踪者数量和阈值扫描）
+#   setup(ctx, **params) 返回一个无参可调用对象，基准只对其计时
+CASES = {}
+
+
+def case(name, sweep=None):
+    def register(setup):
+        CASES[name] = (sweep, setup)
+        return setup
+    return register
+
+
+class BenchContext:
+    """在各用例之间共享的状态：公共参数、按规模缓存的环和签名"""
+    def __init__(self, pp, s, message="benchmark message"):
+        self.pp = pp
+        self.s = s
+        self.message = message
+        self._rings = {}
+        self._signatures = {}
+        self._tracers = {}
+
+    def ring(self, size):
+        if size not in self._rings:
+            self._rings[size] = fixtures.make_ring(self.pp, size)
+        return self._rings[size]
+
+    def signature(self, size):
+        if size not in self._signatures:
+            sk_list, Ring, Ring_table = self.ring(size)
+            self._signatures[size] = fixtures.make_signature(self.pp, sk_list, Ring, Ring_table, self.message)
+        return self._signatures[size]
+
+    def tracers(self, num_tracers, threshold):
+        key = (num_tracers, threshold)
+        if key not in self._tracers:
+            self._tracers[key] = fixtures.make_tracers(self.pp, self.s, num_tracers, threshold)
+        return self._tracers[key]
+
+
+@case("power_table_build")
+def _power_table_build(ctx):
+    P = ctx.pp.g1
+    return lambda: PowerTable(P)
+
+
+@case("power_table_multiply")
+def _power_table_multiply(ctx):
+    k = Integer(ctx.pp.rand_int())
+    return lambda: ctx.pp.g1_table.multiply(k)
+
+
+@case("compact_table_build")
+def _compact_table_build(ctx):
+    P = ctx.pp.g1
+    return lambda: CompactPowerTable(P)
+
+
+@case("compact_table_multiply")
+def _compact_table_multiply(ctx):
+    table = CompactPowerTable(ctx.pp.g1)
+    k = Integer(ctx.pp.rand_int())
+    return lambda: table.multiply(k)
+
+
+@case("g2_table_multiply")
+def _g2_table_multiply(ctx):
+    table = PowerTable(ctx.pp.g2)
+    k = Integer(ctx.pp.rand_int())
+    return lambda: table.multiply(k)
+
+
+@case("g2_tower_table_multiply")
+def _g2_tower_table_multiply(ctx):
+    table = G2TowerTable(ctx.pp.g2, field=ctx.pp.fq6_field)
+    k = Integer(ctx.pp.rand_int())
+    return lambda: table.multiply(k)
+
+
+@case("pairing")
+def _pairing(ctx):
+    pairing = TatePairing(ctx.pp)
+    return lambda: pairing.pairing(ctx.pp.g1, ctx.pp.g2)
+
+
+@case("pairing_fq6")
+def _pairing_fq6(ctx):
+    pairing = TatePairing(ctx.pp, field=ctx.pp.fq6_field)
+    return lambda: pairing.pairing(ctx.pp.g1, ctx.pp.g2)
+
+
+@case("simultaneous_multiply")
+def _simultaneous_multiply(ctx):
+    _, Ring, _ = ctx.ring(MAX_ARITY)
+    points = [member.public_id for member in Ring]
+    scalars = [Integer(ctx.pp.rand_int()) for _ in points]
+    return lambda: simultaneous_multiply(points, scalars, ctx.pp.E(0))
+
+
+@case("separate_multiply")
+def _separate_multiply(ctx):
+    _, Ring, _ = ctx.ring(MAX_ARITY)
+    points = [member.public_id for member in Ring]
+    scalars = [Integer(ctx.pp.rand_int()) for _ in points]
+    return lambda: sum((P * k for P, k in zip(points, scalars)), ctx.pp.E(0))
+
+
+@case("point_from_string")
+def _point_from_string(ctx):
+    point_str = point_to_string(ctx.pp.g2)
+    return lambda: point_from_string(point_str, ctx.pp.F, ctx.pp.E)
+
+
+@case("point_from_string_trusted")
+def _point_from_string_trusted(ctx):
+    point_str = point_to_string(ctx.pp.g2)
+    return lambda: point_from_string(point_str, ctx.pp.F, ctx.pp.E, trusted=True)
+
+
+@case("zr_hash_point")
+def _zr_hash_point(ctx):
+    P = ctx.pp.g1
+    return lambda: ctx.pp.zr_hash(P)
+
+
+@case("zr_hash_message")
+def _zr_hash_message(ctx):
+    return lambda: ctx.pp.zr_hash(ctx.message)
+
+
+@case("simulate")
+def _simulate(ctx):
+    _, _, Ring_table = ctx.ring(1)
+    C2_table = PowerTable(ctx.pp.Q, window_size=2)
+    c = Integer(ctx.pp.rand_int())
+    return lambda: simulate(0, c, C2_table, Ring_table, ctx.pp)
+
+
+@case("ring_proof", sweep="ring")
+def _ring_proof(ctx, size):
+    sk_list, _, Ring_table = ctx.ring(size)
+    _, C2_table = ctx.signature(size)
+    k_int = Integer(ctx.pp.rand_int())
+    return lambda: ring_proof(1, sk_list[0], k_int, ctx.message, C2_table, Ring_table, ctx.pp)
+
+
+@case("verify_ring_proof", sweep="ring")
+def _verify_ring_proof(ctx, size):
+    _, _, Ring_table = ctx.ring(size)
+    (_, proof), C2_table = ctx.signature(size)
+    return lambda: verify_ring_proof(C2_table, fixtures.copy_proof(proof), ctx.message, Ring_table, ctx.pp)
+
+
+@case("serialize_signature", sweep="ring")
+def _serialize_signature(ctx, size):
+    signature, _ = ctx.signature(size)
+    return lambda: json.dumps(User.serialize_signature(signature))
+
+
+@case("deserialize_signature", sweep="ring")
+def _deserialize_signature(ctx, size):
+    signature, _ = ctx.signature(size)
+    text = json.dumps(User.serialize_signature(signature))
+    return lambda: User.deserialize_signature(json.loads(text), ctx.pp)
+
+
+@case("schnorr_proof")
+def _schnorr_proof(ctx):
+    d = Integer(ctx.pp.rand_int())
+    return lambda: schnorr_proof(d, ctx.pp)
+
+
+@case("partial_decrypt", sweep="tracer")
+def _partial_decrypt(ctx, num_tracers, threshold):
+    tracer = ctx.tracers(num_tracers, threshold)[0]
+    signature, _ = ctx.signature(1)
+    return lambda: tracer.partial_decrypt(signature)
+
+
+@case("combine", sweep="tracer")
+def _combine(ctx, num_tracers, threshold):
+    tracers = ctx.tracers(num_tracers, threshold)[:threshold]
+    signature, _ = ctx.signature(1)
+    results = [tracer.partial_decrypt(signature) for tracer in tracers]
+    D_list = [tracer.pub_share for tracer in tracers]
+    return lambda: Tracer.combine(D_list, results, signature, ctx.pp)
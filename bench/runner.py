@@ -0,0 +1,179 @@
+"""基准扫描、结果输出与基线回归比较"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import hashlib
+from core.entities import DEFAULT_PARAMS_PATH
+
+DEFAULT_SIZES = [1, 10, 100, 1000, 10000]
+DEFAULT_TRACERS = [3, 5, 10]
+DEFAULT_THRESHOLDS = [2, 3, 5]
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def parse_int_list(value):
+    """解析逗号分隔的整数列表"""
+    return [int(x) for x in value.split(",") if x.strip()]
+
+
+def measure(fn, repeat):
+    """调用fn共repeat次，返回每次耗时（秒）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def result_key(entry):
+    """结果条目的唯一键：用例名 + 扫描参数"""
+    params = ",".join(f"{k}={v}" for k, v in sorted(entry["params"].items()))
+    return f"{entry['name']}[{params}]"
+
+
+def sweep_points(sweep, sizes, tracers, thresholds):
+    """根据用例的扫描类型展开参数组合"""
+    if sweep is None:
+        return [{}]
+    if sweep == "ring":
+        return [{"size": size} for size in sizes]
+    if sweep == "tracer":
+        return [{"num_tracers": n, "threshold": t} for n in tracers for t in thresholds if t <= n]
+    raise ValueError(f"Unknown sweep type: {sweep}")
+
+
+def run_benchmarks(params_file=DEFAULT_PARAMS_PATH, sizes=DEFAULT_SIZES, tracers=DEFAULT_TRACERS,
+                   thresholds=DEFAULT_THRESHOLDS, repeat=3, only=None, log=None, seed=None):
+    """
+    运行所有（或only指定的）基准用例
+    :return: 结果dict，包含meta和results
+    """
+    from .fixtures import make_params
+    from .primitives import CASES, BenchContext
+
+    pp, s = make_params(params_file, seed=seed)
+    ctx = BenchContext(pp, s)
+    results = []
+    for name, (sweep, setup) in CASES.items():
+        if only and name not in only:
+            continue
+        for params in sweep_points(sweep, sizes, tracers, thresholds):
+            fn = setup(ctx, **params)
+            timings = measure(fn, repeat)
+            entry = {
+                "name": name,
+                "params": params,
+                "repeat": repeat,
+                "min": min(timings),
+                "median": statistics.median(timings),
+                "mean": statistics.mean(timings),
+            }
+            results.append(entry)
+            if log is not None:
+                log(f"{result_key(entry)}: median={entry['median']:.6f}s min={entry['min']:.6f}s")
+
+    with open(params_file, 'rb') as f:
+        params_digest = hashlib.sha256(f.read()).hexdigest()
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "params_digest": params_digest,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance=0.2):
+    """
+    将当前结果与基线比较（按median）
+    :return: (regressions, rows)，regressions为变慢超过tolerance的条目
+    """
+    base_index = {result_key(entry): entry for entry in baseline.get("results", [])}
+    rows, regressions = [], []
+    for entry in current["results"]:
+        key = result_key(entry)
+        base = base_index.get(key)
+        if base is None or base["median"] <= 0:
+            continue
+        ratio = entry["median"] / base["median"]
+        row = {"key": key, "baseline": base["median"], "current": entry["median"], "ratio": ratio}
+        rows.append(row)
+        if ratio > 1 + tolerance:
+            regressions.append(row)
+    return regressions, rows
+
+
+def add_arguments(parser):
+    """为argparse子命令添加基准参数（CLI与python -m bench共用）"""
+    parser.add_argument("-p", "--params", help="System parameter file (params.json)")
+    parser.add_argument("--sizes", type=parse_int_list, default=DEFAULT_SIZES, help="Ring sizes, comma separated")
+    parser.add_argument("--tracers", type=parse_int_list, default=DEFAULT_TRACERS, help="Tracer counts, comma separated")
+    parser.add_argument("--thresholds", type=parse_int_list, default=DEFAULT_THRESHOLDS, help="Thresholds, comma separated")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Repetitions per case")
+    parser.add_argument("--only", type=lambda v: [x.strip() for x in v.split(",") if x.strip()], help="Only run these cases")
+    parser.add_argument("-o", "--output", help="Write JSON results to this file")
+    parser.add_argument("-b", "--baseline", help=f"Compare against this baseline JSON (default: {DEFAULT_BASELINE_PATH} if it exists)")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Also store results as the baseline ({DEFAULT_BASELINE_PATH} unless -b is given)")
+    parser.add_argument("--seed", help="Draw scalars from a deterministic seeded stream instead of os.urandom")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown ratio before reporting a regression")
+
+
+def run_from_args(args):
+    """
+    执行基准并处理输出/基线比较，返回进程退出码
+    未给出-b时与DEFAULT_BASELINE_PATH比较（文件存在时）；给出的-b文件不存在时报错，除非同时--save-baseline
+    """
+    params_file = args.params or DEFAULT_PARAMS_PATH
+    baseline_path = args.baseline or DEFAULT_BASELINE_PATH
+    if args.baseline and not args.save_baseline and not os.path.exists(baseline_path):
+        raise FileNotFoundError(f"Baseline file not found: {baseline_path}")
+    report = run_benchmarks(params_file, sizes=args.sizes, tracers=args.tracers, thresholds=args.thresholds,
+                            repeat=args.repeat, only=args.only, log=print, seed=args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    exit_code = 0
+    if os.path.exists(baseline_path):
+        with open(baseline_path, 'r') as f:
+            baseline = json.load(f)
+        print(f"Comparing against {baseline_path}")
+        regressions, rows = compare(report, baseline, args.tolerance)
+        for row in rows:
+            print(f"{row['key']}: {row['baseline']:.6f}s -> {row['current']:.6f}s (x{row['ratio']:.2f})")
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for row in regressions:
+                print(f"  {row['key']} x{row['ratio']:.2f}")
+            exit_code = 1
+    if args.save_baseline:
+        with open(baseline_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+    return exit_code
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="libTARS benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    from . import autotune
+    run_parser = subparsers.add_parser("run", help="Run the benchmark sweep")
+    add_arguments(run_parser)
+    run_parser.set_defaults(func=run_from_args)
+    autotune_parser = subparsers.add_parser("autotune", help="Measure this machine and write tuning.json")
+    autotune.add_arguments(autotune_parser)
+    autotune_parser.set_defaults(func=autotune.autotune_from_args)
+    args = parser.parse_args(argv)
+    return args.func(args)
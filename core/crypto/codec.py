@@ -0,0 +1,463 @@
+"""
+签名的编码与增量解析
+
+二进制签名格式（大端）:
+    header:  magic 'TARS' | version u8 | flags u8 | 环大小 n u32
+    PID_encryption: C1, C2, T 三个点
+    n 条成员记录: commit_schnorr 点 | commit_okamoto 点 | challenge (32字节) | response_schnorr (64字节) | response_okamoto (64字节)
+最后一条记录的challenge由验证方根据哈希推出，写为0。
+
+点编码: 1字节标签 + 坐标
+    0: 无穷远点，无坐标
+    1: 坐标在基域中，x、y 各 width 字节
+    2: 坐标在扩域中，x、y 各 k * width 字节（按多项式系数升幂）
+width 为 q 的字节长度。
+
+iter_json_leaves 对现有JSON签名做增量解析，不构造整个文档；
+JsonSignatureWriter / BinarySignatureWriter 配合 nizk.ring_proof_stream 流式写出签名。
+"""
+import io
+import json
+import re
+import shutil
+import struct
+import tempfile
+from json.decoder import scanstring
+from sage.all import Integer
+from core.crypto.public_params import point_to_string
+
+MAGIC = b'TARS'
+VERSION = 1
+HEADER = struct.Struct('>4sBBI')
+CHALLENGE_BYTES = 32
+RESPONSE_BYTES = 64
+
+POINT_INFINITY = 0
+POINT_BASE_FIELD = 1
+POINT_EXTENSION_FIELD = 2
+
+
+def coord_width(pp):
+    """单个系数的字节长度"""
+    return (int(pp.q).bit_length() + 7) // 8
+
+
+def _read_exact(fp, size):
+    data = fp.read(size)
+    if len(data) != size:
+        raise ValueError("Unexpected end of binary signature")
+    return data
+
+
+class BufferReader:
+    """在bytes/memoryview上提供与文件相同的read接口，切片不复制数据"""
+    def __init__(self, buffer, offset=0):
+        self.buffer = memoryview(buffer)
+        self.offset = offset
+
+    def read(self, size):
+        data = self.buffer[self.offset:self.offset + size]
+        self.offset += len(data)
+        return data
+
+
+def encode_point(P, pp):
+    """将椭圆曲线点编码为bytes"""
+    if P.is_zero():
+        return bytes([POINT_INFINITY])
+    width = coord_width(pp)
+    x, y = P.xy()
+    x_coeffs = x.polynomial().list()
+    y_coeffs = y.polynomial().list()
+    if len(x_coeffs) <= 1 and len(y_coeffs) <= 1:
+        tag, ncoef = POINT_BASE_FIELD, 1
+    else:
+        tag, ncoef = POINT_EXTENSION_FIELD, int(pp.k)
+    out = bytearray([tag])
+    for coeffs in (x_coeffs, y_coeffs):
+        coeffs = coeffs + [0] * (ncoef - len(coeffs))
+        for c in coeffs:
+            out += int(c).to_bytes(width, 'big')
+    return bytes(out)
+
+
+def read_point(fp, pp):
+    """从文件或BufferReader读取一个点（数据来自签名，做曲线方程检查）"""
+    tag = _read_exact(fp, 1)[0]
+    if tag == POINT_INFINITY:
+        return pp.E(0)
+    width = coord_width(pp)
+    if tag == POINT_BASE_FIELD:
+        ncoef = 1
+    elif tag == POINT_EXTENSION_FIELD:
+        ncoef = int(pp.k)
+    else:
+        raise ValueError(f"Invalid point tag: {tag}")
+    data = _read_exact(fp, 2 * ncoef * width)
+    coords = []
+    for i in range(2):
+        coeffs = [int.from_bytes(data[(i * ncoef + j) * width:(i * ncoef + j + 1) * width], 'big') for j in range(ncoef)]
+        coords.append(pp.F(coeffs[0]) if ncoef == 1 else pp.F(coeffs))
+    return pp.E(coords[0], coords[1])
+
+
+def encode_scalar(value, size):
+    return int(value).to_bytes(size, 'big')
+
+
+def read_scalar(fp, size):
+    return Integer(int.from_bytes(_read_exact(fp, size), 'big'))
+
+
+def encode_record(commit_schnorr, commit_okamoto, challenge, response_schnorr, response_okamoto, pp):
+    """编码一条成员记录；challenge为None时写0"""
+    return b''.join([
+        encode_point(commit_schnorr, pp),
+        encode_point(commit_okamoto, pp),
+        encode_scalar(challenge or 0, CHALLENGE_BYTES),
+        encode_scalar(response_schnorr, RESPONSE_BYTES),
+        encode_scalar(response_okamoto, RESPONSE_BYTES),
+    ])
+
+
+def write_signature(signature, fp, pp):
+    """将 (PID_encryption, PID_signature) 以二进制格式写入fp"""
+    PID_encryption, PID_signature = signature
+    (commit_schnorr, commit_okamoto), challenge, (response_schnorr, response_okamoto) = PID_signature
+    n = len(commit_schnorr)
+    fp.write(HEADER.pack(MAGIC, VERSION, 0, n))
+    for P in PID_encryption:
+        fp.write(encode_point(P, pp))
+    for i in range(n):
+        ch = challenge[i] if i < n - 1 else None
+        fp.write(encode_record(commit_schnorr[i], commit_okamoto[i], ch, response_schnorr[i], response_okamoto[i], pp))
+
+
+def read_signature_header(fp, pp):
+    """读取二进制签名头和PID_encryption，返回 (n, (C1, C2, T))"""
+    magic, version, _flags, n = HEADER.unpack(_read_exact(fp, HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("Not a binary libTARS signature")
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary signature version: {version}")
+    PID_encryption = tuple(read_point(fp, pp) for _ in range(3))
+    return n, PID_encryption
+
+
+def iter_signature_records(fp, pp, n):
+    """逐条产出成员记录 (commit_schnorr, commit_okamoto, challenge, response_schnorr, response_okamoto)，最后一条challenge为None"""
+    for i in range(n):
+        commit_schnorr = read_point(fp, pp)
+        commit_okamoto = read_point(fp, pp)
+        challenge = read_scalar(fp, CHALLENGE_BYTES)
+        response_schnorr = read_scalar(fp, RESPONSE_BYTES)
+        response_okamoto = read_scalar(fp, RESPONSE_BYTES)
+        yield commit_schnorr, commit_okamoto, (challenge if i < n - 1 else None), response_schnorr, response_okamoto
+
+
+def read_signature(fp, pp):
+    """读取完整的二进制签名，返回与User.deserialize_signature相同的结构"""
+    n, PID_encryption = read_signature_header(fp, pp)
+    commit_schnorr, commit_okamoto, challenge, response_schnorr, response_okamoto = [], [], [], [], []
+    for cs, co, ch, rs, ro in iter_signature_records(fp, pp, n):
+        commit_schnorr.append(cs)
+        commit_okamoto.append(co)
+        if ch is not None:
+            challenge.append(ch)
+        response_schnorr.append(rs)
+        response_okamoto.append(ro)
+    return PID_encryption, [(commit_schnorr, commit_okamoto), challenge, (response_schnorr, response_okamoto)]
+
+
+def is_binary_signature(path):
+    """根据文件头判断是否为二进制签名"""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+# ----------- 增量JSON解析 -----------
+_WHITESPACE = ' \t\r\n'
+_DELIMITERS = _WHITESPACE + ',]}'
+_ATOM_RE = re.compile(r'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null')
+_LITERALS = {'true': True, 'false': False, 'null': None}
+
+_VALUE, _VALUE_OR_END, _KEY, _KEY_OR_END, _AFTER = range(5)
+
+
+def iter_json_leaves(fp, chunk_size=1 << 16):
+    """
+    增量解析JSON，逐个产出 (path, value)。
+    path 为由对象键和数组下标组成的元组，只产出标量（字符串、数字、布尔、null），
+    容器本身不被构造，因此内存占用与文档大小无关。
+    :param fp: 文本或二进制文件对象
+    """
+    if not isinstance(fp, io.TextIOBase):
+        fp = io.TextIOWrapper(fp, encoding='utf-8')
+    buf = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buf) or not fill():
+                return
+
+    def read_string():
+        nonlocal pos
+        while True:
+            try:
+                value, end = scanstring(buf, pos + 1)
+            except ValueError:
+                if not fill():
+                    raise
+                continue
+            pos = end
+            return value
+
+    def read_atom():
+        nonlocal pos
+        while True:
+            m = _ATOM_RE.match(buf, pos)
+            # 数字可能被块边界截断，只有后面跟着分隔符（或已到文件末尾）时才算完整
+            if m and (eof or (m.end() < len(buf) and buf[m.end()] in _DELIMITERS)):
+                break
+            if not fill():
+                if m:
+                    break
+                raise ValueError(f"Invalid JSON value at offset {pos}")
+        token = m.group()
+        pos = m.end()
+        if token in _LITERALS:
+            return _LITERALS[token]
+        if any(ch in token for ch in '.eE'):
+            return float(token)
+        return int(token)
+
+    stack = []  # 每层: [是否为对象, 当前键或下标]
+    state = _VALUE
+    while True:
+        if state == _AFTER and not stack:
+            return
+        skip_ws()
+        if pos >= len(buf):
+            raise ValueError("Unexpected end of JSON")
+        ch = buf[pos]
+        if state == _VALUE_OR_END and ch == ']':
+            pos += 1
+            stack.pop()
+            state = _AFTER
+        elif state in (_VALUE, _VALUE_OR_END):
+            if ch == '{':
+                pos += 1
+                stack.append([True, None])
+                state = _KEY_OR_END
+            elif ch == '[':
+                pos += 1
+                stack.append([False, 0])
+                state = _VALUE_OR_END
+            else:
+                value = read_string() if ch == '"' else read_atom()
+                yield tuple(frame[1] for frame in stack), value
+                state = _AFTER
+        elif state in (_KEY, _KEY_OR_END):
+            if state == _KEY_OR_END and ch == '}':
+                pos += 1
+                stack.pop()
+                state = _AFTER
+            elif ch == '"':
+                stack[-1][1] = read_string()
+                skip_ws()
+                if pos >= len(buf) or buf[pos] != ':':
+                    raise ValueError(f"Expected ':' at offset {pos}")
+                pos += 1
+                state = _VALUE
+            else:
+                raise ValueError(f"Expected object key at offset {pos}")
+        else:
+            frame = stack[-1]
+            if ch == ',':
+                pos += 1
+                if frame[0]:
+                    state = _KEY
+                else:
+                    frame[1] += 1
+                    state = _VALUE
+            elif ch == (']' if not frame[0] else '}'):
+                pos += 1
+                stack.pop()
+                state = _AFTER
+            else:
+                raise ValueError(f"Unexpected character {ch!r} at offset {pos}")
+
+
+def read_json_field(path, key):
+    """流式扫描JSON文件，返回顶层字段key的标量值（不存在时返回None）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for leaf_path, value in iter_json_leaves(f):
+            if leaf_path == (key,):
+                return value
+    return None
+
+
+def iter_json_list(path, key):
+    """流式产出JSON文件顶层列表字段key中的各个元素"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for leaf_path, value in iter_json_leaves(f):
+            if len(leaf_path) == 2 and leaf_path[0] == key:
+                yield value
+
+
+# ----------- 流式签名写入 -----------
+# JSON中签名者的挑战/响应先写成空格占位，最后原地回填（JSON允许数字后跟空白）
+JSON_SCALAR_WIDTH = 160
+
+
+class JsonSignatureWriter:
+    """
+    以现有JSON格式流式写出签名（可被User.deserialize_signature读取）。
+    五个列表先分别写入临时文件，finish时按顺序拼接到输出，内存占用与环大小无关。
+    """
+    def __init__(self, fp, extra=None):
+        """
+        :param fp: 输出文本文件对象（不要求可seek）
+        :param extra: 附加的顶层字段（如ring_user_ids、event），写在签名之后
+        """
+        self.fp = fp
+        self.extra = extra or {}
+        self.PID_encryption = None
+        self._spools = [tempfile.TemporaryFile(mode='w+', encoding='utf-8') for _ in range(5)]
+        self._count = 0
+        self._signer_offsets = None
+        self._last_challenge_offset = None
+
+    def begin(self, PID_encryption):
+        self.PID_encryption = PID_encryption
+
+    def _append(self, spool, text):
+        """写入一个列表元素，返回元素起始位置"""
+        if self._count:
+            spool.write(", ")
+        offset = spool.tell()
+        spool.write(text)
+        return offset
+
+    def add_member(self, commit_schnorr, commit_okamoto, challenge, response_schnorr, response_okamoto):
+        """写入一个成员；challenge为None表示签名者，占位等待patch_signer"""
+        cs, co, ch, rs, ro = self._spools
+        signer = challenge is None
+        values = [challenge, response_schnorr, response_okamoto]
+        texts = [" " * JSON_SCALAR_WIDTH if signer else str(int(v)) for v in values]
+        self._append(cs, json.dumps(point_to_string(commit_schnorr)))
+        self._append(co, json.dumps(point_to_string(commit_okamoto)))
+        self._last_challenge_offset = ch.tell()
+        offsets = [self._append(spool, text) for spool, text in zip((ch, rs, ro), texts)]
+        if signer:
+            self._signer_offsets = offsets
+        self._count += 1
+
+    def patch_signer(self, challenge, response_schnorr, response_okamoto):
+        """回填签名者的挑战和响应"""
+        if self._signer_offsets is None:
+            raise ValueError("Signer slot was not reserved")
+        for spool, offset, value in zip(self._spools[2:], self._signer_offsets, (challenge, response_schnorr, response_okamoto)):
+            text = str(int(value))
+            if len(text) > JSON_SCALAR_WIDTH:
+                raise ValueError("Scalar does not fit the reserved JSON slot")
+            spool.seek(offset)
+            spool.write(text)
+            spool.seek(0, io.SEEK_END)
+
+    def finish(self):
+        """拼接输出，返回环大小"""
+        cs, co, ch, rs, ro = self._spools
+        # 最后一个成员的挑战不写出（由验证方推出）
+        ch.truncate(self._last_challenge_offset)
+        out = self.fp
+        out.write('{"PID_encryption": ')
+        out.write(json.dumps([point_to_string(P) for P in self.PID_encryption]))
+        parts = ['[[[', cs, '], [', co, ']], [', ch, '], [[', rs, '], [', ro, ']]]']
+        out.write(', "PID_signature": ')
+        for part in parts:
+            if isinstance(part, str):
+                out.write(part)
+            else:
+                part.seek(0)
+                shutil.copyfileobj(part, out)
+                part.close()
+        for key, value in self.extra.items():
+            out.write(f", {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}")
+        out.write("}\n")
+        return self._count
+
+
+class BinarySignatureWriter:
+    """
+    以codec二进制格式流式写出签名，成员记录按顺序追加，
+    签名者的标量字段和头部的环大小在最后回填（输出不可seek时先写入临时文件）。
+    """
+    def __init__(self, fp, pp):
+        self.pp = pp
+        self.out = fp
+        self.seekable = fp.seekable() if hasattr(fp, 'seekable') else False
+        self.fp = fp if self.seekable else tempfile.TemporaryFile()
+        self._start = self.fp.tell()
+        self._count = 0
+        self._signer_offset = None
+        self._last_scalar_offset = None
+
+    def begin(self, PID_encryption):
+        self.fp.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+        for P in PID_encryption:
+            self.fp.write(encode_point(P, self.pp))
+
+    def add_member(self, commit_schnorr, commit_okamoto, challenge, response_schnorr, response_okamoto):
+        """写入一个成员；challenge为None表示签名者，标量写0等待patch_signer"""
+        self.fp.write(encode_point(commit_schnorr, self.pp))
+        self.fp.write(encode_point(commit_okamoto, self.pp))
+        self._last_scalar_offset = self.fp.tell()
+        if challenge is None:
+            self._signer_offset = self._last_scalar_offset
+            challenge, response_schnorr, response_okamoto = 0, 0, 0
+        self.fp.write(encode_scalar(challenge, CHALLENGE_BYTES))
+        self.fp.write(encode_scalar(response_schnorr, RESPONSE_BYTES))
+        self.fp.write(encode_scalar(response_okamoto, RESPONSE_BYTES))
+        self._count += 1
+
+    def patch_signer(self, challenge, response_schnorr, response_okamoto):
+        if self._signer_offset is None:
+            raise ValueError("Signer slot was not reserved")
+        end = self.fp.tell()
+        self.fp.seek(self._signer_offset)
+        self.fp.write(encode_scalar(challenge, CHALLENGE_BYTES))
+        self.fp.write(encode_scalar(response_schnorr, RESPONSE_BYTES))
+        self.fp.write(encode_scalar(response_okamoto, RESPONSE_BYTES))
+        self.fp.seek(end)
+
+    def finish(self):
+        """回填环大小和最后一条记录的挑战（置0），返回环大小"""
+        end = self.fp.tell()
+        self.fp.seek(self._last_scalar_offset)
+        self.fp.write(encode_scalar(0, CHALLENGE_BYTES))
+        self.fp.seek(self._start)
+        self.fp.write(HEADER.pack(MAGIC, VERSION, 0, self._count))
+        self.fp.seek(end)
+        if not self.seekable:
+            self.fp.seek(0)
+            shutil.copyfileobj(self.fp, self.out)
+            self.fp.close()
+        return self._count
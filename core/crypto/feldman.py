@@ -0,0 +1,162 @@
+"""
+Shamir分享与Feldman承诺
+
+追踪者份额 d_i = f(x_i)，f(x) = s + a_1·x + ... + a_{t-1}·x^{t-1} (mod n)。
+Feldman承诺 C_j = a_j·g1 公开多项式而不泄露系数，其中 C_0 = s·g1 = Q。
+任何一方可以由承诺推出追踪者公钥份额 D_i = Σ_j x_i^j·C_j，
+或用一次多项点乘批量校验全部公钥份额（随机线性组合）:
+    Σ_i r_i·D_i == Σ_j (Σ_i r_i·x_i^j)·C_j
+追踪者也可以用 d_i·g1 == D_i 校验自己收到的份额。
+
+承诺文件格式（JSON）:
+    {"threshold": t, "commitments": [C_0, ..., C_{t-1}]}
+
+追踪者密钥的批量二进制格式（大端）:
+    header: magic 'TRKS' | version u8 | flags u8 | 追踪者数 u32 | 门限 u32
+    每个追踪者: tracer_id u32 | x_i u32 | d_share (32字节) | pub_share 点（codec点编码）
+flags 为 FLAG_PUBLIC 时不含 d_share（公开版本）。
+"""
+import json
+import struct
+from sage.all import Integer
+from core.crypto.public_params import point_to_string, point_from_string
+from core.crypto.multiexp import multi_multiply
+from core.crypto import codec
+
+TRACER_KEYS_MAGIC = b'TRKS'
+TRACER_KEYS_VERSION = 1
+TRACER_KEYS_HEADER = struct.Struct('>4sBBII')
+TRACER_RECORD = struct.Struct('>II')
+SHARE_BYTES = 32
+FLAG_PUBLIC = 1
+
+
+def _read_exact(fp, size):
+    data = fp.read(size)
+    if len(data) != size:
+        raise ValueError("Unexpected end of tracer key file")
+    return data
+
+
+def horner(coeffs, x, n):
+    """用Horner法计算 f(x) mod n，coeffs按升幂排列"""
+    result = 0
+    for c in reversed(coeffs):
+        result = (result * x + c) % n
+    return result
+
+
+def share_secret(coeffs, xs, n):
+    """对每个x计算份额 f(x) mod n"""
+    coeffs = [int(c) % n for c in coeffs]
+    return [horner(coeffs, int(x), n) for x in xs]
+
+
+def lagrange_at_zero(xs, n):
+    """在0处插值的拉格朗日系数 λ_i = Π_{j≠i} x_j / (x_j - x_i) mod n"""
+    xs = [int(x) % n for x in xs]
+    lambdas = []
+    for i, x_i in enumerate(xs):
+        numerator, denominator = 1, 1
+        for j, x_j in enumerate(xs):
+            if i != j:
+                numerator = numerator * x_j % n
+                denominator = denominator * (x_j - x_i) % n
+        lambdas.append(numerator * pow(denominator, -1, n) % n)
+    return lambdas
+
+
+def commit(coeffs, pp):
+    """Feldman承诺 [a_j·g1]（C_0 = s·g1 = Q）"""
+    return pp.g1_table.multiply_many([int(c) % int(pp.n) for c in coeffs])
+
+
+def powers(x, count, n):
+    """[1, x, x^2, ..., x^{count-1}] mod n"""
+    result = [1]
+    for _ in range(count - 1):
+        result.append(result[-1] * x % n)
+    return result
+
+
+def derive_pub_share(commitments, x, pp):
+    """由承诺推出 x 处的公钥份额 D = Σ_j x^j·C_j"""
+    n = int(pp.n)
+    return multi_multiply(list(commitments), powers(int(x) % n, len(commitments), n), pp.E(0), arity=pp.tuning.msm_arity,
+                          min_lanes=pp.tuning.batch_lanes)
+
+
+def verify_share(commitments, x, d_share, pp):
+    """校验私钥份额与承诺一致：d·g1 == Σ_j x^j·C_j"""
+    return pp.g1_table.multiply(Integer(int(d_share) % int(pp.n))) == derive_pub_share(commitments, x, pp)
+
+
+def verify_pub_shares(commitments, pub_shares, pp):
+    """
+    用一次多项点乘批量校验公钥份额
+    :param pub_shares: [(x_i, D_i), ...]
+    :return: 全部一致时为True（任一份额错误时以压倒性概率为False）
+    """
+    if not pub_shares:
+        return True
+    n = int(pp.n)
+    weights = pp.scalars.rand_ints(len(pub_shares))
+    # 合并到承诺一侧的系数：Σ_i r_i·x_i^j
+    combined = [0] * len(commitments)
+    for r, (x, _) in zip(weights, pub_shares):
+        for j, p in enumerate(powers(int(x) % n, len(commitments), n)):
+            combined[j] = (combined[j] + r * p) % n
+    points = [D for _, D in pub_shares] + list(commitments)
+    scalars = list(weights) + [(-c) % n for c in combined]
+    return multi_multiply(points, scalars, pp.E(0), arity=pp.tuning.msm_arity, min_lanes=pp.tuning.batch_lanes).is_zero()
+
+
+def save_commitments(path, commitments, threshold=None):
+    with open(path, 'w') as f:
+        json.dump({"threshold": threshold or len(commitments),
+                   "commitments": [point_to_string(C) for C in commitments]}, f, indent=2)
+
+
+def load_commitments(path, pp):
+    """读取承诺文件，返回承诺点列表"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    commitments = [point_from_string(s, pp.F, pp.E) for s in data["commitments"]]
+    if len(commitments) != int(data.get("threshold", len(commitments))):
+        raise ValueError("Commitment count does not match the threshold")
+    return commitments
+
+
+def write_tracer_keys(fp, keys, threshold, pp, public=False):
+    """
+    以批量二进制格式写出追踪者密钥
+    :param keys: [{'tracer_id', 'x_i', 'd_share', 'pub_share'(点)}, ...]
+    :param public: 为True时不写d_share
+    """
+    fp.write(TRACER_KEYS_HEADER.pack(TRACER_KEYS_MAGIC, TRACER_KEYS_VERSION, FLAG_PUBLIC if public else 0, len(keys), threshold))
+    for key in keys:
+        record = TRACER_RECORD.pack(int(key['tracer_id']), int(key['x_i']))
+        if not public:
+            record += int(key['d_share']).to_bytes(SHARE_BYTES, 'big')
+        fp.write(record + codec.encode_point(key['pub_share'], pp))
+
+
+def iter_tracer_keys(fp, pp):
+    """
+    逐个读取批量二进制格式的追踪者密钥（pub_share为本地文件中的点，不做曲线检查以外的校验）
+    :return: 生成器，产出与write_tracer_keys输入相同结构的dict（公开版本中d_share为None）
+    """
+    magic, version, flags, count, _threshold = TRACER_KEYS_HEADER.unpack(_read_exact(fp, TRACER_KEYS_HEADER.size))
+    if magic != TRACER_KEYS_MAGIC:
+        raise ValueError("Not a libTARS tracer key file")
+    if version != TRACER_KEYS_VERSION:
+        raise ValueError(f"Unsupported tracer key file version: {version}")
+    for _ in range(count):
+        tracer_id, x_i = TRACER_RECORD.unpack(_read_exact(fp, TRACER_RECORD.size))
+        d_share = None if flags & FLAG_PUBLIC else int.from_bytes(_read_exact(fp, SHARE_BYTES), 'big')
+        yield {'tracer_id': tracer_id, 'x_i': x_i, 'd_share': d_share, 'pub_share': codec.read_point(fp, pp)}
+
+
+def is_tracer_keys_file(path):
+    with open(path, 'rb') as f:
+        return f.read(len(TRACER_KEYS_MAGIC)) == TRACER_KEYS_MAGIC
@@ -0,0 +1,334 @@
+"""
+GF(q^6) = F_q[x]/(x^6 + x + 1) 的专用整数实现，作为G2点运算和配对的可选后端
+
+- 元素为6个系数（低次在前）的Python整数元组，外面包一层Fq6Element以便复用
+  jacobian.JacobianCurve 和 pairing.TatePairing 中按运算符书写的公式
+- 乘法：按 x^3 把元素切成两半做一层Karatsuba（3次3x3乘法），系数延迟取模；
+  约化利用模多项式的稀疏性 x^6 = -x - 1
+- Frobenius：a_j ∈ F_q 不动，预计算 x^{j·q^i} mod f 的6x6矩阵，一次作用为36次整数乘法
+- 求逆：范数法（Itoh-Tsujii）a^{-1} = a^{r-1} / N(a)，r-1 = q + q^2 + ... + q^5 由
+  Frobenius和3次乘法得到，N(a) ∈ F_q，只需一次F_q求逆，不做多项式GCD
+
+x^6 + x + 1 没有 x^6 - ξ 形式，无法直接构造 F_q2/F_q3 塔，因此用上面的直接表示。
+tests/test_fq6.py 与Sage的GF(q^6)（cross_check）或纯多项式取模的参考实现交叉核对。
+"""
+import random
+
+DEGREE = 6
+
+
+class Fq6Field:
+    """F_q[x]/(x^6 + x + 1)，调用 field(int) 或 field([c0, ..., c5]) 构造元素"""
+    def __init__(self, q):
+        self.q = q
+        self.zero = Fq6Element(self, (0,) * DEGREE)
+        self.one = Fq6Element(self, (1,) + (0,) * (DEGREE - 1))
+        self.frob_matrices = self._frobenius_matrices()
+
+    def __call__(self, value):
+        if isinstance(value, Fq6Element):
+            return value
+        if isinstance(value, int):
+            return Fq6Element(self, (value % self.q,) + (0,) * (DEGREE - 1))
+        coeffs = [int(c) % self.q for c in value]
+        coeffs += [0] * (DEGREE - len(coeffs))
+        return Fq6Element(self, tuple(coeffs))
+
+    def variable_name(self):
+        return 'a'
+
+    def degree(self):
+        return DEGREE
+
+    def _frobenius_matrices(self):
+        # rows[i][j] = x^{j·q^i} mod f 的系数
+        gen = Fq6Element(self, (0, 1, 0, 0, 0, 0))
+        matrices = [None]
+        x_qi = gen
+        for i in range(1, DEGREE):
+            x_qi = x_qi._pow_plain(self.q)
+            row, power = [], self.one
+            for _ in range(DEGREE):
+                row.append(power.c)
+                power = power * x_qi
+            matrices.append(row)
+        return matrices
+
+    # 与Sage元素的转换
+    def from_sage(self, element):
+        return self(element.polynomial().list())
+
+    def to_sage(self, F, element):
+        return F(list(element.c))
+
+
+def _mul3(a0, a1, a2, b0, b1, b2):
+    """3项多项式乘法（未取模），返回5个系数"""
+    return (a0 * b0,
+            a0 * b1 + a1 * b0,
+            a0 * b2 + a1 * b1 + a2 * b0,
+            a1 * b2 + a2 * b1,
+            a2 * b2)
+
+
+def _reduce(c, q):
+    """把11个系数按 x^6 = -x - 1 约化为6个并取模"""
+    c = list(c)
+    for d in range(10, 5, -1):
+        v = c[d]
+        if v:
+            c[d - 5] -= v
+            c[d - 6] -= v
+    return tuple(v % q for v in c[:6])
+
+
+class Fq6Element:
+    __slots__ = ('field', 'c')
+
+    def __init__(self, field, c):
+        self.field = field
+        self.c = c
+
+    def _coerce(self, other):
+        if isinstance(other, Fq6Element):
+            return other.c
+        return (int(other),) + (0,) * (DEGREE - 1)
+
+    def __add__(self, other):
+        q = self.field.q
+        return Fq6Element(self.field, tuple((a + b) % q for a, b in zip(self.c, self._coerce(other))))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        q = self.field.q
+        return Fq6Element(self.field, tuple((a - b) % q for a, b in zip(self.c, self._coerce(other))))
+
+    def __rsub__(self, other):
+        q = self.field.q
+        return Fq6Element(self.field, tuple((b - a) % q for a, b in zip(self.c, self._coerce(other))))
+
+    def __neg__(self):
+        q = self.field.q
+        return Fq6Element(self.field, tuple(-a % q for a in self.c))
+
+    def __mul__(self, other):
+        q = self.field.q
+        if not isinstance(other, Fq6Element):
+            k = int(other)
+            return Fq6Element(self.field, tuple(a * k % q for a in self.c))
+        a0, a1, a2, a3, a4, a5 = self.c
+        b0, b1, b2, b3, b4, b5 = other.c
+        # Karatsuba：A = L_a + H_a·x^3，B = L_b + H_b·x^3
+        low = _mul3(a0, a1, a2, b0, b1, b2)
+        high = _mul3(a3, a4, a5, b3, b4, b5)
+        mid = _mul3(a0 + a3, a1 + a4, a2 + a5, b0 + b3, b1 + b4, b2 + b5)
+        c = [0] * 11
+        for i in range(5):
+            c[i] += low[i]
+            c[i + 6] += high[i]
+            c[i + 3] += mid[i] - low[i] - high[i]
+        return Fq6Element(self.field, _reduce(c, q))
+
+    __rmul__ = __mul__
+
+    def square(self):
+        a0, a1, a2, a3, a4, a5 = self.c
+        c = (a0 * a0,
+             2 * a0 * a1,
+             2 * a0 * a2 + a1 * a1,
+             2 * (a0 * a3 + a1 * a2),
+             2 * (a0 * a4 + a1 * a3) + a2 * a2,
+             2 * (a0 * a5 + a1 * a4 + a2 * a3),
+             2 * (a1 * a5 + a2 * a4) + a3 * a3,
+             2 * (a2 * a5 + a3 * a4),
+             2 * a3 * a5 + a4 * a4,
+             2 * a4 * a5,
+             a5 * a5)
+        return Fq6Element(self.field, _reduce(c, self.field.q))
+
+    def _pow_plain(self, e):
+        result = self.field.one
+        base = self
+        while e:
+            if e & 1:
+                result = result * base
+            base = base.square()
+            e >>= 1
+        return result
+
+    def __pow__(self, e):
+        e = int(e)
+        if e < 0:
+            return (~self) ** (-e)
+        if e == 2:
+            return self.square()
+        return self._pow_plain(e)
+
+    def frobenius(self, i=1):
+        """a^{q^i}"""
+        i %= DEGREE
+        if i == 0:
+            return self
+        q = self.field.q
+        rows = self.field.frob_matrices[i]
+        out = [0] * DEGREE
+        for a, row in zip(self.c, rows):
+            if a:
+                for j in range(DEGREE):
+                    out[j] += a * row[j]
+        return Fq6Element(self.field, tuple(v % q for v in out))
+
+    def norm(self):
+        """N(a) = a^{1+q+...+q^5} ∈ F_q"""
+        return (self * self._norm_cofactor()).c[0]
+
+    def _norm_cofactor(self):
+        # a^{q+q^2+...+q^5}
+        b = self.frobenius(1)                # q
+        c = b * b.frobenius(1)               # q + q^2
+        d = c * c.frobenius(2)               # q + ... + q^4
+        return d * b.frobenius(4)            # q + ... + q^5
+
+    def __invert__(self):
+        if self.is_zero():
+            raise ZeroDivisionError("Inverse of zero in GF(q^6)")
+        q = self.field.q
+        t = self._norm_cofactor()
+        n = (self * t).c[0]
+        return t * pow(n, -1, q)
+
+    def __truediv__(self, other):
+        return self * ~self.field(other)
+
+    def is_zero(self):
+        return not any(self.c)
+
+    def __eq__(self, other):
+        if isinstance(other, Fq6Element):
+            return self.c == other.c
+        try:
+            return self.c == self._coerce(int(other) % self.field.q)
+        except (TypeError, ValueError):
+            return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash(self.c)
+
+    def __repr__(self):
+        return f"Fq6{self.c}"
+
+
+class Fq6Curve:
+    """供 jacobian.JacobianCurve 使用的曲线描述（只提供base_field和a4）"""
+    def __init__(self, field, a):
+        self.field = field
+        self.a = a
+
+    def base_field(self):
+        return self.field
+
+    def a4(self):
+        return self.a
+
+
+class G2TowerTable:
+    """
+    使用Fq6后端的固定底点窗口表，接口与PowerTable相同（multiply / multiply_many 返回Sage点）。
+    表在Jacobian坐标下构建，一次求逆归一化；每次点乘在Jacobian坐标下累加后再求逆一次。
+    """
+    def __init__(self, P, window_size=4, max_bits=450, field=None):
+        from core.crypto.jacobian import JacobianCurve
+        E = P.curve()
+        self.E = E
+        self.F = E.base_field()
+        self.field = field or Fq6Field(int(self.F.characteristic()))
+        self.J = JacobianCurve(Fq6Curve(self.field, int(E.a4())))
+        self.window_size = window_size
+        num_blocks = (max_bits + window_size - 1) // window_size
+        size = 1 << window_size
+        J = self.J
+        if P.is_zero():
+            current = J.zero
+        else:
+            x, y = P.xy()
+            current = (self.field.from_sage(x), self.field.from_sage(y), self.field.one)
+        flat = []
+        for _ in range(num_blocks):
+            block = [J.zero, current]
+            for i in range(2, size):
+                block.append(J.double(block[i >> 1]) if i % 2 == 0 else J.add(block[i - 1], current))
+            flat.extend(block)
+            current = J.double(block[size >> 1])
+        coords = J.affine_coords_many(flat)
+        self.table = [coords[b * size:(b + 1) * size] for b in range(num_blocks)]
+
+    def _accumulate(self, k):
+        J = self.J
+        k = int(k)
+        mask = (1 << self.window_size) - 1
+        acc = J.zero
+        block_idx = 0
+        while k:
+            idx = k & mask
+            if idx:
+                acc = J.add_affine(acc, self.table[block_idx][idx])
+            k >>= self.window_size
+            block_idx += 1
+        return acc
+
+    def _to_sage(self, coords):
+        if coords is None:
+            return self.E(0)
+        x, y = coords
+        return self.E.point([self.field.to_sage(self.F, x), self.field.to_sage(self.F, y), 1], check=False)
+
+    def multiply(self, k):
+        return self.multiply_many([k])[0]
+
+    def multiply_many(self, ks):
+        coords = self.J.affine_coords_many([self._accumulate(k) for k in ks])
+        return [self._to_sage(c) for c in coords]
+
+
+def cross_check(pp, trials=50, seed=None):
+    """
+    与Sage的GF(q^6)和点运算交叉核对，返回不一致项的描述列表（空列表表示全部一致）
+    """
+    rng = random.Random(seed)
+    F = pp.F
+    field = Fq6Field(int(pp.q))
+    failures = []
+
+    def rand_elem():
+        return F([rng.randrange(int(pp.q)) for _ in range(DEGREE)])
+
+    for t in range(trials):
+        a, b = rand_elem(), rand_elem()
+        A, B = field.from_sage(a), field.from_sage(b)
+        checks = {
+            "mul": (A * B, a * b),
+            "square": (A.square(), a * a),
+            "add": (A + B, a + b),
+            "sub": (A - B, a - b),
+            "inverse": (~A, ~a) if a != 0 else (A, a),
+            "frobenius": (A.frobenius(t % 5 + 1), pp.Frob[t % 5 + 1](a)),
+            "pow": (A ** 12345, a ** 12345),
+        }
+        for name, (mine, sage) in checks.items():
+            if mine.c != field.from_sage(sage).c:
+                failures.append(f"{name} mismatch on trial {t}")
+        if A.norm() != int(a.norm()):
+            failures.append(f"norm mismatch on trial {t}")
+
+    table = G2TowerTable(pp.g2, field=field)
+    for t in range(max(1, trials // 10)):
+        k = rng.randrange(1, int(pp.n))
+        if table.multiply(k) != pp.g2 * k:
+            failures.append(f"G2TowerTable.multiply mismatch on trial {t}")
+    return failures
+
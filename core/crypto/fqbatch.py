@@ -0,0 +1,533 @@
+"""
+NumPy批量F_q运算与G1批量点运算
+
+批量场景（批量密钥生成、多签名的部分解密、多项点乘的分组）中有成千上万个
+互相独立的F_q运算。这里把一批F_q元素存成 (L, N) 的int64 limb数组（每列一个lane），
+加、减、乘、平方对整批lane一次完成，解释器开销按lane摊薄：
+- 每个limb 28位；低位limb数取偶数（两个limb正好7字节，便于与整数互转），再多留一个limb，
+  R = 2^(28·L) ≥ 2^28·q
+- 元素以Montgomery形式 a·R mod q 存储，表示不唯一：limb可以为负或略超28位，值可以超出 [0, q)
+- 加、减、小整数倍只做逐limb运算，不进位也不取模
+- 乘法先对输入做一轮并行进位，再按列累加limb积、逐limb做Montgomery约简（每列至多2L项，
+  单项 < 2^57，不会超出int64）。输入的值不超过c·q时结果的绝对值 < q·(1 + c²/2^28)，
+  因此不需要条件减q，结果可以直接参与下一轮运算
+- 只有判零和转回整数时才做完整的顺序进位
+G1Batch在此之上提供 dbl-2007-bl / madd-2007-bl 的批量Jacobian运算（与jacobian.py相同的公式），
+无穷远点另用bool数组标记；互不依赖的乘法拼成一次调用。混合点加中 H ≡ 0 的lane
+（两点相等或互为相反数）整批检测后改用倍点或无穷远点。
+
+NumPy为可选依赖：未安装或lane数少于min_lanes()时调用方使用原来的逐点实现。
+自检: python -m core.crypto.fqbatch
+"""
+import argparse
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LIMB_BITS = 28
+LIMB_MASK = (1 << LIMB_BITS) - 1
+# lane数不少于该值时才走NumPy路径（0表示关闭）；调用方未给出min_lanes（pp.tuning.batch_lanes）时使用
+_min_lanes = 256
+
+
+def available():
+    return np is not None
+
+
+def set_min_lanes(lanes):
+    global _min_lanes
+    _min_lanes = lanes
+
+
+def min_lanes():
+    return _min_lanes
+
+
+def use_batch(lanes, min_lanes=None):
+    """
+    lane数为lanes的批量运算是否走NumPy路径
+    :param min_lanes: 参数集的门槛（pp.tuning.batch_lanes），None时取进程内的缺省值
+    """
+    if min_lanes is None:
+        min_lanes = _min_lanes
+    return np is not None and min_lanes > 0 and lanes >= min_lanes
+
+
+class FqBatch:
+    """F_q上的批量运算，元素为 (L, N) int64 limb数组（Montgomery形式，表示不唯一）"""
+    def __init__(self, q):
+        if np is None:
+            raise RuntimeError("NumPy is required for batched field arithmetic")
+        self.q = int(q)
+        self.groups = (self.q.bit_length() + 2 * LIMB_BITS - 1) // (2 * LIMB_BITS)
+        self.L = 2 * self.groups + 1
+        self.R = 1 << (LIMB_BITS * self.L)
+        self.R_inv = pow(self.R, -1, self.q)
+        self.n0 = (-pow(self.q, -1, 1 << LIMB_BITS)) & LIMB_MASK
+        self._group_weights = np.array([1 << (8 * i) for i in range(7)], dtype=np.int64)
+        self.q_limbs = self._split([self.q])
+        # 判零用：整数1（不是Montgomery形式的1），以及 ±q 规范进位后的limb
+        self._raw_one = self._split([1])
+        self._q_normal = self._normalize(self.q_limbs.copy())
+        self._neg_q_normal = self._normalize(-self.q_limbs)
+
+    # ----------- 与整数互转 -----------
+    def _split(self, values):
+        """[0, q) 中的整数列表 -> (L, N) limb数组：每7字节拆成两个28位limb，最高limb为0"""
+        groups = self.groups
+        width = 7 * groups
+        raw = np.frombuffer(b''.join(int(v).to_bytes(width, 'little') for v in values), dtype=np.uint8)
+        packed = raw.reshape(len(values), groups, 7).astype(np.int64) @ self._group_weights
+        limbs = np.zeros((self.L, len(values)), dtype=np.int64)
+        limbs[0:-1:2] = (packed & LIMB_MASK).T
+        limbs[1:-1:2] = (packed >> LIMB_BITS).T
+        return limbs
+
+    def _join(self, limbs):
+        """规范进位后的limb数组 -> 整数列表（最高limb可以为负）"""
+        groups = self.groups
+        low = limbs[:-1]
+        packed = np.ascontiguousarray((low[0::2] | (low[1::2] << LIMB_BITS)).T.astype('<i8'))
+        raw = packed.view(np.uint8).reshape(limbs.shape[1], groups, 8)[:, :, :7].tobytes()
+        width = 7 * groups
+        shift = LIMB_BITS * (self.L - 1)
+        return [int.from_bytes(raw[i * width:(i + 1) * width], 'little') + (int(top) << shift)
+                for i, top in enumerate(limbs[-1])]
+
+    def from_ints(self, values):
+        """整数列表 -> Montgomery形式的limb数组"""
+        q, R = self.q, self.R
+        return self._split([int(v) * R % q for v in values])
+
+    def to_ints(self, a):
+        """Montgomery形式的limb数组 -> [0, q) 中的整数列表"""
+        q, R_inv = self.q, self.R_inv
+        return [v * R_inv % q for v in self._join(self._normalize(a.copy()))]
+
+    def constant(self, value, lanes):
+        return np.repeat(self.from_ints([value]), lanes, axis=1)
+
+    def zeros(self, lanes):
+        return np.zeros((self.L, lanes), dtype=np.int64)
+
+    # ----------- 进位 -----------
+    @staticmethod
+    def _normalize(t):
+        """原地逐limb顺序进位（算术右移，借位同样处理）：低位limb落在 [0, 2^28)，最高limb保留符号"""
+        for i in range(t.shape[0] - 1):
+            t[i + 1] += t[i] >> LIMB_BITS
+            t[i] &= LIMB_MASK
+        return t
+
+    @staticmethod
+    def _relax(t):
+        """一轮并行进位：各limb只接收下一位的进位，不改变值，limb回到28位左右"""
+        out = t & LIMB_MASK
+        out[-1] = t[-1]
+        out[1:] += t[:-1] >> LIMB_BITS
+        return out
+
+    # ----------- 运算 -----------
+    @staticmethod
+    def add(a, b):
+        return a + b
+
+    @staticmethod
+    def sub(a, b):
+        return a - b
+
+    @staticmethod
+    def neg(a):
+        return -a
+
+    @staticmethod
+    def double(a):
+        return a + a
+
+    @staticmethod
+    def mul_small(a, k):
+        """乘以小整数k（|k| < 2^16）"""
+        return a * k
+
+    def mul(self, a, b):
+        """Montgomery乘法 a·b·R^-1；a、b之一可以是 (L, 1) 的常数"""
+        L = self.L
+        a, b = self._relax(a), self._relax(b)
+        lanes = max(a.shape[1], b.shape[1])
+        t = np.zeros((2 * L, lanes), dtype=np.int64)
+        products = a[:, None, :] * b[None, :, :]
+        for i in range(L):
+            t[i:i + L] += products[i]
+        q_limbs = self.q_limbs
+        for i in range(L):
+            m = ((t[i] & LIMB_MASK) * self.n0) & LIMB_MASK
+            t[i:i + L] += m * q_limbs
+            t[i + 1] += t[i] >> LIMB_BITS
+        return self._relax(self._relax(t[L:]))
+
+    def square(self, a):
+        return self.mul(a, a)
+
+    def mul_many(self, pairs):
+        """多组互不依赖的乘法拼成一次mul：[(a, b), ...] -> [a·b, ...]"""
+        if len(pairs) == 1:
+            return [self.mul(*pairs[0])]
+        lanes = max(x.shape[1] for pair in pairs for x in pair)
+        a = np.concatenate([np.broadcast_to(x, (self.L, lanes)) for x, _ in pairs], axis=1)
+        b = np.concatenate([np.broadcast_to(y, (self.L, lanes)) for _, y in pairs], axis=1)
+        t = self.mul(a, b)
+        return [t[:, i * lanes:(i + 1) * lanes] for i in range(len(pairs))]
+
+    def is_zero(self, a):
+        """值 ≡ 0 (mod q) 的lane：先乘整数1把值约到 (-2q, 2q)，规范进位后与 0、±q 比较"""
+        t = self._normalize(self.mul(a, self._raw_one))
+        return ~t.any(axis=0) | (t == self._q_normal).all(axis=0) | (t == self._neg_q_normal).all(axis=0)
+
+    @staticmethod
+    def select(mask, a, b):
+        """mask为True的lane取a，否则取b"""
+        return np.where(mask, a, b)
+
+
+class G1Batch:
+    """
+    y^2 = x^3 + a·x + b（坐标在F_q中）上的批量Jacobian点运算。
+    一批点为 (X, Y, Z, inf)：三个limb数组和标记无穷远点的bool数组
+    """
+    def __init__(self, q, a):
+        self.F = FqBatch(q)
+        self.q = self.F.q
+        self.a = int(a) % self.q
+        self.a_mont = self.F.from_ints([self.a])
+
+    def from_affine(self, coords):
+        """仿射整数坐标 (x, y) 列表（None为无穷远点） -> Jacobian lane"""
+        F = self.F
+        xs = [0 if c is None else c[0] for c in coords]
+        ys = [0 if c is None else c[1] for c in coords]
+        inf = np.array([c is None for c in coords], dtype=bool)
+        return F.from_ints(xs), F.from_ints(ys), F.constant(1, len(coords)), inf
+
+    def infinity(self, lanes):
+        one = self.F.constant(1, lanes)
+        return one, one, one, np.ones(lanes, dtype=bool)
+
+    def double(self, P):
+        """dbl-2007-bl；无穷远点仍为无穷远点（G1中没有2阶点）"""
+        F = self.F
+        X1, Y1, Z1, inf = P
+        XX, YY, ZZ = F.mul_many([(X1, X1), (Y1, Y1), (Z1, Z1)])
+        XYY, YZ = F.add(X1, YY), F.add(Y1, Z1)
+        YYYY, XYY2, ZZZZ, YZ2 = F.mul_many([(YY, YY), (XYY, XYY), (ZZ, ZZ), (YZ, YZ)])
+        S = F.double(F.sub(F.sub(XYY2, XX), YYYY))
+        M = F.add(F.mul_small(XX, 3), F.mul(self.a_mont, ZZZZ))
+        T = F.sub(F.square(M), F.double(S))
+        Y3 = F.sub(F.mul(M, F.sub(S, T)), F.mul_small(YYYY, 8))
+        Z3 = F.sub(F.sub(YZ2, YY), ZZ)
+        return T, Y3, Z3, inf
+
+    def add_affine(self, P, A, active=None):
+        """
+        madd-2007-bl：P为Jacobian lane，A = (x2, y2) 为仿射limb数组（不含无穷远点）。
+        :param active: bool数组，为False的lane保持P不变（例如窗口值为0）
+        """
+        F = self.F
+        X1, Y1, Z1, p_inf = P
+        X2, Y2 = A
+        lanes = X1.shape[1]
+        Z1Z1, Y2Z1 = F.mul_many([(Z1, Z1), (Y2, Z1)])
+        U2, S2 = F.mul_many([(X2, Z1Z1), (Y2Z1, Z1Z1)])
+        H = F.sub(U2, X1)
+        r = F.double(F.sub(S2, Y1))
+        Z1H = F.add(Z1, H)
+        HH, rr, Z1H2 = F.mul_many([(H, H), (r, r), (Z1H, Z1H)])
+        I = F.mul_small(HH, 4)
+        J, V = F.mul_many([(H, I), (X1, I)])
+        X3 = F.sub(F.sub(rr, J), F.double(V))
+        rV, Y1J = F.mul_many([(r, F.sub(V, X3)), (Y1, J)])
+        Y3 = F.sub(rV, F.double(Y1J))
+        Z3 = F.sub(F.sub(Z1H2, Z1Z1), HH)
+        inf = np.zeros(lanes, dtype=bool)
+
+        exceptional = ~p_inf
+        if active is not None:
+            exceptional &= active
+        exceptional &= F.is_zero(H)
+        if exceptional.any():
+            # P == A 时改用倍点，P == -A 时结果为无穷远点
+            D = self.double(P)
+            same = exceptional & F.is_zero(r)
+            X3, Y3, Z3 = (F.select(same, d, c) for d, c in zip(D, (X3, Y3, Z3)))
+            inf = exceptional & ~same
+        one = F.constant(1, lanes)
+        X3, Y3, Z3 = F.select(p_inf, X2, X3), F.select(p_inf, Y2, Y3), F.select(p_inf, one, Z3)
+        inf &= ~p_inf
+        if active is not None:
+            X3, Y3, Z3 = F.select(active, X3, X1), F.select(active, Y3, Y1), F.select(active, Z3, Z1)
+            inf = np.where(active, inf, p_inf)
+        return X3, Y3, Z3, inf
+
+    def to_affine(self, P):
+        """Jacobian lane -> 仿射整数坐标列表（无穷远点为None），整批只做一次求逆"""
+        F = self.F
+        q = self.q
+        Xs, Ys, Zs = F.to_ints(P[0]), F.to_ints(P[1]), F.to_ints(P[2])
+        Zs = [0 if inf else Z for Z, inf in zip(Zs, P[3].tolist())]
+        prefix = []
+        acc = 1
+        for Z in Zs:
+            if Z:
+                acc = acc * Z % q
+            prefix.append(acc)
+        inv = pow(acc, -1, q)
+        coords = [None] * len(Zs)
+        for i in range(len(Zs) - 1, -1, -1):
+            Z = Zs[i]
+            if not Z:
+                continue
+            z_inv = inv * prefix[i - 1] % q if i > 0 else inv
+            inv = inv * Z % q
+            z_inv2 = z_inv * z_inv % q
+            coords[i] = (Xs[i] * z_inv2 % q, Ys[i] * z_inv2 * z_inv % q)
+        return coords
+
+    # ----------- 批量点乘 -----------
+    def prepare_table(self, table):
+        """
+        把固定底点窗口表转成每块一对 (xs, ys) limb数组，供fixed_base_many反复使用
+        :param table: 各块的仿射整数坐标列表（第0项为None），见jacobian.window_table
+        """
+        F = self.F
+        prepared = []
+        for block in table:
+            entries = [(0, 0) if c is None else c for c in block]
+            prepared.append((F.from_ints([c[0] for c in entries]), F.from_ints([c[1] for c in entries])))
+        return prepared
+
+    def fixed_base_many(self, prepared, window_size, scalars):
+        """
+        固定底点窗口表上的批量点乘，与PowerTable.multiply_many的累加方式相同，每个标量一个lane
+        :param prepared: prepare_table的结果
+        :param scalars: 非负整数列表
+        :return: 仿射整数坐标列表
+        """
+        digits = window_digits(scalars, window_size, len(prepared))
+        acc = self.infinity(len(scalars))
+        for (xs, ys), idx in zip(prepared, digits):
+            active = idx != 0
+            if active.any():
+                acc = self.add_affine(acc, (xs[:, idx], ys[:, idx]), active)
+        return self.to_affine(acc)
+
+    def multiply_lanes(self, points, k):
+        """同一个非负标量k乘以一批底点（仿射整数坐标，不含无穷远点），左到右二进制"""
+        k = int(k)
+        acc = self.infinity(len(points))
+        if k:
+            X, Y, _, _ = self.from_affine(points)
+            for bit in bin(k)[2:]:
+                acc = self.double(acc)
+                if bit == '1':
+                    acc = self.add_affine(acc, (X, Y))
+        return self.to_affine(acc)
+
+    def simultaneous_many(self, groups):
+        """
+        多组联合点乘（Shamir技巧，与multiexp._simultaneous_jacobian相同），每组一个lane、共用一条倍点链。
+        各组的子集和表同样按lane批量构建：第e项加上第j个底点得到第 e + 2^j 项
+        :param groups: [(bases, ks), ...]，bases为m个仿射整数坐标（不含无穷远点），ks为m个非负标量
+        :return: 各组结果的仿射整数坐标列表
+        """
+        F = self.F
+        lanes = len(groups)
+        arity = max(len(bases) for bases, _ in groups)
+        # 子集和表：lane (e, g) 存第g组的第e项，展平为 e·lanes + g
+        P = self.infinity(lanes)
+        for j in range(arity):
+            entries = P[0].shape[1] // lanes
+            present = np.array([j < len(bases) for bases, _ in groups])
+            base = [bases[j] if j < len(bases) else (0, 0) for bases, _ in groups]
+            bx, by = F.from_ints([c[0] for c in base]), F.from_ints([c[1] for c in base])
+            added = self.add_affine(P, (np.tile(bx, entries), np.tile(by, entries)), np.tile(present, entries))
+            P = tuple(np.concatenate([old, new], axis=-1) for old, new in zip(P, added))
+        table = self.to_affine(P)
+        missing = np.array([c is None for c in table])
+        xs = F.from_ints([0 if c is None else c[0] for c in table])
+        ys = F.from_ints([0 if c is None else c[1] for c in table])
+
+        ks = [[ks[j] if j < len(ks) else 0 for _, ks in groups] for j in range(arity)]
+        bits = max((k.bit_length() for row in ks for k in row), default=0)
+        if not bits:
+            return [None] * lanes
+        # masks[bit, g] = Σ_j bit_j(k_gj) << j
+        digits = window_digits([k for row in ks for k in row], 1, bits).reshape(bits, arity, lanes)
+        masks = np.tensordot(1 << np.arange(arity), digits, axes=([0], [1]))
+        lane_idx = np.arange(lanes)
+        acc = self.infinity(lanes)
+        for bit in range(bits - 1, -1, -1):
+            acc = self.double(acc)
+            flat = masks[bit] * lanes + lane_idx
+            active = (masks[bit] != 0) & ~missing[flat]
+            if active.any():
+                acc = self.add_affine(acc, (xs[:, flat], ys[:, flat]), active)
+        return self.to_affine(acc)
+
+
+_curves = {}
+
+
+def curve_for(q, a):
+    """按 (q, a) 缓存的G1Batch"""
+    key = (int(q), int(a))
+    if key not in _curves:
+        _curves[key] = G1Batch(*key)
+    return _curves[key]
+
+
+def window_digits(scalars, window_size, num_blocks):
+    """
+    把非负标量按window_size位分块，返回 (num_blocks, N) 的窗口值数组（低位块在前）。
+    标量超过 num_blocks·window_size 位时抛出IndexError（与PowerTable查表越界一致）
+    """
+    nbits = num_blocks * window_size
+    nbytes = (nbits + 7) // 8
+    try:
+        raw = b''.join(int(k).to_bytes(nbytes, 'little') for k in scalars)
+    except OverflowError:
+        raise IndexError("Scalar is too long for the window table")
+    bits = np.unpackbits(np.frombuffer(raw, dtype=np.uint8).reshape(len(scalars), nbytes), axis=1, bitorder='little')
+    if nbits < nbytes * 8 and bits[:, nbits:].any():
+        raise IndexError("Scalar is too long for the window table")
+    weights = (1 << np.arange(window_size)).astype(np.int64)
+    return (bits[:, :nbits].reshape(len(scalars), num_blocks, window_size).astype(np.int64) @ weights).T
+
+
+# ----------- 自检 -----------
+def _affine_add(P, Q, a, q):
+    """仿射整数坐标的点加（自检用的参考实现）"""
+    if P is None:
+        return Q
+    if Q is None:
+        return P
+    (x1, y1), (x2, y2) = P, Q
+    if x1 == x2:
+        if (y1 + y2) % q == 0:
+            return None
+        lam = (3 * x1 * x1 + a) * pow(2 * y1, -1, q) % q
+    else:
+        lam = (y2 - y1) * pow(x2 - x1, -1, q) % q
+    x3 = (lam * lam - x1 - x2) % q
+    return (x3, (lam * (x1 - x3) - y1) % q)
+
+
+def _affine_multiply(P, k, a, q):
+    result = None
+    for bit in bin(k)[2:]:
+        result = _affine_add(result, result, a, q)
+        if bit == '1':
+            result = _affine_add(result, P, a, q)
+    return result
+
+
+def cross_check(q, a, g, trials=64, seed=None):
+    """
+    与逐个整数运算交叉核对，返回不一致项的描述列表
+    :param g: 曲线上的一个仿射整数点（如g1）
+    """
+    rng = random.Random(seed)
+    F = FqBatch(q)
+    failures = []
+    xs = [rng.randrange(q) for _ in range(trials)] + [0, 1, q - 1]
+    ys = [rng.randrange(q) for _ in range(trials)] + [q - 1, q - 1, q - 1]
+    A, B = F.from_ints(xs), F.from_ints(ys)
+    if F.to_ints(A) != xs:
+        failures.append("limb round trip mismatch")
+    checks = {
+        "add": (F.add(A, B), [(x + y) % q for x, y in zip(xs, ys)]),
+        "sub": (F.sub(A, B), [(x - y) % q for x, y in zip(xs, ys)]),
+        "mul": (F.mul(A, B), [x * y % q for x, y in zip(xs, ys)]),
+        "square": (F.square(A), [x * x % q for x in xs]),
+        "neg": (F.neg(A), [-x % q for x in xs]),
+        # 不取模的加减链再参与乘法
+        "lazy chain": (F.mul(F.sub(F.mul_small(A, 12), F.double(B)), F.neg(F.add(B, A))),
+                       [(12 * x - 2 * y) * -(x + y) % q for x, y in zip(xs, ys)]),
+    }
+    for name, (mine, expected) in checks.items():
+        if F.to_ints(mine) != expected:
+            failures.append(f"{name} mismatch")
+    zero = F.sub(F.mul(A, B), F.mul(B, A))
+    if not F.is_zero(zero).all() or not F.is_zero(F.add(zero, F.mul_small(zero, 7))).all():
+        failures.append("is_zero misses zero lanes")
+    if list(F.is_zero(F.sub(A, B))) != [x == y for x, y in zip(xs, ys)]:
+        failures.append("is_zero mismatch")
+
+    G = G1Batch(q, a)
+    points = [_affine_multiply(g, rng.randrange(1, q), a, q) for _ in range(max(3, trials // 8))]
+    if G.to_affine(G.double(G.from_affine(points))) != [_affine_add(P, P, a, q) for P in points]:
+        failures.append("double mismatch")
+    # 相等的点、互为相反数的点、左侧为无穷远点、一般情形，最后一个lane不参与
+    P0, P1 = points[0], points[1]
+    lhs = [P0, P1, None] + points[2:] + [P0]
+    rhs = [P0, (P1[0], -P1[1] % q), P1] + points[:-2] + [P1]
+    active = np.array([True] * (len(lhs) - 1) + [False])
+    summed = G.to_affine(G.add_affine(G.from_affine(lhs), (F.from_ints([c[0] for c in rhs]), F.from_ints([c[1] for c in rhs])), active))
+    expected = [_affine_add(P, Q, a, q) for P, Q in zip(lhs[:-1], rhs[:-1])] + [P0]
+    if summed != expected:
+        failures.append("add_affine mismatch")
+    k = rng.randrange(1, q)
+    if G.multiply_lanes(points, k) != [_affine_multiply(P, k, a, q) for P in points]:
+        failures.append("multiply_lanes mismatch")
+
+    window = 4
+    table = []
+    current = g
+    for _ in range(q.bit_length() // window + 1):
+        block = [None, current]
+        for i in range(2, 1 << window):
+            block.append(_affine_add(block[-1], current, a, q))
+        table.append(block)
+        current = _affine_add(block[-1], current, a, q)
+    scalars = [rng.randrange(q) for _ in range(trials // 4)] + [0, 1]
+    if G.fixed_base_many(G.prepare_table(table), window, scalars) != [_affine_multiply(g, k, a, q) for k in scalars]:
+        failures.append("fixed_base_many mismatch")
+
+    groups = []
+    for size in (1, 2, 3, 3):
+        bases = [points[rng.randrange(len(points))] for _ in range(size)]
+        groups.append((bases, [rng.randrange(q) for _ in range(size)]))
+    groups[-1] = (groups[-1][0], [0, 0, 0])
+    expected = []
+    for bases, ks in groups:
+        acc = None
+        for P, k in zip(bases, ks):
+            acc = _affine_add(acc, _affine_multiply(P, k, a, q), a, q)
+        expected.append(acc)
+    if G.simultaneous_many(groups) != expected:
+        failures.append("simultaneous_many mismatch")
+    return failures
+
+
+def main(argv=None):
+    import json
+    from core.entities import DEFAULT_PARAMS_PATH
+    parser = argparse.ArgumentParser(description="Cross-check batched F_q and G1 arithmetic against plain integers")
+    parser.add_argument("-p", "--params", default=DEFAULT_PARAMS_PATH)
+    parser.add_argument("-n", "--trials", type=int, default=64)
+    args = parser.parse_args(argv)
+    with open(args.params, 'r') as f:
+        params = json.load(f)
+    q, a = int(params['curve']['q']), int(params['curve']['a'])
+    # g1的坐标在F_q中，字符串为 '(x,y)'
+    g = tuple(int(c) for c in params['public_kgc_keys']['g1'].strip('()').replace(' ', '').split(','))
+    failures = cross_check(q, a, g, args.trials)
+    for failure in failures:
+        print(failure)
+    print("OK" if not failures else f"{len(failures)} mismatches")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+"""
+可选的性能插桩：操作计数与协议阶段计时
+
+默认关闭。调用点统一写成 ``if instrument.ENABLED: instrument.count(...)``，
+关闭时只多一次模块属性读取；``phase()`` 关闭时返回共享的空上下文。
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+ENABLED = False
+
+# 计数器名称
+POINT_ADD = "point_add"
+POINT_DOUBLE = "point_double"
+SCALAR_MUL = "scalar_mul"
+TABLE_BUILD = "table_build"
+TABLE_LOOKUP = "table_lookup"
+HASH = "hash"
+DESERIALIZE = "deserialize"
+FIELD_INVERSION = "field_inversion"
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_phase_seconds = defaultdict(float)
+_phase_calls = defaultdict(int)
+_NULL_PHASE = nullcontext()
+
+logger = logging.getLogger("libtars.profile")
+
+
+def enable(flag=True):
+    """打开（或关闭）插桩"""
+    global ENABLED
+    ENABLED = bool(flag)
+
+
+def reset():
+    """清空所有计数和计时"""
+    with _lock:
+        _counters.clear()
+        _phase_seconds.clear()
+        _phase_calls.clear()
+
+
+def count(name, n=1):
+    """累加操作计数"""
+    with _lock:
+        _counters[name] += n
+
+
+@contextmanager
+def _timed_phase(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            _phase_seconds[name] += elapsed
+            _phase_calls[name] += 1
+
+
+def phase(name):
+    """协议阶段计时上下文，例如 ``with instrument.phase("sign.load_ring"):``"""
+    if not ENABLED:
+        return _NULL_PHASE
+    return _timed_phase(name)
+
+
+def snapshot():
+    """返回当前计数与计时的副本"""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "phases": {name: {"seconds": _phase_seconds[name], "calls": _phase_calls[name]} for name in _phase_seconds},
+        }
+
+
+def log_line(extra=None):
+    """以单行JSON形式输出到 libtars.profile 日志，并返回该行"""
+    data = snapshot()
+    if extra:
+        data.update(extra)
+    line = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    logger.info(line)
+    return line
+
+
+def to_prometheus(prefix="libtars"):
+    """导出为Prometheus文本格式"""
+    data = snapshot()
+    lines = [
+        f"# HELP {prefix}_operations_total Elliptic curve, table, hash and parsing operations.",
+        f"# TYPE {prefix}_operations_total counter",
+    ]
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f'{prefix}_operations_total{{op="{name}"}} {value}')
+    lines += [
+        f"# HELP {prefix}_phase_seconds_total Wall time spent in each protocol phase.",
+        f"# TYPE {prefix}_phase_seconds_total counter",
+    ]
+    for name, value in sorted(data["phases"].items()):
+        lines.append(f'{prefix}_phase_seconds_total{{phase="{name}"}} {value["seconds"]:.9f}')
+    lines += [
+        f"# HELP {prefix}_phase_calls_total Number of times each protocol phase ran.",
+        f"# TYPE {prefix}_phase_calls_total counter",
+    ]
+    for name, value in sorted(data["phases"].items()):
+        lines.append(f'{prefix}_phase_calls_total{{phase="{name}"}} {value["calls"]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path, prefix="libtars"):
+    """写入Prometheus textfile collector可读取的文件（先写临时文件再替换）"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(to_prometheus(prefix))
+    os.replace(tmp_path, path)
+
+
+def summary():
+    """人类可读的汇总表（CLI --profile 使用）"""
+    data = snapshot()
+    lines = ["operation                     count"]
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f"{name:<28}{value:>8}")
+    lines.append("")
+    lines.append("phase                         calls     seconds")
+    for name, value in sorted(data["phases"].items(), key=lambda item: -item[1]["seconds"]):
+        lines.append(f"{name:<28}{value['calls']:>8}{value['seconds']:>12.6f}")
+    return "\n".join(lines)
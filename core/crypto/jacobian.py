@@ -0,0 +1,227 @@
+"""
+Jacobian射影坐标下的点运算与批量归一化
+
+Sage仿射坐标下每次点加/倍点都要在GF(q^k)中求一次逆。批量产生点的场景
+（预计算表、多项点乘、批量密钥生成、批量部分解密）先在Jacobian坐标
+(X, Y, Z) ~ (X/Z^2, Y/Z^3) 下计算，最后用Montgomery同时求逆一次性转回仿射点，
+整批只需一次域求逆。
+
+公式取自 Explicit-Formulas Database（short Weierstrass, a任意）：
+dbl-2007-bl、add-2007-bl、madd-2007-bl。
+
+坐标都在F_q中的大批量点运算可以改走core.crypto.fqbatch（NumPy limb运算），
+base_field_coords / points_from_coords / batch_curve 负责与Sage点互转。
+"""
+from core.crypto import fqbatch, instrument
+
+
+class JacobianCurve:
+    """曲线 y^2 = x^3 + a*x + b 上的Jacobian坐标运算，点为 (X, Y, Z) 元组，Z = 0 为无穷远点"""
+    def __init__(self, E):
+        self.E = E
+        self.F = E.base_field()
+        self.a = self.F(E.a4())
+        self.one = self.F(1)
+        self.zero = (self.one, self.one, self.F(0))
+
+    def from_affine(self, P):
+        if P.is_zero():
+            return self.zero
+        x, y = P.xy()
+        return (x, y, self.one)
+
+    def neg(self, P):
+        X, Y, Z = P
+        return (X, -Y, Z)
+
+    def double(self, P):
+        X1, Y1, Z1 = P
+        if Z1.is_zero() or Y1.is_zero():
+            return self.zero
+        XX = X1 * X1
+        YY = Y1 * Y1
+        YYYY = YY * YY
+        ZZ = Z1 * Z1
+        S = 2 * ((X1 + YY) ** 2 - XX - YYYY)
+        M = 3 * XX + self.a * ZZ * ZZ
+        T = M * M - 2 * S
+        Y3 = M * (S - T) - 8 * YYYY
+        Z3 = (Y1 + Z1) ** 2 - YY - ZZ
+        return (T, Y3, Z3)
+
+    def add(self, P, Q):
+        X1, Y1, Z1 = P
+        X2, Y2, Z2 = Q
+        if Z1.is_zero():
+            return Q
+        if Z2.is_zero():
+            return P
+        Z1Z1 = Z1 * Z1
+        Z2Z2 = Z2 * Z2
+        U1 = X1 * Z2Z2
+        U2 = X2 * Z1Z1
+        S1 = Y1 * Z2 * Z2Z2
+        S2 = Y2 * Z1 * Z1Z1
+        H = U2 - U1
+        r = 2 * (S2 - S1)
+        if H.is_zero():
+            return self.double(P) if r.is_zero() else self.zero
+        I = (2 * H) ** 2
+        J = H * I
+        V = U1 * I
+        X3 = r * r - J - 2 * V
+        Y3 = r * (V - X3) - 2 * S1 * J
+        Z3 = ((Z1 + Z2) ** 2 - Z1Z1 - Z2Z2) * H
+        return (X3, Y3, Z3)
+
+    def add_affine(self, P, A):
+        """P为Jacobian点，A为仿射坐标 (x, y)，None表示无穷远点"""
+        if A is None:
+            return P
+        X1, Y1, Z1 = P
+        X2, Y2 = A
+        if Z1.is_zero():
+            return (X2, Y2, self.one)
+        Z1Z1 = Z1 * Z1
+        U2 = X2 * Z1Z1
+        S2 = Y2 * Z1 * Z1Z1
+        H = U2 - X1
+        r = 2 * (S2 - Y1)
+        if H.is_zero():
+            return self.double(P) if r.is_zero() else self.zero
+        HH = H * H
+        I = 4 * HH
+        J = H * I
+        V = X1 * I
+        X3 = r * r - J - 2 * V
+        Y3 = r * (V - X3) - 2 * Y1 * J
+        Z3 = (Z1 + H) ** 2 - Z1Z1 - HH
+        return (X3, Y3, Z3)
+
+    def multiply(self, P, k):
+        """Jacobian坐标下的左到右二进制点乘，P为Jacobian点，k >= 0"""
+        k = int(k)
+        result = self.zero
+        for bit in bin(k)[2:] if k else '':
+            result = self.double(result)
+            if bit == '1':
+                result = self.add(result, P)
+        return result
+
+    def affine_coords_many(self, points):
+        """
+        Montgomery同时求逆：把一批Jacobian点转成仿射坐标 (x, y)，
+        无穷远点对应None。整批只做一次域求逆。
+        """
+        prefix = []
+        acc = self.one
+        for X, Y, Z in points:
+            if not Z.is_zero():
+                acc = acc * Z
+            prefix.append(acc)
+        if instrument.ENABLED:
+            instrument.count(instrument.FIELD_INVERSION)
+        inv = ~acc
+        coords = [None] * len(points)
+        for i in range(len(points) - 1, -1, -1):
+            X, Y, Z = points[i]
+            if Z.is_zero():
+                continue
+            z_inv = inv * prefix[i - 1] if i > 0 else inv
+            inv = inv * Z
+            z_inv2 = z_inv * z_inv
+            coords[i] = (X * z_inv2, Y * z_inv2 * z_inv)
+        return coords
+
+    def normalize_many(self, points):
+        """把一批Jacobian点转成Sage仿射点（坐标由合法运算得到，跳过曲线方程检查）"""
+        E = self.E
+        return [E(0) if c is None else E.point([c[0], c[1], 1], check=False)
+                for c in self.affine_coords_many(points)]
+
+    def normalize(self, P):
+        return self.normalize_many([P])[0]
+
+
+def window_table(P, window_size, num_blocks):
+    """
+    固定底点窗口表：第b块为 [i * 2^(b*window_size) * P for i in range(2^window_size)]，
+    全部在Jacobian坐标下计算，最后一次求逆归一化。
+    :return: num_blocks个块组成的列表，每块为仿射点列表
+    """
+    J = JacobianCurve(P.curve())
+    size = 1 << window_size
+    current = J.from_affine(P)
+    flat = []
+    for _ in range(num_blocks):
+        block = [J.zero, current]
+        for i in range(2, size):
+            # 偶数项用倍点（比通用点加便宜），奇数项加上current
+            block.append(J.double(block[i >> 1]) if i % 2 == 0 else J.add(block[i - 1], current))
+        flat.extend(block)
+        current = J.double(block[size >> 1])
+    if instrument.ENABLED:
+        instrument.count(instrument.POINT_ADD, num_blocks * (size // 2 - 1))
+        instrument.count(instrument.POINT_DOUBLE, num_blocks * (size // 2))
+    points = J.normalize_many(flat)
+    return [points[b * size:(b + 1) * size] for b in range(num_blocks)]
+
+
+# ----------- 与fqbatch互转 -----------
+def base_field_int(x):
+    """F_q中的元素转成整数；GF(q^k)中次数大于0的元素返回None"""
+    try:
+        poly = x.polynomial()
+    except AttributeError:
+        return int(x)
+    return int(poly[0]) if poly.degree() <= 0 else None
+
+
+def base_field_coords(points):
+    """Sage点列表 -> 仿射整数坐标列表（无穷远点为None）；有坐标不在F_q中时返回None"""
+    coords = []
+    for P in points:
+        if P.is_zero():
+            coords.append(None)
+            continue
+        x, y = (base_field_int(c) for c in P.xy())
+        if x is None or y is None:
+            return None
+        coords.append((x, y))
+    return coords
+
+
+def points_from_coords(E, coords):
+    """仿射整数坐标列表 -> Sage点列表（坐标由合法运算得到，跳过曲线方程检查）"""
+    F = E.base_field()
+    return [E(0) if c is None else E.point([F(c[0]), F(c[1]), 1], check=False) for c in coords]
+
+
+def batch_curve(E):
+    """NumPy可用且a在F_q中时返回E对应的fqbatch.G1Batch，否则返回None"""
+    if not fqbatch.available():
+        return None
+    a = base_field_int(E.a4())
+    if a is None:
+        return None
+    return fqbatch.curve_for(E.base_field().characteristic(), a)
+
+
+def multiply_lanes(E, points, k, min_lanes=None):
+    """
+    同一个非负标量k乘以一批Sage点（如部分解密中的各C1），走fqbatch。
+    lane数不够（min_lanes为pp.tuning.batch_lanes）、NumPy不可用或有坐标不在F_q中时返回None，
+    由调用方改用逐点运算
+    """
+    if not fqbatch.use_batch(len(points), min_lanes) or k < 0:
+        return None
+    G = batch_curve(E)
+    coords = base_field_coords(points) if G is not None else None
+    if coords is None:
+        return None
+    present = [i for i, c in enumerate(coords) if c is not None]
+    results = [None] * len(coords)
+    if present:
+        for i, c in zip(present, G.multiply_lanes([coords[i] for i in present], k)):
+            results[i] = c
+    return points_from_coords(E, results)
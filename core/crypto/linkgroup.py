@@ -0,0 +1,143 @@
+"""
+v2可链接签名的标签群
+
+标签若放在G1中（tag = sk·H_G1(event)），任何人都可以对环成员逐个检查
+e(tag, g2) == e(H_G1(event), pk_i) 找出签名者。因此标签改放在与曲线无关的
+Schnorr群中：Z_p^* 里阶为n（与G1、G2相同的群阶）的子群，p = n·m + 1 为2048比特素数。
+该群与G1、G2、GT之间没有双线性映射，标签 tag = h^sk 与公钥 pid = sk·g1 之间
+只能通过环签名证明中的commit_link（同一sk的离散对数相等证明）关联。
+
+p由n确定性地导出：m从 2^(2048 - n的比特数) 起取偶数逐个尝试，
+先用小素数试除，再做固定底数的Miller-Rabin检验；不依赖任何可信设置。
+结果按n缓存（第一次使用时约需一秒）。
+
+纯Python实现，Sage路径（core.crypto.nizk）与Sage无关的verifier共用。
+"""
+import functools
+import hashlib
+import operator
+
+MODULUS_BITS = 2048
+MILLER_RABIN_ROUNDS = 16
+
+_SMALL_PRIMES = [p for p in range(3, 2000) if all(p % d for d in range(2, int(p ** 0.5) + 1))]
+
+
+def _is_probable_prime(p):
+    if any(p % s == 0 for s in _SMALL_PRIMES):
+        return False
+    d, s = p - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in _SMALL_PRIMES[:MILLER_RABIN_ROUNDS]:
+        x = pow(a, d, p)
+        if x in (1, p - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % p
+            if x == p - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _as_int(x):
+    """整数（含Sage Integer）转为int，其他类型（点、字符串、bool）返回None"""
+    if isinstance(x, bool):
+        return None
+    try:
+        return operator.index(x)
+    except TypeError:
+        return None
+
+
+class LinkGroup:
+    """Z_p^* 中阶为n的子群，元素为 [1, p) 中的整数"""
+    def __init__(self, n):
+        self.n = int(n)
+        m = 1 << (MODULUS_BITS - self.n.bit_length())
+        while not _is_probable_prime(self.n * m + 1):
+            m += 2
+        self.m = m
+        self.p = self.n * m + 1
+
+    def hash(self, data):
+        """
+        把data确定性地映射到子群中离散对数未知的元素：
+        x = SHA-256(data || 计数器 || 块号)拼接到比p多128比特后模p，h = x^m，h为1时换下一个计数器
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        blocks = (self.p.bit_length() + 128 + 255) // 256
+        counter = 0
+        while True:
+            digest = b''.join(hashlib.sha256(data + counter.to_bytes(4, 'big') + i.to_bytes(2, 'big')).digest()
+                              for i in range(blocks))
+            counter += 1
+            h = pow(int.from_bytes(digest, 'big') % self.p, self.m, self.p)
+            if h > 1:
+                return h
+
+    def power(self, x, k):
+        """x^k（k按群阶约简，可以为负）"""
+        return pow(int(x), int(k) % self.n, self.p)
+
+    def contains(self, x):
+        """x是否为子群中的非单位元"""
+        x = _as_int(x)
+        return x is not None and 1 < x < self.p and pow(x, self.n, self.p) == 1
+
+    def product(self, values):
+        """各元素之积；值不是 [1, p) 中的整数时抛出ValueError"""
+        result = 1
+        for x in values:
+            x = _as_int(x)
+            if x is None or not 0 < x < self.p:
+                raise ValueError("Link commitment is not an element of Z_p^*")
+            result = result * x % self.p
+        return result
+
+    def check(self, h, tag, commit_product, res_sum, challenge_sum):
+        """聚合检查 h^(Σz) == Π commit_link · tag^(Σc)，tag必须在子群中"""
+        if not self.contains(tag):
+            return False
+        return self.power(h, res_sum) == commit_product * self.power(tag, challenge_sum) % self.p
+
+
+class LinkTable:
+    """子群元素的固定底数预计算表（与PowerTable相同的窗口方法，用于同一底数的多次求幂）"""
+    def __init__(self, base, group, window_size=4):
+        self.group = group
+        self.window_size = window_size
+        p = group.p
+        self.rows = []
+        row_base = int(base) % p
+        for _ in range((group.n.bit_length() + window_size - 1) // window_size):
+            row = [1, row_base]
+            for _ in range(2, 1 << window_size):
+                row.append(row[-1] * row_base % p)
+            self.rows.append(row)
+            row_base = row[-1] * row_base % p
+        self.mask = (1 << window_size) - 1
+
+    def power(self, k):
+        """base^k（k按群阶约简，可以为负）"""
+        k = int(k) % self.group.n
+        p = self.group.p
+        result = 1
+        for row in self.rows:
+            if k == 0:
+                break
+            digit = k & self.mask
+            if digit:
+                result = result * row[digit] % p
+            k >>= self.window_size
+        return result
+
+
+@functools.lru_cache(maxsize=None)
+def link_group(n):
+    """群阶n对应的标签群（按n缓存）"""
+    return LinkGroup(int(n))
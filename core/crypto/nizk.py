@@ -1,54 +1,149 @@
 from sage.all import Integer
+from core.crypto import instrument
+from core.crypto.linkgroup import LinkTable, link_group
+from core.crypto.multiexp import multi_multiply
+
+def member_multiply(member, k):
+    """环成员既可以是预计算表（PowerTable/CompactPowerTable），也可以是点"""
+    if hasattr(member, 'window_size'):
+        return member.multiply(k)
+    return member * Integer(k)
 
 def simulate(i, c, C2_table, Ring_table, pp):
-    pid_mul_c = Ring_table[i].multiply(c)
-    res_sch = Integer(pp.rand_int())
+    return simulate_member(Ring_table[i], c, C2_table, pp)
+
+def simulate_member(member, c, C2_table, pp):
+    pid_mul_c = member_multiply(member, c)
+    res_sch, res_oka = (Integer(v) for v in pp.scalars.rand_ints(2))
     com_sch = pp.g1_table.multiply(res_sch) - pid_mul_c
-    res_oka = Integer(pp.rand_int())
     com_oka = pp.Q_table.multiply(res_oka) - C2_table.multiply(c) + pid_mul_c
+    if instrument.ENABLED:
+        instrument.count(instrument.POINT_ADD, 3)
     return com_sch, res_sch, com_oka, res_oka
 
-def ring_proof(index, sk, k_int, message, C2_table, Ring_table, pp):
+def ring_proof(index, sk, k_int, message, C2_table, Ring_table, pp, link=None):
+    """
+    :param link: v2可链接签名的 (h, tag)，h、tag为标签群（core.crypto.linkgroup）中的元素，tag = h^sk。
+                 此时证明的承诺多一个列表commit_link（h^z · tag^(-c) mod p），
+                 与Schnorr分量共用响应，证明 log_h(tag) 等于签名者的 log_g1(pid)
+    """
     Len_Ring = len(Ring_table)
     commit_schnorr, commit_okamoto = ([None] * Len_Ring, [None] * Len_Ring)
     challenge = []
     response_schnorr, response_okamoto = ([None] * Len_Ring, [None] * Len_Ring)
     c_sum = 0
     c = pp.zr_hash(message)
+    if link is not None:
+        h, tag = link
+        group = link_group(pp.n)
+        commit_link = [None] * Len_Ring
+        # h的表每个成员用一次，tag的表每个模拟成员用一次
+        h_table = LinkTable(h, group, window_size=pp.tuning.fixed_window)
+        tag_table = LinkTable(tag, group, window_size=pp.tuning.fixed_window)
+        c *= pp.zr_hash(tag)
+    # 所有模拟挑战一次取出（签名者位置的值随后被覆盖）
+    random_challenges = pp.scalars.rand_ints(Len_Ring)
 
     for i in range(Len_Ring):
-        challenge_i = Integer(pp.rand_int())
+        challenge_i = Integer(random_challenges[i])
         challenge.append(challenge_i)
-        commit_schnorr[i], response_schnorr[i], commit_okamoto[i], response_okamoto[i] = simulate(i, challenge_i, C2_table, Ring_table, pp)
+        with instrument.phase("ring_proof.simulate"):
+            commit_schnorr[i], response_schnorr[i], commit_okamoto[i], response_okamoto[i] = simulate(i, challenge_i, C2_table, Ring_table, pp)
         if i != index-1:
             c_sum = c_sum ^ challenge[i]
-            c *= pp.zr_hash(commit_schnorr[i]) * pp.zr_hash(commit_okamoto[i])
+            if link is not None:
+                with instrument.phase("ring_proof.simulate"):
+                    commit_link[i] = h_table.power(response_schnorr[i]) * tag_table.power(-challenge_i) % group.p
+            with instrument.phase("ring_proof.hash"):
+                c *= pp.zr_hash(commit_schnorr[i]) * pp.zr_hash(commit_okamoto[i])
+                if link is not None:
+                    c *= pp.zr_hash(commit_link[i])
 
-    u = pp.rand_int()
-    commit_schnorr[index-1] = pp.g1_table.multiply(u)
-    commit_okamoto[index-1] = pp.Q_table.multiply(u)
+    with instrument.phase("ring_proof.finalize"):
+        u = pp.rand_int()
+        commit_schnorr[index-1] = pp.g1_table.multiply(u)
+        commit_okamoto[index-1] = pp.Q_table.multiply(u)
 
-    c *= pp.zr_hash(commit_schnorr[index-1]) * pp.zr_hash(commit_okamoto[index-1])
+        c *= pp.zr_hash(commit_schnorr[index-1]) * pp.zr_hash(commit_okamoto[index-1])
+        if link is not None:
+            commit_link[index-1] = h_table.power(u)
+            c *= pp.zr_hash(commit_link[index-1])
 
-    challenge[index-1] = Integer(c) ^ c_sum
+        challenge[index-1] = Integer(c) ^ c_sum
 
-    response_schnorr[index-1] = sk * challenge[index-1] + u
-    response_okamoto[index-1] = Integer(k_int * challenge[index-1] + u)
+        response_schnorr[index-1] = sk * challenge[index-1] + u
+        response_okamoto[index-1] = Integer(k_int * challenge[index-1] + u)
 
+    if link is not None:
+        return [(commit_schnorr, commit_okamoto, commit_link), challenge[:-1], (response_schnorr, response_okamoto)]
     return [(commit_schnorr, commit_okamoto), challenge[:-1], (response_schnorr, response_okamoto)]
 
-def verify_ring_proof(C2_table, proof, message, Ring_table, pp):
-    (commit_schnorr, commit_okamoto), challenge, (response_schnorr, response_okamoto) = proof
+def ring_proof_stream(index, sk, k_int, message, C2_table, members, pp, writer):
+    """
+    流式生成环签名证明：每个成员的承诺、挑战和响应生成后立即交给writer，
+    只有签名者自己的挑战和响应在最后回填，内存占用与环大小无关。
+    :param index: 签名者在环中的位置（从1开始）
+    :param members: 按环顺序产出各成员PID（点或预计算表）的可迭代对象，签名者位置的值不会被使用
+    :param writer: codec中的签名写入器（add_member / patch_signer）
+    :return: 环大小
+    """
+    c = pp.zr_hash(message)
+    c_sum = 0
+    u = pp.rand_int()
+    commit_schnorr_signer = pp.g1_table.multiply(u)
+    commit_okamoto_signer = pp.Q_table.multiply(u)
+
+    n = 0
+    for i, member in enumerate(members):
+        n += 1
+        if i == index - 1:
+            writer.add_member(commit_schnorr_signer, commit_okamoto_signer, None, None, None)
+            with instrument.phase("ring_proof.hash"):
+                c *= pp.zr_hash(commit_schnorr_signer) * pp.zr_hash(commit_okamoto_signer)
+            continue
+        challenge_i = Integer(pp.rand_int())
+        with instrument.phase("ring_proof.simulate"):
+            com_sch, res_sch, com_oka, res_oka = simulate_member(member, challenge_i, C2_table, pp)
+        c_sum = c_sum ^ challenge_i
+        with instrument.phase("ring_proof.hash"):
+            c *= pp.zr_hash(com_sch) * pp.zr_hash(com_oka)
+        writer.add_member(com_sch, com_oka, challenge_i, res_sch, res_oka)
+    if not 1 <= index <= n:
+        raise ValueError(f"Signer index {index} is outside the ring of size {n}")
+
+    with instrument.phase("ring_proof.finalize"):
+        challenge_signer = Integer(c) ^ c_sum
+        response_schnorr = sk * challenge_signer + u
+        response_okamoto = Integer(k_int * challenge_signer + u)
+        writer.patch_signer(challenge_signer, response_schnorr, response_okamoto)
+    return n
+
+def verify_ring_proof(C2_table, proof, message, Ring_table, pp, link=None):
+    """
+    :param link: v2签名的 (h, tag)；带commit_link的证明必须给出link，反之亦然
+    """
+    commits, challenge, (response_schnorr, response_okamoto) = proof
+    commit_schnorr, commit_okamoto = commits[0], commits[1]
+    commit_link = commits[2] if len(commits) > 2 else None
+    if (commit_link is None) != (link is None):
+        return False
+    if commit_link is not None and len(commit_link) != len(commit_schnorr):
+        return False
 
     c_sum = 0
     # Use Zr_hash as in the prompt (case sensitive)
     c = pp.zr_hash(message)
 
     # Multiply all hashes of commitments into c
-    for com in commit_schnorr:
-        c *= pp.zr_hash(com)
-    for com in commit_okamoto:
-        c *= pp.zr_hash(com)
+    with instrument.phase("verify_ring_proof.hash"):
+        for com in commit_schnorr:
+            c *= pp.zr_hash(com)
+        for com in commit_okamoto:
+            c *= pp.zr_hash(com)
+        if link is not None:
+            c *= pp.zr_hash(link[1])
+            for com in commit_link:
+                c *= pp.zr_hash(com)
 
     challenge_sum = 0
     c = Integer(c)
@@ -56,7 +151,8 @@ def verify_ring_proof(C2_table, proof, message, Ring_table, pp):
         c_sum = c_sum ^ ch
         challenge_sum += ch
     last_challenge = Integer(c) ^ c_sum
-    challenge.append(last_challenge)
+    # 不修改调用方传入的proof，便于同一签名重复验证
+    challenge = list(challenge) + [last_challenge]
     challenge_sum += last_challenge
 
     res_sch_sum = 0
@@ -64,15 +160,159 @@ def verify_ring_proof(C2_table, proof, message, Ring_table, pp):
     pid_mul_c_sum = pp.E(0)
     com_sch_sum = pp.E(0)
     com_oka_sum = pp.E(0)
-    for i in range(len(Ring_table)):
-        pid_mul_c_sum += Ring_table[i].multiply(challenge[i])
-        com_sch_sum += commit_schnorr[i]
-        com_oka_sum += commit_okamoto[i]
-        res_oka_sum += response_okamoto[i]
-        res_sch_sum += response_schnorr[i]
-    left_sch = pp.g1_table.multiply(res_sch_sum)  # g1^z
-    left_oka = pp.Q_table.multiply(res_oka_sum)   # Q^z
-    right_sch = pid_mul_c_sum + com_sch_sum    # pid^c + T
-    right_oka = C2_table.multiply(challenge_sum) + com_oka_sum - pid_mul_c_sum
-    return left_sch == right_sch and left_oka == right_oka
+    with instrument.phase("verify_ring_proof.accumulate"):
+        for i in range(len(Ring_table)):
+            pid_mul_c_sum += Ring_table[i].multiply(challenge[i])
+            com_sch_sum += commit_schnorr[i]
+            com_oka_sum += commit_okamoto[i]
+            res_oka_sum += response_okamoto[i]
+            res_sch_sum += response_schnorr[i]
+        if instrument.ENABLED:
+            instrument.count(instrument.POINT_ADD, 3 * len(Ring_table))
+    with instrument.phase("verify_ring_proof.finalize"):
+        # 大环下各项之和会超过PowerTable的max_bits，先按群阶约简
+        left_sch = pp.g1_table.multiply(res_sch_sum % pp.n)  # g1^z
+        left_oka = pp.Q_table.multiply(res_oka_sum % pp.n)   # Q^z
+        right_sch = pid_mul_c_sum + com_sch_sum    # pid^c + T
+        right_oka = C2_table.multiply(challenge_sum % pp.n) + com_oka_sum - pid_mul_c_sum
+        if not (left_sch == right_sch and left_oka == right_oka):
+            return False
+        if link is not None:
+            return verify_link(link, commit_link, res_sch_sum, challenge_sum, pp)
+        return True
+
+
+def verify_link(link, commit_link, res_sch_sum, challenge_sum, pp):
+    """v2标签在标签群中的聚合检查：h^(Σz_sch) == Π commit_link · tag^(Σc) mod p"""
+    h, tag = link
+    group = link_group(pp.n)
+    try:
+        commit_product = group.product(commit_link)
+    except ValueError:
+        return False
+    return group.check(h, tag, commit_product, res_sch_sum, challenge_sum)
+
+
+class StreamingRingVerifier:
+    """
+    流式环签名验证：只保留 verify_ring_proof 用到的累加量和哈希状态，
+    内存占用与环大小无关。承诺、挑战、响应可以按任意顺序、交错地加入；
+    challenge按成员顺序加入（最后一个成员除外，其challenge在finalize时由哈希推出）。
+    """
+    def __init__(self, message, pp):
+        self.pp = pp
+        self.c = pp.zr_hash(message)
+        self.c_sum = 0
+        self.challenge_sum = 0
+        self.res_sch_sum = 0
+        self.res_oka_sum = 0
+        self.pid_mul_c_sum = pp.E(0)
+        # 没有预计算表的成员点先缓冲，凑满arity个后做一次联合点乘
+        self.arity = pp.tuning.msm_arity
+        self.pending_pids = []
+        self.pending_challenges = []
+        self.com_sch_sum = pp.E(0)
+        self.com_oka_sum = pp.E(0)
+        self.com_link_product = 1
+        self.com_link_valid = True
+        self.commit_link_hash = 1
+        self.num_commit_link = 0
+        self.num_commit_schnorr = 0
+        self.num_commit_okamoto = 0
+        self.num_challenges = 0
+        self.num_response_schnorr = 0
+        self.num_response_okamoto = 0
+
+    def add_commit_schnorr(self, com):
+        self.c *= self.pp.zr_hash(com)
+        self.com_sch_sum += com
+        self.num_commit_schnorr += 1
+
+    def add_commit_okamoto(self, com):
+        self.c *= self.pp.zr_hash(com)
+        self.com_oka_sum += com
+        self.num_commit_okamoto += 1
+
+    def add_commit_link(self, com):
+        """v2签名的commit_link（其哈希在finalize时才并入，因为还需要tag）"""
+        self.commit_link_hash *= self.pp.zr_hash(com)
+        try:
+            self.com_link_product = link_group(self.pp.n).product([self.com_link_product, com])
+        except ValueError:
+            self.com_link_valid = False
+        self.num_commit_link += 1
+
+    def add_challenge(self, ch, pid):
+        """加入第 num_challenges 个成员的challenge及其PID"""
+        ch = Integer(ch)
+        self.c_sum = self.c_sum ^ ch
+        self.challenge_sum += ch
+        self.num_challenges += 1
+        self._add_pid_term(pid, ch)
+
+    def _add_pid_term(self, pid, ch):
+        if hasattr(pid, 'window_size'):
+            self.pid_mul_c_sum += member_multiply(pid, ch)
+            if instrument.ENABLED:
+                instrument.count(instrument.SCALAR_MUL)
+                instrument.count(instrument.POINT_ADD)
+            return
+        self.pending_pids.append(pid)
+        self.pending_challenges.append(ch)
+        if len(self.pending_pids) == self.arity:
+            self._flush_pid_terms()
+
+    def _flush_pid_terms(self):
+        if self.pending_pids:
+            self.pid_mul_c_sum += multi_multiply(self.pending_pids, self.pending_challenges, self.pp.E(0), arity=self.arity,
+                                                 min_lanes=self.pp.tuning.batch_lanes)
+            self.pending_pids = []
+            self.pending_challenges = []
+
+    def add_response_schnorr(self, res):
+        self.res_sch_sum += Integer(res)
+        self.num_response_schnorr += 1
+
+    def add_response_okamoto(self, res):
+        self.res_oka_sum += Integer(res)
+        self.num_response_okamoto += 1
 
+    def finalize(self, C2, last_pid, link=None):
+        """
+        :param C2: PID_encryption中的C2
+        :param last_pid: 环中最后一个成员的PID（点或预计算表）
+        :param link: v2签名的 (h, tag)，与verify_ring_proof相同
+        :return: True/False
+        """
+        pp = self.pp
+        n = self.num_commit_schnorr
+        if not (n == self.num_commit_okamoto == self.num_challenges + 1 == self.num_response_schnorr == self.num_response_okamoto):
+            return False
+        if self.num_commit_link != (0 if link is None else n):
+            return False
+        with instrument.phase("verify_ring_proof.finalize"):
+            c = self.c
+            if link is not None:
+                c = c * pp.zr_hash(link[1]) * self.commit_link_hash
+            last_challenge = Integer(c) ^ self.c_sum
+            challenge_sum = self.challenge_sum + last_challenge
+            pid_mul_c_sum = self.pid_mul_c_sum
+            pids, challenges = list(self.pending_pids), list(self.pending_challenges)
+            if hasattr(last_pid, 'window_size'):
+                pid_mul_c_sum += member_multiply(last_pid, last_challenge)
+            else:
+                pids.append(last_pid)
+                challenges.append(last_challenge)
+            if pids:
+                pid_mul_c_sum += multi_multiply(pids, challenges, pp.E(0), arity=self.arity, min_lanes=pp.tuning.batch_lanes)
+            left_sch = pp.g1_table.multiply(self.res_sch_sum % pp.n)
+            left_oka = pp.Q_table.multiply(self.res_oka_sum % pp.n)
+            right_sch = pid_mul_c_sum + self.com_sch_sum
+            right_oka = C2 * Integer(challenge_sum % pp.n) + self.com_oka_sum - pid_mul_c_sum
+            if not (left_sch == right_sch and left_oka == right_oka):
+                return False
+            if link is not None:
+                h, tag = link
+                return self.com_link_valid and link_group(pp.n).check(h, tag, self.com_link_product, self.res_sch_sum,
+                                                                      challenge_sum)
+            return True
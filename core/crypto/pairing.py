@@ -0,0 +1,237 @@
+"""
+约化Tate配对与用户密钥对的批量校验
+
+t(P, Q) = f_{r,P}(Q)^((q^k-1)/r)，P ∈ G1（坐标在基域F_q），Q ∈ G2（迹零子群）。
+- Miller循环中P的倍点只涉及F_q，用Python整数计算；每步的直线 y - λx - c 只在Q处求值
+- 固定的g1的直线系数预先计算一次（g1_lines），可变的P按需计算
+- 多个配对的乘积共用一条Miller循环（每步只平方一次）和一次最终幂
+- 竖线只取决于x_Q与F_q中的常数；Q ∈ G2时 π^{k/2}(Q) = -Q，x_Q ∈ F_{q^{k/2}}，
+  竖线的值在最终幂的 (q^{k/2}-1) 因子下变为1，因此省略（分母消去）
+- 最终幂拆成简单部分 (q^{k/2}-1)(q+1)（用Frobenius计算）和困难部分 (q^2-q+1)/r（k=6）
+- field参数可换成 core.crypto.fq6.Fq6Field，Miller循环和最终幂在整数实现的GF(q^6)中计算
+
+validate_key_pairs 用随机线性组合检查 e(pid_i, g2) == e(g1, pk_i)：
+  t(Σ r_i·pid_i, g2) · t(g1, -Σ r_i·pk_i) == 1
+整批只需两个配对（一次共享的Miller循环和一次最终幂），失败时二分定位无效的密钥对。
+组合检查之前逐个做子群检查（key_pair_in_subgroups）：否则在阶n子群之外带有小阶分量的点
+可能在随机线性组合中相互抵消，或使配对等式在子群之外成立。
+"""
+import secrets
+from core.crypto import instrument
+from core.crypto.multiexp import multi_multiply
+
+# 随机线性组合系数的比特数：一个无效密钥对通过整批检查的概率不超过 2^-RLC_BITS
+RLC_BITS = 128
+
+
+def base_field_coords(P):
+    """
+    G1点的整数坐标 (x, y)，无穷远点返回None；坐标不在基域时抛出ValueError
+    """
+    if P.is_zero():
+        return None
+    coords = []
+    for c in P.xy():
+        poly = c.polynomial()
+        if poly.degree() > 0:
+            raise ValueError("Point is not defined over the base field")
+        coords.append(int(poly[0]))
+    return tuple(coords)
+
+
+def trace_map(P, pp):
+    """Tr(P) = Σ_{i<k} π^i(P)，π为q次Frobenius（与public_params中g1的构造相同）"""
+    if P.is_zero():
+        return P
+    x, y = P.xy()
+    T = P
+    for i in range(1, pp.k):
+        T += pp.E(pp.Frob[i](x), pp.Frob[i](y))
+    return T
+
+
+def key_pair_in_subgroups(member, pp):
+    """
+    密钥对的子群检查：pid与pk均非无穷远点且 n·P == 0，pid的坐标在基域（G1），
+    pk迹为零（G2 = 迹零子群）
+    """
+    pid, pk = member.public_id, member.public_key
+    if pid.is_zero() or pk.is_zero():
+        return False
+    try:
+        base_field_coords(pid)
+    except ValueError:
+        return False
+    if not (pp.n * pid).is_zero() or not (pp.n * pk).is_zero():
+        return False
+    return trace_map(pk, pp).is_zero()
+
+
+def miller_lines(P, r, q, a):
+    """
+    计算 f_{r,P} 的Miller循环直线
+    :param P: 基域坐标 (x, y)
+    :return: 步骤列表 [(is_double, line)]，line为 (λ, c)（直线 y - λx - c），
+             竖线为None；所有P的步骤序列只由r决定，因此可以逐步对齐
+    """
+    x_P, y_P = P
+    steps = []
+    T = P
+    for bit in bin(r)[3:]:
+        # 倍点：切线
+        x_T, y_T = T
+        if y_T == 0:
+            steps.append((True, None))
+            T = None
+        else:
+            lam = (3 * x_T * x_T + a) * pow(2 * y_T, -1, q) % q
+            steps.append((True, (lam, (y_T - lam * x_T) % q)))
+            x_2 = (lam * lam - 2 * x_T) % q
+            T = (x_2, (lam * (x_T - x_2) - y_T) % q)
+        if bit == '1':
+            # 加P：割线（T = -P 时为竖线）
+            x_T, y_T = T
+            if x_T == x_P:
+                steps.append((False, None))
+                T = None if (y_T + y_P) % q == 0 else T
+            else:
+                lam = (y_P - y_T) * pow(x_P - x_T, -1, q) % q
+                steps.append((False, (lam, (y_T - lam * x_T) % q)))
+                x_3 = (lam * lam - x_T - x_P) % q
+                T = (x_3, (lam * (x_T - x_3) - y_T) % q)
+        if T is None:
+            # 到达无穷远点只可能发生在最后一步（P的阶为r）
+            break
+    return steps
+
+
+class TatePairing:
+    """
+    绑定到一组公共参数的约化Tate配对，预计算g1的Miller直线
+    :param field: None使用Sage的pp.F；传入Fq6Field时使用整数实现的GF(q^6)
+    """
+    def __init__(self, pp, field=None):
+        self.pp = pp
+        self.q = int(pp.q)
+        self.r = int(pp.r)
+        self.k = int(pp.k)
+        self.a = int(pp.a) % self.q
+        if self.k % 2:
+            raise ValueError("Denominator elimination requires an even embedding degree")
+        half = self.k // 2
+        self.field = field
+        if field is None:
+            self.F = pp.F
+            self.frob_half = pp.Frob[half]
+            self.frob_one = pp.Frob[1]
+        else:
+            self.F = field
+            self.frob_half = lambda f: f.frobenius(half)
+            self.frob_one = lambda f: f.frobenius(1)
+        # q^{k/2}+1 = (q+1)·Φ，r | Φ 时（k=6: Φ = q^2-q+1）先用Frobenius算 (q+1) 次幂
+        phi, rest = divmod(self.q ** half + 1, self.q + 1)
+        self.split_q_plus_one = self.k > 2 and rest == 0 and phi % self.r == 0
+        if self.split_q_plus_one:
+            self.hard_exponent = phi // self.r
+        else:
+            self.hard_exponent = (self.q ** half + 1) // self.r
+        self.g1_lines = self.lines(pp.g1)
+
+    def lines(self, P):
+        """G1点P的Miller直线"""
+        coords = base_field_coords(P)
+        if coords is None:
+            raise ValueError("Cannot pair the point at infinity")
+        return miller_lines(coords, self.r, self.q, self.a)
+
+    def g2_coords(self, Q):
+        """Q的仿射坐标，转换到配对所用的域表示"""
+        x_Q, y_Q = Q.xy()
+        if self.field is None:
+            return x_Q, y_Q
+        return self.field.from_sage(x_Q), self.field.from_sage(y_Q)
+
+    def miller_product(self, pairs):
+        """
+        Π f_{r,P_j}(Q_j)，所有配对共用一条Miller循环
+        :param pairs: [(lines, Q), ...]，lines来自lines()或g1_lines
+        """
+        evals = [(lines, self.g2_coords(Q)) for lines, Q in pairs]
+        f = self.F(1)
+        for step in range(len(evals[0][0])):
+            if evals[0][0][step][0]:
+                f = f * f
+            for lines, (x_Q, y_Q) in evals:
+                line = lines[step][1]
+                if line is not None:
+                    lam, c = line
+                    f = f * (y_Q - x_Q * lam - c)
+        return f
+
+    def final_exponentiation(self, f):
+        if instrument.ENABLED:
+            instrument.count(instrument.FIELD_INVERSION)
+        # 简单部分：f^(q^{k/2}-1)，再视情况乘上 (q+1) 次幂
+        f = self.frob_half(f) * ~f
+        if self.split_q_plus_one:
+            f = self.frob_one(f) * f
+        return f ** self.hard_exponent
+
+    def pairing(self, P, Q):
+        """t(P, Q)，P ∈ G1，Q ∈ G2"""
+        lines = self.g1_lines if P == self.pp.g1 else self.lines(P)
+        return self.final_exponentiation(self.miller_product([(lines, Q)]))
+
+    def pairing_product_is_one(self, pairs):
+        """检查 Π t(P_j, Q_j) == 1，pairs为 [(lines, Q), ...]"""
+        return self.final_exponentiation(self.miller_product(pairs)) == 1
+
+    def check_combination(self, members, indices):
+        """对indices对应的密钥对做一次随机线性组合检查"""
+        pp = self.pp
+        zero = pp.E(0)
+        coeffs = [secrets.randbits(RLC_BITS) | 1 for _ in indices]
+        arity = pp.tuning.msm_arity
+        pid_sum = multi_multiply([members[i].public_id for i in indices], coeffs, zero, arity=arity, min_lanes=pp.tuning.batch_lanes)
+        pk_sum = multi_multiply([members[i].public_key for i in indices], coeffs, zero, arity=arity, min_lanes=pp.tuning.batch_lanes)
+        if pid_sum.is_zero() or pk_sum.is_zero():
+            return pid_sum.is_zero() and pk_sum.is_zero()
+        return self.pairing_product_is_one([(self.lines(pid_sum), pp.g2), (self.g1_lines, -pk_sum)])
+
+    def find_invalid(self, members, indices):
+        """检查失败的一组密钥对，二分定位其中无效的项"""
+        if len(indices) == 1:
+            return [] if self.check_combination(members, indices) else list(indices)
+        mid = len(indices) // 2
+        invalid = []
+        for half in (indices[:mid], indices[mid:]):
+            if not self.check_combination(members, half):
+                invalid += self.find_invalid(members, half)
+        return invalid
+
+
+def validate_key_pairs(members, pp, batch_size=None, pairing=None):
+    """
+    批量校验用户密钥对：逐个做子群检查，再用随机线性组合检查 e(pid, g2) == e(g1, pk)
+    :param members: pp.R(public_key, public_id) 列表
+    :param batch_size: 每批的密钥对数量（None为整体一批）
+    :param pairing: 复用的TatePairing对象（可选）
+    :return: 无效密钥对的下标列表
+    """
+    if pairing is None:
+        field = pp.fq6_field if getattr(pp, 'g2_backend', 'sage') == "fq6" else None
+        pairing = TatePairing(pp, field=field)
+    invalid = []
+    candidates = []
+    for i, member in enumerate(members):
+        # 子群检查失败的密钥对直接判为无效，不参与组合检查
+        if not key_pair_in_subgroups(member, pp):
+            invalid.append(i)
+            continue
+        candidates.append(i)
+    batch_size = batch_size or max(len(candidates), 1)
+    for start in range(0, len(candidates), batch_size):
+        batch = candidates[start:start + batch_size]
+        if not pairing.check_combination(members, batch):
+            invalid += pairing.find_invalid(members, batch)
+    return sorted(invalid)
@@ -3,8 +3,13 @@ import os
 from sage.all import *
 from sage.calculus.predefined import x
 from sage.schemes.elliptic_curves.ell_point import EllipticCurvePoint
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 import hashlib
+import struct
+from core.crypto import fqbatch, instrument
+from core.crypto.jacobian import JacobianCurve, base_field_coords, batch_curve, points_from_coords, window_table
+from core.crypto.scalars import ScalarSource
+from core.crypto.tuning import TuningProfile
 
 def load_system_params(params_file):
     """加载曲线和协议参数（不含公钥）"""
@@ -41,14 +46,99 @@ def load_public_kgc_keys(params_file):
     
     return public_kgc_keys
 
-def point_from_string(point_str, F, E):
-    """从字符串恢复椭圆曲线点，标准格式为 '(x, y)'，x和y为数字或可被F解析的字符串"""
-    point_str = point_str.strip('()').replace(' ', '')
-    coords = point_str.split(',')
-    if len(coords) != 2:
-        raise ValueError(f"Invalid point string: {point_str}")
-    x_coord = F(coords[0])
-    y_coord = F(coords[1])
+POINT_CACHE_SIZE = 1024
+# 坐标缓存按域分开：id(F) -> [OrderedDict, 条目上限（None时取POINT_CACHE_SIZE）]
+_point_caches = {}
+
+def _point_cache_for(F):
+    entry = _point_caches.get(id(F))
+    if entry is None:
+        entry = _point_caches[id(F)] = [OrderedDict(), None]
+    return entry
+
+def set_point_cache_size(size, F=None):
+    """
+    调整point_from_string坐标缓存的条目上限（来自TuningProfile.point_cache_size）
+    :param F: 只调整该域的缓存，各参数集的设置互不影响（多个参数集共用同一个域时取较大值）；
+              None时调整未单独设置上限的域所用的缺省值
+    """
+    global POINT_CACHE_SIZE
+    if F is None:
+        POINT_CACHE_SIZE = size
+        entries = [entry for entry in _point_caches.values() if entry[1] is None]
+    else:
+        entry = _point_cache_for(F)
+        entry[1] = size if entry[1] is None else max(entry[1], size)
+        entries = [entry]
+    for cache, limit in entries:
+        limit = POINT_CACHE_SIZE if limit is None else limit
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+def _parse_coord(coord, F):
+    """
+    解析point_to_string输出的坐标：整数，或 'c5*a^5+...+c1*a+c0' 形式的多项式
+    （a为F的生成元名）。直接提取系数构造域元素，不经过Sage的通用解析器；
+    不符合该文法时退回 F(coord)。
+    """
+    if coord.isdigit():
+        return F(int(coord))
+    try:
+        name = F.variable_name()
+        coeffs = [0] * F.degree()
+        for term in coord.split('+'):
+            c, sep, power = term.partition(name)
+            if not sep:
+                coeffs[0] += int(term)
+                continue
+            if c:
+                if c[-1] != '*':
+                    raise ValueError(term)
+                c = int(c[:-1])
+            else:
+                c = 1
+            if power:
+                if power[0] != '^':
+                    raise ValueError(term)
+                e = int(power[1:])
+                if e < 0:
+                    raise ValueError(term)
+            else:
+                e = 1
+            coeffs[e] += c
+        if any(c < 0 for c in coeffs):
+            raise ValueError(coord)
+    except (ValueError, IndexError):
+        return F(coord)
+    return F(coeffs)
+
+def point_from_string(point_str, F, E, trusted=False, cache=False):
+    """
+    从字符串恢复椭圆曲线点，标准格式为 '(x, y)'，x和y为数字或可被F解析的字符串
+    :param trusted: 数据来自本地密钥库/参数文件时为True，跳过曲线方程检查
+    :param cache: 是否缓存解析出的坐标（适合g1/g2/Q、环成员等会被反复加载的字符串）
+    """
+    if instrument.ENABLED:
+        instrument.count(instrument.DESERIALIZE)
+    # 缓存的是域元素坐标，按F区分（GF有唯一表示，同参数的F是同一个对象）；
+    # 非可信模式下命中缓存仍会做曲线方程检查
+    point_cache, limit = _point_cache_for(F) if cache else (None, None)
+    cached = point_cache.get(point_str) if cache else None
+    if cached is not None and cached[0].parent() is F:
+        point_cache.move_to_end(point_str)
+        x_coord, y_coord = cached
+    else:
+        coords = point_str.strip('()').replace(' ', '').split(',')
+        if len(coords) != 2:
+            raise ValueError(f"Invalid point string: {point_str}")
+        x_coord = _parse_coord(coords[0], F)
+        y_coord = _parse_coord(coords[1], F)
+        if cache:
+            point_cache[point_str] = (x_coord, y_coord)
+            if len(point_cache) > (POINT_CACHE_SIZE if limit is None else limit):
+                point_cache.popitem(last=False)
+    if trusted:
+        return E.point([x_coord, y_coord, 1], check=False)
     return E(x_coord, y_coord)
 
 def point_to_string(point):
@@ -76,15 +166,58 @@ class CurveContext:
         self.E = EllipticCurve(self.F, [self.a, self.b])
         self.Frob = [self.F.frobenius_endomorphism(i) for i in range(self.k)]
         self.ModRing = IntegerModRing(self.n)
+        self.scalars = ScalarSource(self.n)
+        self._g1_cofactor = None
+
+    @property
+    def g1_cofactor(self):
+        """#E(F_q) / n，首次使用时计算（G1为E(F_q)的n阶子群）"""
+        if self._g1_cofactor is None:
+            self.E_base = EllipticCurve(GF(self.q), [self.a, self.b])
+            order = self.E_base.order()
+            if order % self.n != 0:
+                raise ValueError("n does not divide #E(F_q)")
+            self._g1_cofactor = order // self.n
+        return self._g1_cofactor
+
+    def hash_to_g1(self, data):
+        """
+        把data确定性地映射到G1中离散对数未知的点：
+        x = SHA-256(data || 计数器) mod q，直到 x^3+ax+b 为平方，取较小的平方根为y，再乘余因子
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        cofactor = self.g1_cofactor
+        Fq = self.E_base.base_field()
+        counter = 0
+        while True:
+            digest = hashlib.sha256(data + counter.to_bytes(4, 'big')).digest()
+            counter += 1
+            x_coord = Fq(int.from_bytes(digest, 'big'))
+            rhs = x_coord ** 3 + self.a * x_coord + self.b
+            if not rhs.is_square():
+                continue
+            y_coord = rhs.sqrt()
+            y_coord = min(int(y_coord), self.q - int(y_coord))
+            P = self.E_base.point([x_coord, y_coord, 1], check=False) * cofactor
+            if P.is_zero():
+                continue
+            x_P, y_P = P.xy()
+            return self.E.point([self.F(int(x_P)), self.F(int(y_P)), 1], check=False)
 
     def pairing(self, e1, e2):
         r = Integer(self.r)
         return e1.weil_pairing(e2, r)
 
     def rand_int(self):
-        return self.ModRing.random_element()
+        return self.ModRing(self.scalars.rand_int())
+
+    def rand_ints(self, count):
+        return [self.ModRing(v) for v in self.scalars.rand_ints(count)]
 
     def zr_hash(self, element):
+        if instrument.ENABLED:
+            instrument.count(instrument.HASH)
         def process_point(point):
             x = point.xy()[0].polynomial().coefficients()
             y = point.xy()[1].polynomial().coefficients()
@@ -111,24 +244,35 @@ class CurveContext:
         return self.ModRing(int.from_bytes(hash_value, 'big'))
 
 
+# G2预计算表的可选实现
+G2_BACKENDS = ("sage", "fq6")
+
 
 class PublicParams:
     """
     公开系统参数类
     - KGC: 只需曲线参数, 由曲线计算g1/g2, 不加载kgc_pk
     - User/Tracer: 需曲线参数, 由曲线计算g1/g2, 并从param加载kgc_pk
+    - g2_backend: G2预计算表的实现，"sage"（PowerTable）或 "fq6"（core.crypto.fq6.G2TowerTable）
+    - tuning: params.json同目录下tuning.json中的机器调优参数（窗口、分组、缓存等）
     """
-    def __init__(self, params_file, load_kgc_key=True):
+    def __init__(self, params_file, load_kgc_key=True, g2_backend="sage"):
+        if g2_backend not in G2_BACKENDS:
+            raise ValueError(f"Unknown G2 backend: {g2_backend}")
+        self.g2_backend = g2_backend
+        # 调优参数只作用于本参数集：坐标缓存按域设置上限，batch_lanes由表和点乘调用方传入
+        self.tuning = TuningProfile.for_params(params_file)
         params = load_system_params(params_file)
         self.ctx = CurveContext(params)
+        set_point_cache_size(self.tuning.point_cache_size, self.ctx.F)
         if load_kgc_key:
             public_kgc_keys = load_public_kgc_keys(params_file)
-            self.g1 = point_from_string(public_kgc_keys['g1'], self.ctx.F, self.ctx.E)
-            self.g2 = point_from_string(public_kgc_keys['g2'], self.ctx.F, self.ctx.E)
-            self.Q = point_from_string(public_kgc_keys['Q'], self.ctx.F, self.ctx.E)
-            self.g1_table = PowerTable(self.g1)
-            self.g2_table = PowerTable(self.g2)
-            self.Q_table = PowerTable(self.Q)
+            self.g1 = point_from_string(public_kgc_keys['g1'], self.ctx.F, self.ctx.E, trusted=True, cache=True)
+            self.g2 = point_from_string(public_kgc_keys['g2'], self.ctx.F, self.ctx.E, trusted=True, cache=True)
+            self.Q = point_from_string(public_kgc_keys['Q'], self.ctx.F, self.ctx.E, trusted=True, cache=True)
+            self.g1_table = self.make_table(self.g1)
+            self.g2_table = self.make_g2_table(self.g2)
+            self.Q_table = self.make_table(self.Q)
         else:
             self.g1 = None
             self.g2 = None
@@ -164,10 +308,37 @@ class PublicParams:
     def threshold_tracers(self): return self.ctx.threshold_tracers
     @property
     def num_tracers(self): return self.ctx.num_tracers
+    @property
+    def scalars(self): return self.ctx.scalars
 
     def pairing(self, e1, e2): return self.ctx.pairing(e1, e2)
     def rand_int(self): return self.ctx.rand_int()
+    def rand_ints(self, count): return self.ctx.rand_ints(count)
     def zr_hash(self, element): return self.ctx.zr_hash(element)
+    def hash_to_g1(self, data): return self.ctx.hash_to_g1(data)
+
+    def seed_scalars(self, seed=None):
+        """随机标量改用种子seed的确定性序列（基准测试、测试向量），None恢复os.urandom"""
+        self.ctx.scalars.reseed(seed)
+
+    def make_table(self, P):
+        """固定底点的预计算表，窗口取自tuning.fixed_window"""
+        return PowerTable(P, window_size=self.tuning.fixed_window, batch_lanes=self.tuning.batch_lanes)
+
+    def make_g2_table(self, P):
+        """按g2_backend构建G2点的预计算表"""
+        if self.g2_backend == "fq6":
+            from core.crypto.fq6 import G2TowerTable
+            return G2TowerTable(P, window_size=self.tuning.fixed_window, field=self.fq6_field)
+        return self.make_table(P)
+
+    @property
+    def fq6_field(self):
+        """GF(q^6)的整数实现（按需构建，Frobenius矩阵只计算一次）"""
+        if getattr(self, '_fq6_field', None) is None:
+            from core.crypto.fq6 import Fq6Field
+            self._fq6_field = Fq6Field(int(self.q))
+        return self._fq6_field
 
     def generate_kgc_keys(self, s=None):
         """
@@ -188,23 +359,47 @@ class PublicParams:
         self.g2 = self.k * g - self.g1
         s = self.rand_int() if s is None else s
         self.Q = s * self.g1
-        self.g1_table = PowerTable(self.g1)
-        self.g2_table = PowerTable(self.g2)
-        self.Q_table = PowerTable(self.Q)
+        self.g1_table = self.make_table(self.g1)
+        self.g2_table = self.make_g2_table(self.g2)
+        self.Q_table = self.make_table(self.Q)
         return self.g1, self.g2, self.Q, s
 
+def _table_scalar(k, window_size, num_blocks):
+    """
+    按PowerTable.multiply的行为得到实际参与点乘的标量（与verifier.curve.table_scalar相同）：
+    超出num_blocks块的标量抛出IndexError；负数按bin(k)[2:]分块，含'b'的块抛出ValueError，
+    最高块恰为'0b'加数字时被当作二进制前缀接受
+    """
+    k = int(k)
+    if k >= 0:
+        if k.bit_length() > num_blocks * window_size:
+            raise IndexError("Scalar is too long for the window table")
+        return k
+    k_bin = bin(k)[2:]
+    k_padded = '0' * ((-len(k_bin)) % window_size) + k_bin
+    value = 0
+    for block_idx in range(len(k_padded) // window_size):
+        end = len(k_padded) - block_idx * window_size
+        idx = int(k_padded[end - window_size:end], 2)
+        if block_idx >= num_blocks:
+            raise IndexError("Scalar is too long for the window table")
+        value += idx << (block_idx * window_size)
+    return value
+
+
 class PowerTable:
     """预计算表，用于加速椭圆曲线点乘法"""
-    def __init__(self, P, window_size=4, max_bits=450):
+    def __init__(self, P, window_size=4, max_bits=450, batch_lanes=None):
         self.window_size = window_size
-        self.table = []
-        current = P
+        # multiply_many走fqbatch的最少标量数（pp.tuning.batch_lanes），None时取fqbatch的缺省值
+        self.batch_lanes = batch_lanes
         num_blocks = (max_bits + window_size - 1) // window_size
-        for _ in range(num_blocks):
-            block = [current * i for i in range(1 << window_size)]
-            self.table.append(block)
-            for _ in range(window_size):
-                current = current * 2
+        if instrument.ENABLED:
+            instrument.count(instrument.TABLE_BUILD)
+        # 在Jacobian坐标下构建，整张表只做一次域求逆
+        self.table = window_table(P, window_size, num_blocks)
+        self._coords = None
+        self._limbs = None
 
     def multiply(self, k):
         """使用预计算表进行点乘法"""
@@ -213,6 +408,9 @@ class PowerTable:
         padding = (-len(k_bin)) % self.window_size
         k_padded = '0' * padding + k_bin
         num_blocks = len(k_padded) // self.window_size
+        if instrument.ENABLED:
+            instrument.count(instrument.TABLE_LOOKUP, num_blocks)
+            instrument.count(instrument.POINT_ADD, num_blocks)
         for block_idx in range(num_blocks):
             start = len(k_padded) - (block_idx + 1) * self.window_size
             end = len(k_padded) - block_idx * self.window_size
@@ -221,6 +419,247 @@ class PowerTable:
             result += self.table[block_idx][idx]
         return result
 
+    def multiply_many(self, ks):
+        """
+        批量点乘：每个标量在Jacobian坐标下用混合点加累加表项，
+        最后统一归一化，整批只做一次域求逆
+        """
+        E = self.table[0][0].curve()
+        ks = [_table_scalar(k, self.window_size, len(self.table)) for k in ks]
+        if fqbatch.use_batch(len(ks), self.batch_lanes) and min(ks) >= 0 and self._batch_limbs():
+            return _fixed_base_batch(E, self._limbs, self.window_size, ks)
+        J = JacobianCurve(E)
+        if self._coords is None:
+            self._coords = [[None if P.is_zero() else P.xy() for P in block] for block in self.table]
+        mask = (1 << self.window_size) - 1
+        results = []
+        lookups = 0
+        for k in ks:
+            k = int(k)
+            acc = J.zero
+            block_idx = 0
+            while k:
+                idx = k & mask
+                if idx:
+                    acc = J.add_affine(acc, self._coords[block_idx][idx])
+                    lookups += 1
+                k >>= self.window_size
+                block_idx += 1
+            results.append(acc)
+        if instrument.ENABLED:
+            instrument.count(instrument.TABLE_LOOKUP, lookups)
+            instrument.count(instrument.POINT_ADD, lookups)
+        return J.normalize_many(results)
+
+    def _batch_limbs(self):
+        """fqbatch使用的limb表（首次使用时构建）；坐标不在F_q中时为False"""
+        if self._limbs is None:
+            G = batch_curve(self.table[0][0].curve())
+            blocks = [base_field_coords(block) for block in self.table] if G is not None else [None]
+            self._limbs = False if any(block is None for block in blocks) else G.prepare_table(blocks)
+        return self._limbs
+
+
+def _fixed_base_batch(E, limbs, window_size, ks):
+    """fqbatch上的固定底点批量点乘（ks为非负整数），返回Sage点列表"""
+    if instrument.ENABLED:
+        mask = (1 << window_size) - 1
+        lookups = sum(1 for k in ks for shift in range(0, k.bit_length(), window_size) if (k >> shift) & mask)
+        instrument.count(instrument.TABLE_LOOKUP, lookups)
+        instrument.count(instrument.POINT_ADD, lookups)
+    return points_from_coords(E, batch_curve(E).fixed_base_many(limbs, window_size, ks))
+
+class CompactPowerTable:
+    """
+    紧凑预计算表，multiply接口与PowerTable相同。
+    - 每个表项的仿射坐标按定长大端整数打包进一段连续的bytes（每个坐标k个系数，
+      基域上的点只存常数项），不保留Sage点对象
+    - multiply时只重建用到的表项；每个块的第0项（无穷远点）不存储
+    - 存储可放入共享内存，供其他进程通过 from_shared_memory 直接挂载
+    """
+    MAGIC = b'TPT1'
+    HEADER = struct.Struct('>4sHHHH')  # magic, window_size, num_blocks, ncoef, width
+
+    def __init__(self, P=None, window_size=4, max_bits=450, E=None, buffer=None, batch_lanes=None):
+        # multiply_many走fqbatch的最少标量数（pp.tuning.batch_lanes），None时取fqbatch的缺省值
+        self.batch_lanes = batch_lanes
+        if buffer is not None:
+            # 从已有的打包数据（例如共享内存）构造
+            if E is None:
+                raise ValueError("E is required when building a table from a buffer")
+            magic, window_size, num_blocks, ncoef, width = self.HEADER.unpack_from(buffer, 0)
+            if magic != self.MAGIC:
+                raise ValueError("Invalid compact table buffer")
+            self._init_layout(E, window_size, num_blocks, ncoef, width)
+            self.buffer = buffer
+            return
+
+        E = P.curve()
+        num_blocks = (max_bits + window_size - 1) // window_size
+        ncoef = 1 if all(c.polynomial().degree() <= 0 for c in P.xy()) else E.base_field().degree()
+        width = (int(E.base_field().characteristic()).bit_length() + 7) // 8
+        self._init_layout(E, window_size, num_blocks, ncoef, width)
+
+        data = bytearray(self.HEADER.size + num_blocks * self.block_size)
+        self.HEADER.pack_into(data, 0, self.MAGIC, window_size, num_blocks, ncoef, width)
+        if instrument.ENABLED:
+            instrument.count(instrument.TABLE_BUILD)
+        for block_idx, block in enumerate(window_table(P, window_size, num_blocks)):
+            for i in range(1, 1 << window_size):
+                self._pack(data, block_idx, i, block[i])
+        self.buffer = bytes(data)
+
+    def _init_layout(self, E, window_size, num_blocks, ncoef, width):
+        self.E = E
+        self.F = E.base_field()
+        self.window_size = window_size
+        self.num_blocks = num_blocks
+        self.ncoef = ncoef
+        self.width = width
+        self.entry_size = 2 * ncoef * width
+        self.block_size = ((1 << window_size) - 1) * self.entry_size
+        self._shm = None
+        self._limbs = None
+
+    def _offset(self, block_idx, idx):
+        return self.HEADER.size + block_idx * self.block_size + (idx - 1) * self.entry_size
+
+    def _pack(self, data, block_idx, idx, point):
+        offset = self._offset(block_idx, idx)
+        if point.is_zero():
+            # 全零坐标表示无穷远点（b != 0 时 (0, 0) 不在曲线上）
+            return
+        for coord in point.xy():
+            coeffs = coord.polynomial().list()
+            coeffs += [0] * (self.ncoef - len(coeffs))
+            for c in coeffs[:self.ncoef]:
+                data[offset:offset + self.width] = int(c).to_bytes(self.width, 'big')
+                offset += self.width
+
+    def _unpack_coord(self, offset):
+        width = self.width
+        coeffs = [int.from_bytes(self.buffer[offset + j * width:offset + (j + 1) * width], 'big') for j in range(self.ncoef)]
+        return self.F(coeffs[0]) if self.ncoef == 1 else self.F(coeffs)
+
+    def _entry_coords(self, block_idx, idx):
+        offset = self._offset(block_idx, idx)
+        if not any(self.buffer[offset:offset + self.entry_size]):
+            return None
+        return (self._unpack_coord(offset), self._unpack_coord(offset + self.ncoef * self.width))
+
+    def entry(self, block_idx, idx):
+        """按需重建第block_idx块的第idx个表项"""
+        if idx == 0:
+            return self.E(0)
+        coords = self._entry_coords(block_idx, idx)
+        if coords is None:
+            return self.E(0)
+        x, y = coords
+        # 表项由本进程计算或来自可信的共享内存，跳过曲线方程检查
+        return self.E.point([x, y, 1], check=False)
+
+    def multiply(self, k):
+        """使用紧凑预计算表进行点乘法（标量的处理与PowerTable.multiply相同）"""
+        k = _table_scalar(k, self.window_size, self.num_blocks)
+        mask = (1 << self.window_size) - 1
+        result = self.E(0)
+        block_idx = 0
+        lookups = 0
+        while k:
+            idx = k & mask
+            if idx:
+                result += self.entry(block_idx, idx)
+                lookups += 1
+            k >>= self.window_size
+            block_idx += 1
+        if instrument.ENABLED:
+            instrument.count(instrument.TABLE_LOOKUP, lookups)
+            instrument.count(instrument.POINT_ADD, lookups)
+        return result
+
+    def multiply_many(self, ks):
+        """批量点乘，与PowerTable.multiply_many相同：Jacobian坐标累加，整批一次求逆"""
+        ks = [_table_scalar(k, self.window_size, self.num_blocks) for k in ks]
+        if fqbatch.use_batch(len(ks), self.batch_lanes) and min(ks) >= 0 and self._batch_limbs():
+            return _fixed_base_batch(self.E, self._limbs, self.window_size, ks)
+        J = JacobianCurve(self.E)
+        mask = (1 << self.window_size) - 1
+        results = []
+        lookups = 0
+        for k in ks:
+            k = int(k)
+            acc = J.zero
+            block_idx = 0
+            while k:
+                idx = k & mask
+                if idx:
+                    acc = J.add_affine(acc, self._entry_coords(block_idx, idx))
+                    lookups += 1
+                k >>= self.window_size
+                block_idx += 1
+            results.append(acc)
+        if instrument.ENABLED:
+            instrument.count(instrument.TABLE_LOOKUP, lookups)
+            instrument.count(instrument.POINT_ADD, lookups)
+        return J.normalize_many(results)
+
+    def _entry_ints(self, block_idx, idx):
+        """基域表项的整数坐标（无穷远点为None）"""
+        offset = self._offset(block_idx, idx)
+        if not any(self.buffer[offset:offset + self.entry_size]):
+            return None
+        width = self.width
+        return (int.from_bytes(self.buffer[offset:offset + width], 'big'),
+                int.from_bytes(self.buffer[offset + width:offset + 2 * width], 'big'))
+
+    def _batch_limbs(self):
+        """fqbatch使用的limb表（首次使用时直接从打包数据构建）；表项不在F_q中时为False"""
+        if self._limbs is None:
+            G = batch_curve(self.E) if self.ncoef == 1 else None
+            if G is None:
+                self._limbs = False
+            else:
+                size = 1 << self.window_size
+                self._limbs = G.prepare_table([[None] + [self._entry_ints(b, i) for i in range(1, size)]
+                                               for b in range(self.num_blocks)])
+        return self._limbs
+
+    @property
+    def nbytes(self):
+        """表数据占用的字节数"""
+        return len(self.buffer)
+
+    def to_shared_memory(self, name=None):
+        """
+        将表数据复制到共享内存，并让本对象改用共享内存中的数据。
+        :return: 共享内存名称，其他进程用 CompactPowerTable.from_shared_memory(name, E) 挂载
+        """
+        from multiprocessing import shared_memory
+        shm = shared_memory.SharedMemory(name=name, create=True, size=len(self.buffer))
+        shm.buf[:len(self.buffer)] = self.buffer
+        self.buffer = shm.buf
+        self._shm = shm
+        return shm.name
+
+    @classmethod
+    def from_shared_memory(cls, name, E, batch_lanes=None):
+        """挂载其他进程创建的共享内存表"""
+        from multiprocessing import shared_memory
+        shm = shared_memory.SharedMemory(name=name)
+        table = cls(E=E, buffer=shm.buf, batch_lanes=batch_lanes)
+        table._shm = shm
+        return table
+
+    def close(self, unlink=False):
+        """释放共享内存映射；unlink=True 时同时删除共享内存段（仅创建方调用）"""
+        if self._shm is None:
+            return
+        self.buffer = bytes(self.buffer)
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+        self._shm = None
+
 # 用于KGC生成密钥时（不加载kgc_pk）
 def load_kgc_params(params_file=None):
     """KGC专用：只加载曲线参数, 由曲线计算g1/g2, 不加载kgc_pk"""
@@ -228,7 +667,7 @@ def load_kgc_params(params_file=None):
     return pp
 
 # 用于User/Tracer等加载全部公钥参数
-def load_full_public_params(params_file=None):
+def load_full_public_params(params_file=None, g2_backend="sage"):
     """User/Tracer等：加载曲线参数, 由曲线计算g1/g2, 并加载kgc_pk"""
-    pp = PublicParams(params_file, load_kgc_key=True)
+    pp = PublicParams(params_file, load_kgc_key=True, g2_backend=g2_backend)
     return pp
\ No newline at end of file
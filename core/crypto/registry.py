@@ -0,0 +1,126 @@
+"""
+进程内共享的PublicParams注册表
+
+构建PublicParams要创建有限域、曲线、Frobenius映射和g1/g2/Q预计算表，
+同一进程内多次实例化User/Tracer时重复构建代价很高。注册表按参数文件
+（及同目录tuning.json）内容的摘要返回共享实例：
+- 内容相同的参数文件共用一个实例；文件被修改后摘要改变，自动加载新实例
+- 不同参数集（如阈值不同的多个部署）可以同时存在
+- 按最近使用顺序淘汰，条目数或估计内存超过上限时淘汰最久未使用的参数集
+  （已取得实例的实体继续持有它，不受淘汰影响）
+
+共享实例由多个实体同时使用，调用方不得修改其属性；KGC会替换g1/g2/Q，
+因此KGC仍自行加载独立的PublicParams。
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from core.crypto.public_params import load_full_public_params, point_to_string
+from core.crypto.tuning import TuningProfile
+from core.entities import DEFAULT_PARAMS_PATH
+
+DEFAULT_MAX_ENTRIES = 8
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def params_key(params_file, g2_backend="sage"):
+    """参数文件及其tuning.json内容的摘要，与g2_backend一起作为注册表的键"""
+    digest = hashlib.sha256()
+    with open(params_file, 'rb') as f:
+        digest.update(f.read())
+    tuning_path = TuningProfile.path_for(params_file)
+    if os.path.exists(tuning_path):
+        with open(tuning_path, 'rb') as f:
+            digest.update(b'\x00tuning\x00' + f.read())
+    return digest.hexdigest(), g2_backend
+
+
+def estimate_params_bytes(pp):
+    """按预计算表的表项数和点的文本长度粗略估计一个参数集占用的内存"""
+    total = 0
+    for P, table in ((pp.g1, pp.g1_table), (pp.g2, pp.g2_table), (pp.Q, pp.Q_table)):
+        if P is None or table is None:
+            continue
+        entries = sum(len(block) for block in table.table)
+        total += entries * 2 * len(point_to_string(P))
+    return total
+
+
+class ParamsRegistry:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (pp, 估计字节数)
+        self._lock = threading.Lock()
+        # 每个键一把加载锁：同一参数集只构建一次，不同参数集可以并行加载
+        self._loading = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, params_file=None, g2_backend="sage"):
+        """返回params_file对应的共享PublicParams（加载全部公钥参数）"""
+        params_file = os.path.abspath(params_file or DEFAULT_PARAMS_PATH)
+        key = params_key(params_file, g2_backend)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            load_lock = self._loading.setdefault(key, threading.Lock())
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+            pp = load_full_public_params(params_file, g2_backend=g2_backend)
+            size = estimate_params_bytes(pp)
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = (pp, size)
+                self._loading.pop(key, None)
+                self._evict()
+        return pp
+
+    def _evict(self):
+        # 至少保留刚加入的参数集
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self.nbytes > self.max_bytes):
+            self._entries.popitem(last=False)
+
+    @property
+    def nbytes(self):
+        return sum(size for _, size in self._entries.values())
+
+    def configure(self, max_entries=None, max_bytes=None):
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.nbytes, "hits": self.hits, "misses": self.misses}
+
+
+_registry = ParamsRegistry()
+
+
+def shared_public_params(params_file=None, g2_backend="sage"):
+    """进程内共享的PublicParams（User/Tracer使用），不得修改其属性"""
+    return _registry.get(params_file, g2_backend)
+
+
+def get_registry():
+    return _registry
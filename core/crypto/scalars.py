@@ -0,0 +1,110 @@
+"""
+批量随机标量源
+
+ModRing.random_element() 每次调用都经过Sage的通用随机数接口，既慢又没有
+密码学安全的保证。ScalarSource 一次从 os.urandom 取一大块字节放入缓冲区，
+按 n 的比特长度切片，屏蔽多余的高位后做拒绝采样，得到 [0, n) 上的均匀整数。
+
+seed 不为 None 时改用确定性模式：缓冲区由 SHAKE-256(seed || 块计数器) 填充，
+同一种子（和缓冲区大小）在任何平台上产生相同的标量序列，只用于基准测试和测试向量。
+
+fork出的子进程会继承父进程缓冲区中尚未用掉的字节，各子进程（如进程池的工作进程）
+会取出相同的签名随机数。因此子进程中非确定性模式的缓冲区在fork后立即丢弃。
+"""
+import hashlib
+import os
+import threading
+import weakref
+
+DEFAULT_BUFFER_SIZE = 4096
+
+_sources = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for source in list(_sources):
+        source._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class ScalarSource:
+    def __init__(self, n, buffer_size=DEFAULT_BUFFER_SIZE, seed=None):
+        self.n = int(n)
+        if self.n < 2:
+            raise ValueError("Scalar modulus must be at least 2")
+        bits = (self.n - 1).bit_length()
+        self.width = (bits + 7) // 8
+        self.mask = (1 << bits) - 1
+        # 缓冲区至少容纳一个标量
+        self.buffer_size = max(int(buffer_size), self.width)
+        self.seed = None if seed is None else self._seed_bytes(seed)
+        self._counter = 0
+        self._buffer = b""
+        self._offset = 0
+        self._lock = threading.Lock()
+        _sources.add(self)
+
+    def _after_fork(self):
+        # fork时其他线程可能持有锁，子进程中换一把新锁
+        self._lock = threading.Lock()
+        if self.seed is None:
+            self._buffer = b""
+            self._offset = 0
+
+    @staticmethod
+    def _seed_bytes(seed):
+        if isinstance(seed, bytes):
+            return seed
+        if isinstance(seed, int):
+            return seed.to_bytes((seed.bit_length() + 8) // 8, 'big', signed=True)
+        return str(seed).encode()
+
+    @property
+    def deterministic(self):
+        return self.seed is not None
+
+    def _refill(self):
+        if self.seed is None:
+            self._buffer = os.urandom(self.buffer_size)
+        else:
+            block = self.seed + self._counter.to_bytes(8, 'big')
+            self._buffer = hashlib.shake_256(block).digest(self.buffer_size)
+            self._counter += 1
+        self._offset = 0
+
+    def _next_candidate(self):
+        if self._offset + self.width > len(self._buffer):
+            self._refill()
+        start = self._offset
+        self._offset += self.width
+        return int.from_bytes(self._buffer[start:self._offset], 'big') & self.mask
+
+    def rand_int(self):
+        """[0, n) 上均匀分布的整数"""
+        with self._lock:
+            while True:
+                value = self._next_candidate()
+                if value < self.n:
+                    return value
+
+    def rand_ints(self, count):
+        """count个独立的 [0, n) 上均匀分布的整数"""
+        n = self.n
+        result = []
+        with self._lock:
+            while len(result) < count:
+                value = self._next_candidate()
+                if value < n:
+                    result.append(value)
+        return result
+
+    def reseed(self, seed=None):
+        """切换到种子seed的确定性模式（None恢复os.urandom），并丢弃缓冲区中的剩余字节"""
+        with self._lock:
+            self.seed = None if seed is None else self._seed_bytes(seed)
+            self._counter = 0
+            self._buffer = b""
+            self._offset = 0
@@ -1,5 +1,12 @@
+import secrets
 from core.crypto.public_params import PowerTable
 from sage.all import Integer
+from core.crypto import instrument
+from core.crypto.jacobian import JacobianCurve
+from core.crypto.multiexp import multi_multiply, simultaneous_multiply
+
+# 批量验证中随机线性组合系数的比特数
+BATCH_BITS = 128
 
 def schnorr_proof(d, pp):
     r = pp.rand_int()
@@ -8,10 +15,23 @@ def schnorr_proof(d, pp):
     s = r + d * Integer(c)
     return (T, s)
 
+def batch_schnorr_proof(d, count, pp):
+    """为同一私钥d生成count个独立的Schnorr证明，承诺T用multiply_many批量计算"""
+    r_list = pp.rand_ints(count)
+    T_list = pp.g1_table.multiply_many(r_list)
+    proofs = []
+    for r, T in zip(r_list, T_list):
+        c = pp.zr_hash(T)
+        proofs.append((T, r + d * Integer(c)))
+    return proofs
+
 def schnorr_verify(D, proof, pp):
+    """s·g1 - c·D == T，两项共用一条倍点链（multiexp.simultaneous_multiply）"""
     T, s = proof
     c = pp.zr_hash(T)
-    return pp.g1_table.multiply(Integer(s)) == T + D * Integer(c)
+    if instrument.ENABLED:
+        instrument.count(instrument.SCALAR_MUL)
+    return simultaneous_multiply([pp.g1, D], [Integer(s) % pp.n, -Integer(c)], pp.E(0)) == T
 
 
 def batch_schnorr_verify(D_list, proof_list, pp):
@@ -20,12 +40,72 @@ def batch_schnorr_verify(D_list, proof_list, pp):
     
     s_sum = 0
     right_sum = pp.E(0)
+    c_list = []
     
     for i in range(len(D_list)):
-        D = D_list[i]
         T, s = proof_list[i]
-        c = pp.zr_hash(T)
+        c_list.append(pp.zr_hash(T) % pp.n)
         s_sum += Integer(s)
-        right_sum += T + D * Integer(c)
+        right_sum += T
+    # Σ D_i·c_i 的底点各不相同，用联合比特窗口共享倍点链
+    right_sum += multi_multiply(list(D_list), c_list, pp.E(0), arity=pp.tuning.msm_arity, min_lanes=pp.tuning.batch_lanes)
+    if instrument.ENABLED:
+        instrument.count(instrument.POINT_ADD, len(D_list))
     
-    return pp.g1_table.multiply(s_sum) == right_sum
\ No newline at end of file
+    return pp.g1_table.multiply(s_sum % pp.n) == right_sum
+
+
+def dleq_proofs(d, D, C1_list, s_list, pp):
+    """
+    部分解密的Chaum-Pedersen证明：对每个 (C1, s = d·C1) 证明 log_C1(s) == log_g1(D)，D = d·g1。
+    A1 = r·g1，A2 = r·C1，c = H(D, C1, s, A1, A2)，z = r + c·d。
+    证明绑定C1和份额s，不能挪用到其他密文或伪造的份额上。
+    A1用g1的预计算表批量计算，A2在Jacobian坐标下逐个点乘后整批一次求逆
+    :return: [(A1, A2, z), ...]
+    """
+    r_list = [int(r) for r in pp.rand_ints(len(C1_list))]
+    A1_list = pp.g1_table.multiply_many(r_list)
+    J = JacobianCurve(pp.E)
+    A2_list = J.normalize_many([J.multiply(J.from_affine(C1), r) for C1, r in zip(C1_list, r_list)])
+    if instrument.ENABLED:
+        instrument.count(instrument.SCALAR_MUL, len(C1_list))
+    proofs = []
+    for C1, s, r, A1, A2 in zip(C1_list, s_list, r_list, A1_list, A2_list):
+        c = pp.zr_hash((D, C1, s, A1, A2))
+        proofs.append((A1, A2, Integer(r) + Integer(d) * Integer(c)))
+    return proofs
+
+def dleq_verify(D, C1, s, proof, pp):
+    """z·g1 == A1 + c·D 且 z·C1 == A2 + c·s"""
+    A1, A2, z = proof
+    c = Integer(pp.zr_hash((D, C1, s, A1, A2)))
+    z = Integer(z) % pp.n
+    if instrument.ENABLED:
+        instrument.count(instrument.SCALAR_MUL, 2)
+    zero = pp.E(0)
+    return (simultaneous_multiply([pp.g1, D], [z, -c], zero) == A1
+            and simultaneous_multiply([C1, s], [z, -c], zero) == A2)
+
+def batch_dleq_verify(D_list, C1_list, s_list, proof_list, pp):
+    """
+    用随机线性组合批量验证dleq_proofs的证明：
+    Σ ρ_i·(z_i·g1 - A1_i - c_i·D_i) + Σ σ_i·(z_i·C1_i - A2_i - c_i·s_i) == 0，
+    ρ_i、σ_i为BATCH_BITS比特随机数；任一证明无效时整批通过的概率不超过 2^-BATCH_BITS
+    """
+    if not len(D_list) == len(C1_list) == len(s_list) == len(proof_list):
+        raise ValueError("D_list, C1_list, s_list and proof_list must have the same length")
+    if any(proof is None for proof in proof_list):
+        return False
+    n = int(pp.n)
+    g1_scalar = 0
+    points, scalars = [], []
+    for D, C1, s, (A1, A2, z) in zip(D_list, C1_list, s_list, proof_list):
+        c = int(pp.zr_hash((D, C1, s, A1, A2)))
+        z = int(z) % n
+        rho, sigma = secrets.randbits(BATCH_BITS), secrets.randbits(BATCH_BITS)
+        g1_scalar += rho * z
+        points += [A1, D, C1, A2, s]
+        scalars += [-rho, -rho * c % n, sigma * z % n, -sigma, -sigma * c % n]
+    total = pp.g1_table.multiply(g1_scalar % n) + multi_multiply(points, scalars, pp.E(0), arity=pp.tuning.msm_arity,
+                                                                min_lanes=pp.tuning.batch_lanes)
+    return total.is_zero()
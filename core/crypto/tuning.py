@@ -0,0 +1,85 @@
+"""
+按机器调优的性能参数
+
+bench autotune 在当前机器上测量点运算、预计算表和进程池的开销，
+把结果写入 params.json 同目录下的 tuning.json；PublicParams 加载参数时
+读取该文件（不存在时使用与原先硬编码一致的默认值），实体类从 pp.tuning 取值。
+"""
+import json
+import os
+
+TUNING_FILE_NAME = 'tuning.json'
+
+# 字段 -> (默认值, 最小值, 最大值)
+FIELDS = {
+    # 固定底点（g1/g2/Q）预计算表的窗口
+    'fixed_window': (4, 1, 8),
+    # 环成员PID预计算表的窗口
+    'member_window': (4, 1, 8),
+    # 每个签名临时构建的C2表的窗口
+    'ephemeral_window': (2, 1, 8),
+    # 多项点乘每组的底点数（子集和表大小为 2^msm_arity），上限为multiexp.MAX_ARITY
+    'msm_arity': (4, 1, 4),
+    # 条目数不少于该值时才值得交给进程池
+    'parallel_threshold': (256, 1, None),
+    # 进程池的工作进程数
+    'workers': (os.cpu_count() or 1, 1, None),
+    # point_from_string的坐标缓存条目数
+    'point_cache_size': (1024, 0, None),
+    # 批量点运算的lane数不少于该值时改用NumPy limb运算（core.crypto.fqbatch），0为关闭
+    'batch_lanes': (256, 0, None),
+    # 验证结果缓存的默认条目数
+    'verification_cache_size': (10000, 0, None),
+}
+
+
+class TuningProfile:
+    def __init__(self, machine=None, **values):
+        """
+        :param machine: 生成该配置的机器信息（只做记录）
+        :param values: FIELDS中的字段，缺省取默认值
+        """
+        unknown = set(values) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown tuning fields: {', '.join(sorted(unknown))}")
+        for name, (default, low, high) in FIELDS.items():
+            value = int(values.get(name, default))
+            if value < low or (high is not None and value > high):
+                raise ValueError(f"Tuning field {name}={value} is out of range")
+            setattr(self, name, value)
+        self.machine = machine or {}
+
+    @staticmethod
+    def path_for(params_file):
+        """params.json 同目录下的 tuning.json"""
+        return os.path.join(os.path.dirname(os.path.abspath(params_file)), TUNING_FILE_NAME)
+
+    @classmethod
+    def from_dict(cls, data):
+        # 忽略未知字段，旧版本的程序可以读取新版本写出的配置
+        values = {name: data[name] for name in FIELDS if name in data}
+        return cls(machine=data.get('machine'), **values)
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in FIELDS}
+        data['machine'] = self.machine
+        return data
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def for_params(cls, params_file):
+        """读取参数文件旁的tuning.json，不存在时返回默认配置"""
+        path = cls.path_for(params_file)
+        if os.path.exists(path):
+            return cls.load(path)
+        return cls()
+
+    def save(self, path):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
@@ -9,6 +9,8 @@ DEFAULT_TRACER_KEYS_DIR = os.path.join(DEFAULT_CONFIG_DIR, 'tracer')
 DEFAULT_TRACER_KEYS_FILE = os.path.join(DEFAULT_TRACER_KEYS_DIR, 'tracer_keys.json')
 DEFAULT_TRACER_SINGLE_KEY_FILE_FMT = os.path.join(DEFAULT_TRACER_KEYS_DIR, 'tracer_{}_key.json')
 DEFAULT_TRACER_SINGLE_PUBLIC_KEY_FILE_FMT = os.path.join(DEFAULT_TRACER_KEYS_DIR, 'tracer_{}_pub.json')
+DEFAULT_TRACER_COMMITMENTS_FILE = os.path.join(DEFAULT_TRACER_KEYS_DIR, 'tracer_commitments.json')
+DEFAULT_TRACER_AUTH_KEY_FILE = os.path.join(DEFAULT_TRACER_KEYS_DIR, 'tracer_auth.key')
 
 DEFAULT_USER_KEYS_DIR = os.path.join(DEFAULT_CONFIG_DIR, 'user')
 DEFAULT_USER_SINGLE_KEY_FILE_FMT = os.path.join(DEFAULT_USER_KEYS_DIR, 'user_{}_key.json')
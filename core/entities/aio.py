@@ -0,0 +1,287 @@
+"""
+User / Tracer 的asyncio接口
+
+签名、验证、部分解密和组合都是长时间占用CPU的同步调用，直接在事件循环中调用会阻塞数秒。
+AsyncUser / AsyncTracer 把这些调用交给共用的进程池（WorkerPool）：
+- 进程数取tuning.workers；一批部分解密不少于tuning.parallel_threshold条时切块分给多个工作进程，
+  否则整批交给一个工作进程；每个工作进程按参数文件加载一次共享的PublicParams，
+  User/Tracer（含密钥）按 (ID, 密钥文件及其修改时间) 缓存，密钥文件、环成员公钥文件都在工作进程中读取
+- 进程间只传递可JSON化的数据：签名为User.serialize_signature的dict，点为point_to_string字符串，
+  部分解密结果为Tracer.serialize_decrypt_result的dict
+- 参数完全相同的并发请求合并为一次计算（同一签名请求的各等待者得到同一个签名）
+- timeout为单个等待者的超时；等待者取消或超时不影响同一请求的其他等待者，
+  全部等待者都离开后，尚未开始的任务从进程池中撤回（已在运行的任务无法中断，结果被丢弃）
+
+用法:
+    async with WorkerPool() as pool:
+        user = AsyncUser("1001", pool=pool)
+        sig_dict = await user.sign(message, ring_user_ids, timeout=30)
+        valid = await user.verify(message, sig_dict, ring_user_ids)
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from core.crypto.tuning import TuningProfile
+from . import DEFAULT_PARAMS_PATH, DEFAULT_USER_KEYS_DIR, DEFAULT_USER_SINGLE_KEY_FILE_FMT, DEFAULT_TRACER_SINGLE_KEY_FILE_FMT
+
+# ----------- 工作进程中执行的函数 -----------
+# 工作进程内的实体缓存：(类名, ID, 参数文件, 密钥文件, 密钥文件修改时间) -> User/Tracer
+_entities = {}
+
+
+def _warm(params_file):
+    """工作进程的initializer：预先加载共享的PublicParams"""
+    from core.crypto.registry import shared_public_params
+    shared_public_params(params_file)
+
+
+def _entity(cls, entity_id, params_file, key_file, load_key=True):
+    try:
+        mtime = os.stat(key_file).st_mtime_ns if load_key else None
+    except OSError:
+        mtime = None
+    key = (cls.__name__, entity_id, params_file, key_file, mtime)
+    entity = _entities.get(key)
+    if entity is None:
+        entity = cls(entity_id, params_file=params_file, key_file=key_file, load_key=load_key)
+        # 密钥文件更新后旧条目不再命中，一并清除
+        for stale in [k for k in _entities if k[:4] == key[:4]]:
+            del _entities[stale]
+        _entities[key] = entity
+    return entity
+
+
+def _sign(user_id, params_file, key_file, message, ring_user_ids, event, user_dir, linkable):
+    from core.entities.user import User
+    user = _entity(User, user_id, params_file, key_file)
+    return User.serialize_signature(user.sign(message, ring_user_ids, event, user_dir, linkable=linkable))
+
+
+def _verify(user_id, params_file, sig_dict, message, ring_user_ids, event, user_dir):
+    from core.entities.user import User
+    user = _entity(User, user_id, params_file, None, load_key=False)
+    return user.verify(message, User.deserialize_signature(sig_dict, user.pp), ring_user_ids, event, user_dir)
+
+
+def _partial_decrypt(tracer_id, params_file, key_file, enc_list, prove):
+    from core.crypto.public_params import point_from_string
+    from core.entities.tracer import Tracer
+    tracer = _entity(Tracer, tracer_id, params_file, key_file)
+    pp = tracer.pp
+    signatures = [(tuple(point_from_string(s, pp.F, pp.E) for s in enc) + (None,), None) for enc in enc_list]
+    return [Tracer.serialize_decrypt_result(result) for result in tracer.partial_decrypt_batch(signatures, prove)]
+
+
+def _combine(params_file, D_strs, results, enc):
+    from core.crypto.public_params import point_from_string, point_to_string
+    from core.crypto.registry import shared_public_params
+    from core.entities.tracer import Tracer
+    pp = shared_public_params(params_file)
+    D_list = [point_from_string(s, pp.F, pp.E) for s in D_strs]
+    partials = [Tracer.deserialize_decrypt_result(r, pp) for r in results]
+    PID_encryption = tuple(point_from_string(s, pp.F, pp.E) for s in enc) + (None,)
+    return point_to_string(Tracer.combine(D_list, partials, (PID_encryption, None), pp))
+
+
+# ----------- 事件循环一侧 -----------
+def _point_str(P):
+    if isinstance(P, str):
+        return P
+    from core.crypto.public_params import point_to_string
+    return point_to_string(P)
+
+
+def _signature_dict(signature):
+    """签名dict原样返回，(PID_encryption, PID_signature) 元组按User.serialize_signature序列化"""
+    if isinstance(signature, dict):
+        return signature
+    from core.entities.user import User
+    return User.serialize_signature(signature)
+
+
+def _encryption_strs(signature):
+    """签名dict、签名元组或PID_encryption -> C1、C2的点字符串（追踪不需要第三项T，v2签名的T也不是点）"""
+    if isinstance(signature, dict):
+        return list(signature["PID_encryption"][:2])
+    PID_encryption = signature[0] if len(signature) == 2 else signature
+    return [_point_str(P) for P in PID_encryption[:2]]
+
+
+def _ring_list(ring_user_ids):
+    """环ID统一为字符串列表（文件路径原样保留，由工作进程读取）"""
+    if isinstance(ring_user_ids, str):
+        return ring_user_ids
+    return [str(uid) for uid in ring_user_ids]
+
+
+class WorkerPool:
+    """
+    AsyncUser / AsyncTracer 共用的进程池
+    :param workers: 工作进程数，缺省取参数文件旁tuning.json中的workers
+    :param parallel_threshold: 批量任务条数不少于该值时切块并行（见chunks），缺省取tuning.json中的parallel_threshold
+    :param mp_context: multiprocessing上下文（可选），例如 multiprocessing.get_context("spawn")
+    """
+    def __init__(self, params_file=DEFAULT_PARAMS_PATH, workers=None, mp_context=None, parallel_threshold=None):
+        self.params_file = os.path.abspath(params_file or DEFAULT_PARAMS_PATH)
+        tuning = TuningProfile.for_params(self.params_file)
+        self.workers = workers or tuning.workers
+        self.parallel_threshold = parallel_threshold or tuning.parallel_threshold
+        self.mp_context = mp_context
+        self._executor = None
+        # 请求键 -> [asyncio.Future, 等待者数]
+        self._pending = {}
+        self.stats = {"requests": 0, "deduplicated": 0, "submitted": 0, "abandoned": 0}
+
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=self.mp_context,
+                                                 initializer=_warm, initargs=(self.params_file,))
+        return self._executor
+
+    def chunks(self, items):
+        """
+        把一批任务切块：条数不少于parallel_threshold且workers > 1时切成约两倍进程数的块
+        （与SigningHost相同），否则整批为一块
+        """
+        items = list(items)
+        if self.workers <= 1 or len(items) < self.parallel_threshold:
+            return [items]
+        chunk_size = max(1, math.ceil(len(items) / (2 * self.workers)))
+        return [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+    @staticmethod
+    def request_key(fn, args):
+        return hashlib.sha256(json.dumps([fn.__name__, args], sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    async def call(self, fn, *args, timeout=None):
+        """
+        在进程池中执行fn(*args)；参数相同的并发调用共用一次计算
+        :param timeout: 本次等待的超时（秒），超时抛出asyncio.TimeoutError
+        """
+        self.stats["requests"] += 1
+        key = self.request_key(fn, args)
+        entry = self._pending.get(key)
+        if entry is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor(), fn, *args)
+            entry = [future, 0]
+            self._pending[key] = entry
+            self.stats["submitted"] += 1
+            future.add_done_callback(lambda f: self._finished(key, entry, f))
+        else:
+            self.stats["deduplicated"] += 1
+        entry[1] += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(entry[0]), timeout)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not entry[0].done():
+                # 没有等待者了：撤回尚未开始的任务（已在运行的任务算完后丢弃结果）
+                entry[0].cancel()
+                self.stats["abandoned"] += 1
+                if self._pending.get(key) is entry:
+                    del self._pending[key]
+
+    def _finished(self, key, entry, future):
+        if self._pending.get(key) is entry:
+            del self._pending[key]
+        if future.cancelled():
+            return
+        # 取走异常，避免无人等待时的 "exception was never retrieved" 警告
+        if isinstance(future.exception(), BrokenProcessPool):
+            # 工作进程异常退出后进程池不可再用，下次调用重建
+            self._executor = None
+
+    def close(self, wait=True):
+        """关闭进程池，未开始的任务被撤回"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    async def aclose(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, lambda: executor.shutdown(wait=True, cancel_futures=True))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+class AsyncUser:
+    """
+    User的asyncio接口
+    :param pool: WorkerPool，缺省为本对象单独创建一个（用完调用close）
+    """
+    def __init__(self, user_id, params_file=DEFAULT_PARAMS_PATH, key_file=None, pool=None):
+        self.user_id = str(user_id)
+        self.params_file = os.path.abspath(params_file or DEFAULT_PARAMS_PATH)
+        self.key_file = os.path.abspath(key_file or DEFAULT_USER_SINGLE_KEY_FILE_FMT.format(self.user_id))
+        self._own_pool = pool is None
+        self.pool = pool or WorkerPool(self.params_file)
+
+    async def sign(self, message, ring_user_ids, event="default", user_dir=DEFAULT_USER_KEYS_DIR, linkable=False, timeout=None):
+        """与User.sign相同，返回User.serialize_signature格式的dict"""
+        return await self.pool.call(_sign, self.user_id, self.params_file, self.key_file, message,
+                                    _ring_list(ring_user_ids), event, os.path.abspath(user_dir), linkable, timeout=timeout)
+
+    async def verify(self, message, signature, ring_user_ids, event="default", user_dir=DEFAULT_USER_KEYS_DIR, timeout=None):
+        """
+        与User.verify相同（不使用验证缓存）
+        :param signature: 签名dict或 (PID_encryption, PID_signature) 元组
+        """
+        return await self.pool.call(_verify, self.user_id, self.params_file, _signature_dict(signature), message,
+                                    _ring_list(ring_user_ids), event, os.path.abspath(user_dir), timeout=timeout)
+
+    async def close(self):
+        if self._own_pool:
+            await self.pool.aclose()
+
+
+class AsyncTracer:
+    """
+    Tracer的asyncio接口
+    :param pool: WorkerPool，缺省为本对象单独创建一个（用完调用close）
+    """
+    def __init__(self, tracer_id, params_file=DEFAULT_PARAMS_PATH, key_file=None, pool=None):
+        self.tracer_id = tracer_id
+        self.params_file = os.path.abspath(params_file or DEFAULT_PARAMS_PATH)
+        self.key_file = os.path.abspath(key_file or DEFAULT_TRACER_SINGLE_KEY_FILE_FMT.format(tracer_id))
+        self._own_pool = pool is None
+        self.pool = pool or WorkerPool(self.params_file)
+
+    async def partial_decrypt(self, signature, timeout=None):
+        """
+        与Tracer.partial_decrypt相同
+        :param signature: 签名dict、签名元组或PID_encryption（点或字符串）
+        :return: Tracer.serialize_decrypt_result格式的dict
+        """
+        return (await self.partial_decrypt_batch([signature], timeout=timeout))[0]
+
+    async def partial_decrypt_batch(self, signatures, prove=True, timeout=None):
+        """与Tracer.partial_decrypt_batch相同；大批量按WorkerPool.chunks切块，各块在不同工作进程中并行计算"""
+        enc_list = [_encryption_strs(signature) for signature in signatures]
+        parts = await asyncio.gather(*(self.pool.call(_partial_decrypt, self.tracer_id, self.params_file, self.key_file,
+                                                      chunk, prove, timeout=timeout)
+                                       for chunk in self.pool.chunks(enc_list)))
+        return [result for part in parts for result in part]
+
+    async def combine(self, D_list, partial_decrypt_results, signature, timeout=None):
+        """
+        与Tracer.combine相同（批量验证DLEQ证明）
+        :param D_list: 各追踪者的pub_share（点或字符串）
+        :param partial_decrypt_results: Tracer.serialize_decrypt_result格式的dict列表
+        :return: PID的point_to_string字符串
+        """
+        return await self.pool.call(_combine, self.params_file, [_point_str(D) for D in D_list],
+                                    list(partial_decrypt_results), _encryption_strs(signature), timeout=timeout)
+
+    async def close(self):
+        if self._own_pool:
+            await self.pool.aclose()
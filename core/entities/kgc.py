@@ -1,7 +1,8 @@
 import json
 import os
-from core.crypto.public_params import load_kgc_params, point_to_string, point_from_string, PowerTable
-from . import DEFAULT_PARAMS_PATH, DEFAULT_KGC_KEY_PATH, DEFAULT_TRACER_KEYS_FILE, DEFAULT_TRACER_SINGLE_KEY_FILE_FMT, DEFAULT_TRACER_SINGLE_PUBLIC_KEY_FILE_FMT, DEFAULT_TRACER_KEYS_DIR
+from core.crypto.public_params import load_kgc_params, point_to_string, point_from_string
+from core.crypto import feldman
+from . import DEFAULT_PARAMS_PATH, DEFAULT_KGC_KEY_PATH, DEFAULT_TRACER_KEYS_FILE, DEFAULT_TRACER_SINGLE_KEY_FILE_FMT, DEFAULT_TRACER_SINGLE_PUBLIC_KEY_FILE_FMT, DEFAULT_TRACER_KEYS_DIR, DEFAULT_TRACER_COMMITMENTS_FILE
 
 class KGC:
     """
@@ -14,6 +15,7 @@ class KGC:
         self.params_path = params_path
         self.key_path = key_path
         # 加载曲线与协议参数
+        # KGC会改写g1/g2/Q及其预计算表，使用独立的参数实例而不是core.crypto.registry中的共享实例
         self.pp = load_kgc_params(params_path)
         self.s = None
 
@@ -41,12 +43,12 @@ class KGC:
                 key_s = key_json.get("s", None)
                 if key_g1 is None or key_g2 is None or key_Q is None or key_s is None:
                     raise ValueError("key.json must contain g1, g2, Q and s")
-                self.pp.g1 = point_from_string(key_g1, self.pp.F, self.pp.E)
-                self.pp.g2 = point_from_string(key_g2, self.pp.F, self.pp.E)
-                self.pp.Q = point_from_string(key_Q, self.pp.F, self.pp.E)
-                self.pp.g1_table = PowerTable(self.pp.g1)
-                self.pp.g2_table = PowerTable(self.pp.g2)
-                self.pp.Q_table = PowerTable(self.pp.Q)
+                self.pp.g1 = point_from_string(key_g1, self.pp.F, self.pp.E, trusted=True, cache=True)
+                self.pp.g2 = point_from_string(key_g2, self.pp.F, self.pp.E, trusted=True, cache=True)
+                self.pp.Q = point_from_string(key_Q, self.pp.F, self.pp.E, trusted=True, cache=True)
+                self.pp.g1_table = self.pp.make_table(self.pp.g1)
+                self.pp.g2_table = self.pp.make_g2_table(self.pp.g2)
+                self.pp.Q_table = self.pp.make_table(self.pp.Q)
                 self.s = int(key_s)
             else:
                 # 若无key.json，则新生成s和Q
@@ -64,6 +66,8 @@ class KGC:
 
         # 追踪者密钥参数
         self.tracer_keys = {}
+        # 最近一次generate_tracer_keys的Feldman承诺
+        self.commitments = None
 
     @property
     def g1(self): return self.pp.g1
@@ -122,26 +126,38 @@ class KGC:
             json.dump(params, f, indent=2)
         self.params = params
 
-    def generate_tracer_keys(self, save_all=True, save_single=True, tracer_keys_path=DEFAULT_TRACER_KEYS_FILE, single_key_file_fmt=DEFAULT_TRACER_SINGLE_KEY_FILE_FMT, single_public_key_file_fmt=DEFAULT_TRACER_SINGLE_PUBLIC_KEY_FILE_FMT):
+    def generate_tracer_keys(self, save_all=True, save_single=True, tracer_keys_path=DEFAULT_TRACER_KEYS_FILE, single_key_file_fmt=DEFAULT_TRACER_SINGLE_KEY_FILE_FMT, single_public_key_file_fmt=DEFAULT_TRACER_SINGLE_PUBLIC_KEY_FILE_FMT, commitments_path=DEFAULT_TRACER_COMMITMENTS_FILE, fmt="json"):
         """
         生成所有追踪者的Shamir密钥份额，并为每个追踪者生成公钥g1_table*da_share
         trace id 从1开始
+        :param commitments_path: Feldman承诺文件（None时不写），C_0 = Q
+        :param fmt: "json" 为原有的JSON文件；"binary" 时tracer_keys_path写为批量二进制文件，不写单个文件
         """
         # 生成t-1个随机系数
-        poly_coeffs = [self.s] + [self.pp.rand_int() for _ in range(self.threshold_tracers - 1)]
-        # trace id 从1开始
-        for trace_id in range(0, self.num_tracers):
-            x_i = trace_id + 1 # 可以取其他坐标值，但需要保证x_i互不相同
-            share = sum(poly_coeffs[j] * (x_i ** j) for j in range(self.threshold_tracers))
-            share = int(share % int(self.pp.n))
-            pub_share = self.g1_table.multiply(share)
+        poly_coeffs = [int(self.s)] + [int(c) for c in self.pp.rand_ints(self.threshold_tracers - 1)]
+        # trace id 从1开始；x_i可以取其他坐标值，但需要保证x_i互不相同
+        xs = [trace_id + 1 for trace_id in range(self.num_tracers)]
+        # Horner法求值，每个追踪者 t 次模乘
+        shares = feldman.share_secret(poly_coeffs, xs, int(self.pp.n))
+        # 所有公钥份额在Jacobian坐标下批量计算，整批一次求逆
+        pub_shares = self.g1_table.multiply_many(shares)
+        self.commitments = feldman.commit(poly_coeffs, self.pp)
+        if commitments_path is not None:
+            feldman.save_commitments(commitments_path, self.commitments, self.threshold_tracers)
+        if fmt == "binary":
+            keys = [{'tracer_id': trace_id, 'x_i': x_i, 'd_share': share, 'pub_share': pub_share}
+                    for trace_id, (x_i, share, pub_share) in enumerate(zip(xs, shares, pub_shares))]
+            with open(tracer_keys_path, 'wb') as f:
+                feldman.write_tracer_keys(f, keys, self.threshold_tracers, self.pp)
+        for trace_id, (x_i, share, pub_share) in enumerate(zip(xs, shares, pub_shares)):
             self.tracer_keys[trace_id] = {
                 'tracer_id': trace_id,
                 'x_i': x_i,
                 'd_share': share,
                 'pub_share': point_to_string(pub_share)
             }
-        self.save_tracer_keys(save_all=save_all, save_single=save_single, tracer_keys_path=tracer_keys_path, single_key_file_fmt=single_key_file_fmt, single_public_key_file_fmt=single_public_key_file_fmt)
+        if fmt != "binary":
+            self.save_tracer_keys(save_all=save_all, save_single=save_single, tracer_keys_path=tracer_keys_path, single_key_file_fmt=single_key_file_fmt, single_public_key_file_fmt=single_public_key_file_fmt)
         return self.tracer_keys
 
     def save_tracer_keys(self, save_all=True, save_single=True, tracer_keys_path=DEFAULT_TRACER_KEYS_FILE, single_key_file_fmt=DEFAULT_TRACER_SINGLE_KEY_FILE_FMT, single_public_key_file_fmt=DEFAULT_TRACER_SINGLE_PUBLIC_KEY_FILE_FMT):
@@ -1,19 +1,24 @@
 import json
 import os
-from core.crypto.public_params import load_full_public_params, point_from_string, point_to_string, PowerTable
-from core.crypto.schnorr import schnorr_proof
-from core.crypto.schnorr import batch_schnorr_verify
+from core.crypto.public_params import point_from_string, point_to_string
+from core.crypto.registry import shared_public_params
+from core.crypto.schnorr import dleq_proofs
+from core.crypto.schnorr import batch_dleq_verify
+from core.crypto import instrument, feldman
+from core.crypto.multiexp import multi_multiply
+from core.crypto.jacobian import JacobianCurve, multiply_lanes
 from sage.all import Integer, inverse_mod
-from . import DEFAULT_PARAMS_PATH, DEFAULT_TRACER_SINGLE_KEY_FILE_FMT
+from . import DEFAULT_PARAMS_PATH, DEFAULT_TRACER_SINGLE_KEY_FILE_FMT, DEFAULT_TRACER_SINGLE_PUBLIC_KEY_FILE_FMT
 
 class Tracer:
-    def __init__(self, tracer_id, params_file=DEFAULT_PARAMS_PATH, key_file=None, load_key=True):
+    def __init__(self, tracer_id, params_file=DEFAULT_PARAMS_PATH, key_file=None, load_key=True, pp=None):
         """
         初始化追踪者，可指定公共参数文件和密钥文件。
         :param tracer_id: 追踪者ID
         :param params_file: 公共参数文件路径
         :param key_file: 追踪者密钥文件路径
         :param load_key: 是否加载密钥（可选）
+        :param pp: 已加载的公共参数（可选，缺省取进程内共享的参数集，见core.crypto.registry）
         """
         self.tracer_id = tracer_id
         self.params_file = params_file
@@ -22,7 +27,7 @@ class Tracer:
         self.key_file = key_file
 
         # 加载公共参数
-        self.pp = load_full_public_params(self.params_file)
+        self.pp = pp if pp is not None else shared_public_params(self.params_file)
 
         if load_key:
             self.load_key(self.key_file)
@@ -30,6 +35,9 @@ class Tracer:
     def load_key(self, key_file=None):
         """从文件加载追踪者密钥"""
         key_file = key_file or self.key_file
+        if os.path.exists(key_file) and feldman.is_tracer_keys_file(key_file):
+            self._load_binary_key(key_file)
+            return
         try:
             with open(key_file, 'r') as f:
                 key_data = json.load(f)
@@ -45,7 +53,7 @@ class Tracer:
                 key_info = key_data[self.tracer_id]
             
             self.x_i = key_info['x_i']
-            self.pub_share = point_from_string(key_info['pub_share'], self.pp.F, self.pp.E)
+            self.pub_share = point_from_string(key_info['pub_share'], self.pp.F, self.pp.E, trusted=True)
             self.d_share = key_info['d_share']
             self.proof = None
             
@@ -54,22 +62,109 @@ class Tracer:
         except KeyError as e:
             raise ValueError(f"Invalid key file format: missing {e}")
 
+    def _load_binary_key(self, key_file):
+        """从批量二进制密钥文件（kgc tracerkeygen --format binary）中查找本追踪者的密钥"""
+        with open(key_file, 'rb') as f:
+            for key in feldman.iter_tracer_keys(f, self.pp):
+                if str(key['tracer_id']) == str(self.tracer_id):
+                    if key['d_share'] is None:
+                        raise ValueError(f"{key_file} is a public tracer key file")
+                    self.x_i = key['x_i']
+                    self.pub_share = key['pub_share']
+                    self.d_share = key['d_share']
+                    self.proof = None
+                    return
+        raise ValueError(f"Tracer {self.tracer_id} not found in key file")
+
     def partial_decrypt(self, signature):
         """
         输入签名信息生成部分解密
         :param signature_info: 签名信息，可以是序列化的dict或(C1, C2, T)元组
         :return: (s_i, proof) 部分解密结果和证明
         """
-        PID_encryption, PID_signature = signature
-        C1 = PID_encryption[0]
-        # 创建C1的预计算表
-        C1_table = PowerTable(C1)
-        
-        # 部分解密
-        s_share = C1_table.multiply(self.d_share)
-        proof = schnorr_proof(self.d_share, self.pp)
-        
-        return (self.x_i, s_share, proof)
+        return self.partial_decrypt_batch([signature])[0]
+
+    def partial_decrypt_batch(self, signatures, prove=True):
+        """
+        批量部分解密：每个C1只用一次，不再为其构建预计算表，
+        而是在Jacobian坐标下直接点乘，整批结果一次求逆归一化；
+        批量足够大时各C1作为lane交给fqbatch一起计算（见jacobian.multiply_lanes）
+        :param signatures: 签名列表
+        :param prove: 为每个份额生成绑定 (C1, s_share, pub_share) 的DLEQ证明（schnorr.dleq_proofs）；
+                      份额不交给他人、由本进程直接组合时可传False，proof为None
+        :return: [(x_i, s_share, proof), ...]，与partial_decrypt的返回值一一对应
+        """
+        with instrument.phase("partial_decrypt"):
+            d = int(self.d_share)
+            C1_list = [PID_encryption[0] for PID_encryption, _ in signatures]
+            s_shares = multiply_lanes(self.pp.E, C1_list, d, min_lanes=self.pp.tuning.batch_lanes)
+            if s_shares is None:
+                J = JacobianCurve(self.pp.E)
+                s_shares = J.normalize_many([J.multiply(J.from_affine(C1), d) for C1 in C1_list])
+            if prove:
+                proofs = dleq_proofs(self.d_share, self.pub_share, C1_list, s_shares, self.pp)
+            else:
+                proofs = [None] * len(signatures)
+            if instrument.ENABLED:
+                instrument.count(instrument.SCALAR_MUL, len(signatures))
+
+        return [(self.x_i, s_share, proof) for s_share, proof in zip(s_shares, proofs)]
+
+    def partial_decrypt_archive(self, archive, batch_size=256, event=None, ring_user_ids=None, prove=True):
+        """
+        按batch_size分批对签名归档中的签名做部分解密（可按event/环筛选）
+        :param archive: core.storage.archive.SignatureArchive
+        :return: 逐条产出 (签名摘要, (x_i, s_share, proof))
+        """
+        batch = []
+        for entry, signature in archive.iter_signatures(self.pp, event, ring_user_ids):
+            batch.append((entry.digest_hex, signature))
+            if len(batch) >= batch_size:
+                yield from self._decrypt_digests(batch, prove)
+                batch = []
+        if batch:
+            yield from self._decrypt_digests(batch, prove)
+
+    def _decrypt_digests(self, batch, prove):
+        results = self.partial_decrypt_batch([signature for _, signature in batch], prove)
+        return zip([digest for digest, _ in batch], results)
+
+    @staticmethod
+    def key_file_ids(key_file, pp):
+        """
+        密钥文件中含私钥的追踪者ID（单个JSON、批量JSON或批量二进制文件），
+        与Tracer(tracer_id, key_file=key_file)配合加载文件中的全部追踪者
+        """
+        if feldman.is_tracer_keys_file(key_file):
+            with open(key_file, 'rb') as f:
+                return [key['tracer_id'] for key in feldman.iter_tracer_keys(f, pp) if key['d_share'] is not None]
+        with open(key_file, 'r') as f:
+            key_data = json.load(f)
+        if 'tracer_id' in key_data:
+            return [key_data['tracer_id']]
+        return list(key_data)
+
+    @staticmethod
+    def load_pub_share(tracer_id, pp, pub_file_fmt=DEFAULT_TRACER_SINGLE_PUBLIC_KEY_FILE_FMT):
+        """
+        从追踪者公钥文件读取pub_share
+        :param pub_file_fmt: 公钥文件路径格式，{}处填入tracer_id
+        :return: pub_share点；文件不存在或没有pub_share时返回None
+        """
+        pub_file = pub_file_fmt.format(tracer_id)
+        if not os.path.exists(pub_file):
+            return None
+        with open(pub_file, 'r', encoding='utf-8') as f:
+            pub_data = json.load(f)
+        pub_share_str = pub_data.get('pub_share')
+        if pub_share_str is None:
+            return None
+        return point_from_string(pub_share_str, pp.F, pp.E, trusted=True, cache=True)
+
+    @staticmethod
+    def pub_shares_from_commitments(x_list, commitments, pp):
+        """由Feldman承诺推出各追踪者的pub_share（不依赖追踪者公钥文件）"""
+        return [feldman.derive_pub_share(commitments, x_i, pp) for x_i in x_list]
 
     @classmethod
     def serialize_decrypt_result(cls, partial_decrypt_result):
@@ -77,15 +172,17 @@ class Tracer:
         序列化部分解密结果
         :param x_i: 坐标x_i
         :param s_share: 部分解密结果点
-        :param proof: Schnorr证明 (T, s)
+        :param proof: DLEQ证明 (A1, A2, z)，或None（prove=False）
         :return: 序列化的dict
         """
         x_i, s_share, proof = partial_decrypt_result
-        T, s = proof
+        if proof is not None:
+            A1, A2, z = proof
+            proof = (point_to_string(A1), point_to_string(A2), int(z))
         return {
             "x_i": x_i,
             "s_share": point_to_string(s_share),
-            "proof": (point_to_string(T), int(s))
+            "proof": proof
         }
 
     @classmethod
@@ -98,27 +195,33 @@ class Tracer:
         """
         x_i = serialized_result["x_i"]
         s_share = point_from_string(serialized_result["s_share"], pp.F, pp.E)
-        proof = (point_from_string(serialized_result["proof"][0], pp.F, pp.E), Integer(serialized_result["proof"][1]))
+        proof = serialized_result["proof"]
+        if proof is not None:
+            if len(proof) != 3:
+                raise ValueError("Partial decryption proof must be (A1, A2, z)")
+            proof = (point_from_string(proof[0], pp.F, pp.E), point_from_string(proof[1], pp.F, pp.E), Integer(proof[2]))
         return (x_i, s_share, proof)
 
     @classmethod    
-    def combine(cls, D_list, partial_decrypt_results, signature, pp):
+    def combine(cls, D_list, partial_decrypt_results, signature, pp, verify_proofs=True):
         """
         组合多个追踪者的份额进行解密
         :param shares: [(s_i, x_i), ...] 部分解密结果列表
         :param signature_info: 签名信息，可以是序列化的dict或(C1, C2, T)元组
         :param pp: 公共参数对象（如果为None，将从默认路径加载）
+        :param verify_proofs: 是否批量验证各份额的DLEQ证明（调用方已逐个验证过时可传False）
         :return: 解密后的PID
         """
         PID_encryption, PID_signature = signature
         C1, C2, T = PID_encryption
-        C2_table = PowerTable(C2)
         
         # 组合份额进行解密
         x_list, s_points, proofs = zip(*partial_decrypt_results)
         
-        # 使用schnorr.py中的batch_schnorr_verify进行批量验证
-        assert batch_schnorr_verify(D_list, proofs, pp), "分组解密证明无效"
+        # 使用schnorr.py中的batch_dleq_verify进行批量验证：每个份额都必须是 d_i·C1
+        if verify_proofs:
+            with instrument.phase("combine.verify_proofs"):
+                assert batch_dleq_verify(D_list, [C1] * len(s_points), s_points, proofs, pp), "分组解密证明无效"
         
         # 计算拉格朗日插值系数
         modulus = int(pp.ModRing.order())
@@ -131,14 +234,16 @@ class Tracer:
             inverses[i] = inverse_mod(denominator, modulus)
         
         # 计算最终结果
-        result_point = pp.E(0)
-        for i in range(len(partial_decrypt_results)):
-            numerator = 1
-            for j in range(len(partial_decrypt_results)):
-                if i != j:
-                    numerator = (-x_list[j]) % modulus
-            lambda_i = (numerator * inverses[i]) % modulus
-            result_point += s_points[i] * Integer(lambda_i)
+        with instrument.phase("combine.interpolate"):
+            lambdas = []
+            for i in range(len(partial_decrypt_results)):
+                numerator = 1
+                for j in range(len(partial_decrypt_results)):
+                    if i != j:
+                        numerator = (numerator * (-x_list[j])) % modulus
+                lambdas.append((numerator * inverses[i]) % modulus)
+            result_point = multi_multiply(list(s_points), lambdas, pp.E(0), arity=pp.tuning.msm_arity,
+                                          min_lanes=pp.tuning.batch_lanes)
         
         # 计算PID
         PID = C2 - result_point
@@ -1,27 +1,171 @@
 from inspect import Signature
 import os
 import json
-from core.crypto.public_params import load_full_public_params, point_from_string, point_to_string, PowerTable, point_to_string
-from core.crypto.nizk import ring_proof, verify_ring_proof
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from core.crypto.public_params import point_from_string, point_to_string, PowerTable, CompactPowerTable
+from core.crypto.registry import shared_public_params
+from core.crypto.nizk import ring_proof, ring_proof_stream, verify_ring_proof, StreamingRingVerifier
+from core.crypto import instrument, codec
+from core.crypto.linkgroup import link_group
 from sage.all import Integer
 import hashlib
 from . import DEFAULT_USER_SINGLE_KEY_FILE_FMT, DEFAULT_USER_SINGLE_PUBLIC_KEY_FILE_FMT, DEFAULT_PARAMS_PATH, DEFAULT_USER_KEYS_DIR
 
+def event_to_hash(event):
+    """计算event字段的hash（sha256，作为整数）"""
+    if isinstance(event, str):
+        event_bytes = event.encode('utf-8')
+    else:
+        event_bytes = bytes(event)
+    return int(hashlib.sha256(event_bytes).hexdigest(), 16)
+
+# v2可链接签名：标签 tag = H(LINK_DOMAIN || event)^sk，是标签群（core.crypto.linkgroup）中的整数，
+# 放在PID_encryption的第三项
+LINK_DOMAIN = b"libTARS/link/v2/"
+SIGNATURE_V1 = 1
+SIGNATURE_V2 = 2
+
+# verify_and_link的结果：linkable为False时（v1签名）previous和first_seen为None
+LinkResult = namedtuple("LinkResult", "valid linkable previous first_seen first_signature replay")
+
+
+def link_base(event, pp):
+    """event对应的标签群底数 H(LINK_DOMAIN || event)"""
+    event_bytes = event.encode('utf-8') if isinstance(event, str) else bytes(event)
+    return link_group(pp.n).hash(LINK_DOMAIN + event_bytes)
+
+
+def _link_element(value):
+    """JSON中的标签群元素：必须是整数（与挑战、响应相同，不接受字符串）"""
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"Invalid link group element: {value!r}")
+    return value
+
+
+def signature_version(signature):
+    """带commit_link的证明为v2，否则为v1"""
+    return SIGNATURE_V2 if len(signature[1][0]) > 2 else SIGNATURE_V1
+
+
+def signature_digest(signature):
+    """签名的规范字节（serialize_signature后按键排序的紧凑JSON）的sha256十六进制摘要"""
+    canonical = json.dumps(User.serialize_signature(signature), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def file_digest(path, chunk_size=1 << 20):
+    """文件内容的sha256十六进制摘要（分块读取）"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class VerificationCache:
+    """
+    签名验证结果缓存，只记录验证通过的签名（键为User.verification_key的摘要）。
+    - 按LRU淘汰，最多保留max_entries条；ttl（秒）不为None时过期条目视为未命中
+    - path不为None时从该JSON文件加载已有条目，save()写回
+    - hits/misses记录命中统计，线程安全
+    """
+    def __init__(self, max_entries=10000, ttl=None, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def _expired(self, stored_at, now):
+        return self.ttl is not None and now - stored_at > self.ttl
+
+    def _trim(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        """命中返回True（并刷新LRU位置），否则返回False"""
+        now = time.time()
+        with self._lock:
+            stored_at = self._entries.get(key)
+            if stored_at is not None and self._expired(stored_at, now):
+                del self._entries[key]
+                stored_at = None
+            if stored_at is None:
+                self.misses += 1
+                return False
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True
+
+    def add(self, key):
+        """记录一个验证通过的签名"""
+        with self._lock:
+            self._entries[key] = time.time()
+            self._entries.move_to_end(key)
+            self._trim()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def load(self, path=None):
+        """从JSON文件加载条目（跳过已过期的）"""
+        path = path or self.path
+        with open(path, 'r') as f:
+            data = json.load(f)
+        now = time.time()
+        with self._lock:
+            for key, stored_at in data.get("entries", []):
+                if not self._expired(stored_at, now):
+                    self._entries[key] = stored_at
+            self._trim()
+
+    def save(self, path=None):
+        """把条目按LRU顺序写入JSON文件（先写临时文件再替换）"""
+        path = path or self.path
+        if path is None:
+            raise ValueError("No cache file specified")
+        with self._lock:
+            entries = [[key, stored_at] for key, stored_at in self._entries.items()]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": 1, "entries": entries}, f)
+        os.replace(tmp_path, path)
+
 class User:
-    def __init__(self, user_id, params_file=DEFAULT_PARAMS_PATH, key_file=None, load_key=True):
+    def __init__(self, user_id, params_file=DEFAULT_PARAMS_PATH, key_file=None, load_key=True, pp=None, compact_tables=False, verification_cache=None):
         """
         初始化用户，可指定公共参数文件和密钥文件。
         :param user_id: 用户ID
         :param params_file: 公共参数文件路径
         :param key_file: 用户密钥文件路径
         :param load_key: 是否加载密钥（可选）
+        :param pp: 已加载的公共参数（可选，缺省取进程内共享的参数集，见core.crypto.registry）
+        :param compact_tables: 环成员预计算表是否使用CompactPowerTable（大环时节省内存）
+        :param verification_cache: VerificationCache对象（可选），verify/verify_stream先查缓存
         """
         self.user_id = str(user_id)
         self.key_file = key_file or DEFAULT_USER_SINGLE_KEY_FILE_FMT.format(self.user_id)
         self.public_key_file = DEFAULT_USER_SINGLE_PUBLIC_KEY_FILE_FMT.format(self.user_id)
         self.params_file = params_file or DEFAULT_PARAMS_PATH
+        self.compact_tables = compact_tables
+        self.verification_cache = verification_cache
+        self._params_digest = None
 
-        self.pp = load_full_public_params(self.params_file)
+        self.pp = pp if pp is not None else shared_public_params(self.params_file)
         self.sk = None
         self.pk = None
         self.pid = None
@@ -59,15 +203,19 @@ class User:
                 if str(self.user_id) not in key_data:
                     raise ValueError(f"User {self.user_id} not found in key file")
                 key_info = key_data[str(self.user_id)]
-            self.sk = Integer(key_info['sk'])
-            # 使用 point_from_string 加载点
-            self.pk = point_from_string(key_info['pk'], self.F, self.E)
-            self.pid = point_from_string(key_info['pid'], self.F, self.E)
+            self.set_key(key_info)
         except FileNotFoundError:
             raise FileNotFoundError(f"User key file {key_file} not found. Please generate keys first.")
         except KeyError as e:
             raise ValueError(f"Invalid key file format: missing {e}")
 
+    def set_key(self, key_info):
+        """从密钥dict（与密钥文件格式相同：sk, pk, pid）设置密钥"""
+        self.sk = Integer(key_info['sk'])
+        # 使用 point_from_string 加载点
+        self.pk = point_from_string(key_info['pk'], self.F, self.E, trusted=True)
+        self.pid = point_from_string(key_info['pid'], self.F, self.E, trusted=True)
+
     def generate_key(self, save_key=True):
         """生成用户密钥对并保存到文件（不包含event_hash）"""
         
@@ -104,13 +252,17 @@ class User:
             with open(public_key_file, 'w') as f:
                 json.dump(public_data, f, indent=2)
 
-    def load_ring(self, user_ids, user_dir=DEFAULT_USER_KEYS_DIR):
+    def load_ring(self, user_ids, user_dir=DEFAULT_USER_KEYS_DIR, compact=None):
         """
         根据用户ID集合或列表文件，加载环签名环。
         :param user_ids: 用户ID列表或包含用户ID的文件路径
         :param user_dir: 用户密钥文件所在目录
+        :param compact: 是否使用CompactPowerTable，None时取self.compact_tables
         :return: (Ring, Ring_table, id2index)
         """
+        if compact is None:
+            compact = self.compact_tables
+        table_cls = CompactPowerTable if compact else PowerTable
         if isinstance(user_ids, str) and os.path.isfile(user_ids):
             # 如果是文件，逐行读取用户ID
             with open(user_ids, 'r') as f:
@@ -120,60 +272,180 @@ class User:
         Ring_table = []
         id2index = {}
         for idx, uid in enumerate(user_ids):
-            key_file = os.path.join(user_dir, DEFAULT_USER_SINGLE_PUBLIC_KEY_FILE_FMT.format(uid))
-            try:
-                with open(key_file, 'r') as f:
-                    key_data = json.load(f)
-                if 'user_id' in key_data:
-                    key_info = key_data
-                else:
-                    key_info = key_data[uid]
-                # 使用 point_from_string 加载点
-                pk = point_from_string(key_info['pk'], self.pp.F, self.pp.E)
-                pid = point_from_string(key_info['pid'], self.pp.F, self.pp.E)
-                Ring.append(self.pp.R(pk, pid))
-                Ring_table.append(PowerTable(pid))
-                id2index[uid] = idx + 1
-            except Exception as e:
-                raise RuntimeError(f"Failed to load user key for {uid}: {e}")
+            member = self.load_member(uid, user_dir)
+            Ring.append(member)
+            Ring_table.append(table_cls(member.public_id, window_size=self.pp.tuning.member_window,
+                                        batch_lanes=self.pp.tuning.batch_lanes))
+            id2index[uid] = idx + 1
         return Ring, Ring_table, id2index
 
-    def sign(self, message, ring_user_ids, event="default", user_dir=DEFAULT_USER_KEYS_DIR):
+    def load_member(self, uid, user_dir=DEFAULT_USER_KEYS_DIR):
+        """加载单个环成员的公钥文件，返回 pp.R(public_key, public_id)"""
+        uid = str(uid)
+        key_file = self.member_key_file(uid, user_dir)
+        try:
+            with open(key_file, 'r') as f:
+                key_data = json.load(f)
+            if 'user_id' in key_data:
+                key_info = key_data
+            else:
+                key_info = key_data[uid]
+            # 环成员公钥来自本地密钥库：跳过曲线方程检查，并缓存坐标供重复加载
+            pk = point_from_string(key_info['pk'], self.pp.F, self.pp.E, trusted=True, cache=True)
+            pid = point_from_string(key_info['pid'], self.pp.F, self.pp.E, trusted=True, cache=True)
+            return self.pp.R(pk, pid)
+        except Exception as e:
+            raise RuntimeError(f"Failed to load user key for {uid}: {e}")
+
+    @staticmethod
+    def member_key_file(uid, user_dir=DEFAULT_USER_KEYS_DIR):
+        """环成员公钥文件路径"""
+        return os.path.join(user_dir, DEFAULT_USER_SINGLE_PUBLIC_KEY_FILE_FMT.format(uid))
+
+    @staticmethod
+    def iter_ring_ids(user_ids):
+        """逐个产出环用户ID；user_ids为ID的可迭代对象或每行一个ID的文件路径"""
+        if isinstance(user_ids, str) and os.path.isfile(user_ids):
+            with open(user_ids, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        yield line.strip()
+            return
+        for uid in user_ids:
+            yield str(uid)
+
+    def iter_ring_members(self, user_ids, user_dir=DEFAULT_USER_KEYS_DIR):
+        """
+        按顺序逐个加载环成员（不保留已产出的成员）。
+        :param user_ids: 用户ID的可迭代对象，或每行一个ID的文件路径
+        """
+        for uid in self.iter_ring_ids(user_ids):
+            yield self.load_member(uid, user_dir)
+
+    def sign(self, message, ring_user_ids, event="default", user_dir=DEFAULT_USER_KEYS_DIR, linkable=False):
         """
         生成环签名。根据输入的用户ID集合或列表文件构建环。
         :param message: 签名消息
         :param ring_user_ids: 用户ID列表或文件
         :param event: 用于签名的event字段（将对其取hash）
+        :param linkable: True时生成v2签名：PID_encryption的第三项为标签 H(event)^sk（标签群中的整数），
+                         同一用户在同一event下的签名可以被LinkIndex关联
         :return: (PID_encryption, PID_signature, C2_table, ring_user_ids)
         """
+        with instrument.phase("sign.load_ring"):
+            ring = self.load_ring(ring_user_ids, user_dir)
+        return self.sign_with_ring(message, ring, event, linkable)
+
+    def sign_with_ring(self, message, ring, event="default", linkable=False):
+        """
+        用已加载的环签名：同一个环的多次签名（可以来自不同的签名者）共用环成员的预计算表
+        :param ring: load_ring的返回值 (Ring, Ring_table, id2index)，签名过程中只读
+        """
         # 计算event字段的hash，作为event_hash
-        if isinstance(event, str):
-            event_bytes = event.encode('utf-8')
-        else:
-            event_bytes = bytes(event)
-        event_hash = int(hashlib.sha256(event_bytes).hexdigest(), 16)
+        event_hash = event_to_hash(event)
 
-        Ring, Ring_table, id2index = self.load_ring(ring_user_ids, user_dir)
+        Ring, Ring_table, id2index = ring
         if self.user_id not in id2index:
             raise ValueError(f"Current user_id {self.user_id} not in ring_user_ids")
         index = id2index[self.user_id]
-        k = self.pp.rand_int()
-        k_int = Integer(k)
-        C1 = self.g1_table.multiply(k_int)
-        C2 = self.pid + self.Q_table.multiply(k_int)
-        T = self.g1_table.multiply(Integer(event_hash))
-        PID_encryption = (C1, C2, T)
-        C2_table = PowerTable(C2, window_size=2)
+        with instrument.phase("sign.encrypt"):
+            k = self.pp.rand_int()
+            k_int = Integer(k)
+            link = None
+            if linkable:
+                C1 = self.g1_table.multiply(k_int)
+                h = link_base(event, self.pp)
+                T = link_group(self.pp.n).power(h, self.sk)
+                link = (h, T)
+            else:
+                C1, T = self.g1_table.multiply_many([k_int, Integer(event_hash)])
+            C2 = self.pid + self.Q_table.multiply(k_int)
+            PID_encryption = (C1, C2, T)
+            C2_table = PowerTable(C2, window_size=self.pp.tuning.ephemeral_window)
         # ring_proof的输入
         # 按nizk.py接口补全参数
-        PID_signature = ring_proof(
-            index, Integer(self.sk), k_int, message, C2_table, Ring_table, self.pp
-        )
+        with instrument.phase("sign.ring_proof"):
+            PID_signature = ring_proof(
+                index, Integer(self.sk), k_int, message, C2_table, Ring_table, self.pp, link=link
+            )
         return (PID_encryption, PID_signature)
 
+    def sign_stream(self, message, ring_user_ids, output, event="default", user_dir=DEFAULT_USER_KEYS_DIR, fmt="json", extra=None):
+        """
+        流式生成环签名：环成员逐个加载，每个成员的证明分量生成后立即写出，
+        签名者的分量最后回填，内存占用与环大小无关。
+        :param ring_user_ids: 用户ID列表或每行一个ID的文件（会被遍历两次）
+        :param output: 输出文件对象（json为文本，binary为二进制）
+        :param fmt: "json"（现有格式）或 "binary"（codec二进制格式）
+        :param extra: json格式下附加的顶层字段（如ring_user_ids、event）
+        :return: 环大小
+        """
+        index = None
+        for pos, uid in enumerate(self.iter_ring_ids(ring_user_ids)):
+            if uid == self.user_id:
+                index = pos + 1
+                break
+        if index is None:
+            raise ValueError(f"Current user_id {self.user_id} not in ring_user_ids")
+
+        with instrument.phase("sign.encrypt"):
+            k_int = Integer(self.pp.rand_int())
+            C1, T = self.g1_table.multiply_many([k_int, Integer(event_to_hash(event))])
+            C2 = self.pid + self.Q_table.multiply(k_int)
+            C2_table = PowerTable(C2, window_size=self.pp.tuning.ephemeral_window)
+
+        if fmt == "json":
+            writer = codec.JsonSignatureWriter(output, extra=extra)
+        elif fmt == "binary":
+            writer = codec.BinarySignatureWriter(output, self.pp)
+        else:
+            raise ValueError(f"Unknown signature format: {fmt}")
+        writer.begin((C1, C2, T))
+        # 签名者位置不需要PID，跳过其公钥文件
+        members = (None if pos == index - 1 else self.load_member(uid, user_dir)
+                   for pos, uid in enumerate(self.iter_ring_ids(ring_user_ids)))
+        with instrument.phase("sign.ring_proof"):
+            ring_proof_stream(index, Integer(self.sk), k_int, message, C2_table, members, self.pp, writer)
+        return writer.finish()
+
+    def params_digest(self):
+        """公共参数（曲线参数与g1/g2/Q）的sha256十六进制摘要"""
+        if self._params_digest is None:
+            pp = self.pp
+            text = "|".join([str(pp.q), str(pp.a), str(pp.b), str(pp.n), str(pp.k),
+                             point_to_string(pp.g1), point_to_string(pp.g2), point_to_string(pp.Q)])
+            self._params_digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return self._params_digest
+
+    def ring_digest(self, ring_user_ids, user_dir=DEFAULT_USER_KEYS_DIR):
+        """环的摘要：按顺序覆盖每个成员的ID和公钥文件内容（不解析点、不建表）"""
+        digest = hashlib.sha256()
+        for uid in self.iter_ring_ids(ring_user_ids):
+            digest.update(uid.encode('utf-8') + b'\0')
+            with open(self.member_key_file(uid, user_dir), 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        return digest.hexdigest()
+
+    def verification_key(self, message, sig_digest, ring_user_ids, event="default", user_dir=DEFAULT_USER_KEYS_DIR):
+        """
+        验证缓存的键：sha256(参数摘要, 环摘要, event, 消息摘要, 签名摘要)
+        :param sig_digest: signature_digest(signature) 或签名文件的 file_digest
+        """
+        message_bytes = message.encode('utf-8') if isinstance(message, str) else bytes(message)
+        event_bytes = event.encode('utf-8') if isinstance(event, str) else bytes(event)
+        parts = [
+            self.params_digest(),
+            self.ring_digest(ring_user_ids, user_dir),
+            hashlib.sha256(event_bytes).hexdigest(),
+            hashlib.sha256(message_bytes).hexdigest(),
+            sig_digest,
+        ]
+        return hashlib.sha256("|".join(parts).encode('utf-8')).hexdigest()
+
     def verify(self, message, signature, ring_user_ids, event="default", user_dir=DEFAULT_USER_KEYS_DIR):
         """
-        验证环签名。
+        验证环签名。设置了verification_cache时，先按verification_key查缓存，
+        验证通过的结果写入缓存（失败的结果不缓存）。
         :param message: 被签名的消息
         :param PID_encryption: (C1, C2, T) 三元组
         :param PID_signature: 签名证明
@@ -181,33 +453,163 @@ class User:
         :param event: event字段（需与签名时一致）
         :return: True/False
         """
+        cache = self.verification_cache
+        if cache is None:
+            return self._verify(message, signature, ring_user_ids, event, user_dir)
+        ring_user_ids = list(self.iter_ring_ids(ring_user_ids))
+        key = self.verification_key(message, signature_digest(signature), ring_user_ids, event, user_dir)
+        if cache.get(key):
+            return True
+        valid = self._verify(message, signature, ring_user_ids, event, user_dir)
+        if valid:
+            cache.add(key)
+        return valid
+
+    def _verify(self, message, signature, ring_user_ids, event="default", user_dir=DEFAULT_USER_KEYS_DIR):
         PID_encryption, PID_signature = signature
 
         # 计算event字段的hash
-        if isinstance(event, str):
-            event_bytes = event.encode('utf-8')
-        else:
-            event_bytes = bytes(event)
-        event_hash = int(hashlib.sha256(event_bytes).hexdigest(), 16)
+        event_hash = event_to_hash(event)
 
         # 加载环
-        Ring, Ring_table, id2index = self.load_ring(ring_user_ids, user_dir)
+        with instrument.phase("verify.load_ring"):
+            Ring, Ring_table, id2index = self.load_ring(ring_user_ids, user_dir)
 
         # 解析PID_encryption
         C1, C2, T = PID_encryption
-        # 检查T是否等于g1^event_hash
-        expected_T = self.g1_table.multiply(Integer(event_hash))
-        if T != expected_T:
-            return False
+        link = None
+        if signature_version(signature) == SIGNATURE_V2:
+            # v2：T为标签，由证明中的commit_link保证与签名者一致
+            link = (link_base(event, self.pp), T)
+        else:
+            # 检查T是否等于g1^event_hash
+            expected_T = self.g1_table.multiply(Integer(event_hash))
+            if T != expected_T:
+                return False
 
         # 构造C2_table
-        C2_table = PowerTable(C2, window_size=2)
+        C2_table = PowerTable(C2, window_size=self.pp.tuning.ephemeral_window)
         # 按nizk.py接口补全参数
-        return verify_ring_proof(
-            C2_table, PID_signature, message, Ring_table, self.pp
-        )
+        with instrument.phase("verify.ring_proof"):
+            return verify_ring_proof(
+                C2_table, PID_signature, message, Ring_table, self.pp, link=link
+            )
+
+    def verify_and_link(self, message, signature, ring_user_ids, link_index, event="default", user_dir=DEFAULT_USER_KEYS_DIR,
+                        allow_v1=False):
+        """
+        验证签名，并把有效v2签名的标签记入link_index
+        :param link_index: core.storage.link_index.LinkIndex
+        :param allow_v1: v1签名没有标签，改用v1签名即可绕过链接检查，因此默认抛出ValueError；
+                         为True时v1签名只做验证，返回linkable为False的结果
+        :return: LinkResult；previous > 0 表示同一签名者在该event下已有签名（重复投票/频率限制），
+                 replay为True表示这份签名此前已记录过（重放或重复验证，不再计数），
+                 first_signature为该标签首次记录的签名摘要，
+                 v1签名没有标签，linkable为False
+        """
+        if signature_version(signature) != SIGNATURE_V2 and not allow_v1:
+            raise ValueError("v1 signatures carry no link tag and are rejected when a link index is used")
+        valid = self.verify(message, signature, ring_user_ids, event, user_dir)
+        if not valid or signature_version(signature) != SIGNATURE_V2:
+            return LinkResult(valid, False, None, None, None, False)
+        record = link_index.record(event, signature[0][2], signature_digest(signature))
+        return LinkResult(True, True, record.previous, record.first_seen, record.first_signature, record.replay)
 
-        # INSERT_YOUR_CODE
+    def verify_archive(self, archive, message=None, event=None, ring_user_ids=None, user_dir=DEFAULT_USER_KEYS_DIR):
+        """
+        逐条验证签名归档中的签名（可按event/环筛选），产出 (记录, 是否通过)
+        :param archive: core.storage.archive.SignatureArchive
+        :param message: 被签名的消息；None时使用打包时记录在归档中的消息
+        """
+        for entry, signature in archive.iter_signatures(self.pp, event, ring_user_ids):
+            entry_message = entry.message if message is None else message
+            if entry_message is None:
+                raise ValueError(f"No message recorded for signature {entry.digest_hex}")
+            yield entry, self.verify(entry_message, signature, entry.ring_user_ids, entry.event, user_dir)
+
+    def verify_stream(self, message, signature_file, ring_user_ids=None, event=None, user_dir=DEFAULT_USER_KEYS_DIR):
+        """
+        流式验证环签名：签名（JSON或二进制）与环成员都逐个读取，
+        只保留累加量和哈希状态，内存占用与环大小无关。
+        :param message: 被签名的消息
+        :param signature_file: 签名文件路径（JSON格式或codec二进制格式）
+        :param ring_user_ids: 用户ID的可迭代对象或文件；None时从JSON签名文件的ring_user_ids字段流式读取
+        :param event: event字段；None时从JSON签名文件读取（缺省为"default"）
+        :return: True/False
+        """
+        binary = codec.is_binary_signature(signature_file)
+        if ring_user_ids is None:
+            if binary:
+                raise ValueError("ring_user_ids is required for binary signatures")
+            ring_user_ids = codec.iter_json_list(signature_file, "ring_user_ids")
+        if event is None:
+            event = "default" if binary else (codec.read_json_field(signature_file, "event") or "default")
+        cache = self.verification_cache
+        if cache is None:
+            return self._verify_stream(message, signature_file, binary, ring_user_ids, event, user_dir)
+        # 缓存键使用签名文件内容的摘要；环ID需要遍历两次，这里只保留ID字符串
+        ring_user_ids = list(self.iter_ring_ids(ring_user_ids))
+        key = self.verification_key(message, file_digest(signature_file), ring_user_ids, event, user_dir)
+        if cache.get(key):
+            return True
+        valid = self._verify_stream(message, signature_file, binary, ring_user_ids, event, user_dir)
+        if valid:
+            cache.add(key)
+        return valid
+
+    def _verify_stream(self, message, signature_file, binary, ring_user_ids, event, user_dir):
+        members = self.iter_ring_members(ring_user_ids, user_dir)
+        verifier = StreamingRingVerifier(message, self.pp)
+
+        if binary:
+            with open(signature_file, 'rb') as f:
+                n, PID_encryption = codec.read_signature_header(f, self.pp)
+                for cs, co, ch, rs, ro in codec.iter_signature_records(f, self.pp, n):
+                    verifier.add_commit_schnorr(cs)
+                    verifier.add_commit_okamoto(co)
+                    if ch is not None:
+                        member = next(members, None)
+                        if member is None:
+                            return False
+                        verifier.add_challenge(ch, member.public_id)
+                    verifier.add_response_schnorr(rs)
+                    verifier.add_response_okamoto(ro)
+        else:
+            PID_encryption = [None, None, None]
+            handlers = {
+                (0, 0): lambda v: verifier.add_commit_schnorr(point_from_string(v, self.pp.F, self.pp.E)),
+                (0, 1): lambda v: verifier.add_commit_okamoto(point_from_string(v, self.pp.F, self.pp.E)),
+                (0, 2): verifier.add_commit_link,
+                (2, 0): verifier.add_response_schnorr,
+                (2, 1): verifier.add_response_okamoto,
+            }
+            with open(signature_file, 'r', encoding='utf-8') as f:
+                for path, value in codec.iter_json_leaves(f):
+                    if path[0] == "PID_encryption":
+                        # v2签名的标签是整数，其余为点
+                        PID_encryption[path[1]] = value if isinstance(value, int) else point_from_string(value, self.pp.F, self.pp.E)
+                    elif path[0] == "PID_signature":
+                        if path[1] == 1:
+                            member = next(members, None)
+                            if member is None:
+                                return False
+                            verifier.add_challenge(value, member.public_id)
+                        else:
+                            handlers[path[1], path[2]](value)
+            if any(P is None for P in PID_encryption):
+                raise ValueError("Signature file is missing PID_encryption")
+
+        C1, C2, T = PID_encryption
+        link = None
+        if verifier.num_commit_link:
+            link = (link_base(event, self.pp), T)
+        elif isinstance(T, int) or T != self.g1_table.multiply(Integer(event_to_hash(event))):
+            return False
+        last_member = next(members, None)
+        if last_member is None or next(members, None) is not None:
+            # 环大小与签名不一致
+            return False
+        return verifier.finalize(C2, last_member.public_id, link=link)
 
     @staticmethod
     def serialize_signature(signature):
@@ -219,15 +621,19 @@ class User:
         """
 
         PID_encryption, PID_signature = signature
-        # PID_encryption: (C1, C2, T)
-        enc_str = [point_to_string(pt) for pt in PID_encryption]
+        # PID_encryption: (C1, C2, T)，v2签名的T为标签群中的整数
+        enc_str = [point_to_string(pt) for pt in PID_encryption[:2]]
+        if len(PID_signature[0]) > 2:
+            enc_str.append(int(PID_encryption[2]))
+        else:
+            enc_str.append(point_to_string(PID_encryption[2]))
 
         # PID_signature: [
         #   (commit_schnorr, commit_okamoto),  # 两个长度为环大小的承诺列表
         #   challenge[:-1],                    # 长度为环大小-1的挑战列表
         #   (response_schnorr, response_okamoto) # 两个长度为环大小的响应列表
         # ]
-        commit_schnorr, commit_okamoto = PID_signature[0]
+        commit_schnorr, commit_okamoto = PID_signature[0][:2]
         challenge = PID_signature[1]
         response_schnorr, response_okamoto = PID_signature[2]
 
@@ -242,14 +648,21 @@ class User:
         response_schnorr_int = to_int_list(response_schnorr)
         response_okamoto_int = to_int_list(response_okamoto)
 
+        commits_str = [commit_schnorr_str, commit_okamoto_str]
+        if len(PID_signature[0]) > 2:
+            # v2：第三个承诺列表commit_link（标签群中的整数）
+            commits_str.append([int(x) for x in PID_signature[0][2]])
+
         sig_dict = {
             "PID_encryption": enc_str,
             "PID_signature": [
-                [commit_schnorr_str, commit_okamoto_str],
+                commits_str,
                 challenge_int,
                 [response_schnorr_int, response_okamoto_int]
             ]
         }
+        if len(commits_str) > 2:
+            sig_dict["version"] = SIGNATURE_V2
         return sig_dict
 
     @staticmethod
@@ -262,10 +675,17 @@ class User:
         """
 
         enc_str = sig_dict["PID_encryption"]
-        PID_encryption = tuple(point_from_string(s, pp.F, pp.E) for s in enc_str)
-
         sig = sig_dict["PID_signature"]
-        commit_schnorr_str, commit_okamoto_str = sig[0]
+        if len(enc_str) != 3:
+            raise ValueError("PID_encryption must have three items")
+        C1, C2 = (point_from_string(s, pp.F, pp.E) for s in enc_str[:2])
+        if len(sig[0]) > 2:
+            # v2：标签为整数
+            PID_encryption = (C1, C2, _link_element(enc_str[2]))
+        else:
+            PID_encryption = (C1, C2, point_from_string(enc_str[2], pp.F, pp.E))
+
+        commit_schnorr_str, commit_okamoto_str = sig[0][:2]
         challenge = sig[1]
         response_schnorr, response_okamoto = sig[2]
 
@@ -280,8 +700,14 @@ class User:
         response_schnorr_int = to_Integer_list(response_schnorr)
         response_okamoto_int = to_Integer_list(response_okamoto)
 
+        commits = (commit_schnorr, commit_okamoto)
+        if len(sig[0]) > 2:
+            commits += ([_link_element(x) for x in sig[0][2]],)
+        elif sig_dict.get("version", SIGNATURE_V1) != SIGNATURE_V1:
+            raise ValueError("v2 signature is missing commit_link")
+
         PID_signature = [
-            (commit_schnorr, commit_okamoto),
+            commits,
             challenge_int,
             (response_schnorr_int, response_okamoto_int)
         ]
@@ -0,0 +1,288 @@
+"""
+可断点续跑的批量审计
+
+一次完整审计对签名归档中的每个签名依次做：验证、各追踪者部分解密、组合恢复PID。
+AuditRunner 按归档顺序分批处理，每完成一个阶段就把进度原子地写入本地状态文件：
+- cursor: 已完成的签名数（按归档或event链的顺序）
+- pending: 当前批次已完成的阶段（验证结果、各追踪者的部分解密份额），
+  崩溃后恢复时直接复用，不再重算
+- results_offset: 结果文件已提交的字节数，恢复时截掉之后写了一半的结果
+结果文件每个签名一行JSON。状态文件记录任务配置的指纹，配置改变时拒绝续跑，
+需要显式重新开始（restart=True）。
+"""
+import hashlib
+import json
+import os
+import time
+from core.crypto.public_params import point_to_string
+from core.entities import DEFAULT_USER_KEYS_DIR
+from core.entities.tracer import Tracer
+from core.entities.user import User
+
+STATE_VERSION = 2
+
+
+def format_duration(seconds):
+    """把秒数格式化为 1h02m03s / 2m03s / 3s"""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m{seconds:02d}s"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+
+def load_state(state_file):
+    """读取状态文件，不存在时返回None"""
+    if not os.path.exists(state_file):
+        return None
+    with open(state_file, 'r') as f:
+        return json.load(f)
+
+
+class AuditRunner:
+    def __init__(self, archive, state_file, results_file, pp, tracers=(), message=None, event=None,
+                 user_dir=DEFAULT_USER_KEYS_DIR, batch_size=256, verify=True, restart=False, log=None):
+        """
+        :param archive: core.storage.archive.SignatureArchive
+        :param state_file: 状态文件路径（进度与中间份额）
+        :param results_file: 结果文件路径（每个签名一行JSON）
+        :param tracers: 已加载密钥的Tracer列表（不少于门限）；为空时只做验证
+        :param message: 被签名的消息；None时使用打包时记录在归档中的消息
+        :param event: 只审计该event的签名（None为整个归档）
+        :param verify: 是否验证签名（为False时对所有签名直接追踪）
+        :param restart: 忽略已有状态，从头开始
+        :param log: 进度输出函数（如print）
+        """
+        self.archive = archive
+        self.state_file = state_file
+        self.results_file = results_file
+        self.pp = pp
+        self.tracers = list(tracers)
+        tracer_ids = {str(tracer.tracer_id) for tracer in self.tracers}
+        if len(tracer_ids) != len(self.tracers):
+            raise ValueError("Duplicate tracer keys")
+        if self.tracers and len(self.tracers) < pp.threshold_tracers:
+            # 份额不足门限时插值得到的是错误的点，且不会报错
+            raise ValueError(f"{len(self.tracers)} tracer keys loaded, the threshold is {pp.threshold_tracers}")
+        self.message = message
+        self.event = event
+        self.user_dir = user_dir
+        self.batch_size = batch_size
+        self.verify = verify
+        self.log = log
+        if verify and not os.path.isdir(user_dir):
+            raise FileNotFoundError(f"User key directory {user_dir} not found")
+        self.user = User("0", load_key=False, pp=pp)
+        self.state = None if restart else load_state(state_file)
+        if self.state is None:
+            # 新任务：results_offset为0，打开结果文件时清空旧内容
+            self.state = self._new_state()
+        elif self.state.get("fingerprint") != self.fingerprint():
+            raise ValueError("Audit state file belongs to a different job; restart it explicitly")
+        elif self.state.get("version") != STATE_VERSION:
+            # 旧版本状态中未完成批次的份额格式不同，只丢弃该批次的中间结果，进度保留
+            self.state["pending"] = None
+            self.state["version"] = STATE_VERSION
+
+    def fingerprint(self):
+        """任务配置的摘要：归档、筛选条件、消息、追踪者和是否验证"""
+        config = {
+            "archive": os.path.abspath(self.archive.path),
+            "event": self.event,
+            "message": None if self.message is None else hashlib.sha256(self.message.encode('utf-8')).hexdigest(),
+            "tracers": sorted(str(tracer.tracer_id) for tracer in self.tracers),
+            "verify": self.verify,
+        }
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _new_state(self):
+        return {
+            "version": STATE_VERSION,
+            "fingerprint": self.fingerprint(),
+            "cursor": 0,
+            "results_offset": 0,
+            "pending": None,
+            "counts": {"valid": 0, "invalid": 0, "recovered": 0, "identified": 0, "failed": 0},
+            "elapsed": 0.0,
+        }
+
+    def _save_state(self):
+        tmp_path = self.state_file + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_file)
+
+    # ----------- 进度 -----------
+    @property
+    def total(self):
+        return self.archive.count_of(event=self.event) if self.event is not None else len(self.archive)
+
+    @property
+    def done(self):
+        return self.state["cursor"]
+
+    def progress(self, session_done=0, session_elapsed=0.0):
+        """进度、吞吐量（签名/秒，按本次运行计算）和预计剩余时间"""
+        total = self.total
+        rate = session_done / session_elapsed if session_elapsed > 0 else 0.0
+        remaining = max(total - self.done, 0)
+        return {
+            "done": self.done,
+            "total": total,
+            "percent": 100.0 * self.done / total if total else 100.0,
+            "rate": rate,
+            "eta": remaining / rate if rate else None,
+            "elapsed": self.state["elapsed"],
+            "counts": dict(self.state["counts"]),
+        }
+
+    def _report(self, info):
+        if self.log is None:
+            return
+        eta = "-" if info["eta"] is None else format_duration(info["eta"])
+        self.log(f"{info['done']}/{info['total']} ({info['percent']:.1f}%)  {info['rate']:.2f} sig/s  ETA {eta}")
+
+    # ----------- 执行 -----------
+    def _entries(self):
+        entries = self.archive.find(event=self.event)
+        skip = self.done
+        for entry in entries:
+            if skip:
+                skip -= 1
+                continue
+            yield entry
+
+    def _batches(self):
+        batch = []
+        for entry in self._entries():
+            batch.append(entry)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _open_results(self):
+        """截掉结果文件中未提交的部分，返回追加写入的文件对象"""
+        offset = self.state["results_offset"]
+        size = os.path.getsize(self.results_file) if os.path.exists(self.results_file) else 0
+        if size < offset:
+            raise ValueError("Audit results file is shorter than the committed offset")
+        f = open(self.results_file, 'ab')
+        f.truncate(offset)
+        return f
+
+    def run(self, max_batches=None):
+        """
+        从上次的进度继续处理，直到处理完或完成max_batches个批次
+        :return: progress()的结果
+        """
+        session_done = 0
+        start = time.perf_counter()
+        last = start
+        with self._open_results() as results:
+            for number, batch in enumerate(self._batches()):
+                if max_batches is not None and number >= max_batches:
+                    break
+                self._process_batch(batch, results)
+                now = time.perf_counter()
+                self.state["elapsed"] += now - last
+                last = now
+                session_done += len(batch)
+                self._save_state()
+                self._report(self.progress(session_done, now - start))
+        return self.progress(session_done, time.perf_counter() - start)
+
+    def _pending_for(self, batch):
+        """与当前批次一致的pending记录（批次大小改变等情况下丢弃）"""
+        pending = self.state["pending"]
+        key = [batch[0].digest_hex, len(batch)]
+        if pending is None or pending.get("batch") != key:
+            pending = {"batch": key, "valid": None, "shares": {}}
+            self.state["pending"] = pending
+        return pending
+
+    def _process_batch(self, batch, results):
+        pending = self._pending_for(batch)
+        signatures = [entry.signature(self.pp) for entry in batch]
+
+        if pending["valid"] is None:
+            if self.verify:
+                pending["valid"] = [self._verify(entry, signature) for entry, signature in zip(batch, signatures)]
+            else:
+                pending["valid"] = [True] * len(batch)
+            self._save_state()
+        valid = pending["valid"]
+        traced = [i for i, ok in enumerate(valid) if ok]
+
+        shares = {}
+        if self.tracers and traced:
+            for tracer in self.tracers:
+                tracer_id = str(tracer.tracer_id)
+                if tracer_id not in pending["shares"]:
+                    computed = tracer.partial_decrypt_batch([signatures[i] for i in traced], prove=False)
+                    pending["shares"][tracer_id] = [Tracer.serialize_decrypt_result(result) for result in computed]
+                    self._save_state()
+                shares[tracer_id] = [Tracer.deserialize_decrypt_result(s, self.pp) for s in pending["shares"][tracer_id]]
+
+        lines = []
+        counts = self.state["counts"]
+        position = {i: j for j, i in enumerate(traced)}
+        for i, entry in enumerate(batch):
+            record = {"digest": entry.digest_hex, "event": entry.event, "valid": valid[i] if self.verify else None,
+                      "pid": None, "user_id": None}
+            if self.verify:
+                counts["valid" if valid[i] else "invalid"] += 1
+            if shares and valid[i]:
+                record.update(self._recover(entry, signatures[i], [shares[tid][position[i]] for tid in shares]))
+            lines.append(json.dumps(record) + "\n")
+        results.write("".join(lines).encode('utf-8'))
+        results.flush()
+        os.fsync(results.fileno())
+
+        self.state["results_offset"] = results.tell()
+        self.state["cursor"] += len(batch)
+        self.state["pending"] = None
+
+    def _verify(self, entry, signature):
+        message = entry.message if self.message is None else self.message
+        if message is None:
+            raise ValueError(f"No message recorded for signature {entry.digest_hex}")
+        try:
+            return bool(self.user.verify(message, signature, entry.ring_user_ids, entry.event, self.user_dir))
+        except OSError:
+            raise
+        except Exception:
+            # 环成员公钥无法加载（--user-dir错误、缺少密钥文件）是配置问题，中止审计而不是把签名记为无效；
+            # 成员都能加载时异常来自签名本身（格式错误的点、超长标量等）
+            for uid in entry.ring_user_ids:
+                self.user.load_member(uid, self.user_dir)
+            return False
+
+    def _recover(self, entry, signature, partial_results):
+        """组合份额恢复PID，并在签名的环中查找对应的用户"""
+        counts = self.state["counts"]
+        D_list = [tracer.pub_share for tracer in self.tracers]
+        try:
+            # 份额由本任务用已加载的密钥算出，不生成也不验证证明
+            PID = Tracer.combine(D_list, partial_results, signature, self.pp, verify_proofs=False)
+        except Exception as e:
+            counts["failed"] += 1
+            return {"error": str(e)}
+        counts["recovered"] += 1
+        user_id = None
+        for uid in entry.ring_user_ids:
+            try:
+                if self.user.load_member(uid, self.user_dir).public_id == PID:
+                    user_id = uid
+                    break
+            except RuntimeError:
+                continue
+        if user_id is not None:
+            counts["identified"] += 1
+        return {"pid": point_to_string(PID), "user_id": user_id}
@@ -0,0 +1,86 @@
+"""
+追踪者端点的请求认证
+
+部分解密端点对任意C1给出 d_share·C1，不加认证就是一个公开的解密预言机。
+协调器与各追踪者共享一个对称密钥（tracer authkey生成），每条请求带上
+nonce、时间戳和HMAC-SHA256：
+- auth = HMAC(key, 去掉auth字段后按键排序的紧凑JSON)
+- 时间戳与服务端时钟相差超过window秒的请求被拒绝
+- window内重复出现的nonce被拒绝（防重放）
+"""
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+AUTH_WINDOW = 300.0
+MIN_KEY_BYTES = 16
+
+
+def generate_auth_key(path):
+    """生成32字节随机密钥，以十六进制写入path（权限0600），返回密钥"""
+    key = secrets.token_bytes(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(key.hex() + "\n")
+    return key
+
+
+def load_auth_key(path):
+    """读取十六进制密钥文件，密钥不足MIN_KEY_BYTES字节时抛出ValueError"""
+    with open(path, 'r') as f:
+        key = bytes.fromhex(f.read().strip())
+    if len(key) < MIN_KEY_BYTES:
+        raise ValueError(f"Authentication key must be at least {MIN_KEY_BYTES} bytes")
+    return key
+
+
+def request_mac(request, key):
+    """请求的HMAC-SHA256（十六进制），不含auth字段"""
+    body = {k: v for k, v in request.items() if k != "auth"}
+    canonical = json.dumps(body, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hmac.new(key, canonical, hashlib.sha256).hexdigest()
+
+
+def sign_request(request, key, now=None):
+    """返回加上nonce、timestamp和auth的请求副本"""
+    signed = dict(request, nonce=secrets.token_hex(16), timestamp=time.time() if now is None else now)
+    signed["auth"] = request_mac(signed, key)
+    return signed
+
+
+class RequestAuthenticator:
+    """
+    服务端的请求检查，失败时抛出PermissionError
+    :param key: 共享密钥
+    :param window: 时间戳允许的偏差（秒），也是nonce的保留时间
+    """
+    def __init__(self, key, window=AUTH_WINDOW):
+        if not key or len(key) < MIN_KEY_BYTES:
+            raise ValueError(f"Authentication key must be at least {MIN_KEY_BYTES} bytes")
+        self.key = bytes(key)
+        self.window = window
+        self.nonces = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, request, now=None):
+        now = time.time() if now is None else now
+        mac = request.get("auth")
+        if not isinstance(mac, str) or not hmac.compare_digest(mac, request_mac(request, self.key)):
+            raise PermissionError("Request authentication failed")
+        timestamp, nonce = request.get("timestamp"), request.get("nonce")
+        if not isinstance(timestamp, (int, float)) or abs(now - timestamp) > self.window:
+            raise PermissionError("Request timestamp is outside the allowed window")
+        if not isinstance(nonce, str) or not nonce:
+            raise PermissionError("Request has no nonce")
+        with self._lock:
+            # 按收到的顺序丢弃过期的nonce（带这些nonce的请求已不可能通过时间戳检查）
+            while self.nonces and now - next(iter(self.nonces.values())) > 2 * self.window:
+                self.nonces.popitem(last=False)
+            if nonce in self.nonces:
+                raise PermissionError("Replayed request")
+            self.nonces[nonce] = now
@@ -0,0 +1,248 @@
+"""
+追踪协调器：把追踪请求并发发给N个追踪者端点，先到的t个有效份额即可恢复PID
+
+- 传输：TCP（tcp://host:port 或 host:port）或Unix套接字（unix:/path，权限0600），
+  每条消息为一行JSON；端点默认只监听Unix套接字，TCP地址省略主机时为127.0.0.1
+- 认证：每条请求带共享密钥的HMAC、nonce和时间戳（见core.protocol.auth），
+  端点拒绝未认证、过期或重放的请求，不对外提供解密预言机
+- 请求：{"op": "partial_decrypt", "PID_encryption": [C1, C2]}（只需加密部分的C1、C2，
+  不传标签和环签名证明；带第三项时忽略）；{"op": "ping"}
+- 应答：Tracer.serialize_decrypt_result 的结果加 tracer_id，出错时为 {"error": ...}
+- 协调器在份额到达时逐个验证DLEQ证明（份额确为 d_i·C1），凑满threshold_tracers个有效份额后
+  立即调用Tracer.combine，并取消其余未完成的请求
+"""
+import asyncio
+import ipaddress
+import json
+import os
+import tempfile
+from core.crypto.public_params import point_from_string, point_to_string
+from core.crypto.schnorr import dleq_verify
+from core.crypto import feldman
+from core.entities import DEFAULT_TRACER_SINGLE_PUBLIC_KEY_FILE_FMT
+from core.entities.tracer import Tracer
+from core.protocol.auth import RequestAuthenticator, sign_request
+
+# 追踪者端点的默认监听地址（只有本机可以连接）
+DEFAULT_LISTEN_FMT = "unix:" + os.path.join(tempfile.gettempdir(), "libtars_tracer_{}.sock")
+
+
+def parse_address(address):
+    """
+    解析端点地址
+    :return: ("unix", path) 或 ("tcp", (host, port))
+    """
+    if address.startswith("unix:"):
+        path = address[len("unix:"):]
+        if path.startswith("//"):
+            path = path[2:]
+        return "unix", path
+    if address.startswith("tcp://"):
+        address = address[len("tcp://"):]
+    host, sep, port = address.rpartition(":")
+    if not sep:
+        raise ValueError(f"Invalid endpoint address: {address}")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+def is_local_address(address):
+    """Unix套接字或回环TCP地址"""
+    kind, target = parse_address(address)
+    if kind == "unix":
+        return True
+    host = target[0]
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+async def open_connection(address):
+    kind, target = parse_address(address)
+    if kind == "unix":
+        return await asyncio.open_unix_connection(target)
+    return await asyncio.open_connection(*target)
+
+
+async def start_server(handler, address):
+    kind, target = parse_address(address)
+    if kind == "unix":
+        server = await asyncio.start_unix_server(handler, target)
+        os.chmod(target, 0o600)
+        return server
+    return await asyncio.start_server(handler, *target)
+
+
+def encode_message(message):
+    return json.dumps(message).encode('utf-8') + b"\n"
+
+
+class TracerEndpoint:
+    """
+    单个追踪者的服务端：接收部分解密请求，在线程池中计算后返回份额
+    :param auth_key: 与协调器共享的认证密钥（必需），未通过认证的请求返回错误
+    """
+    def __init__(self, tracer, address, auth_key):
+        self.tracer = tracer
+        self.address = address
+        self.authenticator = RequestAuthenticator(auth_key)
+        self.server = None
+
+    def process(self, request):
+        op = request.get("op")
+        if op == "ping":
+            return {"tracer_id": self.tracer.tracer_id}
+        if op != "partial_decrypt":
+            raise ValueError(f"Unknown op: {op}")
+        pp = self.tracer.pp
+        C1, C2 = (point_from_string(s, pp.F, pp.E) for s in request["PID_encryption"][:2])
+        result = self.tracer.partial_decrypt(((C1, C2, None), None))
+        response = Tracer.serialize_decrypt_result(result)
+        response["tracer_id"] = self.tracer.tracer_id
+        return response
+
+    async def respond(self, request):
+        """处理一条请求：在线程池中执行process，避免阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.process, request)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    self.authenticator.check(request)
+                    response = await self.respond(request)
+                except Exception as e:
+                    response = {"error": str(e)}
+                writer.write(encode_message(response))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # 客户端断开或服务关闭
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self.server = await start_server(self.handle, self.address)
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+
+class TraceCoordinator:
+    """
+    并发收集部分解密份额并恢复PID
+    :param endpoints: 追踪者端点地址列表
+    :param pub_shares: {tracer_id: pub_share点}（可选）；缺少的按pub_file_fmt从文件加载
+    :param pub_file_fmt: 追踪者公钥文件路径格式
+    :param commitments: Feldman承诺（可选）；给出时由应答中的x_i推出pub_share，不读取公钥文件
+    :param threshold: 需要的有效份额数，默认为承诺个数或pp.threshold_tracers
+    :param timeout: 整次追踪的超时时间（秒）
+    :param auth_key: 与各端点共享的认证密钥
+    """
+    def __init__(self, pp, endpoints, pub_shares=None, pub_file_fmt=DEFAULT_TRACER_SINGLE_PUBLIC_KEY_FILE_FMT, commitments=None, threshold=None, timeout=30.0,
+                 auth_key=None):
+        self.pp = pp
+        self.auth_key = auth_key
+        self.endpoints = list(endpoints)
+        self.pub_shares = {str(k): v for k, v in (pub_shares or {}).items()}
+        self.pub_file_fmt = pub_file_fmt
+        self.commitments = commitments
+        # 重分享后门限以承诺个数为准，params.json中的threshold_tracers不再更新
+        self.threshold = threshold or (len(commitments) if commitments else pp.threshold_tracers)
+        self.timeout = timeout
+        # 最近一次trace中各端点的失败原因 {address: message}
+        self.errors = {}
+
+    def pub_share(self, tracer_id, x_i=None):
+        tracer_id = str(tracer_id)
+        if self.commitments is not None:
+            return feldman.derive_pub_share(self.commitments, x_i, self.pp)
+        if tracer_id not in self.pub_shares:
+            D = Tracer.load_pub_share(tracer_id, self.pp, self.pub_file_fmt)
+            if D is None:
+                raise ValueError(f"No pub_share for tracer {tracer_id}")
+            self.pub_shares[tracer_id] = D
+        return self.pub_shares[tracer_id]
+
+    def sign(self, request):
+        """带上认证字段；没有密钥时原样发送（端点会拒绝）"""
+        return request if self.auth_key is None else sign_request(request, self.auth_key)
+
+    async def request_share(self, address, enc_str):
+        """向一个端点请求部分解密，返回应答dict"""
+        reader, writer = await open_connection(address)
+        try:
+            writer.write(encode_message(self.sign({"op": "partial_decrypt", "PID_encryption": enc_str})))
+            await writer.drain()
+            line = await reader.readline()
+        finally:
+            writer.close()
+        if not line:
+            raise ConnectionError("Connection closed without a response")
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    def check_share(self, response, C1):
+        """反序列化一个份额并验证其对C1的DLEQ证明，返回 (tracer_id, D, partial_result)"""
+        tracer_id = str(response["tracer_id"])
+        result = Tracer.deserialize_decrypt_result(response, self.pp)
+        D = self.pub_share(tracer_id, result[0])
+        if result[2] is None or not dleq_verify(D, C1, result[1], result[2], self.pp):
+            raise ValueError(f"Invalid proof from tracer {tracer_id}")
+        return tracer_id, D, result
+
+    async def fetch_share(self, address, enc_str, C1):
+        response = await self.request_share(address, enc_str)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.check_share, response, C1)
+
+    async def trace(self, signature):
+        """
+        :param signature: 反序列化后的签名 (PID_encryption, PID_signature)
+        :return: 恢复出的PID点
+        """
+        enc_str = [point_to_string(P) for P in signature[0][:2]]
+        C1 = signature[0][0]
+        tasks = {asyncio.ensure_future(self.fetch_share(address, enc_str, C1)): address for address in self.endpoints}
+        shares = {}
+        try:
+            for future in asyncio.as_completed(list(tasks), timeout=self.timeout):
+                try:
+                    tracer_id, D, result = await future
+                except asyncio.TimeoutError:
+                    raise
+                except Exception:
+                    # 失败原因在finally中按端点汇总到self.errors
+                    continue
+                # 同一追踪者通过多个端点应答时只计一次
+                shares.setdefault(tracer_id, (D, result))
+                if len(shares) >= self.threshold:
+                    break
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+            self.errors = {tasks[task]: str(outcome) or type(outcome).__name__
+                           for task, outcome in zip(tasks, outcomes)
+                           if isinstance(outcome, Exception) and not isinstance(outcome, asyncio.CancelledError)}
+        if len(shares) < self.threshold:
+            raise RuntimeError(f"Only {len(shares)} valid shares received, {self.threshold} required")
+        D_list, results = zip(*list(shares.values())[:self.threshold])
+        loop = asyncio.get_running_loop()
+        # 份额到达时已逐个验证过证明，combine不再重复验证
+        return await loop.run_in_executor(None, Tracer.combine, list(D_list), list(results), signature, self.pp, False)
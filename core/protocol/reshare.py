@@ -0,0 +1,168 @@
+"""
+追踪者份额的主动重分享（不更换主密钥s和系统公钥Q）
+
+当前的追踪者把各自的 d_i = f(x_i) 重新分享给新的追踪者集合（门限t'、人数N'），
+params.json、Q 和所有用户密钥保持不变：
+1. 分发（每个参与的旧追踪者i，至少t个）：随机选取 t'-1 次多项式 g_i，g_i(0) = d_i，
+   公开承诺 B_ik = b_ik·g1（B_i0 = D_i），并私下把子份额 s_ij = g_i(x'_j) 交给新追踪者j
+2. 组合（每个新追踪者j）：
+   - 公开检查：B_i0 必须等于由旧承诺推出的 D_i，承诺个数必须为t'
+   - 按x_i从小到大取前t个通过公开检查的分发者作为合格集合S
+     （只依赖公开数据，所有新追踪者得到相同的S，新份额才落在同一多项式上）
+   - 私下检查：s_ij·g1 == Σ_k x'_j^k·B_ik；S中有分发者的子份额不通过时报错并指明该分发者，
+     不能静默跳过（跳过会让不同新追踪者使用不同的S）
+   - d'_j = Σ_{i∈S} λ_i·s_ij，新承诺 C'_k = Σ_{i∈S} λ_i·B_ik，其中 C'_0 = Q
+新追踪者x'_j = tracer_id + 1，与kgc tracerkeygen相同。整个过程约 O(N·N') 次标量运算与小规模多项点乘。
+
+文件（均为JSON）:
+    分发文件 dealing_<旧tracer_id>.json（公开）:
+        {"version", "dealer_id", "x_i", "threshold", "commitments": [B_i0, ...]}
+    子份额文件 subshare_<旧tracer_id>_to_<新tracer_id>.json（私密，只交给新追踪者）:
+        {"version", "dealer_id", "dealer_x", "tracer_id", "x_i", "sub_share"}
+"""
+import json
+import os
+from sage.all import Integer
+from core.crypto import feldman
+from core.crypto.public_params import point_to_string, point_from_string
+from core.crypto.multiexp import multi_multiply
+
+RESHARE_VERSION = 1
+DEALING_FILE_FMT = "dealing_{}.json"
+SUBSHARE_FILE_FMT = "subshare_{}_to_{}.json"
+
+
+def new_tracer_xs(num_tracers):
+    """新追踪者的插值点：tracer_id 0..N'-1 对应 x = 1..N'"""
+    return [tracer_id + 1 for tracer_id in range(num_tracers)]
+
+
+def deal(tracer, new_xs, new_threshold, pp):
+    """
+    旧追踪者把自己的d_share重新分享
+    :param tracer: 已加载密钥的Tracer
+    :param new_xs: 新追踪者的插值点列表
+    :return: (commitments, sub_shares)，sub_shares与new_xs一一对应
+    """
+    if new_threshold < 1 or new_threshold > len(new_xs):
+        raise ValueError("New threshold must be between 1 and the number of new tracers")
+    n = int(pp.n)
+    coeffs = [int(tracer.d_share) % n] + [int(c) for c in pp.rand_ints(new_threshold - 1)]
+    return feldman.commit(coeffs, pp), feldman.share_secret(coeffs, new_xs, n)
+
+
+def check_dealing(dealing, old_commitments, new_threshold, pp):
+    """公开检查：承诺个数为t'且 B_0 等于由旧承诺推出的公钥份额。不通过时返回原因，通过时返回None"""
+    commitments = dealing["commitments"]
+    if len(commitments) != new_threshold:
+        return f"expected {new_threshold} commitments, got {len(commitments)}"
+    if commitments[0] != feldman.derive_pub_share(old_commitments, dealing["x_i"], pp):
+        return "B_0 does not match the dealer's public share"
+    return None
+
+
+def qualified_dealers(dealings, old_commitments, new_threshold, pp):
+    """
+    选出合格集合：通过公开检查的分发中x_i最小的t个
+    :param dealings: 分发列表（load_dealing的结果）
+    :return: (合格分发列表, {dealer_id: 拒绝原因})
+    """
+    threshold = len(old_commitments)
+    accepted, rejected, seen = [], {}, set()
+    for dealing in sorted(dealings, key=lambda d: int(d["x_i"])):
+        if len(accepted) >= threshold:
+            break
+        reason = check_dealing(dealing, old_commitments, new_threshold, pp)
+        if reason is None and int(dealing["x_i"]) in seen:
+            reason = f"duplicate dealing for x={dealing['x_i']}"
+        if reason is None:
+            accepted.append(dealing)
+            seen.add(int(dealing["x_i"]))
+        else:
+            rejected[str(dealing["dealer_id"])] = reason
+    if len(accepted) < threshold:
+        raise ValueError(f"Only {len(accepted)} valid dealings, {threshold} required")
+    return accepted, rejected
+
+
+def combine_sub_shares(x, dealings, sub_shares, pp):
+    """
+    新追踪者组合子份额
+    :param x: 本新追踪者的插值点
+    :param dealings: 合格集合（qualified_dealers的结果）
+    :param sub_shares: {dealer_id: s_ij}
+    :return: (d_share, 新承诺列表)
+    """
+    n = int(pp.n)
+    for dealing in dealings:
+        dealer_id = str(dealing["dealer_id"])
+        if dealer_id not in sub_shares:
+            raise ValueError(f"Missing sub-share from dealer {dealer_id}")
+        if not feldman.verify_share(dealing["commitments"], x, sub_shares[dealer_id], pp):
+            raise ValueError(f"Sub-share from dealer {dealer_id} does not match its commitments")
+    lambdas = feldman.lagrange_at_zero([dealing["x_i"] for dealing in dealings], n)
+    d_share = sum(l * int(sub_shares[str(dealing["dealer_id"])]) for l, dealing in zip(lambdas, dealings)) % n
+    new_threshold = len(dealings[0]["commitments"])
+    commitments = [multi_multiply([dealing["commitments"][k] for dealing in dealings], lambdas, pp.E(0), arity=pp.tuning.msm_arity,
+                                   min_lanes=pp.tuning.batch_lanes)
+                   for k in range(new_threshold)]
+    if commitments[0] != pp.Q:
+        raise ValueError("Combined commitment C'_0 does not match Q")
+    return d_share, commitments
+
+
+# ----------- 文件读写 -----------
+def save_dealing(out_dir, tracer, commitments, sub_shares, new_xs):
+    """写出公开分发文件和每个新追踪者的子份额文件，返回分发文件路径"""
+    os.makedirs(out_dir, exist_ok=True)
+    dealing_path = os.path.join(out_dir, DEALING_FILE_FMT.format(tracer.tracer_id))
+    with open(dealing_path, 'w') as f:
+        json.dump({"version": RESHARE_VERSION, "dealer_id": tracer.tracer_id, "x_i": int(tracer.x_i),
+                   "threshold": len(commitments), "commitments": [point_to_string(B) for B in commitments]}, f, indent=2)
+    for new_id, (x, s) in enumerate(zip(new_xs, sub_shares)):
+        path = os.path.join(out_dir, SUBSHARE_FILE_FMT.format(tracer.tracer_id, new_id))
+        with open(path, 'w') as f:
+            json.dump({"version": RESHARE_VERSION, "dealer_id": tracer.tracer_id, "dealer_x": int(tracer.x_i),
+                       "tracer_id": new_id, "x_i": x, "sub_share": int(s)}, f, indent=2)
+    return dealing_path
+
+
+def load_dealing(path, pp):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get("version") != RESHARE_VERSION:
+        raise ValueError(f"Unsupported dealing version: {data.get('version')}")
+    data["commitments"] = [point_from_string(s, pp.F, pp.E) for s in data["commitments"]]
+    return data
+
+
+def load_dealings(dealing_dir, pp):
+    """读取目录中的全部分发文件"""
+    return [load_dealing(os.path.join(dealing_dir, name), pp)
+            for name in sorted(os.listdir(dealing_dir))
+            if name.startswith("dealing_") and name.endswith(".json")]
+
+
+def load_sub_shares(dealing_dir, tracer_id, x):
+    """读取目录中发给本新追踪者的子份额 {dealer_id: s_ij}"""
+    suffix = f"_to_{tracer_id}.json"
+    sub_shares = {}
+    for name in sorted(os.listdir(dealing_dir)):
+        if not (name.startswith("subshare_") and name.endswith(suffix)):
+            continue
+        with open(os.path.join(dealing_dir, name), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if int(data["x_i"]) != int(x):
+            raise ValueError(f"{name} was dealt for x={data['x_i']}, expected {x}")
+        sub_shares[str(data["dealer_id"])] = int(data["sub_share"])
+    return sub_shares
+
+
+def new_tracer_key(tracer_id, x, d_share, pp):
+    """与kgc tracerkeygen相同格式的单个追踪者密钥"""
+    return {
+        'tracer_id': tracer_id,
+        'x_i': x,
+        'd_share': int(d_share),
+        'pub_share': point_to_string(pp.g1_table.multiply(Integer(d_share))),
+    }
@@ -0,0 +1,208 @@
+"""
+多用户签名主机
+
+托管服务代成千上万个用户签名，逐个请求构造User会重复加载参数、密钥和环。SigningHost：
+- 所有用户共用一个PublicParams（core.crypto.registry）
+- KeyVault按需加载用户密钥，最近使用的max_keys个User（含私钥）留在内存中；
+  loader钩子可以替换密钥来源（例如解密托管服务自己的密钥存储）
+- 一批签名任务按环分组，每个环的成员预计算表只构建一次，同一环的任务
+  （不同签名者）都用User.sign_with_ring签名；加载过的环按LRU保留max_rings个
+- 任务数不少于tuning.parallel_threshold且workers > 1时，各环组切块交给进程池，
+  每个工作进程有自己的KeyVault和环缓存，同一批中同一环的块尽量少拆
+签名结果为User.serialize_signature格式的dict。
+"""
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from core.crypto.registry import shared_public_params
+from core.entities import DEFAULT_PARAMS_PATH, DEFAULT_USER_KEYS_DIR, DEFAULT_USER_SINGLE_KEY_FILE_FMT
+from core.entities.user import User
+
+DEFAULT_MAX_KEYS = 10000
+DEFAULT_MAX_RINGS = 8
+
+
+class KeyVault:
+    """
+    按需加载的用户密钥库，User对象共用同一个PublicParams
+    :param user_dir: 用户密钥文件目录（文件名与DEFAULT_USER_SINGLE_KEY_FILE_FMT相同）
+    :param max_keys: 内存中保留的用户数（按最近使用淘汰）
+    :param loader: loader(user_id) -> 密钥dict（sk, pk, pid，与密钥文件格式相同）；缺省读取密钥文件
+    """
+    def __init__(self, pp, user_dir=DEFAULT_USER_KEYS_DIR, max_keys=DEFAULT_MAX_KEYS, loader=None):
+        self.pp = pp
+        self.user_dir = user_dir
+        self.max_keys = max_keys
+        self.loader = loader
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "loads": 0, "evictions": 0}
+
+    def key_file(self, user_id):
+        return os.path.join(self.user_dir, os.path.basename(DEFAULT_USER_SINGLE_KEY_FILE_FMT).format(user_id))
+
+    def get(self, user_id):
+        """返回已加载密钥的User"""
+        user_id = str(user_id)
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is not None:
+                self._users.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return user
+        # 在锁外读取密钥文件；并发加载同一用户时后到的覆盖先到的，结果相同
+        user = User(user_id, key_file=self.key_file(user_id), load_key=self.loader is None, pp=self.pp)
+        if self.loader is not None:
+            user.set_key(self.loader(user_id))
+        with self._lock:
+            self._users[user_id] = user
+            self._users.move_to_end(user_id)
+            self.stats["loads"] += 1
+            while len(self._users) > self.max_keys:
+                self._users.popitem(last=False)
+                self.stats["evictions"] += 1
+        return user
+
+    def evict(self, user_id):
+        """从内存中移除一个用户的密钥（例如密钥轮换后）"""
+        with self._lock:
+            self._users.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+    def __len__(self):
+        return len(self._users)
+
+
+# 工作进程中的SigningHost（由_init_worker创建）
+_worker_host = None
+
+
+def _init_worker(options):
+    global _worker_host
+    _worker_host = SigningHost(workers=1, **options)
+
+
+def _sign_chunk(ring_ids, jobs):
+    return _worker_host._sign_group(ring_ids, jobs)
+
+
+class SigningHost:
+    """
+    :param workers: 工作进程数，缺省取tuning.workers；为1时总在本进程中签名
+    :param compact_tables: 环成员预计算表是否使用CompactPowerTable（大环时节省内存）
+    :param loader: 见KeyVault；使用spawn方式的进程池时必须可以pickle
+    """
+    def __init__(self, params_file=DEFAULT_PARAMS_PATH, user_dir=DEFAULT_USER_KEYS_DIR, max_keys=DEFAULT_MAX_KEYS,
+                 max_rings=DEFAULT_MAX_RINGS, compact_tables=False, workers=None, loader=None):
+        self.params_file = params_file or DEFAULT_PARAMS_PATH
+        self.user_dir = user_dir or DEFAULT_USER_KEYS_DIR
+        self.pp = shared_public_params(self.params_file)
+        self.vault = KeyVault(self.pp, self.user_dir, max_keys, loader)
+        self.max_rings = max_rings
+        self.workers = workers or self.pp.tuning.workers
+        self._options = dict(params_file=self.params_file, user_dir=self.user_dir, max_keys=max_keys,
+                             max_rings=max_rings, compact_tables=compact_tables, loader=loader)
+        # 只用于加载环（load_ring不需要私钥）
+        self._ring_loader = User("signing-host", pp=self.pp, load_key=False, compact_tables=compact_tables)
+        self._rings = OrderedDict()
+        self._rings_lock = threading.Lock()
+        self._pool = None
+        self.stats = {"signed": 0, "failed": 0, "ring_loads": 0, "ring_hits": 0}
+
+    def ring(self, ring_ids):
+        """加载（或从缓存取出）环，ring_ids为用户ID元组"""
+        with self._rings_lock:
+            ring = self._rings.get(ring_ids)
+            if ring is not None:
+                self._rings.move_to_end(ring_ids)
+                self.stats["ring_hits"] += 1
+                return ring
+        ring = self._ring_loader.load_ring(list(ring_ids), self.user_dir)
+        with self._rings_lock:
+            self._rings[ring_ids] = ring
+            self.stats["ring_loads"] += 1
+            while len(self._rings) > self.max_rings:
+                self._rings.popitem(last=False)
+        return ring
+
+    def sign(self, user_id, message, ring_user_ids, event="default", linkable=False):
+        """单个签名，返回签名dict"""
+        return self.sign_batch([(user_id, message, ring_user_ids, event, linkable)])[0]
+
+    def sign_batch(self, jobs, return_exceptions=False):
+        """
+        批量签名
+        :param jobs: [(user_id, message, ring_user_ids, event[, linkable]), ...]，
+                     ring_user_ids为ID列表或每行一个ID的文件路径
+        :param return_exceptions: True时失败的任务在结果中对应异常对象，否则抛出第一个异常
+        :return: 与jobs一一对应的签名dict列表
+        """
+        groups = OrderedDict()
+        for position, job in enumerate(jobs):
+            user_id, message, ring_user_ids, event = job[:4]
+            linkable = bool(job[4]) if len(job) > 4 else False
+            ring_ids = tuple(User.iter_ring_ids(ring_user_ids))
+            groups.setdefault(ring_ids, []).append((position, (str(user_id), message, event, linkable)))
+
+        results = [None] * len(jobs)
+        if self.workers > 1 and len(jobs) >= self.pp.tuning.parallel_threshold:
+            # 按总任务数切块（约为进程数的两倍），同一环的任务连续切分
+            chunk_size = max(1, math.ceil(len(jobs) / (2 * self.workers)))
+            pool = self._executor()
+            futures = []
+            for ring_ids, entries in groups.items():
+                for start in range(0, len(entries), chunk_size):
+                    chunk = entries[start:start + chunk_size]
+                    futures.append(([position for position, _ in chunk],
+                                    pool.submit(_sign_chunk, ring_ids, [job for _, job in chunk])))
+            for positions, future in futures:
+                for position, result in zip(positions, future.result()):
+                    results[position] = result
+        else:
+            for ring_ids, entries in groups.items():
+                for position, result in zip([position for position, _ in entries],
+                                            self._sign_group(ring_ids, [job for _, job in entries])):
+                    results[position] = result
+
+        failures = [result for result in results if isinstance(result, Exception)]
+        self.stats["signed"] += len(results) - len(failures)
+        self.stats["failed"] += len(failures)
+        if failures and not return_exceptions:
+            raise failures[0]
+        return results
+
+    def _sign_group(self, ring_ids, jobs):
+        """同一个环的任务：环只加载一次，每个任务的异常单独记录"""
+        try:
+            ring = self.ring(ring_ids)
+        except Exception as e:
+            return [e] * len(jobs)
+        results = []
+        for user_id, message, event, linkable in jobs:
+            try:
+                user = self.vault.get(user_id)
+                results.append(User.serialize_signature(user.sign_with_ring(message, ring, event, linkable)))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self._options,))
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
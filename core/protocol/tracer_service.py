@@ -0,0 +1,120 @@
+"""
+常驻追踪者服务
+
+与TracerEndpoint使用相同的传输和消息格式，但进程常驻：d_share、公共参数和预计算表
+只加载一次，请求进入队列，由单个工作协程批量处理。
+- 同一C1的并发请求合并为一次计算
+- 已发出的份额按C1摘要缓存（LRU），重复审计同一签名不再计算
+- 每次取空队列时整批调用Tracer.partial_decrypt_batch，点乘一次归一化，
+  每个份额带绑定其C1的DLEQ证明（缓存的应答可以原样转发给任何协调器验证）
+- {"op": "stats"} 返回命中、合并和批处理统计
+"""
+import asyncio
+import hashlib
+from collections import OrderedDict
+from core.crypto.public_params import point_from_string
+from core.entities.tracer import Tracer
+from core.protocol.coordinator import TracerEndpoint
+
+
+def c1_digest(C1_str):
+    """C1字符串（point_to_string格式）的sha256摘要，忽略空白"""
+    return hashlib.sha256(C1_str.replace(' ', '').encode('utf-8')).hexdigest()
+
+
+class TracerService(TracerEndpoint):
+    """
+    :param tracer: 已加载密钥的Tracer
+    :param address: 监听地址
+    :param auth_key: 与协调器共享的认证密钥（与TracerEndpoint相同）
+    :param cache_size: 份额缓存的最大条目数
+    :param max_batch: 每批最多处理的请求数
+    """
+    def __init__(self, tracer, address, auth_key, cache_size=100000, max_batch=64):
+        super().__init__(tracer, address, auth_key)
+        self.cache_size = cache_size
+        self.max_batch = max_batch
+        self.cache = OrderedDict()
+        self.pending = {}
+        self.queue = None
+        self.worker = None
+        self.stats = {"requests": 0, "cache_hits": 0, "deduplicated": 0, "computed": 0, "batches": 0}
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.ensure_future(self.drain())
+        return await super().start()
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.worker is not None:
+            self.worker.cancel()
+            await asyncio.gather(self.worker, return_exceptions=True)
+
+    async def respond(self, request):
+        op = request.get("op")
+        if op == "stats":
+            return dict(self.stats, cache_entries=len(self.cache), tracer_id=self.tracer.tracer_id)
+        if op != "partial_decrypt":
+            return self.process(request)
+        return await self.submit(request["PID_encryption"][0])
+
+    async def submit(self, C1_str):
+        """提交一个C1，返回序列化的部分解密结果"""
+        self.stats["requests"] += 1
+        key = c1_digest(C1_str)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return cached
+        future = self.pending.get(key)
+        if future is not None:
+            self.stats["deduplicated"] += 1
+        else:
+            # 入队前解析并检查C1，格式错误只影响本次请求，不会拖垮整批
+            pp = self.tracer.pp
+            C1 = point_from_string(C1_str, pp.F, pp.E)
+            future = asyncio.get_running_loop().create_future()
+            self.pending[key] = future
+            self.queue.put_nowait((key, C1))
+        # shield：某个客户端断开不影响同一C1的其他等待者
+        return await asyncio.shield(future)
+
+    def compute_batch(self, C1_list):
+        signatures = [((C1, None, None), None) for C1 in C1_list]
+        results = self.tracer.partial_decrypt_batch(signatures)
+        responses = []
+        for result in results:
+            response = Tracer.serialize_decrypt_result(result)
+            response["tracer_id"] = self.tracer.tracer_id
+            responses.append(response)
+        return responses
+
+    async def drain(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            keys = [key for key, _ in batch]
+            try:
+                responses = await loop.run_in_executor(None, self.compute_batch, [C1 for _, C1 in batch])
+            except Exception as e:
+                # 整批失败时逐个回报错误，不缓存
+                for key in keys:
+                    future = self.pending.pop(key, None)
+                    if future is not None and not future.done():
+                        future.set_exception(e)
+                continue
+            self.stats["batches"] += 1
+            self.stats["computed"] += len(batch)
+            for key, response in zip(keys, responses):
+                self.cache[key] = response
+                future = self.pending.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
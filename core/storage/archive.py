@@ -0,0 +1,498 @@
+"""
+分段签名归档
+
+批量任务（验证、部分解密、恢复）逐个打开、解析JSON签名文件的开销很大。
+SignatureArchive 把签名追加写入固定大小上限的段文件，并维护三个mmap哈希索引，
+按签名摘要、event、环直接定位记录，千万级签名中取一条不需要扫描。
+
+目录结构:
+    archive.json        清单：段列表、每段已提交长度、记录数
+    seg-000000.dat ...  段文件，只追加
+    signature.idx       签名摘要 -> 记录位置
+    event.idx           event摘要 -> 该event最新一条记录的位置
+    ring.idx            环摘要 -> 该环最新一条记录的位置
+
+段内记录（大端）:
+    header: magic 'SR' | format u8 | flags u8 | event长度 u16 | 环长度 u32 | 消息长度 u32 | 签名长度 u32
+            | 同event上一条 u64 | 同环上一条 u64 | event内序号 u32 | 环内序号 u32
+    签名摘要 (32字节) | event (utf-8) | 环ID（'\\n'分隔） | 消息 | 签名
+format 为 FORMAT_BINARY（codec二进制，v1签名）或 FORMAT_JSON（紧凑JSON，v2签名）。
+同一event（环）的记录通过"上一条"指针串成链，索引只记录链头，按event或环查询时
+沿链回溯，不经过其他记录；链头记录的序号即该event（环）的签名数。
+
+索引文件: header 'TARSIDX1' | 槽数 u64 | 键数 u64，之后为槽数个 (键 16字节 | 位置+1 u64)；
+位置为 段号 << 40 | 段内偏移，值为0的槽为空（记录中的"上一条"指针同样存 位置+1）。
+开放寻址、线性探测，装载因子超过1/2时容量翻倍重建。
+
+写入顺序为 段 -> 索引 -> 清单（flush时）；打开时若段长度或索引条目数与清单不一致
+（上次未正常关闭），截掉末尾不完整的记录并从段文件重建索引。
+"""
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+from core.crypto import codec
+
+MANIFEST_NAME = "archive.json"
+SEGMENT_NAME_FMT = "seg-{:06d}.dat"
+DEFAULT_SEGMENT_SIZE = 1 << 30
+
+RECORD_MAGIC = b'SR'
+RECORD = struct.Struct('>2sBBHIIIQQII')
+DIGEST_BYTES = 32
+FORMAT_BINARY = 0
+FORMAT_JSON = 1
+FLAG_MESSAGE = 1
+
+INDEX_MAGIC = b'TARSIDX1'
+INDEX_HEADER = struct.Struct('>8sQQ')
+INDEX_SLOT = struct.Struct('>16sQ')
+INDEX_KEY_BYTES = 16
+INDEX_MIN_SLOTS = 1024
+OFFSET_BITS = 40
+
+
+def _ring_bytes(ring_user_ids):
+    return "\n".join(str(uid) for uid in ring_user_ids).encode('utf-8')
+
+
+def _digest(data):
+    return hashlib.sha256(data).digest()
+
+
+def pack_location(segment, offset):
+    return (segment << OFFSET_BITS) | offset
+
+
+def unpack_location(location):
+    return location >> OFFSET_BITS, location & ((1 << OFFSET_BITS) - 1)
+
+
+class HashIndex:
+    """mmap上的开放寻址哈希表，键为16字节摘要前缀，值为记录位置"""
+    def __init__(self, path, min_slots=INDEX_MIN_SLOTS, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        if not os.path.exists(path):
+            self._create(path, min_slots)
+        self._open()
+
+    @staticmethod
+    def _create(path, slots):
+        with open(path, 'wb') as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, slots, 0))
+            f.truncate(INDEX_HEADER.size + slots * INDEX_SLOT.size)
+
+    def _open(self):
+        self._file = open(self.path, 'rb' if self.readonly else 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ if self.readonly else mmap.ACCESS_WRITE)
+        magic, self.slots, self.count = INDEX_HEADER.unpack_from(self._map, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"Not a libTARS archive index: {self.path}")
+        self._mask = self.slots - 1
+
+    def _slot_offset(self, slot):
+        return INDEX_HEADER.size + slot * INDEX_SLOT.size
+
+    def _probe(self, key):
+        """沿key的探测序列产出 (槽号, 槽中的键, 位置+1)，到空槽为止"""
+        slot = int.from_bytes(key[:8], 'big') & self._mask
+        while True:
+            stored_key, value = INDEX_SLOT.unpack_from(self._map, self._slot_offset(slot))
+            yield slot, stored_key, value
+            if value == 0:
+                return
+            slot = (slot + 1) & self._mask
+
+    def put(self, key, location):
+        """写入或覆盖key对应的位置"""
+        key = bytes(key[:INDEX_KEY_BYTES])
+        if 2 * (self.count + 1) > self.slots:
+            self._grow()
+        for slot, stored_key, value in self._probe(key):
+            if value == 0 or stored_key == key:
+                INDEX_SLOT.pack_into(self._map, self._slot_offset(slot), key, location + 1)
+                break
+        if value == 0:
+            self.count += 1
+            INDEX_HEADER.pack_into(self._map, 0, INDEX_MAGIC, self.slots, self.count)
+
+    def get(self, key):
+        """key对应的位置，不存在时返回None"""
+        key = bytes(key[:INDEX_KEY_BYTES])
+        for _, stored_key, value in self._probe(key):
+            if value and stored_key == key:
+                return value - 1
+        return None
+
+    def items(self):
+        for slot in range(self.slots):
+            key, value = INDEX_SLOT.unpack_from(self._map, self._slot_offset(slot))
+            if value:
+                yield key, value - 1
+
+    def _grow(self):
+        entries = list(self.items())
+        tmp_path = self.path + '.tmp'
+        self._create(tmp_path, self.slots * 2)
+        grown = HashIndex(tmp_path)
+        for key, location in entries:
+            grown.put(key, location)
+        grown.close()
+        self.close()
+        os.replace(tmp_path, self.path)
+        self._open()
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    @classmethod
+    def reset(cls, path, min_slots=INDEX_MIN_SLOTS):
+        if os.path.exists(path):
+            os.remove(path)
+        return cls(path, min_slots)
+
+
+class ArchiveEntry:
+    """一条归档记录；payload是段文件mmap上的memoryview，不复制数据"""
+    __slots__ = ('location', 'format', 'digest', 'event', '_ring', '_message', 'payload')
+
+    def __init__(self, location, fmt, digest, event, ring, message, payload):
+        self.location = location
+        self.format = fmt
+        self.digest = digest
+        self.event = event
+        self._ring = ring
+        self._message = message
+        self.payload = payload
+
+    @property
+    def digest_hex(self):
+        return self.digest.hex()
+
+    @property
+    def ring_user_ids(self):
+        return bytes(self._ring).decode('utf-8').split('\n') if len(self._ring) else []
+
+    @property
+    def message(self):
+        """打包时记录的消息（str），未记录时为None"""
+        return None if self._message is None else bytes(self._message).decode('utf-8')
+
+    def signature(self, pp):
+        """解码为 (PID_encryption, PID_signature)"""
+        if self.format == FORMAT_BINARY:
+            return codec.read_signature(codec.BufferReader(self.payload), pp)
+        from core.entities.user import User
+        return User.deserialize_signature(json.loads(bytes(self.payload).decode('utf-8')), pp)
+
+    def to_json(self, pp=None):
+        """与user sign输出相同结构的dict（二进制记录需要pp解码）"""
+        if self.format == FORMAT_JSON:
+            data = json.loads(bytes(self.payload).decode('utf-8'))
+        else:
+            from core.entities.user import User
+            data = User.serialize_signature(self.signature(pp))
+        data.update({"ring_user_ids": self.ring_user_ids, "event": self.event})
+        return data
+
+
+class SignatureArchive:
+    def __init__(self, path, segment_size=DEFAULT_SEGMENT_SIZE, readonly=False):
+        """
+        :param path: 归档目录（不存在时创建）
+        :param segment_size: 单个段文件的大小上限（字节），超过后开启新段
+        :param readonly: 只读打开（不修复、不写清单）
+        """
+        self.path = path
+        self.readonly = readonly
+        manifest_path = os.path.join(path, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            self.segment_size = manifest["segment_size"]
+            self.segment_sizes = manifest["segments"]
+            self.count = manifest["count"]
+        else:
+            if readonly:
+                raise FileNotFoundError(f"Signature archive {path} does not exist")
+            os.makedirs(path, exist_ok=True)
+            self.segment_size = segment_size
+            self.segment_sizes = []
+            self.count = 0
+        self._maps = {}  # 段号 -> (映射长度, mmap)
+        self._writer = None
+        self.indexes = {name: HashIndex(os.path.join(path, f"{name}.idx"), readonly=readonly) for name in ("signature", "event", "ring")}
+        if not readonly and not self._consistent():
+            self.recover()
+
+    # ----------- 段文件 -----------
+    def _segment_path(self, segment):
+        return os.path.join(self.path, SEGMENT_NAME_FMT.format(segment))
+
+    def _consistent(self):
+        for segment, size in enumerate(self.segment_sizes):
+            if os.path.getsize(self._segment_path(segment)) != size:
+                return False
+        if os.path.exists(self._segment_path(len(self.segment_sizes))):
+            return False
+        return self.indexes["signature"].count == self.count
+
+    def _segment_map(self, segment, end):
+        """覆盖到end的只读映射；段在映射后增长时重新映射（旧映射由仍持有的memoryview保活）"""
+        cached = self._maps.get(segment)
+        if cached is None or cached[0] < end:
+            with open(self._segment_path(segment), 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                cached = (size, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            self._maps[segment] = cached
+        return cached[1]
+
+    def _scan_segment(self, segment, start=0):
+        """顺序产出段中从start开始的完整记录 (偏移, 记录长度, 摘要, event字节, 环字节)，遇到不完整记录停止"""
+        with open(self._segment_path(segment), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        offset = start
+        while offset + RECORD.size <= len(data):
+            magic, _fmt, _flags, event_len, ring_len, message_len, sig_len = RECORD.unpack_from(data, offset)[:7]
+            length = RECORD.size + DIGEST_BYTES + event_len + ring_len + message_len + sig_len
+            if magic != RECORD_MAGIC or offset + length > len(data):
+                return
+            pos = offset + RECORD.size
+            digest = data[pos:pos + DIGEST_BYTES]
+            pos += DIGEST_BYTES
+            event = data[pos:pos + event_len]
+            ring = data[pos + event_len:pos + event_len + ring_len]
+            yield offset, length, digest, event, ring
+            offset += length
+
+    def recover(self):
+        """
+        上次未正常关闭时：截掉每段末尾不完整的记录，从段文件重建全部索引并重写清单。
+        记录中的链指针写入时已经确定，只需按顺序恢复各链的链头。
+        """
+        for index in self.indexes.values():
+            index.close()
+        self.indexes = {name: HashIndex.reset(os.path.join(self.path, f"{name}.idx")) for name in self.indexes}
+        self.segment_sizes = []
+        self.count = 0
+        segment = 0
+        while os.path.exists(self._segment_path(segment)):
+            end = 0
+            for offset, length, digest, event, ring in self._scan_segment(segment):
+                location = pack_location(segment, offset)
+                self.indexes["signature"].put(digest, location)
+                self.indexes["event"].put(_digest(event), location)
+                self.indexes["ring"].put(_digest(ring), location)
+                self.count += 1
+                end = offset + length
+            with open(self._segment_path(segment), 'r+b') as f:
+                f.truncate(end)
+            self.segment_sizes.append(end)
+            segment += 1
+        self.flush()
+
+    # ----------- 写入 -----------
+    def _chain_head(self, name, key):
+        """链头的 (位置+1, 序号)，链为空时为 (0, 0)"""
+        location = self.indexes[name].get(key)
+        if location is None:
+            return 0, 0
+        header = self._record_header(location)
+        return location + 1, header[9 if name == "event" else 10]
+
+    def _open_writer(self, record_size):
+        # 当前段放不下时开启新段（空段总是可以写入，单条记录可以超过段大小上限）
+        if not self.segment_sizes or (self.segment_sizes[-1] and self.segment_sizes[-1] + record_size > self.segment_size):
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self.segment_sizes.append(0)
+        if self._writer is None:
+            # 无缓冲：每条记录一次write，写入后即可通过mmap读取
+            self._writer = open(self._segment_path(len(self.segment_sizes) - 1), 'ab', buffering=0)
+
+    def append_encoded(self, digest, fmt, payload, event="default", ring_user_ids=(), message=None):
+        """
+        写入一条已编码的签名
+        :param digest: 32字节签名摘要（user.signature_digest的字节形式）
+        :return: 新记录的位置；摘要已存在时不写入，返回None
+        """
+        if self.readonly:
+            raise ValueError("Signature archive is opened read-only")
+        if len(digest) != DIGEST_BYTES:
+            raise ValueError("Signature digest must be 32 bytes")
+        if self.indexes["signature"].get(digest) is not None:
+            return None
+        event_bytes = event.encode('utf-8')
+        ring_bytes = _ring_bytes(ring_user_ids)
+        event_digest, ring_digest = _digest(event_bytes), _digest(ring_bytes)
+        message_bytes = b'' if message is None else (message.encode('utf-8') if isinstance(message, str) else bytes(message))
+        flags = FLAG_MESSAGE if message is not None else 0
+        prev_event, event_seq = self._chain_head("event", event_digest)
+        prev_ring, ring_seq = self._chain_head("ring", ring_digest)
+        header = RECORD.pack(RECORD_MAGIC, fmt, flags, len(event_bytes), len(ring_bytes), len(message_bytes), len(payload),
+                             prev_event, prev_ring, event_seq + 1, ring_seq + 1)
+        record = b''.join([header, digest, event_bytes, ring_bytes, message_bytes, payload])
+        self._open_writer(len(record))
+        segment = len(self.segment_sizes) - 1
+        offset = self.segment_sizes[segment]
+        self._writer.write(record)
+        self.segment_sizes[segment] = offset + len(record)
+        location = pack_location(segment, offset)
+        self.indexes["signature"].put(digest, location)
+        self.indexes["event"].put(event_digest, location)
+        self.indexes["ring"].put(ring_digest, location)
+        self.count += 1
+        return location
+
+    def append(self, signature, pp, event="default", ring_user_ids=(), message=None):
+        """
+        写入签名 (PID_encryption, PID_signature)：v1签名按codec二进制格式，v2签名按紧凑JSON
+        :return: 签名摘要（十六进制）和是否新写入
+        """
+        from core.entities.user import User, signature_digest, signature_version, SIGNATURE_V1
+        digest = bytes.fromhex(signature_digest(signature))
+        if signature_version(signature) == SIGNATURE_V1:
+            buffer = io.BytesIO()
+            codec.write_signature(signature, buffer, pp)
+            fmt, payload = FORMAT_BINARY, buffer.getvalue()
+        else:
+            text = json.dumps(User.serialize_signature(signature), separators=(',', ':'))
+            fmt, payload = FORMAT_JSON, text.encode('utf-8')
+        location = self.append_encoded(digest, fmt, payload, event, ring_user_ids, message)
+        return digest.hex(), location is not None
+
+    def flush(self):
+        """把段和索引写到磁盘，再原子地更新清单"""
+        if self.readonly:
+            return
+        if self._writer is not None:
+            self._writer.flush()
+            os.fsync(self._writer.fileno())
+        for index in self.indexes.values():
+            index.flush()
+        manifest = {"version": 1, "segment_size": self.segment_size, "segments": self.segment_sizes, "count": self.count}
+        manifest_path = os.path.join(self.path, MANIFEST_NAME)
+        with open(manifest_path + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+    # ----------- 读取 -----------
+    def _record_header(self, location):
+        segment, offset = unpack_location(location)
+        if segment >= len(self.segment_sizes):
+            raise KeyError(f"Archive location {location} is out of range")
+        header = RECORD.unpack_from(self._segment_map(segment, offset + RECORD.size), offset)
+        if header[0] != RECORD_MAGIC:
+            raise ValueError(f"Corrupt archive record at segment {segment} offset {offset}")
+        return header
+
+    def entry_at(self, location):
+        segment, offset = unpack_location(location)
+        _, fmt, flags, event_len, ring_len, message_len, sig_len = self._record_header(location)[:7]
+        end = offset + RECORD.size + DIGEST_BYTES + event_len + ring_len + message_len + sig_len
+        view = memoryview(self._segment_map(segment, end))
+        pos = offset + RECORD.size
+        digest = bytes(view[pos:pos + DIGEST_BYTES])
+        pos += DIGEST_BYTES
+        event = bytes(view[pos:pos + event_len]).decode('utf-8')
+        pos += event_len
+        ring = view[pos:pos + ring_len]
+        pos += ring_len
+        message = view[pos:pos + message_len] if flags & FLAG_MESSAGE else None
+        pos += message_len
+        return ArchiveEntry(location, fmt, digest, event, ring, message, view[pos:pos + sig_len])
+
+    def get(self, digest):
+        """按签名摘要（十六进制或bytes）取一条记录，不存在时返回None"""
+        if isinstance(digest, str):
+            digest = bytes.fromhex(digest)
+        location = self.indexes["signature"].get(digest)
+        return None if location is None else self.entry_at(location)
+
+    def _chain(self, name, key):
+        """沿链回溯，返回该event（环）全部记录的位置（按归档顺序）"""
+        locations = []
+        location = self.indexes[name].get(key)
+        prev_field = 7 if name == "event" else 8
+        while location is not None:
+            locations.append(location)
+            prev = self._record_header(location)[prev_field]
+            location = prev - 1 if prev else None
+        locations.reverse()
+        return locations
+
+    def count_of(self, event=None, ring_user_ids=None):
+        """某个event或环的签名数（读链头记录的序号，不遍历）"""
+        name, key = ("event", _digest(event.encode('utf-8'))) if event is not None else ("ring", _digest(_ring_bytes(ring_user_ids)))
+        return self._chain_head(name, key)[1]
+
+    def find(self, event=None, ring_user_ids=None):
+        """
+        按event和/或环查询，按归档顺序产出记录；两者都给出时沿较短的链回溯并按另一条件过滤
+        """
+        if event is None and ring_user_ids is None:
+            return self.iter_entries()
+        event_bytes = None if event is None else event.encode('utf-8')
+        ring_bytes = None if ring_user_ids is None else _ring_bytes(ring_user_ids)
+        chains = []
+        if event_bytes is not None:
+            chains.append((self._chain_head("event", _digest(event_bytes))[1], "event", _digest(event_bytes)))
+        if ring_bytes is not None:
+            chains.append((self._chain_head("ring", _digest(ring_bytes))[1], "ring", _digest(ring_bytes)))
+        _, name, key = min(chains)
+        return (entry for entry in map(self.entry_at, self._chain(name, key))
+                if (event is None or entry.event == event)
+                and (ring_bytes is None or bytes(entry._ring) == ring_bytes))
+
+    def iter_entries(self, start=0):
+        """按归档顺序产出全部记录；start为跳过的记录数"""
+        index = 0
+        for segment, size in enumerate(self.segment_sizes):
+            offset = 0
+            while offset < size:
+                buffer = self._segment_map(segment, size)
+                length = RECORD.size + DIGEST_BYTES + sum(RECORD.unpack_from(buffer, offset)[3:7])
+                if index >= start:
+                    yield self.entry_at(pack_location(segment, offset))
+                index += 1
+                offset += length
+
+    def iter_signatures(self, pp, event=None, ring_user_ids=None):
+        """产出 (记录, 签名)，供批量验证/部分解密/恢复使用"""
+        for entry in self.find(event, ring_user_ids):
+            yield entry, entry.signature(pp)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, digest):
+        return self.get(digest) is not None
+
+    def stats(self):
+        return {"signatures": self.count, "segments": len(self.segment_sizes), "bytes": sum(self.segment_sizes)}
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        for index in self.indexes.values():
+            index.close()
+        # 段映射可能仍被调用方持有的memoryview引用，交给垃圾回收释放
+        self._maps.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,135 @@
+"""
+可链接标签索引
+
+v2签名的标签 tag = H(event)^sk 只由签名者和event决定，同一签名者在同一event下的
+两份签名标签相同。LinkIndex 按 (event摘要, 标签摘要) 记录出现次数，验证时一次
+主键查询即可发现重复投票或超出频率限制的签名者，无需追踪者参与。
+给出签名摘要时按 (event, 标签, 签名摘要) 去重：同一份签名再次记录（重放、审计重跑、重试）
+不增加次数，返回它首次记录时的序号。
+
+存储使用SQLite（WAL模式，WITHOUT ROWID的复合主键表），支持百万级条目；
+path为":memory:"时只保存在内存中。
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+# previous: 本次之前同一 (event, tag) 已记录的签名数（重放时为该签名首次记录之前的签名数）；
+# first_seen / first_signature: 该标签首次记录的时间戳和签名摘要；replay: 这份签名此前已记录过
+LinkRecord = namedtuple("LinkRecord", "previous first_seen first_signature replay")
+
+_SCHEMA = ("""
+CREATE TABLE IF NOT EXISTS links (
+    event BLOB NOT NULL,
+    tag BLOB NOT NULL,
+    count INTEGER NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    first_signature TEXT,
+    PRIMARY KEY (event, tag)
+) WITHOUT ROWID
+""", """
+CREATE TABLE IF NOT EXISTS link_signatures (
+    event BLOB NOT NULL,
+    tag BLOB NOT NULL,
+    signature TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    seen REAL NOT NULL,
+    PRIMARY KEY (event, tag, signature)
+) WITHOUT ROWID
+""")
+
+
+def event_key(event):
+    """event的32字节摘要"""
+    event_bytes = event.encode('utf-8') if isinstance(event, str) else bytes(event)
+    return hashlib.sha256(event_bytes).digest()
+
+
+def tag_key(tag):
+    """标签的32字节摘要（标签群元素的十进制字符串形式）"""
+    return hashlib.sha256(str(tag).encode('utf-8')).digest()
+
+
+class LinkIndex:
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def record(self, event, tag, signature_digest=None, now=None):
+        """
+        记录一份有效签名的标签
+        :param tag: 标签点
+        :param signature_digest: 签名摘要（可选）；给出时同一份签名只计一次，标签首次出现时的摘要另行保存
+        :return: LinkRecord，previous为0表示该签名者在此event下首次出现
+        """
+        return self.record_many([(event, tag, signature_digest)], now)[0]
+
+    def record_many(self, items, now=None):
+        """
+        在一个事务中记录多个 (event, tag, signature_digest)，返回与items对应的LinkRecord列表
+        """
+        now = time.time() if now is None else now
+        results = []
+        with self._lock, self._conn:
+            cursor = self._conn.cursor()
+            for event, tag, signature_digest in items:
+                key = (event_key(event), tag_key(tag))
+                cursor.execute("SELECT count, first_seen, first_signature FROM links WHERE event = ? AND tag = ?", key)
+                row = cursor.fetchone()
+                if row is not None and signature_digest is not None:
+                    cursor.execute("SELECT seq FROM link_signatures WHERE event = ? AND tag = ? AND signature = ?",
+                                   key + (signature_digest,))
+                    seen = cursor.fetchone()
+                    if seen is not None:
+                        cursor.execute("UPDATE links SET last_seen = ? WHERE event = ? AND tag = ?", (now,) + key)
+                        results.append(LinkRecord(seen[0] - 1, row[1], row[2], True))
+                        continue
+                if row is None:
+                    cursor.execute("INSERT INTO links VALUES (?, ?, 1, ?, ?, ?)", key + (now, now, signature_digest))
+                    count = 1
+                    results.append(LinkRecord(0, now, signature_digest, False))
+                else:
+                    cursor.execute("UPDATE links SET count = count + 1, last_seen = ? WHERE event = ? AND tag = ?", (now,) + key)
+                    count = row[0] + 1
+                    results.append(LinkRecord(row[0], row[1], row[2], False))
+                if signature_digest is not None:
+                    cursor.execute("INSERT INTO link_signatures VALUES (?, ?, ?, ?, ?)", key + (signature_digest, count, now))
+        return results
+
+    def lookup(self, event, tag):
+        """已记录的不同签名数（不修改索引）"""
+        with self._lock:
+            row = self._conn.execute("SELECT count FROM links WHERE event = ? AND tag = ?",
+                                     (event_key(event), tag_key(tag))).fetchone()
+        return 0 if row is None else row[0]
+
+    def stats(self, event=None):
+        """不同标签数、签名总数和重复标签数（可限定event）"""
+        query = "SELECT COUNT(*), COALESCE(SUM(count), 0), COALESCE(SUM(count > 1), 0) FROM links"
+        params = ()
+        if event is not None:
+            query += " WHERE event = ?"
+            params = (event_key(event),)
+        with self._lock:
+            tags, signatures, duplicated = self._conn.execute(query, params).fetchone()
+        return {"tags": tags, "signatures": signatures, "duplicated_tags": duplicated}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -2,10 +2,10 @@ import argparse
 import os
 import json
 from core.entities.kgc import KGC
-from core.entities.user import User
+from core.entities.user import User, VerificationCache, SIGNATURE_V2, signature_version
 from core.entities.tracer import Tracer
 from core.crypto.public_params import point_to_string, point_from_string  # 新增：点转化函数
-from core.entities import DEFAULT_PARAMS_PATH, DEFAULT_KGC_KEY_PATH, DEFAULT_TRACER_KEYS_FILE, DEFAULT_TRACER_SINGLE_KEY_FILE_FMT, DEFAULT_TRACER_SINGLE_PUBLIC_KEY_FILE_FMT, DEFAULT_USER_KEYS_DIR, DEFAULT_USER_SINGLE_KEY_FILE_FMT, DEFAULT_USER_SINGLE_PUBLIC_KEY_FILE_FMT
+from core.entities import DEFAULT_PARAMS_PATH, DEFAULT_KGC_KEY_PATH, DEFAULT_TRACER_KEYS_FILE, DEFAULT_TRACER_SINGLE_KEY_FILE_FMT, DEFAULT_TRACER_SINGLE_PUBLIC_KEY_FILE_FMT, DEFAULT_TRACER_COMMITMENTS_FILE, DEFAULT_TRACER_AUTH_KEY_FILE, DEFAULT_USER_KEYS_DIR, DEFAULT_USER_SINGLE_KEY_FILE_FMT, DEFAULT_USER_SINGLE_PUBLIC_KEY_FILE_FMT
 
 # 全局语言参数: "zh"（中文）或 "en"（英文）
 LANG = "zh"
@@ -63,17 +63,72 @@ def kgc_tracerkeygen(args):
     ensure_dirs()
     params_path = args.params or DEFAULT_PARAMS_PATH
     key_path = args.key or DEFAULT_KGC_KEY_PATH
+    fmt = args.format or "json"
     out_path = args.output or DEFAULT_TRACER_KEYS_FILE
+    if fmt == "binary" and not args.output:
+        out_path = os.path.splitext(DEFAULT_TRACER_KEYS_FILE)[0] + ".bin"
+    commitments_path = args.commitments or DEFAULT_TRACER_COMMITMENTS_FILE
     # print(args)
     single_key_file_fmt = args.single_key_file_fmt or DEFAULT_TRACER_SINGLE_KEY_FILE_FMT
     single_public_key_file_fmt = args.single_public_key_file_fmt or DEFAULT_TRACER_SINGLE_PUBLIC_KEY_FILE_FMT
     kgc_inst = KGC(params_path=params_path, key_path=key_path, load_key=True)
-    kgc_inst.generate_tracer_keys(save_all=True, save_single=True, tracer_keys_path=out_path, single_key_file_fmt=single_key_file_fmt, single_public_key_file_fmt=single_public_key_file_fmt)
+    kgc_inst.generate_tracer_keys(save_all=True, save_single=True, tracer_keys_path=out_path, single_key_file_fmt=single_key_file_fmt, single_public_key_file_fmt=single_public_key_file_fmt,
+                                  commitments_path=commitments_path, fmt=fmt)
+    print(t(f"Feldman承诺已保存到 {commitments_path}", f"Feldman commitments have been saved to {commitments_path}"))
+    if fmt == "binary":
+        print(t(f"所有追踪者密钥已保存到批量二进制文件 {out_path}", f"All tracer keys have been saved to the bulk binary file {out_path}"))
+        return
     print(t(
         f"所有追踪者密钥已保存到 {out_path}，单个追踪者密钥已保存到 {single_key_file_fmt.format('trace_id')} 和 {single_public_key_file_fmt.format('trace_id')}",
         f"All tracer keys have been saved to {out_path}, single tracer keys have been saved to {single_key_file_fmt.format('trace_id')} and {single_public_key_file_fmt.format('trace_id')}"
     ))
 
+def kgc_validate(args):
+    """
+    注册时批量校验用户公钥对 e(pid, g2) == e(g1, pk)
+    输入:
+        files: 用户公钥文件列表（缺省时扫描 -d/--user-dir 下的全部用户公钥文件）
+        -p/--params, -d/--user-dir, --batch-size, --backend
+    """
+    import glob
+    import time
+    from core.crypto.registry import shared_public_params
+    from core.crypto.pairing import validate_key_pairs
+
+    params_path = args.params or DEFAULT_PARAMS_PATH
+    user_dir = args.user_dir or DEFAULT_USER_KEYS_DIR
+    files = args.files or sorted(glob.glob(os.path.join(user_dir, os.path.basename(DEFAULT_USER_SINGLE_PUBLIC_KEY_FILE_FMT).format("*"))))
+    if not files:
+        print(t("没有找到用户公钥文件。", "No user public key files found."))
+        return
+    pp = shared_public_params(params_path, g2_backend=args.backend)
+
+    start = time.perf_counter()
+    members, names, malformed = [], [], []
+    for path in files:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                key_info = json.load(f)
+            # 注册数据不可信：做完整的曲线方程检查
+            pk = point_from_string(key_info["pk"], pp.F, pp.E)
+            pid = point_from_string(key_info["pid"], pp.F, pp.E)
+        except Exception as e:
+            malformed.append((path, e))
+            continue
+        members.append(pp.R(pk, pid))
+        names.append(str(key_info.get("user_id", path)))
+    invalid = validate_key_pairs(members, pp, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - start
+
+    for path, e in malformed:
+        print(t(f"无法解析 {path}: {e}", f"Cannot parse {path}: {e}"))
+    for i in invalid:
+        print(t(f"用户 {names[i]} 的密钥对无效", f"Invalid key pair for user {names[i]}"))
+    print(t(f"已校验 {len(members)} 个密钥对，无效 {len(invalid)} 个，无法解析 {len(malformed)} 个，用时 {elapsed:.2f}s",
+            f"Checked {len(members)} key pairs: {len(invalid)} invalid, {len(malformed)} malformed, {elapsed:.2f}s"))
+    if invalid or malformed:
+        raise SystemExit(1)
+
 # ----------- User 命令实现 -----------
 def user_keygen(args):
     """
@@ -162,7 +217,32 @@ def user_sign(args):
             return
 
     user = User(user_id, params_file=params_file, key_file=key_file)
-    signature = user.sign(message, ring_user_ids, event=event)
+    fmt = args.format or "json"
+    if args.linkable and (args.stream or fmt == "binary"):
+        print(t("可链接签名（v2）目前只支持非流式JSON格式。", "Linkable (v2) signatures are only supported as non-streaming JSON."))
+        return
+
+    if args.stream or fmt == "binary":
+        if not out_file:
+            print(t("流式签名和二进制格式需要指定输出文件 (-o)。", "Streaming and binary signatures require an output file (-o)."))
+            return
+        mode = "wb" if fmt == "binary" else "w"
+        encoding = None if fmt == "binary" else "utf-8"
+        with open(out_file, mode, encoding=encoding) as f:
+            if args.stream:
+                # 流式签名：逐个成员生成并写出，内存与环大小无关
+                extra = {"ring_user_ids": ring_user_ids, "event": event}
+                user.sign_stream(message, ring_user_ids, f, event=event, user_dir=user_dir, fmt=fmt, extra=extra)
+            else:
+                from core.crypto import codec
+                codec.write_signature(user.sign(message, ring_user_ids, event=event), f, user.pp)
+        print(t(
+            f"签名结果已保存到 {out_file}",
+            f"Signature result saved to {out_file}"
+        ))
+        return
+
+    signature = user.sign(message, ring_user_ids, event=event, linkable=args.linkable)
 
     # 使用User类的序列化方法
     result = User.serialize_signature(signature)
@@ -181,6 +261,38 @@ def user_sign(args):
     else:
         print(json.dumps(result, indent=2, ensure_ascii=False))
 
+def user_sign_batch(args):
+    """
+    按任务文件（JSON Lines）批量签名：同一环的任务共用环成员预计算表，大批量时分给进程池
+    每行: {"user_id": ..., "message": ..., "ring": [...] 或环文件, "event": ..., "linkable": false}
+    """
+    import time
+    from core.protocol.signing_host import SigningHost
+    jobs = []
+    with open(args.input, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                job = json.loads(line)
+                jobs.append((job["user_id"], job["message"], job["ring"], job.get("event", "default"), job.get("linkable", False)))
+    with SigningHost(params_file=args.params, user_dir=args.user_dir, max_keys=args.max_keys,
+                     compact_tables=args.compact_tables, workers=args.workers) as host:
+        start = time.perf_counter()
+        results = host.sign_batch(jobs, return_exceptions=True)
+        elapsed = time.perf_counter() - start
+    failed = 0
+    with open(args.output, "w", encoding="utf-8") as f:
+        for index, (job, result) in enumerate(zip(jobs, results)):
+            if isinstance(result, Exception):
+                failed += 1
+                record = {"job": index, "error": str(result)}
+            else:
+                record = dict(result, job=index, ring_user_ids=list(User.iter_ring_ids(job[2])), event=job[3])
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    rate = len(jobs) / elapsed if elapsed else 0.0
+    print(t(f"已签名 {len(jobs) - failed}/{len(jobs)}（失败 {failed}），用时 {elapsed:.2f}s，{rate:.1f} 个/秒",
+            f"Signed {len(jobs) - failed}/{len(jobs)} ({failed} failed) in {elapsed:.2f}s, {rate:.1f}/s"))
+    print(t(f"签名结果已保存到 {args.output}", f"Signature results saved to {args.output}"))
+
 def user_verify(args):
     """
     验证用户环签名（无需加载用户密钥）
@@ -192,11 +304,6 @@ def user_verify(args):
         print(t(f"签名输入文件 {input_file} 不存在。", f"Signature input file {input_file} does not exist."))
         return
 
-    with open(input_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    # 兼容不同字段名
-    ring_user_ids = data.get("ring_user_ids")
-    event = data.get("event", "default")
     # 处理消息
     message = None
     if hasattr(args, "message") and args.message:
@@ -211,9 +318,37 @@ def user_verify(args):
         print(t("未指定消息且默认消息文件不存在。", "No message specified and default message file does not exist."))
         return
 
+    cache = None
+    if args.cache:
+        from core.crypto.tuning import TuningProfile
+        cache_size = args.cache_size
+        if cache_size is None:
+            cache_size = TuningProfile.for_params(params_file).verification_cache_size
+        cache = VerificationCache(max_entries=cache_size, ttl=args.cache_ttl, path=args.cache)
+
+    if args.stream:
+        if args.link_db:
+            print(t("--link-db 不支持流式验证。", "--link-db is not supported with --stream."))
+            return
+        # 流式验证：签名和环成员逐个读取，内存与环大小无关
+        user = User("0", params_file=params_file, load_key=False, verification_cache=cache)
+        try:
+            valid = user.verify_stream(message, input_file, ring_user_ids=args.ring, event=args.event, user_dir=user_dir)
+        except Exception as e:
+            print(t(f"验证过程中发生错误: {e}", f"Error during verification: {e}"))
+            return
+        report_verification(valid, cache)
+        return
+
+    with open(input_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    # 兼容不同字段名
+    ring_user_ids = data.get("ring_user_ids")
+    event = data.get("event", "default")
+
     # user.py的verify接口: verify(self, message, PID_encryption, PID_signature, ring_user_ids, event="default")
     # 只需实例化User，不需要密钥
-    user = User("0", params_file=params_file, load_key=False)  # user_id随便填，不加载密钥
+    user = User("0", params_file=params_file, load_key=False, compact_tables=args.compact_tables, verification_cache=cache)  # user_id随便填，不加载密钥
     
     try:
         sig_dict = {
@@ -226,16 +361,56 @@ def user_verify(args):
         return
 
 
+    link_result = None
+    if args.link_db and not args.allow_v1 and signature_version(signature) != SIGNATURE_V2:
+        print(t("v1签名没有可链接标签，使用 --link-db 时被拒绝（--allow-v1 允许只验证不链接）。",
+                "v1 signature has no linkable tag and is rejected with --link-db (--allow-v1 verifies it without linking)."))
+        report_verification(False, cache)
+        return
     try:
-        valid = user.verify(message, signature, ring_user_ids, event, user_dir)
+        if args.link_db:
+            from core.storage.link_index import LinkIndex
+            with LinkIndex(args.link_db) as link_index:
+                link_result = user.verify_and_link(message, signature, ring_user_ids, link_index, event, user_dir,
+                                                   allow_v1=args.allow_v1)
+            valid = link_result.valid
+        else:
+            valid = user.verify(message, signature, ring_user_ids, event, user_dir)
     except Exception as e:
         print(t(f"验证过程中发生错误: {e}", f"Error during verification: {e}"))
         return
 
+    report_verification(valid, cache)
+    if link_result is not None and valid:
+        report_link(link_result, args.max_per_event)
+
+def report_link(result, max_per_event=1):
+    """输出可链接标签的检查结果：同一签名者在该event下的签名数超过max_per_event时告警"""
+    if not result.linkable:
+        print(t("v1签名没有可链接标签，无法检测重复签名。", "v1 signature has no linkable tag; duplicates cannot be detected."))
+        return
+    count = result.previous + 1
+    if result.replay:
+        print(t(f"这份签名此前已记录（第 {count} 份），不重复计数。",
+                f"This signature was already recorded (#{count}); it is not counted again."))
+    if count > max_per_event:
+        print(t(f"链接告警：同一签名者在该event下的第 {count} 份签名（上限 {max_per_event}）。",
+                f"LINKED: signature #{count} from the same signer in this event (limit {max_per_event})."))
+    else:
+        print(t(f"链接检查通过：该签名者在此event下的第 {count} 份签名。",
+                f"Link check passed: signature #{count} from this signer in this event."))
+
+def report_verification(valid, cache=None):
+    """输出验证结果；使用了验证缓存时输出命中统计并写回缓存文件"""
     if valid:
         print(t("签名验证通过。", "Signature verification PASSED."))
     else:
         print(t("签名验证失败。", "Signature verification FAILED."))
+    if cache is not None:
+        stats = cache.stats()
+        print(t(f"验证缓存: 命中 {stats['hits']}，未命中 {stats['misses']}，条目 {stats['entries']}",
+                f"Verification cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries"))
+        cache.save()
 
 # ----------- Tracer 命令实现 -----------
 def tracer_partial_decrypt(args):
@@ -359,8 +534,8 @@ def tracer_combine(args):
         return
 
     # 加载公共参数
-    from core.crypto.public_params import load_full_public_params, point_from_string
-    pp = load_full_public_params(params_file)
+    from core.crypto.registry import shared_public_params
+    pp = shared_public_params(params_file)
 
     # 反序列化签名
     try:
@@ -370,6 +545,18 @@ def tracer_combine(args):
         print(t(f"签名反序列化失败: {e}", f"Failed to deserialize signature: {e}"))
         return
 
+    commitments = None
+    if args.commitments:
+        from core.crypto import feldman
+        try:
+            commitments = feldman.load_commitments(args.commitments, pp)
+        except Exception as e:
+            print(t(f"承诺文件 {args.commitments} 解析失败: {e}", f"Failed to parse commitment file {args.commitments}: {e}"))
+            return
+        if commitments[0] != pp.Q:
+            print(t("承诺文件的C_0与系统公钥Q不一致。", "Commitment C_0 does not match the system public key Q."))
+            return
+
     # 读取所有部分解密结果
     partial_results = []
     D_list = []
@@ -388,18 +575,12 @@ def tracer_combine(args):
             if tracer_id is None:
                 print(t(f"部分解密结果文件 {share_file} 中没有 tracer_id。", f"Partial decryption result file {share_file} does not contain tracer_id."))
                 return
-            # 构造 tracer 的 pub 文件名
-            tracer_pub_file = f"config/tracer/tracer_{tracer_id}_pub.json"
-            if os.path.exists(tracer_pub_file):
-                with open(tracer_pub_file, "r", encoding="utf-8") as pubf:
-                    pub_data = json.load(pubf)
-                pub_share_str = pub_data.get("pub_share", None)
-                if pub_share_str is not None:
-                    D_list.append(point_from_string(pub_share_str, pp.F, pp.E))
-                else:
-                    D_list.append(None)
+            if commitments is not None:
+                # 由Feldman承诺推出 pub_share，不读取追踪者公钥文件
+                D_list.append(feldman.derive_pub_share(commitments, partial_result[0], pp))
             else:
-                D_list.append(None)
+                # 按公钥文件格式读取 tracer 的 pub_share
+                D_list.append(Tracer.load_pub_share(tracer_id, pp, args.pub_fmt or DEFAULT_TRACER_SINGLE_PUBLIC_KEY_FILE_FMT))
         except Exception as e:
             print(t(f"部分解密结果文件 {share_file} 解析失败: {e}", f"Failed to parse partial decryption result file {share_file}: {e}"))
             return
@@ -412,6 +593,10 @@ def tracer_combine(args):
         print(t(f"PID恢复失败: {e}", f"Failed to recover PID: {e}"))
         return
 
+    report_recovered_pid(PID)
+
+def report_recovered_pid(PID):
+    """输出恢复出的PID，并在用户目录中检索对应的用户"""
     print(t(f"恢复出的PID为: {point_to_string(PID)}", f"Recovered PID: {point_to_string(PID)}"))
     # 通过在user文件夹检索pid，找到对应的user_id，并输出user_id
     user_dir = "config/user"
@@ -423,8 +608,409 @@ def tracer_combine(args):
                     print(t(f"检索出签名用户 {user_data.get('user_id')}", f"Found user {user_data.get('user_id')}"))
                     break
 
+def tracer_authkey(args):
+    """
+    生成协调器与追踪者端点共享的请求认证密钥
+    输入:
+        -o/--output: 密钥文件（默认config/tracer/tracer_auth.key，权限0600）
+    """
+    from core.protocol.auth import generate_auth_key
+    output = args.output or DEFAULT_TRACER_AUTH_KEY_FILE
+    if os.path.exists(output) and not args.force:
+        print(t(f"{output} 已存在，使用 --force 覆盖。", f"{output} already exists; use --force to overwrite it."))
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    generate_auth_key(output)
+    print(t(f"认证密钥已写入 {output}，请复制给协调器和各追踪者。",
+            f"Authentication key written to {output}; copy it to the coordinator and every tracer."))
+
+def load_cli_auth_key(path):
+    """读取认证密钥，失败时输出原因并返回None"""
+    from core.protocol.auth import load_auth_key
+    path = path or DEFAULT_TRACER_AUTH_KEY_FILE
+    try:
+        return load_auth_key(path)
+    except Exception as e:
+        print(t(f"认证密钥 {path} 读取失败: {e}（用 tracer authkey 生成）",
+                f"Failed to read authentication key {path}: {e} (generate one with tracer authkey)"))
+        return None
+
+def tracer_serve(args):
+    """
+    以服务方式运行追踪者端点，供 tracer coordinate 并发请求部分解密
+    输入:
+        tracer_id, -k/--key, -p/--params, -l/--listen, --auth-key
+        --service: 常驻服务模式（请求队列、C1去重、份额缓存、批量处理）
+        --allow-remote: 允许监听非回环的TCP地址
+    """
+    import asyncio
+    from core.protocol.coordinator import DEFAULT_LISTEN_FMT, TracerEndpoint, is_local_address
+    from core.protocol.tracer_service import TracerService
+
+    listen = args.listen or DEFAULT_LISTEN_FMT.format(args.tracer_id)
+    if not is_local_address(listen) and not args.allow_remote:
+        print(t(f"{listen} 不是本机地址，确需对外监听时使用 --allow-remote。",
+                f"{listen} is not a local address; use --allow-remote to listen on it."))
+        return
+    auth_key = load_cli_auth_key(args.auth_key)
+    if auth_key is None:
+        return
+    try:
+        tracer = Tracer(args.tracer_id, params_file=args.params or DEFAULT_PARAMS_PATH, key_file=args.key, load_key=True)
+    except Exception as e:
+        print(t(f"Tracer初始化失败: {e}", f"Failed to initialize Tracer: {e}"))
+        return
+    if args.service:
+        endpoint = TracerService(tracer, listen, auth_key, cache_size=args.cache_size, max_batch=args.batch_size)
+    else:
+        endpoint = TracerEndpoint(tracer, listen, auth_key)
+    print(t(f"追踪者 {args.tracer_id} 在 {listen} 上监听", f"Tracer {args.tracer_id} listening on {listen}"))
+    try:
+        asyncio.run(endpoint.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+def tracer_coordinate(args):
+    """
+    并发向多个追踪者端点请求部分解密，收到threshold个有效份额后立即恢复PID
+    输入:
+        -i/--input: 签名输入文件
+        -e/--endpoints: 追踪者端点列表（逗号分隔或多次-e）
+        -p/--params, --pub-fmt, --timeout, --auth-key
+    """
+    import asyncio
+    from core.crypto.registry import shared_public_params
+    from core.protocol.coordinator import TraceCoordinator
+
+    input_file = args.input
+    if not input_file or not os.path.exists(input_file):
+        print(t(f"签名输入文件 {input_file} 不存在。", f"Signature input file {input_file} does not exist."))
+        return
+    endpoints = [e.strip() for item in args.endpoints for e in item.split(",") if e.strip()]
+
+    pp = shared_public_params(args.params or DEFAULT_PARAMS_PATH)
+    with open(input_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    try:
+        signature = User.deserialize_signature({
+            "PID_encryption": data["PID_encryption"],
+            "PID_signature": data["PID_signature"]
+        }, pp)
+    except Exception as e:
+        print(t(f"签名反序列化失败: {e}", f"Failed to deserialize signature: {e}"))
+        return
+
+    commitments = None
+    if args.commitments:
+        commitments = load_checked_commitments(args.commitments, pp)
+        if commitments is None:
+            return
+
+    auth_key = load_cli_auth_key(args.auth_key)
+    if auth_key is None:
+        return
+    coordinator = TraceCoordinator(pp, endpoints, pub_file_fmt=args.pub_fmt or DEFAULT_TRACER_SINGLE_PUBLIC_KEY_FILE_FMT,
+                                   commitments=commitments, timeout=args.timeout, auth_key=auth_key)
+    try:
+        PID = asyncio.run(coordinator.trace(signature))
+    except Exception as e:
+        print(t(f"PID恢复失败: {e}", f"Failed to recover PID: {e}"))
+        PID = None
+    for address, error in coordinator.errors.items():
+        print(t(f"端点 {address} 失败: {error}", f"Endpoint {address} failed: {error}"))
+    if PID is not None:
+        report_recovered_pid(PID)
+
+def load_checked_commitments(path, pp):
+    """读取Feldman承诺文件并检查C_0 == Q，失败时输出原因并返回None"""
+    from core.crypto import feldman
+    try:
+        commitments = feldman.load_commitments(path, pp)
+    except Exception as e:
+        print(t(f"承诺文件 {path} 解析失败: {e}", f"Failed to parse commitment file {path}: {e}"))
+        return None
+    if commitments[0] != pp.Q:
+        print(t("承诺文件的C_0与系统公钥Q不一致。", "Commitment C_0 does not match the system public key Q."))
+        return None
+    return commitments
+
+def tracer_reshare_deal(args):
+    """
+    旧追踪者把自己的份额重新分享给新的追踪者集合（Q和用户密钥不变）
+    输入:
+        tracer_id, -k/--key, -c/--commitments（当前的承诺文件）
+        --new-threshold, --new-tracers, -o/--output（分发目录）
+    """
+    from core.crypto import feldman
+    from core.protocol import reshare
+
+    try:
+        tracer = Tracer(args.tracer_id, params_file=args.params or DEFAULT_PARAMS_PATH, key_file=args.key, load_key=True)
+    except Exception as e:
+        print(t(f"Tracer初始化失败: {e}", f"Failed to initialize Tracer: {e}"))
+        return
+    pp = tracer.pp
+    commitments = load_checked_commitments(args.commitments or DEFAULT_TRACER_COMMITMENTS_FILE, pp)
+    if commitments is None:
+        return
+    if not feldman.verify_share(commitments, tracer.x_i, tracer.d_share, pp):
+        print(t("本追踪者的份额与承诺不一致，不能参与重分享。", "This tracer's share does not match the commitments; it cannot deal."))
+        return
+    new_xs = reshare.new_tracer_xs(args.new_tracers)
+    try:
+        dealing_commitments, sub_shares = reshare.deal(tracer, new_xs, args.new_threshold, pp)
+    except ValueError as e:
+        print(t(f"重分享失败: {e}", f"Resharing failed: {e}"))
+        return
+    dealing_path = reshare.save_dealing(args.output, tracer, dealing_commitments, sub_shares, new_xs)
+    print(t(f"分发文件已保存到 {dealing_path}，{len(sub_shares)} 个子份额文件已写入 {args.output}（子份额为私密数据，只交给对应的新追踪者）",
+            f"Dealing saved to {dealing_path}; {len(sub_shares)} sub-share files written to {args.output} (sub-shares are secret, hand each only to its new tracer)"))
+
+def tracer_reshare_combine(args):
+    """
+    新追踪者验证并组合旧追踪者的子份额，得到新的密钥份额和新的承诺
+    输入:
+        tracer_id（新ID）, -d/--dealings（分发目录）, -c/--commitments（旧承诺文件）
+        --new-threshold, -o/--output（新密钥文件）, --pub-output, --commitments-output
+    """
+    from core.crypto import feldman
+    from core.crypto.registry import shared_public_params
+    from core.protocol import reshare
+
+    pp = shared_public_params(args.params or DEFAULT_PARAMS_PATH)
+    old_commitments = load_checked_commitments(args.commitments or DEFAULT_TRACER_COMMITMENTS_FILE, pp)
+    if old_commitments is None:
+        return
+    tracer_id = int(args.tracer_id)
+    x = reshare.new_tracer_xs(tracer_id + 1)[tracer_id]
+    try:
+        dealings = reshare.load_dealings(args.dealings, pp)
+        accepted, rejected = reshare.qualified_dealers(dealings, old_commitments, args.new_threshold, pp)
+        for dealer_id, reason in rejected.items():
+            print(t(f"拒绝分发者 {dealer_id}: {reason}", f"Rejected dealer {dealer_id}: {reason}"))
+        sub_shares = reshare.load_sub_shares(args.dealings, tracer_id, x)
+        d_share, commitments = reshare.combine_sub_shares(x, accepted, sub_shares, pp)
+    except (OSError, ValueError) as e:
+        print(t(f"重分享组合失败: {e}", f"Failed to combine the resharing: {e}"))
+        return
+    key = reshare.new_tracer_key(tracer_id, x, d_share, pp)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(key, f, indent=2)
+    print(t(f"新的追踪者密钥已保存到 {args.output}（合格分发者: {', '.join(str(d['dealer_id']) for d in accepted)}）",
+            f"New tracer key saved to {args.output} (qualified dealers: {', '.join(str(d['dealer_id']) for d in accepted)})"))
+    if args.pub_output:
+        with open(args.pub_output, "w", encoding="utf-8") as f:
+            json.dump({k: key[k] for k in ('tracer_id', 'x_i', 'pub_share')}, f, indent=2)
+        print(t(f"新的追踪者公钥已保存到 {args.pub_output}", f"New tracer public key saved to {args.pub_output}"))
+    if args.commitments_output:
+        feldman.save_commitments(args.commitments_output, commitments, len(commitments))
+        print(t(f"新的Feldman承诺已保存到 {args.commitments_output}", f"New Feldman commitments saved to {args.commitments_output}"))
+
+# ----------- Archive 命令实现 -----------
+def iter_signature_files(inputs):
+    """展开输入路径：文件原样产出，目录按文件名顺序产出其中的 .json / .bin 文件"""
+    for path in inputs:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith((".json", ".bin")):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+def archive_pack(args):
+    """
+    把签名文件（JSON或二进制）追加到签名归档，已存在的签名跳过
+    """
+    from core.crypto import codec
+    from core.crypto.registry import shared_public_params
+    from core.storage.archive import SignatureArchive
+
+    pp = shared_public_params(args.params)
+    ring_override = list(User.iter_ring_ids(args.ring)) if args.ring else None
+    added = skipped = 0
+    with SignatureArchive(args.archive, segment_size=args.segment_mb * 1024 * 1024) as archive:
+        for path in iter_signature_files(args.inputs):
+            try:
+                if codec.is_binary_signature(path):
+                    if ring_override is None:
+                        print(t(f"二进制签名 {path} 需要指定环 (-L)，已跳过。", f"Binary signature {path} needs a ring (-L); skipped."))
+                        skipped += 1
+                        continue
+                    with open(path, "rb") as f:
+                        signature = codec.read_signature(f, pp)
+                    ring_user_ids, event = ring_override, args.event or "default"
+                else:
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    signature = User.deserialize_signature(data, pp)
+                    ring_user_ids = ring_override or data.get("ring_user_ids") or []
+                    event = args.event or data.get("event", "default")
+                _, is_new = archive.append(signature, pp, event=event, ring_user_ids=ring_user_ids, message=args.message)
+            except Exception as e:
+                print(t(f"签名文件 {path} 解析失败: {e}", f"Failed to parse signature file {path}: {e}"))
+                skipped += 1
+                continue
+            if is_new:
+                added += 1
+            else:
+                skipped += 1
+        stats = archive.stats()
+    print(t(f"已写入 {added} 个签名，跳过 {skipped} 个；归档共 {stats['signatures']} 个签名，{stats['segments']} 个段。",
+            f"Packed {added} signatures, skipped {skipped}; the archive holds {stats['signatures']} signatures in {stats['segments']} segments."))
+
+def archive_list(args):
+    """
+    列出签名归档中的签名（可按摘要、event、环筛选）
+    """
+    from core.storage.archive import SignatureArchive
+
+    ring_user_ids = list(User.iter_ring_ids(args.ring)) if args.ring else None
+    with SignatureArchive(args.archive, readonly=True) as archive:
+        if args.digest:
+            entry = archive.get(args.digest)
+            entries = [] if entry is None else [entry]
+        else:
+            entries = archive.find(event=args.event, ring_user_ids=ring_user_ids)
+        shown = 0
+        for entry in entries:
+            if args.limit is not None and shown >= args.limit:
+                break
+            kind = "json" if entry.format else "binary"
+            print(f"{entry.digest_hex}  event={entry.event}  ring={len(entry.ring_user_ids)}  {kind}  {len(entry.payload)}B")
+            shown += 1
+        if args.digest or (args.event is not None and ring_user_ids is not None):
+            print(t(f"显示 {shown} 个签名。", f"{shown} signatures shown."))
+            return
+        if args.event is not None or ring_user_ids is not None:
+            # 单一条件的匹配数直接取自链头记录
+            total = archive.count_of(event=args.event, ring_user_ids=ring_user_ids)
+        else:
+            total = len(archive)
+        print(t(f"共 {total} 个签名，显示 {shown} 个。", f"{total} signatures, {shown} shown."))
+
+def archive_extract(args):
+    """
+    从签名归档中取出签名，写成与 user sign 输出相同的JSON文件
+    """
+    from core.crypto.registry import shared_public_params
+    from core.storage.archive import SignatureArchive
+
+    pp = shared_public_params(args.params)
+    with SignatureArchive(args.archive, readonly=True) as archive:
+        if args.digest:
+            entry = archive.get(args.digest)
+            if entry is None:
+                print(t(f"归档中没有签名 {args.digest}。", f"Signature {args.digest} is not in the archive."))
+                return
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(entry.to_json(pp), f, indent=2, ensure_ascii=False)
+            print(t(f"签名已保存到 {args.output}", f"Signature saved to {args.output}"))
+            return
+        # 按event导出到目录，每个签名一个文件（文件名为签名摘要）
+        os.makedirs(args.output, exist_ok=True)
+        count = 0
+        for entry in archive.find(event=args.event):
+            with open(os.path.join(args.output, f"{entry.digest_hex}.json"), "w", encoding="utf-8") as f:
+                json.dump(entry.to_json(pp), f, indent=2, ensure_ascii=False)
+            count += 1
+        print(t(f"已导出 {count} 个签名到 {args.output}", f"Extracted {count} signatures to {args.output}"))
+
+# ----------- Audit 命令实现 -----------
+def audit_run(args):
+    """
+    对签名归档做批量审计（验证、部分解密、恢复PID），进度写入状态文件，中断后可续跑
+    """
+    from core.crypto.registry import shared_public_params
+    from core.storage.archive import SignatureArchive
+    from core.protocol.audit import AuditRunner, format_duration
+
+    pp = shared_public_params(args.params)
+    tracers = {}
+    for key_file in args.tracer_keys or []:
+        try:
+            # 单个JSON、批量JSON和批量二进制密钥文件都由Tracer.load_key读取；批量文件加载其中全部追踪者
+            for tracer_id in Tracer.key_file_ids(key_file, pp):
+                tracers.setdefault(str(tracer_id), Tracer(tracer_id, params_file=args.params, key_file=key_file, pp=pp))
+        except Exception as e:
+            print(t(f"追踪者密钥 {key_file} 加载失败: {e}", f"Failed to load tracer key {key_file}: {e}"))
+            return
+    tracers = list(tracers.values())
+    if tracers and len(tracers) < pp.threshold_tracers:
+        print(t(f"只加载了 {len(tracers)} 个追踪者密钥，少于门限 {pp.threshold_tracers}，无法恢复PID。",
+                f"Only {len(tracers)} tracer keys loaded, below the threshold of {pp.threshold_tracers}; PIDs cannot be recovered."))
+        return
+
+    with SignatureArchive(args.archive, readonly=True) as archive:
+        try:
+            runner = AuditRunner(archive, args.state, args.output, pp, tracers=tracers, message=args.message,
+                                 event=args.event, user_dir=args.user_dir or DEFAULT_USER_KEYS_DIR,
+                                 batch_size=args.batch_size, verify=not args.no_verify, restart=args.restart, log=print)
+        except FileNotFoundError as e:
+            print(t(f"审计无法开始: {e}", f"Cannot start the audit: {e}"))
+            return
+        except ValueError as e:
+            print(t(f"状态文件与本次任务不一致（{e}），如需重新开始请加 --restart。", f"{e}. Pass --restart to start over."))
+            return
+        if runner.done:
+            print(t(f"从第 {runner.done} 个签名继续。", f"Resuming after {runner.done} signatures."))
+        try:
+            info = runner.run(max_batches=args.max_batches)
+        except (OSError, RuntimeError) as e:
+            # 配置或I/O错误：当前批次未提交，修正后可直接续跑
+            print(t(f"审计中止（已完成的批次已保存，修正后重新运行即可续跑）: {e}",
+                    f"Audit aborted (completed batches are saved; rerun to resume after fixing): {e}"))
+            return
+    counts = info["counts"]
+    print(t(f"已处理 {info['done']}/{info['total']}，累计用时 {format_duration(info['elapsed'])}。",
+            f"Processed {info['done']}/{info['total']} in {format_duration(info['elapsed'])} total."))
+    print(t(f"有效 {counts['valid']}，无效 {counts['invalid']}，恢复 {counts['recovered']}，识别出用户 {counts['identified']}，恢复失败 {counts['failed']}",
+            f"Valid {counts['valid']}, invalid {counts['invalid']}, recovered {counts['recovered']}, identified {counts['identified']}, failed {counts['failed']}"))
+    print(t(f"结果已保存到 {args.output}", f"Results saved to {args.output}"))
+
+def audit_status(args):
+    """
+    输出审计状态文件中的进度
+    """
+    from core.protocol.audit import load_state, format_duration
+
+    state = load_state(args.state)
+    if state is None:
+        print(t(f"状态文件 {args.state} 不存在。", f"State file {args.state} does not exist."))
+        return
+    counts = state["counts"]
+    rate = state["cursor"] / state["elapsed"] if state["elapsed"] else 0.0
+    print(t(f"已处理 {state['cursor']} 个签名，累计用时 {format_duration(state['elapsed'])}，平均 {rate:.2f} 个/秒",
+            f"Processed {state['cursor']} signatures in {format_duration(state['elapsed'])}, {rate:.2f} sig/s on average"))
+    if state["pending"] is not None:
+        print(t(f"当前批次已完成 {len(state['pending']['shares'])} 个追踪者的部分解密。",
+                f"Current batch has partial decryptions from {len(state['pending']['shares'])} tracers."))
+    print(t(f"有效 {counts['valid']}，无效 {counts['invalid']}，恢复 {counts['recovered']}，识别出用户 {counts['identified']}，恢复失败 {counts['failed']}",
+            f"Valid {counts['valid']}, invalid {counts['invalid']}, recovered {counts['recovered']}, identified {counts['identified']}, failed {counts['failed']}"))
+
+# ----------- Bench 命令实现 -----------
+def bench_run(args):
+    """
+    运行性能基准（按环大小、追踪者数量和阈值扫描），输出JSON并可与基线比较
+    """
+    from bench.runner import run_from_args
+    exit_code = run_from_args(args)
+    if exit_code:
+        raise SystemExit(exit_code)
+
+def bench_autotune(args):
+    """
+    测量本机的点运算、预计算表和进程池开销，在params.json同目录下写出tuning.json
+    """
+    from bench.autotune import autotune_from_args
+    exit_code = autotune_from_args(args)
+    if exit_code:
+        raise SystemExit(exit_code)
+
 def main():
     parser = argparse.ArgumentParser(description="libTARS CLI")
+    parser.add_argument("--profile", action="store_true", help=t("结束时输出操作计数和阶段耗时汇总", "Print operation counters and phase timings on exit"))
+    parser.add_argument("--profile-prom", help=t("将插桩结果写入Prometheus文本文件", "Write instrumentation results to a Prometheus text file"))
+    parser.add_argument("--profile-log", action="store_true", help=t("将插桩结果以单行JSON写入日志(stderr)", "Log instrumentation results as one JSON line (stderr)"))
     subparsers = parser.add_subparsers(dest="module", required=True, help="模块: kgc 或 user")
 
     # KGC 子命令
@@ -444,8 +1030,19 @@ def main():
     kgc_tracerkeygen_parser.add_argument("-o", "--output", help=t("输出所有追踪者密钥的文件", "Output file for all tracer keys"))
     kgc_tracerkeygen_parser.add_argument("-sf", "--single-key-file-fmt", help=t("单个追踪者密钥文件格式", "Single tracer key file format"))
     kgc_tracerkeygen_parser.add_argument("-spf", "--single-public-key-file-fmt", help=t("单个追踪者公钥文件格式", "Single tracer public key file format"))
+    kgc_tracerkeygen_parser.add_argument("--format", choices=["json", "binary"], help=t("输出格式：json（默认，每个追踪者单独文件）或binary（单个批量文件）", "Output format: json (default, one file per tracer) or binary (one bulk file)"))
+    kgc_tracerkeygen_parser.add_argument("--commitments", help=t("Feldman承诺输出文件", "Feldman commitment output file"))
     kgc_tracerkeygen_parser.set_defaults(func=kgc_tracerkeygen)
 
+    # kgc validate
+    kgc_validate_parser = kgc_subparsers.add_parser("validate", help=t("批量校验用户公钥对", "Validate user key pairs in bulk"))
+    kgc_validate_parser.add_argument("files", nargs="*", help=t("用户公钥文件（缺省为用户目录下全部公钥文件）", "User public key files (default: all public key files in the user directory)"))
+    kgc_validate_parser.add_argument("-p", "--params", help=t("系统参数文件 (params.json)", "System parameter file (params.json)"))
+    kgc_validate_parser.add_argument("-d", "--user-dir", help=t("用户密钥目录", "User key directory"))
+    kgc_validate_parser.add_argument("--batch-size", type=int, default=1000, help=t("每批随机线性组合的密钥对数量", "Key pairs per random linear combination batch"))
+    kgc_validate_parser.add_argument("--backend", choices=["sage", "fq6"], default="sage", help=t("GF(q^6)运算后端", "GF(q^6) arithmetic backend"))
+    kgc_validate_parser.set_defaults(func=kgc_validate)
+
     # User 子命令
     user_parser = subparsers.add_parser("user", help=t("用户相关操作", "User related operations"))
     user_subparsers = user_parser.add_subparsers(dest="user_command", required=True)
@@ -469,14 +1066,38 @@ def main():
     user_sign_parser.add_argument("-d", "--user-dir", help=t("用户密钥目录", "User key directory"))
     user_sign_parser.add_argument("-e", "--event", help=t("事件字段 (event)", "Event field (event)"))
     user_sign_parser.add_argument("-o", "--output", help=t("签名输出文件", "Signature output file"))
+    user_sign_parser.add_argument("--stream", action="store_true", help=t("流式签名（逐个成员写出，内存与环大小无关，需要-o）", "Streaming signing (members written as produced, memory independent of ring size, requires -o)"))
+    user_sign_parser.add_argument("-f", "--format", choices=["json", "binary"], help=t("签名输出格式（默认json）", "Signature output format (default: json)"))
+    user_sign_parser.add_argument("--linkable", action="store_true", help=t("生成可链接签名（v2）：同一用户在同一event下的签名可被关联", "Create a linkable (v2) signature: signatures by the same user in the same event can be linked"))
     user_sign_parser.set_defaults(func=user_sign)
 
+    # user sign_batch
+    user_sign_batch_parser = user_subparsers.add_parser("sign_batch", help=t("代多个用户批量签名", "Sign a batch of jobs for many users"))
+    user_sign_batch_parser.add_argument("-i", "--input", required=True, help=t("任务文件（JSON Lines：user_id, message, ring, event, linkable）", "Job file (JSON Lines: user_id, message, ring, event, linkable)"))
+    user_sign_batch_parser.add_argument("-o", "--output", required=True, help=t("签名输出文件（JSON Lines，与任务逐行对应）", "Signature output file (JSON Lines, one line per job)"))
+    user_sign_batch_parser.add_argument("-p", "--params", help=t("系统参数文件 (params.json)", "System parameter file (params.json)"))
+    user_sign_batch_parser.add_argument("-d", "--user-dir", help=t("用户密钥目录", "User key directory"))
+    user_sign_batch_parser.add_argument("--workers", type=int, help=t("工作进程数（缺省取tuning.json）", "Worker processes (default: from tuning.json)"))
+    user_sign_batch_parser.add_argument("--max-keys", type=int, default=10000, help=t("内存中保留的用户密钥数", "User keys kept in memory"))
+    user_sign_batch_parser.add_argument("--compact-tables", action="store_true", help=t("环成员预计算表使用紧凑存储（大环省内存）", "Use compact ring member tables (saves memory on large rings)"))
+    user_sign_batch_parser.set_defaults(func=user_sign_batch)
+
     # user verify
     user_verify_parser = user_subparsers.add_parser("verify", help=t("验证用户环签名", "Verify user ring signature"))
     user_verify_parser.add_argument("message", help=t("要验证的消息", "Message to verify"))
     user_verify_parser.add_argument("-p", "--params", help=t("系统参数文件 (params.json)", "System parameter file (params.json)"))
     user_verify_parser.add_argument("-d", "--user-dir", help=t("用户密钥目录", "User key directory"))
     user_verify_parser.add_argument("-i", "--input", required=True, help=t("签名输入文件", "Signature input file"))
+    user_verify_parser.add_argument("--stream", action="store_true", help=t("流式验证（JSON或二进制签名，内存与环大小无关）", "Streaming verification (JSON or binary signature, memory independent of ring size)"))
+    user_verify_parser.add_argument("-L", "--ring", help=t("环用户ID文件（每行一个，--stream时可选，二进制签名必需）", "Ring user ID file, one per line (optional with --stream, required for binary signatures)"))
+    user_verify_parser.add_argument("-e", "--event", help=t("事件字段（--stream时覆盖签名文件中的event）", "Event field (overrides the signature file's event with --stream)"))
+    user_verify_parser.add_argument("--compact-tables", action="store_true", help=t("环成员预计算表使用紧凑存储（大环省内存）", "Use compact ring member tables (saves memory on large rings)"))
+    user_verify_parser.add_argument("--cache", help=t("验证缓存文件（只记录验证通过的签名）", "Verification cache file (only stores signatures that passed)"))
+    user_verify_parser.add_argument("--cache-size", type=int, help=t("验证缓存最大条目数（缺省取tuning.json，否则为10000）", "Maximum number of verification cache entries (default: from tuning.json, else 10000)"))
+    user_verify_parser.add_argument("--cache-ttl", type=float, help=t("验证缓存条目有效期（秒）", "Verification cache entry lifetime in seconds"))
+    user_verify_parser.add_argument("--link-db", help=t("可链接标签索引（SQLite文件），记录并检查v2签名的标签", "Linkable tag index (SQLite file); records and checks v2 signature tags"))
+    user_verify_parser.add_argument("--max-per-event", type=int, default=1, help=t("每个签名者在同一event下允许的签名数", "Signatures allowed per signer and event"))
+    user_verify_parser.add_argument("--allow-v1", action="store_true", help=t("使用--link-db时仍接受v1签名（只验证，不链接）", "Accept v1 signatures with --link-db (verified but not linked)"))
     user_verify_parser.set_defaults(func=user_verify)
 
     # Tracer 子命令
@@ -498,14 +1119,159 @@ def main():
     tracer_recover_parser.add_argument("-s", "--shares", required=True, help=t("部分解密结果文件列表", "Partial decryption result file list"))
     tracer_recover_parser.add_argument("-p", "--params", help=t("系统参数文件 (params.json)", "System parameter file (params.json)"))
     tracer_recover_parser.add_argument("-o", "--output", help=t("输出PID文件", "Output PID file"))
+    tracer_recover_parser.add_argument("--pub-fmt", help=t("追踪者公钥文件路径格式（{}处为tracer_id）", "Tracer public key file path format ({} is replaced by tracer_id)"))
+    tracer_recover_parser.add_argument("--commitments", help=t("Feldman承诺文件：由承诺推出追踪者公钥份额，不读取公钥文件", "Feldman commitment file: derive tracer public shares from it instead of reading public key files"))
     tracer_recover_parser.set_defaults(func=tracer_combine)
 
+    # tracer authkey
+    tracer_authkey_parser = tracer_subparsers.add_parser("authkey", help=t("生成追踪者端点的请求认证密钥", "Generate the request authentication key for tracer endpoints"))
+    tracer_authkey_parser.add_argument("-o", "--output", help=t("密钥文件（默认config/tracer/tracer_auth.key）", "Key file (default: config/tracer/tracer_auth.key)"))
+    tracer_authkey_parser.add_argument("--force", action="store_true", help=t("覆盖已有的密钥文件", "Overwrite an existing key file"))
+    tracer_authkey_parser.set_defaults(func=tracer_authkey)
+
+    # tracer serve
+    tracer_serve_parser = tracer_subparsers.add_parser("serve", help=t("以服务方式运行追踪者端点", "Run a tracer endpoint service"))
+    tracer_serve_parser.add_argument("tracer_id", help=t("追踪者ID", "Tracer ID"))
+    tracer_serve_parser.add_argument("-k", "--key", required=True, help=t("追踪者密钥文件", "Tracer key file"))
+    tracer_serve_parser.add_argument("-p", "--params", help=t("系统参数文件 (params.json)", "System parameter file (params.json)"))
+    tracer_serve_parser.add_argument("-l", "--listen", help=t("监听地址（host:port 或 unix:/path），默认为临时目录下的Unix套接字", "Listen address (host:port or unix:/path); defaults to a Unix socket in the temp directory"))
+    tracer_serve_parser.add_argument("--auth-key", help=t("请求认证密钥文件（默认config/tracer/tracer_auth.key）", "Request authentication key file (default: config/tracer/tracer_auth.key)"))
+    tracer_serve_parser.add_argument("--allow-remote", action="store_true", help=t("允许监听非回环的TCP地址", "Allow listening on a non-loopback TCP address"))
+    tracer_serve_parser.add_argument("--service", action="store_true", help=t("常驻服务模式：请求队列、同一C1去重、份额缓存、批量处理", "Service mode: request queue, per-C1 deduplication, share cache and batching"))
+    tracer_serve_parser.add_argument("--batch-size", type=int, default=64, help=t("服务模式下每批最多处理的请求数", "Maximum requests per batch in service mode"))
+    tracer_serve_parser.add_argument("--cache-size", type=int, default=100000, help=t("服务模式下份额缓存的最大条目数", "Maximum share cache entries in service mode"))
+    tracer_serve_parser.set_defaults(func=tracer_serve)
+
+    # tracer coordinate
+    tracer_coordinate_parser = tracer_subparsers.add_parser("coordinate", help=t("并发收集部分解密并恢复PID", "Collect partial decryptions concurrently and recover the PID"))
+    tracer_coordinate_parser.add_argument("-i", "--input", required=True, help=t("签名输入文件", "Signature input file"))
+    tracer_coordinate_parser.add_argument("-e", "--endpoints", action="append", required=True, help=t("追踪者端点（逗号分隔或多次-e）", "Tracer endpoints (comma-separated or repeated -e)"))
+    tracer_coordinate_parser.add_argument("-p", "--params", help=t("系统参数文件 (params.json)", "System parameter file (params.json)"))
+    tracer_coordinate_parser.add_argument("--pub-fmt", help=t("追踪者公钥文件路径格式（{}处为tracer_id）", "Tracer public key file path format ({} is replaced by tracer_id)"))
+    tracer_coordinate_parser.add_argument("--commitments", help=t("Feldman承诺文件：由承诺推出追踪者公钥份额，门限取承诺个数", "Feldman commitment file: derive tracer public shares from it and take the threshold from its size"))
+    tracer_coordinate_parser.add_argument("--timeout", type=float, default=30.0, help=t("超时时间（秒）", "Timeout in seconds"))
+    tracer_coordinate_parser.add_argument("--auth-key", help=t("请求认证密钥文件（默认config/tracer/tracer_auth.key）", "Request authentication key file (default: config/tracer/tracer_auth.key)"))
+    tracer_coordinate_parser.set_defaults(func=tracer_coordinate)
+
+    # tracer reshare_deal
+    tracer_reshare_deal_parser = tracer_subparsers.add_parser("reshare_deal", help=t("把本追踪者的份额重新分享给新的追踪者集合", "Reshare this tracer's share to a new tracer set"))
+    tracer_reshare_deal_parser.add_argument("tracer_id", help=t("追踪者ID", "Tracer ID"))
+    tracer_reshare_deal_parser.add_argument("-k", "--key", required=True, help=t("追踪者密钥文件", "Tracer key file"))
+    tracer_reshare_deal_parser.add_argument("-p", "--params", help=t("系统参数文件 (params.json)", "System parameter file (params.json)"))
+    tracer_reshare_deal_parser.add_argument("-c", "--commitments", help=t("当前的Feldman承诺文件", "Current Feldman commitment file"))
+    tracer_reshare_deal_parser.add_argument("--new-threshold", type=int, required=True, help=t("新的门限", "New threshold"))
+    tracer_reshare_deal_parser.add_argument("--new-tracers", type=int, required=True, help=t("新的追踪者人数", "Number of new tracers"))
+    tracer_reshare_deal_parser.add_argument("-o", "--output", required=True, help=t("分发目录", "Dealing directory"))
+    tracer_reshare_deal_parser.set_defaults(func=tracer_reshare_deal)
+
+    # tracer reshare_combine
+    tracer_reshare_combine_parser = tracer_subparsers.add_parser("reshare_combine", help=t("组合子份额得到新的追踪者密钥", "Combine sub-shares into a new tracer key"))
+    tracer_reshare_combine_parser.add_argument("tracer_id", help=t("新的追踪者ID", "New tracer ID"))
+    tracer_reshare_combine_parser.add_argument("-d", "--dealings", required=True, help=t("分发目录", "Dealing directory"))
+    tracer_reshare_combine_parser.add_argument("-p", "--params", help=t("系统参数文件 (params.json)", "System parameter file (params.json)"))
+    tracer_reshare_combine_parser.add_argument("-c", "--commitments", help=t("重分享前的Feldman承诺文件", "Feldman commitment file from before the resharing"))
+    tracer_reshare_combine_parser.add_argument("--new-threshold", type=int, required=True, help=t("新的门限", "New threshold"))
+    tracer_reshare_combine_parser.add_argument("-o", "--output", required=True, help=t("新的追踪者密钥文件", "New tracer key file"))
+    tracer_reshare_combine_parser.add_argument("--pub-output", help=t("新的追踪者公钥文件", "New tracer public key file"))
+    tracer_reshare_combine_parser.add_argument("--commitments-output", help=t("新的Feldman承诺文件", "New Feldman commitment file"))
+    tracer_reshare_combine_parser.set_defaults(func=tracer_reshare_combine)
+
+    # Archive 子命令
+    archive_parser = subparsers.add_parser("archive", help=t("签名归档", "Signature archives"))
+    archive_subparsers = archive_parser.add_subparsers(dest="archive_command", required=True)
+
+    # archive pack
+    archive_pack_parser = archive_subparsers.add_parser("pack", help=t("把签名文件追加到归档", "Append signature files to an archive"))
+    archive_pack_parser.add_argument("inputs", nargs="+", help=t("签名文件或目录（目录中的 .json / .bin 文件）", "Signature files or directories (.json / .bin files inside)"))
+    archive_pack_parser.add_argument("-a", "--archive", required=True, help=t("归档目录", "Archive directory"))
+    archive_pack_parser.add_argument("-p", "--params", help=t("系统参数文件 (params.json)", "System parameter file (params.json)"))
+    archive_pack_parser.add_argument("-L", "--ring", help=t("环用户ID文件（二进制签名必需，指定时覆盖JSON中的ring_user_ids）", "Ring user ID file (required for binary signatures, overrides ring_user_ids in JSON)"))
+    archive_pack_parser.add_argument("-e", "--event", help=t("事件字段（覆盖签名文件中的event）", "Event field (overrides the signature file's event)"))
+    archive_pack_parser.add_argument("-m", "--message", help=t("随签名记录的消息（供批量验证使用）", "Message stored with the signatures (used by bulk verification)"))
+    archive_pack_parser.add_argument("--segment-mb", type=int, default=1024, help=t("单个段文件的大小上限（MB）", "Maximum segment file size in MB"))
+    archive_pack_parser.set_defaults(func=archive_pack)
+
+    # archive list
+    archive_list_parser = archive_subparsers.add_parser("list", help=t("列出归档中的签名", "List signatures in an archive"))
+    archive_list_parser.add_argument("-a", "--archive", required=True, help=t("归档目录", "Archive directory"))
+    archive_list_parser.add_argument("-d", "--digest", help=t("签名摘要（十六进制）", "Signature digest (hex)"))
+    archive_list_parser.add_argument("-e", "--event", help=t("只列出该event的签名", "Only list signatures of this event"))
+    archive_list_parser.add_argument("-L", "--ring", help=t("只列出该环的签名（环用户ID文件）", "Only list signatures of this ring (ring user ID file)"))
+    archive_list_parser.add_argument("--limit", type=int, help=t("最多显示的条目数", "Maximum number of entries to show"))
+    archive_list_parser.set_defaults(func=archive_list)
+
+    # archive extract
+    archive_extract_parser = archive_subparsers.add_parser("extract", help=t("从归档中取出签名", "Extract signatures from an archive"))
+    archive_extract_parser.add_argument("-a", "--archive", required=True, help=t("归档目录", "Archive directory"))
+    archive_extract_group = archive_extract_parser.add_mutually_exclusive_group(required=True)
+    archive_extract_group.add_argument("-d", "--digest", help=t("签名摘要，输出到文件", "Signature digest; writes one file"))
+    archive_extract_group.add_argument("-e", "--event", help=t("导出该event的全部签名到目录", "Extract every signature of this event into a directory"))
+    archive_extract_parser.add_argument("-o", "--output", required=True, help=t("输出文件（-d）或目录（-e）", "Output file (-d) or directory (-e)"))
+    archive_extract_parser.add_argument("-p", "--params", help=t("系统参数文件 (params.json)", "System parameter file (params.json)"))
+    archive_extract_parser.set_defaults(func=archive_extract)
+
+    # Audit 子命令
+    audit_parser = subparsers.add_parser("audit", help=t("批量审计", "Bulk audits"))
+    audit_subparsers = audit_parser.add_subparsers(dest="audit_command", required=True)
+
+    # audit run
+    audit_run_parser = audit_subparsers.add_parser("run", help=t("审计签名归档（可断点续跑）", "Audit a signature archive (resumable)"))
+    audit_run_parser.add_argument("-a", "--archive", required=True, help=t("签名归档目录", "Signature archive directory"))
+    audit_run_parser.add_argument("-s", "--state", required=True, help=t("状态文件（进度与中间份额）", "State file (progress and intermediate shares)"))
+    audit_run_parser.add_argument("-o", "--output", required=True, help=t("结果文件（每个签名一行JSON）", "Results file (one JSON line per signature)"))
+    audit_run_parser.add_argument("-t", "--tracer-keys", nargs="+", help=t("追踪者密钥文件（单个或批量JSON、批量二进制文件，合计不少于门限个追踪者；不指定时只验证）", "Tracer key files: single or batch JSON, or bulk binary (at least the threshold in total; verify only when omitted)"))
+    audit_run_parser.add_argument("-m", "--message", help=t("被签名的消息（缺省使用归档中记录的消息）", "Signed message (default: the message stored in the archive)"))
+    audit_run_parser.add_argument("-e", "--event", help=t("只审计该event的签名", "Only audit signatures of this event"))
+    audit_run_parser.add_argument("-p", "--params", help=t("系统参数文件 (params.json)", "System parameter file (params.json)"))
+    audit_run_parser.add_argument("--user-dir", help=t("用户公钥目录", "User public key directory"))
+    audit_run_parser.add_argument("--batch-size", type=int, default=256, help=t("每批签名数", "Signatures per batch"))
+    audit_run_parser.add_argument("--max-batches", type=int, help=t("本次最多处理的批次数", "Maximum batches to process in this run"))
+    audit_run_parser.add_argument("--no-verify", action="store_true", help=t("跳过签名验证，直接追踪", "Skip verification and trace every signature"))
+    audit_run_parser.add_argument("--restart", action="store_true", help=t("忽略已有状态，从头开始", "Ignore existing state and start over"))
+    audit_run_parser.set_defaults(func=audit_run)
+
+    # audit status
+    audit_status_parser = audit_subparsers.add_parser("status", help=t("查看审计进度", "Show audit progress"))
+    audit_status_parser.add_argument("-s", "--state", required=True, help=t("状态文件", "State file"))
+    audit_status_parser.set_defaults(func=audit_status)
+
+    # Bench 子命令
+    bench_parser = subparsers.add_parser("bench", help=t("性能基准", "Performance benchmarks"))
+    bench_subparsers = bench_parser.add_subparsers(dest="bench_command", required=True)
+
+    # bench run
+    from bench.runner import add_arguments as add_bench_arguments
+    bench_run_parser = bench_subparsers.add_parser("run", help=t("运行基准扫描", "Run the benchmark sweep"))
+    add_bench_arguments(bench_run_parser)
+    bench_run_parser.set_defaults(func=bench_run)
+
+    # bench autotune
+    from bench.autotune import add_arguments as add_autotune_arguments
+    bench_autotune_parser = bench_subparsers.add_parser("autotune", help=t("按本机测量结果生成tuning.json", "Measure this machine and write tuning.json"))
+    add_autotune_arguments(bench_autotune_parser)
+    bench_autotune_parser.set_defaults(func=bench_autotune)
+
     args = parser.parse_args()
+    profiling = args.profile or args.profile_prom or args.profile_log
+    if profiling:
+        from core.crypto import instrument
+        instrument.enable()
     # 兼容调用
-    if hasattr(args, "func"):
-        args.func(args)
-    else:
-        parser.print_help()
+    try:
+        if hasattr(args, "func"):
+            args.func(args)
+        else:
+            parser.print_help()
+    finally:
+        if profiling:
+            if args.profile:
+                print(instrument.summary())
+            if args.profile_prom:
+                instrument.write_prometheus(args.profile_prom)
+            if args.profile_log:
+                import logging
+                logging.basicConfig(level=logging.INFO, format="%(message)s")
+                instrument.log_line({"command": " ".join(filter(None, [args.module, getattr(args, f"{args.module}_command", None)]))})
 
 if __name__ == "__main__":
     main()
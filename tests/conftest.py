@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 测试从仓库根目录导入core、verifier
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
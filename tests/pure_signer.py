@@ -0,0 +1,83 @@
+"""
+测试用的纯Python环签名（与core.crypto.nizk.ring_proof相同的证明结构），
+在没有Sage的环境中为verifier生成v1/v2签名
+"""
+import json
+import os
+import random
+from core.crypto.linkgroup import link_group
+from core.entities import DEFAULT_USER_KEYS_DIR, DEFAULT_USER_SINGLE_KEY_FILE_FMT
+from verifier.verify import Verifier, event_to_hash, link_base
+
+
+def load_secret(uid, user_dir=DEFAULT_USER_KEYS_DIR):
+    with open(os.path.join(user_dir, DEFAULT_USER_SINGLE_KEY_FILE_FMT.format(uid)), 'r') as f:
+        return int(json.load(f)["sk"])
+
+
+def sign(params, sk, signer_uid, ring, message, event="default", linkable=False, user_dir=DEFAULT_USER_KEYS_DIR, rng=None):
+    """返回 (PID_encryption, PID_signature)，结构与verifier.signature.deserialize_signature相同"""
+    rng = rng or random.Random()
+    curve, n = params.curve, params.n
+    verifier = Verifier(params)
+    pids = [verifier.load_member(uid, user_dir)[1] for uid in ring]
+    index = list(ring).index(signer_uid)
+
+    k = rng.randrange(1, n)
+    C1 = params.g1_table.multiply(k)
+    C2 = curve.add(pids[index], params.Q_table.multiply(k))
+    c = params.zr_hash(message)
+    if linkable:
+        group = link_group(n)
+        h = link_base(event, params)
+        T = group.power(h, sk)
+        c = c * params.zr_hash(T) % n
+    else:
+        T = params.g1_table.multiply(event_to_hash(event))
+
+    size = len(pids)
+    commit_schnorr, commit_okamoto, commit_link = [None] * size, [None] * size, [None] * size
+    challenge, response_schnorr, response_okamoto = [0] * size, [0] * size, [0] * size
+    c_sum = 0
+    for i in range(size):
+        if i == index:
+            continue
+        ch, z_s, z_o = (rng.randrange(n) for _ in range(3))
+        pid_c = curve.multiply(pids[i], ch)
+        commit_schnorr[i] = curve.sub(params.g1_table.multiply(z_s), pid_c)
+        commit_okamoto[i] = curve.add(curve.sub(params.Q_table.multiply(z_o), curve.multiply(C2, ch)), pid_c)
+        challenge[i], response_schnorr[i], response_okamoto[i] = ch, z_s, z_o
+        c_sum ^= ch
+        if linkable:
+            commit_link[i] = group.power(h, z_s) * group.power(T, -ch) % group.p
+    u = rng.randrange(1, n)
+    commit_schnorr[index] = params.g1_table.multiply(u)
+    commit_okamoto[index] = params.Q_table.multiply(u)
+    if linkable:
+        commit_link[index] = group.power(h, u)
+    commits = (commit_schnorr, commit_okamoto) + ((commit_link,) if linkable else ())
+    for com in [x for lst in commits for x in lst]:
+        c = c * params.zr_hash(com) % n
+    challenge[index] = c ^ c_sum
+    response_schnorr[index] = sk * challenge[index] + u
+    response_okamoto[index] = k * challenge[index] + u
+    return (C1, C2, T), [commits, challenge[:-1], (response_schnorr, response_okamoto)]
+
+
+def serialize(params, signature):
+    """与User.serialize_signature相同的JSON结构"""
+    (C1, C2, T), (commits, challenge, responses) = signature
+    curve = params.curve
+    linkable = len(commits) > 2
+    sig_dict = {
+        "PID_encryption": [curve.point_to_string(C1), curve.point_to_string(C2), T if linkable else curve.point_to_string(T)],
+        "PID_signature": [
+            [[curve.point_to_string(P) for P in commits[0]], [curve.point_to_string(P) for P in commits[1]]]
+            + ([list(commits[2])] if linkable else []),
+            list(challenge),
+            [list(responses[0]), list(responses[1])],
+        ],
+    }
+    if linkable:
+        sig_dict["version"] = 2
+    return sig_dict
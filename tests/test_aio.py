@@ -0,0 +1,26 @@
+"""WorkerPool按tuning切块（core.entities.aio）"""
+from core.entities.aio import WorkerPool
+
+
+def test_small_batch_is_one_chunk():
+    pool = WorkerPool(workers=4, parallel_threshold=8)
+    assert pool.chunks(range(7)) == [list(range(7))]
+
+
+def test_large_batch_is_split_across_workers():
+    pool = WorkerPool(workers=4, parallel_threshold=8)
+    chunks = pool.chunks(range(20))
+    assert len(chunks) == 7
+    assert [x for chunk in chunks for x in chunk] == list(range(20))
+
+
+def test_single_worker_never_splits():
+    pool = WorkerPool(workers=1, parallel_threshold=1)
+    assert pool.chunks(range(100)) == [list(range(100))]
+
+
+def test_defaults_come_from_tuning():
+    from core.crypto.tuning import TuningProfile
+    pool = WorkerPool()
+    tuning = TuningProfile.for_params(pool.params_file)
+    assert (pool.workers, pool.parallel_threshold) == (tuning.workers, tuning.parallel_threshold)
@@ -0,0 +1,112 @@
+"""批量审计（core.protocol.audit）的断点续跑：中断后继续的结果与一次跑完相同"""
+import json
+import os
+import pytest
+
+pytest.importorskip("sage.all")
+
+from core.entities.tracer import Tracer  # noqa: E402
+from core.entities.user import User  # noqa: E402
+from core.protocol.audit import AuditRunner, load_state  # noqa: E402
+from core.storage.archive import SignatureArchive  # noqa: E402
+
+RING = ['1001', '1002', '1003']
+COUNT = 5
+
+
+@pytest.fixture(scope="module")
+def archive_dir(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("archive"))
+    signers = [User(uid) for uid in RING]
+    with SignatureArchive(path) as archive:
+        for i in range(COUNT):
+            message = f"message {i}"
+            archive.append(signers[i % len(signers)].sign(message, RING, "vote"), signers[0].pp,
+                           event="vote", ring_user_ids=RING, message=message)
+    return path
+
+
+@pytest.fixture(scope="module")
+def tracers():
+    return [Tracer('0'), Tracer('1')]
+
+
+def _run(archive_dir, workdir, tracers, batches_per_run):
+    state_file = os.path.join(workdir, "state.json")
+    results_file = os.path.join(workdir, "results.jsonl")
+    with SignatureArchive(archive_dir, readonly=True) as archive:
+        while True:
+            runner = AuditRunner(archive, state_file, results_file, tracers[0].pp, tracers=tracers, batch_size=2)
+            info = runner.run(max_batches=batches_per_run)
+            if info["done"] >= info["total"]:
+                break
+    with open(results_file, 'r') as f:
+        return [json.loads(line) for line in f], info["counts"]
+
+
+def test_resumed_audit_matches_single_run(archive_dir, tracers, tmp_path):
+    full_dir, resumed_dir = str(tmp_path / "full"), str(tmp_path / "resumed")
+    os.makedirs(full_dir)
+    os.makedirs(resumed_dir)
+    full, full_counts = _run(archive_dir, full_dir, tracers, None)
+    resumed, resumed_counts = _run(archive_dir, resumed_dir, tracers, 1)
+    assert len(full) == COUNT
+    assert resumed == full
+    assert resumed_counts == full_counts
+    assert full_counts["identified"] == COUNT
+    assert [record["user_id"] for record in full] == [RING[i % len(RING)] for i in range(COUNT)]
+
+
+def test_uncommitted_results_are_truncated(archive_dir, tracers, tmp_path):
+    workdir = str(tmp_path)
+    state_file = os.path.join(workdir, "state.json")
+    results_file = os.path.join(workdir, "results.jsonl")
+    with SignatureArchive(archive_dir, readonly=True) as archive:
+        AuditRunner(archive, state_file, results_file, tracers[0].pp, tracers=tracers, batch_size=2).run(max_batches=1)
+        # 模拟写了一半就崩溃：结果文件末尾多出未提交的内容
+        with open(results_file, 'a') as f:
+            f.write('{"digest": "partial')
+        AuditRunner(archive, state_file, results_file, tracers[0].pp, tracers=tracers, batch_size=2).run()
+    with open(results_file, 'r') as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == COUNT
+    assert load_state(state_file)["cursor"] == COUNT
+
+
+def test_pending_shares_are_reused(archive_dir, tracers, tmp_path):
+    """状态文件中已有的份额不再重算"""
+    workdir = str(tmp_path)
+    state_file = os.path.join(workdir, "state.json")
+    results_file = os.path.join(workdir, "results.jsonl")
+
+    class CountingTracer(Tracer):
+        calls = 0
+
+        def partial_decrypt_batch(self, signatures, prove=True):
+            CountingTracer.calls += 1
+            return super().partial_decrypt_batch(signatures, prove)
+
+    with SignatureArchive(archive_dir, readonly=True) as archive:
+        runner = AuditRunner(archive, state_file, results_file, tracers[0].pp, tracers=tracers, batch_size=COUNT)
+        batch = next(runner._batches())
+        pending = runner._pending_for(batch)
+        pending["valid"] = [True] * len(batch)
+        signatures = [entry.signature(runner.pp) for entry in batch]
+        pending["shares"]["0"] = [Tracer.serialize_decrypt_result(r)
+                                  for r in tracers[0].partial_decrypt_batch(signatures, prove=False)]
+        runner._save_state()
+
+        resumed_tracers = [CountingTracer('0'), CountingTracer('1')]
+        info = AuditRunner(archive, state_file, results_file, tracers[0].pp, tracers=resumed_tracers,
+                           batch_size=COUNT).run()
+    assert CountingTracer.calls == 1
+    assert info["counts"]["identified"] == COUNT
+
+
+def test_state_of_another_job_is_rejected(archive_dir, tracers, tmp_path):
+    state_file = os.path.join(str(tmp_path), "state.json")
+    results_file = os.path.join(str(tmp_path), "results.jsonl")
+    with SignatureArchive(archive_dir, readonly=True) as archive:
+        AuditRunner(archive, state_file, results_file, tracers[0].pp, tracers=tracers, batch_size=2).run(max_batches=1)
+        with pytest.raises(ValueError):
+            AuditRunner(archive, state_file, results_file, tracers[0].pp, tracers=tracers, event="vote", batch_size=2)
@@ -0,0 +1,62 @@
+"""追踪者端点的请求认证（core.protocol.auth）"""
+import os
+import pytest
+from core.protocol.auth import RequestAuthenticator, generate_auth_key, load_auth_key, sign_request
+
+KEY = bytes(range(32))
+REQUEST = {"op": "partial_decrypt", "PID_encryption": ["(1,2)", "(3,4)"]}
+
+
+def test_signed_request_is_accepted_once():
+    auth = RequestAuthenticator(KEY)
+    signed = sign_request(REQUEST, KEY)
+    auth.check(signed)
+    with pytest.raises(PermissionError):
+        auth.check(signed)
+
+
+@pytest.mark.parametrize("tamper", [
+    lambda r: r.pop("auth"),
+    lambda r: r.__setitem__("PID_encryption", ["(5,6)", "(3,4)"]),
+    lambda r: r.__setitem__("op", "ping"),
+    lambda r: r.__setitem__("auth", "0" * 64),
+])
+def test_tampered_request_is_rejected(tamper):
+    signed = sign_request(REQUEST, KEY)
+    tamper(signed)
+    with pytest.raises(PermissionError):
+        RequestAuthenticator(KEY).check(signed)
+
+
+def test_wrong_key_and_unsigned_requests_are_rejected():
+    auth = RequestAuthenticator(KEY)
+    with pytest.raises(PermissionError):
+        auth.check(sign_request(REQUEST, bytes(32)))
+    with pytest.raises(PermissionError):
+        auth.check(dict(REQUEST))
+
+
+def test_stale_request_is_rejected():
+    auth = RequestAuthenticator(KEY, window=10)
+    with pytest.raises(PermissionError):
+        auth.check(sign_request(REQUEST, KEY, now=1000.0), now=1011.0)
+    auth.check(sign_request(REQUEST, KEY, now=1000.0), now=1009.0)
+
+
+def test_nonces_expire_after_the_window():
+    auth = RequestAuthenticator(KEY, window=10)
+    for now in range(0, 200, 5):
+        auth.check(sign_request(REQUEST, KEY, now=float(now)), now=float(now))
+    assert len(auth.nonces) <= 5
+
+
+def test_key_file_round_trip(tmp_path):
+    path = tmp_path / "auth.key"
+    key = generate_auth_key(str(path))
+    assert load_auth_key(str(path)) == key
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    path.write_text("00" * 8)
+    with pytest.raises(ValueError):
+        load_auth_key(str(path))
+    with pytest.raises(ValueError):
+        RequestAuthenticator(b"short")
@@ -0,0 +1,79 @@
+"""部分解密份额的DLEQ证明与TracerService的请求认证"""
+import asyncio
+import json
+import os
+import pytest
+
+pytest.importorskip("sage.all")
+
+from core.crypto.schnorr import batch_dleq_verify, dleq_verify  # noqa: E402
+from core.entities.tracer import Tracer  # noqa: E402
+from core.entities.user import User  # noqa: E402
+from core.protocol.coordinator import TraceCoordinator, encode_message, open_connection  # noqa: E402
+from core.protocol.tracer_service import TracerService  # noqa: E402
+
+RING = ['1001', '1002', '1003']
+KEY = bytes(range(32))
+
+
+@pytest.fixture(scope="module")
+def tracer():
+    return Tracer('0')
+
+
+@pytest.fixture(scope="module")
+def signatures():
+    user = User('1002')
+    return [user.sign(f"message {i}", RING, "vote") for i in range(3)]
+
+
+def test_proofs_bind_c1_and_share(tracer, signatures):
+    pp = tracer.pp
+    D = tracer.pub_share
+    results = tracer.partial_decrypt_batch(signatures)
+    C1_list = [signature[0][0] for signature in signatures]
+    for C1, (_, s, proof) in zip(C1_list, results):
+        assert dleq_verify(D, C1, s, proof, pp)
+    (_, s0, proof0), (_, s1, _) = results[:2]
+    # 份额换成另一个点、证明挪到另一个C1上都不能通过
+    assert not dleq_verify(D, C1_list[0], s0 + pp.g1, proof0, pp)
+    assert not dleq_verify(D, C1_list[1], s1, proof0, pp)
+    s_list = [s for _, s, _ in results]
+    proofs = [proof for _, _, proof in results]
+    assert batch_dleq_verify([D] * 3, C1_list, s_list, proofs, pp)
+    assert not batch_dleq_verify([D] * 3, C1_list, [s_list[0], s_list[0], s_list[2]], proofs, pp)
+    assert not batch_dleq_verify([D] * 3, C1_list, s_list, [None] * 3, pp)
+
+
+def test_coordinator_rejects_share_for_other_c1(tracer, signatures):
+    response = Tracer.serialize_decrypt_result(tracer.partial_decrypt(signatures[0]))
+    response["tracer_id"] = tracer.tracer_id
+    coordinator = TraceCoordinator(tracer.pp, [], pub_shares={tracer.tracer_id: tracer.pub_share})
+    coordinator.check_share(response, signatures[0][0][0])
+    with pytest.raises(ValueError):
+        coordinator.check_share(response, signatures[1][0][0])
+
+
+def test_service_requires_authentication(tracer, signatures, tmp_path):
+    address = "unix:" + os.path.join(str(tmp_path), "tracer.sock")
+    enc_str = User.serialize_signature(signatures[0])["PID_encryption"][:2]
+    coordinator = TraceCoordinator(tracer.pp, [address], pub_shares={tracer.tracer_id: tracer.pub_share},
+                                   auth_key=KEY)
+
+    async def scenario():
+        service = TracerService(tracer, address, KEY)
+        await service.start()
+        try:
+            reader, writer = await open_connection(address)
+            writer.write(encode_message({"op": "partial_decrypt", "PID_encryption": enc_str}))
+            await writer.drain()
+            unauthenticated = json.loads(await reader.readline())
+            writer.close()
+            response = await coordinator.request_share(address, enc_str)
+        finally:
+            await service.stop()
+        return unauthenticated, response
+
+    unauthenticated, response = asyncio.run(scenario())
+    assert "error" in unauthenticated
+    coordinator.check_share(response, signatures[0][0][0])
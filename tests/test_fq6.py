@@ -0,0 +1,133 @@
+"""
+GF(q^6)整数实现（core.crypto.fq6）的交叉核对：
+有Sage时与Sage的GF(q^6)和G2点乘比较（fq6.cross_check），否则与下面按定义写的
+多项式取模参考实现（逐项相乘、对 x^6 + x + 1 做长除法、扩展欧几里得求逆）比较
+"""
+import json
+import random
+import pytest
+from core.crypto.fq6 import DEGREE, Fq6Field
+from core.entities import DEFAULT_PARAMS_PATH
+
+MODULUS = (1, 1, 0, 0, 0, 0, 1)  # x^6 + x + 1，低次在前
+SEED = 20240601
+TRIALS = 20
+
+
+@pytest.fixture(scope="module")
+def q():
+    with open(DEFAULT_PARAMS_PATH, 'r') as f:
+        return int(json.load(f)['curve']['q'])
+
+
+def _trim(a):
+    a = list(a)
+    while a and a[-1] == 0:
+        a.pop()
+    return a
+
+
+def _poly_mod(a, m, q):
+    """多项式a对首一多项式m取余"""
+    a = [c % q for c in a]
+    dm = len(m) - 1
+    for d in range(len(a) - 1, dm - 1, -1):
+        v = a[d]
+        if v:
+            for j, mj in enumerate(m):
+                a[d - dm + j] = (a[d - dm + j] - v * mj) % q
+    return a[:dm] + [0] * (dm - len(a[:dm]))
+
+
+def _divmod_poly(a, b, q):
+    a, b = _trim(a), _trim(b)
+    inv = pow(b[-1], -1, q)
+    quotient = [0] * max(len(a) - len(b) + 1, 1)
+    while len(a) >= len(b) and a:
+        shift = len(a) - len(b)
+        v = a[-1] * inv % q
+        quotient[shift] = v
+        for j, bj in enumerate(b):
+            a[shift + j] = (a[shift + j] - v * bj) % q
+        a = _trim(a)
+    return quotient, a
+
+
+def _poly_mul_plain(a, b, q):
+    out = [0] * (len(a) + len(b) - 1) if a and b else []
+    for i, ai in enumerate(a):
+        for j, bj in enumerate(b):
+            out[i + j] = (out[i + j] + ai * bj) % q
+    return out
+
+
+def ref_mul(a, b, q):
+    return _poly_mod(_poly_mul_plain(list(a), list(b), q), MODULUS, q)
+
+
+def ref_pow(a, e, q):
+    result, base = [1] + [0] * (DEGREE - 1), list(a)
+    while e:
+        if e & 1:
+            result = ref_mul(result, base, q)
+        base = ref_mul(base, base, q)
+        e >>= 1
+    return result
+
+
+def ref_inv(a, q):
+    """扩展欧几里得：s·a + t·m = 1"""
+    r0, r1 = list(MODULUS), _trim(a)
+    s0, s1 = [0], [1]
+    while r1:
+        quotient, rem = _divmod_poly(r0, r1, q)
+        product = _poly_mul_plain(quotient, s1, q)
+        width = max(len(s0), len(product))
+        s_next = [((s0[i] if i < len(s0) else 0) - (product[i] if i < len(product) else 0)) % q for i in range(width)]
+        r0, r1, s0, s1 = r1, rem, s1, _trim(s_next) or [0]
+    assert len(r0) == 1, "x^6 + x + 1 is irreducible, gcd must be a constant"
+    inv = pow(r0[0], -1, q)
+    return _poly_mod([c * inv for c in s0], MODULUS, q)
+
+
+def _random_elements(q, count):
+    rng = random.Random(SEED)
+    return [[rng.randrange(q) for _ in range(DEGREE)] for _ in range(count)]
+
+
+def test_arithmetic_matches_polynomial_reference(q):
+    field = Fq6Field(q)
+    elements = _random_elements(q, 2 * TRIALS)
+    for t, (a, b) in enumerate(zip(elements[::2], elements[1::2])):
+        A, B = field(a), field(b)
+        assert list((A * B).c) == ref_mul(a, b, q)
+        assert list(A.square().c) == ref_mul(a, a, q)
+        assert list((A + B).c) == [(x + y) % q for x, y in zip(a, b)]
+        assert list((A - B).c) == [(x - y) % q for x, y in zip(a, b)]
+        assert list((~A).c) == ref_inv(a, q)
+        assert list((A ** 12345).c) == ref_pow(a, 12345, q)
+        i = t % 5 + 1
+        assert list(A.frobenius(i).c) == ref_pow(a, q ** i, q)
+
+
+def test_norm_matches_product_of_conjugates(q):
+    field = Fq6Field(q)
+    for a in _random_elements(q, 4):
+        product = list(a)
+        for i in range(1, DEGREE):
+            product = ref_mul(product, ref_pow(a, q ** i, q), q)
+        assert product[1:] == [0] * (DEGREE - 1)
+        assert field(a).norm() == product[0]
+
+
+def test_inverse_of_zero_raises(q):
+    with pytest.raises(ZeroDivisionError):
+        ~Fq6Field(q).zero
+
+
+def test_cross_check_against_sage():
+    pytest.importorskip("sage.all")
+    from core.crypto.fq6 import cross_check
+    from core.crypto.public_params import load_full_public_params
+    pp = load_full_public_params(DEFAULT_PARAMS_PATH)
+    assert cross_check(pp, trials=TRIALS, seed=SEED) == []
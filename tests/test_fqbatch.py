@@ -0,0 +1,24 @@
+"""NumPy批量F_q与G1运算（core.crypto.fqbatch）与逐个整数运算的交叉核对"""
+import json
+import pytest
+
+pytest.importorskip("numpy")
+
+from core.crypto import fqbatch  # noqa: E402
+from core.entities import DEFAULT_PARAMS_PATH  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def curve():
+    with open(DEFAULT_PARAMS_PATH, 'r') as f:
+        params = json.load(f)
+    q, a = int(params['curve']['q']), int(params['curve']['a'])
+    g = tuple(int(c) for c in params['public_kgc_keys']['g1'].strip('()').replace(' ', '').split(','))
+    return q, a, g
+
+
+@pytest.mark.parametrize("seed", [1, 2024])
+def test_cross_check(curve, seed):
+    q, a, g = curve
+    assert fqbatch.cross_check(q, a, g, trials=64, seed=seed) == []
+
@@ -0,0 +1,60 @@
+"""可链接标签索引（core.storage.link_index）：重放不重复计数，重复标签按签名计数"""
+import os
+from core.storage.link_index import LinkIndex
+
+TAG = 1234567890123456789
+OTHER_TAG = 987654321987654321
+
+
+def test_first_and_repeated_signers():
+    with LinkIndex() as index:
+        first = index.record("vote", TAG, "sig-a", now=1.0)
+        second = index.record("vote", TAG, "sig-b", now=2.0)
+        assert (first.previous, first.replay) == (0, False)
+        assert (second.previous, second.first_seen, second.first_signature, second.replay) == (1, 1.0, "sig-a", False)
+        assert index.lookup("vote", TAG) == 2
+        assert index.stats() == {"tags": 1, "signatures": 2, "duplicated_tags": 1}
+
+
+def test_replay_is_counted_once():
+    with LinkIndex() as index:
+        index.record("vote", TAG, "sig-a", now=1.0)
+        index.record("vote", TAG, "sig-b", now=2.0)
+        replay_a = index.record("vote", TAG, "sig-a", now=3.0)
+        replay_b = index.record("vote", TAG, "sig-b", now=4.0)
+        assert (replay_a.previous, replay_a.replay) == (0, True)
+        assert (replay_b.previous, replay_b.replay) == (1, True)
+        assert index.lookup("vote", TAG) == 2
+        assert index.stats()["signatures"] == 2
+
+
+def test_replay_within_one_batch():
+    with LinkIndex() as index:
+        results = index.record_many([("vote", TAG, "sig-a"), ("vote", TAG, "sig-a"), ("vote", TAG, "sig-b")])
+        assert [(r.previous, r.replay) for r in results] == [(0, False), (0, True), (1, False)]
+        assert index.lookup("vote", TAG) == 2
+
+
+def test_events_and_tags_are_separate():
+    with LinkIndex() as index:
+        index.record("vote", TAG, "sig-a")
+        assert index.record("poll", TAG, "sig-a").previous == 0
+        assert index.record("vote", OTHER_TAG, "sig-c").previous == 0
+        assert index.stats("vote") == {"tags": 2, "signatures": 2, "duplicated_tags": 0}
+        assert index.lookup("other", TAG) == 0
+
+
+def test_without_digest_every_record_counts():
+    with LinkIndex() as index:
+        index.record("vote", TAG)
+        assert index.record("vote", TAG).previous == 1
+        assert index.lookup("vote", TAG) == 2
+
+
+def test_index_persists_across_reopen(tmp_path):
+    path = os.path.join(str(tmp_path), "links.db")
+    with LinkIndex(path) as index:
+        index.record("vote", TAG, "sig-a")
+    with LinkIndex(path) as index:
+        assert index.record("vote", TAG, "sig-a").replay
+        assert index.record("vote", TAG, "sig-b").previous == 1
@@ -0,0 +1,89 @@
+"""v2可链接标签：标签群的性质、纯Python验证器的标签检查，以及配对检查无法再从环公钥中找出签名者"""
+import random
+import pytest
+from core.crypto.linkgroup import LinkTable, link_group
+from verifier.params import VerifierParams
+from verifier.signature import deserialize_signature
+from verifier.verify import LINK_DOMAIN, Verifier, link_base
+import pure_signer
+
+RING = ['1001', '1002', '1003', '1004']
+
+
+@pytest.fixture(scope="module")
+def params():
+    return VerifierParams()
+
+
+def test_link_group_is_a_schnorr_group(params):
+    group = link_group(params.n)
+    assert group.p.bit_length() == 2048
+    assert (group.p - 1) % params.n == 0
+    assert pow(3, group.p - 1, group.p) == 1
+    h = group.hash(b"event")
+    assert group.contains(h)
+    assert h == link_group(params.n).hash(b"event")
+    assert h != group.hash(b"other event")
+    assert not group.contains(1) and not group.contains(group.p - 1) and not group.contains(group.p + h)
+
+
+def test_link_table_matches_pow(params):
+    group = link_group(params.n)
+    h = group.hash(b"table")
+    table = LinkTable(h, group, window_size=3)
+    rng = random.Random(7)
+    for k in [0, 1, params.n - 1, params.n, -5] + [rng.randrange(-params.n, 4 * params.n) for _ in range(20)]:
+        assert table.power(k) == group.power(h, k)
+
+
+def test_tag_is_linkable_per_event(params):
+    group = link_group(params.n)
+    sk = pure_signer.load_secret('1002')
+    tags = {event: group.power(link_base(event, params), sk) for event in ("vote-1", "vote-2")}
+    assert tags["vote-1"] != tags["vote-2"]
+    rng = random.Random(1)
+    first = pure_signer.sign(params, sk, '1002', RING, "m1", "vote-1", linkable=True, rng=rng)
+    second = pure_signer.sign(params, sk, '1002', RING[::-1], "m2", "vote-1", linkable=True, rng=rng)
+    assert first[0][2] == second[0][2] == tags["vote-1"]
+
+
+def test_pure_verifier_checks_tag(params):
+    group = link_group(params.n)
+    sk = pure_signer.load_secret('1003')
+    signature = pure_signer.sign(params, sk, '1003', RING, "message", "vote", linkable=True, rng=random.Random(2))
+    sig_dict = pure_signer.serialize(params, signature)
+    verifier = Verifier(params)
+    assert verifier.verify("message", deserialize_signature(sig_dict, params), RING, "vote")
+    assert not verifier.verify("message", deserialize_signature(sig_dict, params), RING, "other vote")
+
+    tag = sig_dict["PID_encryption"][2]
+    other_tag = group.power(link_base("vote", params), pure_signer.load_secret('1001'))
+    for bad_tag in (tag * group.hash(b"x") % group.p, other_tag, group.p - 1, tag + group.p):
+        tampered = dict(sig_dict, PID_encryption=sig_dict["PID_encryption"][:2] + [bad_tag])
+        assert not verifier.verify("message", deserialize_signature(tampered, params), RING, "vote")
+    with pytest.raises(ValueError):
+        deserialize_signature(dict(sig_dict, PID_encryption=sig_dict["PID_encryption"][:2] + [str(tag)]), params)
+
+
+def test_pairing_check_over_ring_keys_does_not_identify_signer():
+    """旧格式的攻击 e(T, g2) == e(H_G1(LINK_DOMAIN || event), pk_i) 对v2签名的任何成员都不成立"""
+    pytest.importorskip("sage.all")
+    from core.crypto.pairing import TatePairing
+    from core.entities.user import User
+    signer = User('1002')
+    pp = signer.pp
+    event = "vote"
+    signature = signer.sign("message", RING, event, linkable=True)
+    tag = signature[0][2]
+    assert isinstance(tag, int) and link_group(pp.n).contains(tag)
+    assert User('1001', pp=pp, load_key=False).verify("message", signature, RING, event)
+
+    pairing = TatePairing(pp)
+    g1_base = pp.hash_to_g1(LINK_DOMAIN + event.encode('utf-8'))
+    # G1中的标签（旧格式）会被这一检查识别出来
+    assert pairing.pairing(g1_base * signer.sk, pp.g2) == pairing.pairing(g1_base, signer.pk)
+    # v2签名中所有在G1中的公开点（C1、C2与各承诺）都不满足任何成员的检查
+    candidates = list(signature[0][:2]) + list(signature[1][0][0])
+    for uid in RING:
+        expected = pairing.pairing(g1_base, signer.load_member(uid).public_key)
+        assert all(pairing.pairing(P, pp.g2) != expected for P in candidates)
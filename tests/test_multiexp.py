@@ -0,0 +1,29 @@
+"""多项点乘（core.crypto.multiexp）的参数检查与schnorr_verify"""
+import pytest
+from core.crypto.multiexp import MAX_ARITY, multi_multiply
+from core.crypto.tuning import TuningProfile
+
+
+@pytest.mark.parametrize("arity", [0, -1, MAX_ARITY + 1, 8])
+def test_multi_multiply_rejects_arity_out_of_range(arity):
+    with pytest.raises(ValueError):
+        multi_multiply([], [], None, arity=arity)
+
+
+def test_tuning_rejects_arity_above_max():
+    with pytest.raises(ValueError):
+        TuningProfile(msm_arity=MAX_ARITY + 1)
+
+
+def test_schnorr_verify():
+    pytest.importorskip("sage.all")
+    from core.crypto.registry import shared_public_params
+    from core.crypto.schnorr import schnorr_proof, schnorr_verify
+    from core.entities import DEFAULT_PARAMS_PATH
+    pp = shared_public_params(DEFAULT_PARAMS_PATH)
+    d = pp.rand_int()
+    D = pp.g1_table.multiply(d)
+    T, s = schnorr_proof(d, pp)
+    assert schnorr_verify(D, (T, s), pp)
+    assert not schnorr_verify(D, (T, s + 1), pp)
+    assert not schnorr_verify(D + pp.g1, (T, s), pp)
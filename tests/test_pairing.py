@@ -0,0 +1,44 @@
+"""validate_key_pairs的子群检查与配对检查（core.crypto.pairing）"""
+import pytest
+
+pytest.importorskip("sage.all")
+
+from core.crypto.pairing import key_pair_in_subgroups, validate_key_pairs  # noqa: E402
+from core.entities.user import User  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def user():
+    return User('1002')
+
+
+def _point_outside_subgroup(pp):
+    """基域上阶不整除n的点"""
+    while True:
+        P = pp.E.random_point()
+        if P.xy()[0].polynomial().degree() == 0 and not (pp.n * P).is_zero():
+            return P
+
+
+def test_valid_pair_passes(user):
+    pp = user.pp
+    member = pp.R(user.pk, user.pid)
+    assert key_pair_in_subgroups(member, pp)
+    assert validate_key_pairs([member], pp) == []
+
+
+def test_subgroup_violations_are_rejected(user):
+    pp = user.pp
+    outside = _point_outside_subgroup(pp)
+    members = [
+        pp.R(user.pk, user.pid),
+        # pk不在迹零子群中（g1的迹为k·g1）
+        pp.R(user.pk + pp.g1, user.pid),
+        # pid带有n-挠子群之外的分量
+        pp.R(user.pk, user.pid + outside),
+        # pid不在基域上
+        pp.R(user.pk, user.pk),
+        pp.R(pp.E(0), pp.E(0)),
+    ]
+    assert [key_pair_in_subgroups(m, pp) for m in members] == [True, False, False, False, False]
+    assert validate_key_pairs(members, pp) == [1, 2, 3, 4]
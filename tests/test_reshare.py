@@ -0,0 +1,107 @@
+"""追踪者份额的重分享（core.protocol.reshare）：主密钥s不变，新份额能恢复同一个PID"""
+import pytest
+
+pytest.importorskip("sage.all")
+
+from sage.all import Integer  # noqa: E402
+from core.crypto import feldman  # noqa: E402
+from core.entities.tracer import Tracer  # noqa: E402
+from core.entities.user import User  # noqa: E402
+from core.protocol import reshare  # noqa: E402
+
+RING = ['1001', '1002', '1003']
+NEW_COUNT, NEW_THRESHOLD = 4, 3
+
+
+@pytest.fixture(scope="module")
+def old_tracers():
+    return [Tracer(str(i)) for i in range(3)]
+
+
+@pytest.fixture(scope="module")
+def old_commitments(old_tracers):
+    """由现有追踪者份额还原门限为2的Feldman承诺（C_0 = Q）"""
+    pp = old_tracers[0].pp
+    n = int(pp.n)
+    first, second = old_tracers[:2]
+    lambdas = feldman.lagrange_at_zero([first.x_i, second.x_i], n)
+    s = (lambdas[0] * int(first.d_share) + lambdas[1] * int(second.d_share)) % n
+    a1 = (int(first.d_share) - s) * pow(int(first.x_i), -1, n) % n
+    commitments = feldman.commit([s, a1], pp)
+    assert commitments[0] == pp.Q
+    assert all(feldman.verify_share(commitments, t.x_i, t.d_share, pp) for t in old_tracers)
+    return commitments
+
+
+def _dealings(tracers, new_xs, pp):
+    dealings, sub_shares = [], {}
+    for tracer in tracers:
+        commitments, shares = reshare.deal(tracer, new_xs, NEW_THRESHOLD, pp)
+        dealings.append({"dealer_id": tracer.tracer_id, "x_i": int(tracer.x_i), "commitments": commitments})
+        for x, s in zip(new_xs, shares):
+            sub_shares.setdefault(x, {})[str(tracer.tracer_id)] = s
+    return dealings, sub_shares
+
+
+def _new_tracer(tracer_id, x, d_share, pp):
+    tracer = Tracer(str(tracer_id), load_key=False, pp=pp)
+    tracer.x_i = x
+    tracer.d_share = Integer(d_share)
+    tracer.pub_share = pp.g1_table.multiply(Integer(d_share))
+    return tracer
+
+
+def test_reshare_preserves_the_secret(old_tracers, old_commitments):
+    pp = old_tracers[0].pp
+    n = int(pp.n)
+    new_xs = reshare.new_tracer_xs(NEW_COUNT)
+    dealings, sub_shares = _dealings(old_tracers[1:], new_xs, pp)
+    accepted, rejected = reshare.qualified_dealers(dealings, old_commitments, NEW_THRESHOLD, pp)
+    assert not rejected
+
+    new_shares, new_commitments = {}, None
+    for x in new_xs:
+        d_share, commitments = reshare.combine_sub_shares(x, accepted, sub_shares[x], pp)
+        assert new_commitments is None or commitments == new_commitments
+        new_commitments = commitments
+        new_shares[x] = d_share
+    assert new_commitments[0] == pp.Q
+    assert feldman.verify_pub_shares(new_commitments, [(x, pp.g1_table.multiply(Integer(d))) for x, d in new_shares.items()], pp)
+
+    # 任意t'个新份额插值都得到同一个s（s·g1 == Q）
+    for subset in (new_xs[:3], new_xs[1:]):
+        lambdas = feldman.lagrange_at_zero(subset, n)
+        s = sum(l * new_shares[x] for l, x in zip(lambdas, subset)) % n
+        assert pp.g1_table.multiply(Integer(s)) == pp.Q
+
+    # 新追踪者恢复的PID与旧追踪者相同
+    signer = User('1002')
+    signature = signer.sign("message", RING, "vote")
+    old_shares = [t.partial_decrypt(signature) for t in old_tracers[:2]]
+    old_pid = Tracer.combine([t.pub_share for t in old_tracers[:2]], old_shares, signature, pp)
+    new_tracers = [_new_tracer(i, x, new_shares[x], pp) for i, x in enumerate(new_xs)][1:]
+    new_pid = Tracer.combine([t.pub_share for t in new_tracers], [t.partial_decrypt(signature) for t in new_tracers],
+                             signature, pp)
+    assert old_pid == new_pid == signer.pid
+
+
+def test_bad_dealings_are_rejected(old_tracers, old_commitments):
+    pp = old_tracers[0].pp
+    new_xs = reshare.new_tracer_xs(NEW_COUNT)
+    dealings, sub_shares = _dealings(old_tracers, new_xs, pp)
+
+    # 承诺B_0与公钥份额不符的分发被公开检查剔除，由下一个分发者补上
+    forged = dict(dealings[0], commitments=[dealings[0]["commitments"][0] + pp.g1] + dealings[0]["commitments"][1:])
+    accepted, rejected = reshare.qualified_dealers([forged] + dealings[1:], old_commitments, NEW_THRESHOLD, pp)
+    assert [d["dealer_id"] for d in accepted] == [t.tracer_id for t in old_tracers[1:]]
+    assert list(rejected) == [str(old_tracers[0].tracer_id)]
+    with pytest.raises(ValueError):
+        reshare.qualified_dealers([forged, dealings[1]], old_commitments, NEW_THRESHOLD, pp)
+
+    # 合格分发者的子份额不符时报错并指明该分发者
+    accepted, _ = reshare.qualified_dealers(dealings, old_commitments, NEW_THRESHOLD, pp)
+    x = new_xs[0]
+    dealer_id = str(accepted[0]["dealer_id"])
+    tampered = dict(sub_shares[x], **{dealer_id: (sub_shares[x][dealer_id] + 1) % int(pp.n)})
+    with pytest.raises(ValueError, match=f"dealer {dealer_id}"):
+        reshare.combine_sub_shares(x, accepted, tampered, pp)
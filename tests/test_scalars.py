@@ -0,0 +1,42 @@
+"""fork后子进程不得继承父进程缓冲区中的随机标量（core.crypto.scalars）"""
+import os
+import pytest
+from core.crypto.scalars import ScalarSource
+
+N = 15028799613985034465755506450771561352583254744125520639296541195021
+
+
+def _draw_in_child(source, count):
+    """在fork出的子进程中取count个标量，经管道交回父进程"""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            os.write(write_fd, ",".join(str(k) for k in source.rand_ints(count)).encode())
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as f:
+        data = f.read().decode()
+    os.waitpid(pid, 0)
+    return [int(k) for k in data.split(",")]
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="requires os.fork")
+def test_forked_child_draws_different_scalars():
+    source = ScalarSource(N)
+    # 先取一个，使缓冲区中留有未用的字节
+    source.rand_int()
+    child = _draw_in_child(source, 8)
+    parent = source.rand_ints(8)
+    assert len(child) == 8
+    assert not set(child) & set(parent)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="requires os.fork")
+def test_deterministic_source_is_kept_across_fork():
+    source = ScalarSource(N, seed=7)
+    source.rand_int()
+    child = _draw_in_child(source, 4)
+    assert child == source.rand_ints(4)
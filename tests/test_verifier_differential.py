@@ -0,0 +1,11 @@
+"""Sage无关的verifier与Sage路径的差分测试（verifier.differential）"""
+import pytest
+
+pytest.importorskip("sage.all")
+
+from verifier.differential import cross_check  # noqa: E402
+
+
+@pytest.mark.parametrize("seed", [1, 47])
+def test_pure_verifier_agrees_with_sage(seed):
+    assert cross_check(trials=4, seed=seed) == []
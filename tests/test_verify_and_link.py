@@ -0,0 +1,32 @@
+"""User.verify_and_link：使用链接索引时默认拒绝没有标签的v1签名"""
+import pytest
+
+pytest.importorskip("sage.all")
+
+from core.entities.user import User  # noqa: E402
+from core.storage.link_index import LinkIndex  # noqa: E402
+
+RING = ['1001', '1002', '1003']
+
+
+@pytest.fixture(scope="module")
+def signer():
+    return User('1002')
+
+
+def test_v1_signature_is_rejected_with_link_index(signer):
+    signature = signer.sign("message", RING, "vote")
+    with LinkIndex() as index:
+        with pytest.raises(ValueError):
+            signer.verify_and_link("message", signature, RING, index, "vote")
+        result = signer.verify_and_link("message", signature, RING, index, "vote", allow_v1=True)
+        assert result.valid and not result.linkable
+        assert index.stats()["signatures"] == 0
+
+
+def test_v2_signatures_are_linked(signer):
+    with LinkIndex() as index:
+        first = signer.verify_and_link("m1", signer.sign("m1", RING, "vote", linkable=True), RING, index, "vote")
+        second = signer.verify_and_link("m2", signer.sign("m2", RING, "vote", linkable=True), RING, index, "vote")
+        assert first.linkable and first.previous == 0
+        assert second.previous == 1 and not second.replay
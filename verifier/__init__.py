@@ -0,0 +1,21 @@
+"""
+libTARS 只做验证的运行时（不依赖SageMath）
+
+读取与Sage路径相同的params.json、环成员公钥文件和签名（JSON或二进制），
+验证结果与User.verify逐位一致。运算基于Python整数，安装了gmpy2时自动使用。
+
+- curve: 曲线运算、点的解析/格式化（G1走整数快速路径，扩域坐标退回core.crypto.fq6）
+- params: 公共参数、zr_hash与hash_to_g1
+- signature: JSON/二进制签名的读取
+- verify: verify_ring_proof与Verifier
+- differential: 与Sage路径的差分测试（需要Sage，只在开发环境运行）
+
+用法: python -m verifier -i temp/test_signature.json -m temp/test_message.txt
+      python -m verifier.differential --trials 20
+
+精简镜像只需要以下文件（不需要sage及core下的其他模块）:
+    verifier/
+    core/__init__.py
+    core/entities/__init__.py
+    core/crypto/__init__.py, fq6.py, jacobian.py, instrument.py, tuning.py
+"""
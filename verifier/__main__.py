@@ -0,0 +1,46 @@
+import argparse
+import os
+import sys
+import time
+from core.entities import DEFAULT_USER_KEYS_DIR
+from verifier.params import VerifierParams
+from verifier.signature import load_signature_file
+from verifier.verify import Verifier
+
+
+def main(argv=None):
+    """退出码: 0 签名有效，1 签名无效，2 读取或验证出错"""
+    parser = argparse.ArgumentParser(prog="python -m verifier", description="Sage-free libTARS signature verifier")
+    parser.add_argument("-i", "--input", required=True, help="Signature file (JSON or binary)")
+    parser.add_argument("-m", "--message", required=True, help="Message file, or the message itself")
+    parser.add_argument("-L", "--ring", help="Ring user ids (comma separated) or a file with one id per line; defaults to the signature's ring")
+    parser.add_argument("-e", "--event", help="Event; defaults to the signature's event, then 'default'")
+    parser.add_argument("-p", "--params", help="System parameter file (params.json)")
+    parser.add_argument("-d", "--user-dir", default=DEFAULT_USER_KEYS_DIR, help="Directory of member public key files")
+    args = parser.parse_args(argv)
+
+    try:
+        start = time.perf_counter()
+        params = VerifierParams(args.params)
+        signature, ring, event = load_signature_file(args.input, params)
+        if args.ring:
+            ring = args.ring if os.path.isfile(args.ring) else [x.strip() for x in args.ring.split(",") if x.strip()]
+        if ring is None:
+            print("The signature file has no ring, use -L", file=sys.stderr)
+            return 2
+        event = args.event or event or "default"
+        if os.path.isfile(args.message):
+            with open(args.message, 'r') as f:
+                message = f.read()
+        else:
+            message = args.message
+        valid = Verifier(params).verify(message, signature, ring, event, args.user_dir)
+    except Exception as e:
+        print(f"Verification error: {e}", file=sys.stderr)
+        return 2
+    print(f"Signature is {'valid' if valid else 'invalid'} ({time.perf_counter() - start:.3f}s)")
+    return 0 if valid else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
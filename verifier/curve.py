@@ -0,0 +1,457 @@
+"""
+不依赖Sage的曲线运算：E: y^2 = x^3 + a·x + b over GF(q^6) = F_q[x]/(x^6 + x + 1)
+
+- 仿射点为 (x, y) 元组，None 为无穷远点。坐标在基域F_q中时是整数，否则是
+  core.crypto.fq6.Fq6Element；canonical() 把落在F_q中的扩域元素降为整数，
+  同一个点只有一种表示，点相等即元组相等
+- G1点（g1、Q、PID、承诺）坐标都在F_q中，走整数快速路径：Jacobian坐标、
+  批量求逆、固定底点窗口表、多项点乘（少量底点用Straus，多个底点用Pippenger）
+- 任一坐标在扩域中时（G2点或恶意构造的签名点）退回fq6的通用实现，结果相同，只是更慢
+- 解析、格式化与哈希所用的字符串与Sage路径逐位一致（见 parse_point / point_to_string / point_repr）
+"""
+from core.crypto.fq6 import Fq6Field, Fq6Element, Fq6Curve, DEGREE
+from core.crypto.jacobian import JacobianCurve
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+# 与 PublicParams.make_table 中 PowerTable 的 max_bits 相同
+TABLE_MAX_BITS = 450
+VARIABLE_NAME = 'a'
+
+
+def to_int(value):
+    """有gmpy2时转为mpz（模运算更快），否则为int"""
+    return gmpy2.mpz(value) if gmpy2 is not None else int(value)
+
+
+def table_bit_limit(window_size, max_bits=TABLE_MAX_BITS):
+    """PowerTable能处理的最大标量位数：超过时Sage路径在查表时抛出IndexError"""
+    return window_size * ((max_bits + window_size - 1) // window_size)
+
+
+def table_scalar(k, window_size, max_bits=TABLE_MAX_BITS):
+    """
+    按PowerTable.multiply的行为得到实际参与点乘的标量：超长标量抛出IndexError。
+    PowerTable按bin(k)[2:]分块，负数的字符串中留有'b'：多数情况下int()抛出ValueError，
+    但最高块恰为'0b'加数字时被当作二进制前缀接受，结果是|k|的点乘，这里逐块照搬
+    """
+    if k >= 0:
+        if k.bit_length() > table_bit_limit(window_size, max_bits):
+            raise IndexError("Scalar is too long for the window table")
+        return k
+    num_table_blocks = (max_bits + window_size - 1) // window_size
+    k_bin = bin(int(k))[2:]
+    k_padded = '0' * ((-len(k_bin)) % window_size) + k_bin
+    value = 0
+    for block_idx in range(len(k_padded) // window_size):
+        end = len(k_padded) - block_idx * window_size
+        idx = int(k_padded[end - window_size:end], 2)
+        if block_idx >= num_table_blocks:
+            raise IndexError("Scalar is too long for the window table")
+        value += idx << (block_idx * window_size)
+    return to_int(value)
+
+
+class Curve:
+    def __init__(self, q, a, b, k=DEGREE):
+        if k != DEGREE:
+            raise ValueError(f"Only embedding degree {DEGREE} (modulus x^6 + x + 1) is supported")
+        self.q = to_int(q)
+        self.a = to_int(a) % self.q
+        self.b = to_int(b) % self.q
+        self.k = k
+        self._field = None
+        self._ext = None
+
+    # ----------- 扩域 -----------
+    @property
+    def field(self):
+        """GF(q^6)的整数实现（只在遇到扩域坐标时构建）"""
+        if self._field is None:
+            self._field = Fq6Field(int(self.q))
+        return self._field
+
+    @property
+    def ext(self):
+        """扩域坐标上的Jacobian运算"""
+        if self._ext is None:
+            self._ext = JacobianCurve(Fq6Curve(self.field, int(self.a)))
+        return self._ext
+
+    def element(self, coeffs):
+        """由任意长度的升幂系数构造域元素：按 x^6 = -x - 1 约化、对q取模，落在F_q中时为整数"""
+        coeffs = [to_int(c) for c in coeffs]
+        for d in range(len(coeffs) - 1, DEGREE - 1, -1):
+            v = coeffs[d]
+            if v:
+                coeffs[d - 5] -= v
+                coeffs[d - 6] -= v
+        coeffs = [c % self.q for c in coeffs[:DEGREE]]
+        if not any(coeffs[1:]):
+            return coeffs[0] if coeffs else to_int(0)
+        return Fq6Element(self.field, tuple(int(c) for c in coeffs + [0] * (DEGREE - len(coeffs))))
+
+    @staticmethod
+    def canonical(e):
+        if isinstance(e, Fq6Element) and not any(e.c[1:]):
+            return to_int(e.c[0])
+        return e
+
+    def lift(self, e):
+        return e if isinstance(e, Fq6Element) else self.field(int(e))
+
+    @staticmethod
+    def coefficients(e):
+        """升幂系数列表（与Sage的 polynomial().list() 相同，零元素为空列表）"""
+        if isinstance(e, Fq6Element):
+            coeffs = list(e.c)
+            while coeffs and not coeffs[-1]:
+                coeffs.pop()
+            return coeffs
+        return [e] if e else []
+
+    @staticmethod
+    def is_base(P):
+        return P is None or not (isinstance(P[0], Fq6Element) or isinstance(P[1], Fq6Element))
+
+    def on_curve(self, P):
+        if P is None:
+            return True
+        x, y = P
+        if self.is_base(P):
+            q = self.q
+            return (y * y - (x * x * x + self.a * x + self.b)) % q == 0
+        x, y = self.lift(x), self.lift(y)
+        return (y * y - (x * x * x + x * int(self.a) + int(self.b))).is_zero()
+
+    # ----------- 解析与格式化 -----------
+    def parse_coord(self, coord):
+        """
+        解析point_to_string输出的坐标，与public_params._parse_coord的文法相同：
+        整数，或 'c*a^e' / 'a^e' / 'c*a' / 'a' / 'c' 项用'+'连接。
+        次数不限、系数可为负或不小于q（按域运算约化）；其他写法抛出ValueError
+        """
+        if coord.isdigit():
+            return to_int(int(coord)) % self.q
+        coeffs = {}
+        for term in coord.split('+'):
+            c, sep, power = term.partition(VARIABLE_NAME)
+            if not sep:
+                coeffs[0] = coeffs.get(0, 0) + int(term)
+                continue
+            if c:
+                if c[-1] != '*':
+                    raise ValueError(f"Unsupported coordinate term: {term}")
+                c = int(c[:-1])
+            else:
+                c = 1
+            if power:
+                if power[0] != '^':
+                    raise ValueError(f"Unsupported coordinate term: {term}")
+                e = int(power[1:])
+                if e < 0:
+                    raise ValueError(f"Unsupported coordinate term: {term}")
+            else:
+                e = 1
+            coeffs[e] = coeffs.get(e, 0) + c
+        return self.element([coeffs.get(e, 0) for e in range(max(coeffs) + 1)])
+
+    def parse_point(self, point_str, trusted=False):
+        """
+        与public_params.point_from_string相同：'(x,y)'，忽略空格
+        :param trusted: 为False时检查曲线方程（不在曲线上时抛出ValueError）
+        """
+        coords = point_str.strip('()').replace(' ', '').split(',')
+        if len(coords) != 2:
+            raise ValueError(f"Invalid point string: {point_str}")
+        P = (self.parse_coord(coords[0]), self.parse_coord(coords[1]))
+        if not trusted and not self.on_curve(P):
+            raise ValueError(f"Point is not on the curve: {point_str}")
+        return P
+
+    @staticmethod
+    def format_coord(e):
+        """与Sage打印GF(q^6)元素的格式相同：高次项在前，' + '连接，系数1省略"""
+        if not isinstance(e, Fq6Element):
+            return str(int(e))
+        terms = []
+        for d in range(DEGREE - 1, -1, -1):
+            c = int(e.c[d])
+            if not c:
+                continue
+            if d == 0:
+                terms.append(str(c))
+                continue
+            var = VARIABLE_NAME if d == 1 else f"{VARIABLE_NAME}^{d}"
+            terms.append(var if c == 1 else f"{c}*{var}")
+        return " + ".join(terms) if terms else "0"
+
+    def point_to_string(self, P):
+        """与public_params.point_to_string相同；无穷远点没有仿射坐标，抛出ZeroDivisionError（同Sage的xy()）"""
+        if P is None:
+            raise ZeroDivisionError("Point at infinity has no affine coordinates")
+        return f"({self.format_coord(P[0])},{self.format_coord(P[1])})"
+
+    def point_repr(self, P):
+        """Sage中str(P)的射影形式 '(x : y : 1)'，无穷远点为 '(0 : 1 : 0)'（zr_hash对点按此字符串哈希）"""
+        if P is None:
+            return "(0 : 1 : 0)"
+        return f"({self.format_coord(P[0])} : {self.format_coord(P[1])} : 1)"
+
+    # ----------- 整数Jacobian运算（坐标在F_q中） -----------
+    ZERO = (1, 1, 0)
+
+    def _double(self, P):
+        X1, Y1, Z1 = P
+        if not Z1 or not Y1:
+            return self.ZERO
+        q = self.q
+        XX = X1 * X1 % q
+        YY = Y1 * Y1 % q
+        YYYY = YY * YY % q
+        ZZ = Z1 * Z1 % q
+        S = 2 * ((X1 + YY) ** 2 - XX - YYYY) % q
+        M = (3 * XX + self.a * ZZ * ZZ) % q
+        T = (M * M - 2 * S) % q
+        Y3 = (M * (S - T) - 8 * YYYY) % q
+        Z3 = ((Y1 + Z1) ** 2 - YY - ZZ) % q
+        return (T, Y3, Z3)
+
+    def _add(self, P, Q):
+        X1, Y1, Z1 = P
+        X2, Y2, Z2 = Q
+        if not Z1:
+            return Q
+        if not Z2:
+            return P
+        q = self.q
+        Z1Z1 = Z1 * Z1 % q
+        Z2Z2 = Z2 * Z2 % q
+        U1 = X1 * Z2Z2 % q
+        U2 = X2 * Z1Z1 % q
+        S1 = Y1 * Z2 * Z2Z2 % q
+        S2 = Y2 * Z1 * Z1Z1 % q
+        H = (U2 - U1) % q
+        r = 2 * (S2 - S1) % q
+        if not H:
+            return self._double(P) if not r else self.ZERO
+        I = 4 * H * H % q
+        J = H * I % q
+        V = U1 * I % q
+        X3 = (r * r - J - 2 * V) % q
+        Y3 = (r * (V - X3) - 2 * S1 * J) % q
+        Z3 = ((Z1 + Z2) ** 2 - Z1Z1 - Z2Z2) * H % q
+        return (X3, Y3, Z3)
+
+    def _add_affine(self, P, A):
+        if A is None:
+            return P
+        X1, Y1, Z1 = P
+        X2, Y2 = A
+        if not Z1:
+            return (X2, Y2, 1)
+        q = self.q
+        Z1Z1 = Z1 * Z1 % q
+        U2 = X2 * Z1Z1 % q
+        S2 = Y2 * Z1 * Z1Z1 % q
+        H = (U2 - X1) % q
+        r = 2 * (S2 - Y1) % q
+        if not H:
+            return self._double(P) if not r else self.ZERO
+        HH = H * H % q
+        I = 4 * HH
+        J = H * I % q
+        V = X1 * I % q
+        X3 = (r * r - J - 2 * V) % q
+        Y3 = (r * (V - X3) - 2 * Y1 * J) % q
+        Z3 = ((Z1 + H) ** 2 - Z1Z1 - HH) % q
+        return (X3, Y3, Z3)
+
+    def _to_affine_many(self, points):
+        """Montgomery同时求逆，整批一次模逆"""
+        q = self.q
+        prefix = []
+        acc = 1
+        for _, _, Z in points:
+            if Z:
+                acc = acc * Z % q
+            prefix.append(acc)
+        inv = pow(acc, -1, q)
+        result = [None] * len(points)
+        for i in range(len(points) - 1, -1, -1):
+            X, Y, Z = points[i]
+            if not Z:
+                continue
+            z_inv = inv * prefix[i - 1] % q if i > 0 else inv
+            inv = inv * Z % q
+            z_inv2 = z_inv * z_inv % q
+            result[i] = (X * z_inv2 % q, Y * z_inv2 * z_inv % q)
+        return result
+
+    # ----------- 扩域上的通用运算 -----------
+    def _ext_point(self, P):
+        if P is None:
+            return self.ext.zero
+        return (self.lift(P[0]), self.lift(P[1]), self.field.one)
+
+    def _ext_affine(self, P):
+        coords = self.ext.affine_coords_many([P])[0]
+        if coords is None:
+            return None
+        return (self.canonical(coords[0]), self.canonical(coords[1]))
+
+    def _ext_msm(self, points, scalars):
+        J = self.ext
+        acc = J.zero
+        for P, k in zip(points, scalars):
+            base = self._ext_point(P)
+            if k < 0:
+                base, k = J.neg(base), -k
+            acc = J.add(acc, J.multiply(base, k))
+        return self._ext_affine(acc)
+
+    # ----------- 群运算 -----------
+    def neg(self, P):
+        if P is None:
+            return None
+        x, y = P
+        return (x, self.canonical(-self.lift(y))) if isinstance(y, Fq6Element) else (x, -y % self.q)
+
+    def add(self, P, Q):
+        return self.sum([P, Q])
+
+    def sub(self, P, Q):
+        return self.sum([P, self.neg(Q)])
+
+    def sum(self, points):
+        """Σ points（整批一次求逆）"""
+        points = [P for P in points if P is not None]
+        if not points:
+            return None
+        if all(self.is_base(P) for P in points):
+            acc = self.ZERO
+            for P in points:
+                acc = self._add_affine(acc, P)
+            return self._to_affine_many([acc])[0]
+        J = self.ext
+        acc = J.zero
+        for P in points:
+            acc = J.add(acc, self._ext_point(P))
+        return self._ext_affine(acc)
+
+    def multiply(self, P, k):
+        return self.msm([P], [k])
+
+    def msm(self, points, scalars):
+        """Σ k_i·P_i，标量为任意整数（负数按取负点处理）"""
+        terms = []
+        for P, k in zip(points, scalars):
+            k = to_int(k)
+            if P is None or not k:
+                continue
+            if k < 0:
+                P, k = self.neg(P), -k
+            terms.append((P, k))
+        if not terms:
+            return None
+        if not all(self.is_base(P) for P, _ in terms):
+            return self._ext_msm(*zip(*terms))
+        if len(terms) <= 16:
+            acc = self._straus(terms)
+        else:
+            acc = self._pippenger(terms)
+        return self._to_affine_many([acc])[0]
+
+    def _straus(self, terms, window=4):
+        """每个底点一张 [0..2^w) 倍数表，共用一条倍点链"""
+        size = 1 << window
+        flat = []
+        for P, _ in terms:
+            row = [self.ZERO, (P[0], P[1], 1)]
+            for i in range(2, size):
+                row.append(self._double(row[i >> 1]) if i % 2 == 0 else self._add_affine(row[i - 1], P))
+            flat.extend(row)
+        coords = self._to_affine_many(flat)
+        tables = [coords[j * size:(j + 1) * size] for j in range(len(terms))]
+        bits = max(k.bit_length() for _, k in terms)
+        mask = size - 1
+        acc = self.ZERO
+        for shift in range(((bits + window - 1) // window - 1) * window, -1, -window):
+            for _ in range(window):
+                acc = self._double(acc)
+            for table, (_, k) in zip(tables, terms):
+                idx = (k >> shift) & mask
+                if idx:
+                    acc = self._add_affine(acc, table[idx])
+        return acc
+
+    def _pippenger(self, terms):
+        """桶方法：每个c位窗口把底点按窗口值放入桶，再用前缀和求 Σ j·B_j"""
+        c = max(4, len(terms).bit_length() - 2)
+        bits = max(k.bit_length() for _, k in terms)
+        mask = (1 << c) - 1
+        acc = self.ZERO
+        for shift in range(((bits + c - 1) // c - 1) * c, -1, -c):
+            for _ in range(c):
+                acc = self._double(acc)
+            buckets = [self.ZERO] * (mask + 1)
+            for P, k in terms:
+                idx = (k >> shift) & mask
+                if idx:
+                    buckets[idx] = self._add_affine(buckets[idx], P)
+            running = self.ZERO
+            window_sum = self.ZERO
+            for idx in range(mask, 0, -1):
+                running = self._add(running, buckets[idx])
+                window_sum = self._add(window_sum, running)
+            acc = self._add(acc, window_sum)
+        return acc
+
+
+class FixedBaseTable:
+    """
+    固定底点窗口表（g1、Q、链接底点h），与PowerTable的表结构和标量范围相同：
+    第b块为 [i·2^(b·w)·P]，共 ceil(max_bits / w) 块
+    """
+    def __init__(self, curve, P, window_size=4, max_bits=TABLE_MAX_BITS):
+        self.curve = curve
+        self.P = P
+        self.window_size = window_size
+        self.max_bits = max_bits
+        self.table = None
+        if P is not None and curve.is_base(P):
+            self._build()
+
+    def _build(self):
+        curve = self.curve
+        size = 1 << self.window_size
+        num_blocks = (self.max_bits + self.window_size - 1) // self.window_size
+        current = (self.P[0], self.P[1], 1)
+        flat = []
+        for _ in range(num_blocks):
+            block = [curve.ZERO, current]
+            for i in range(2, size):
+                block.append(curve._double(block[i >> 1]) if i % 2 == 0 else curve._add(block[i - 1], current))
+            flat.extend(block)
+            current = curve._double(block[size >> 1])
+        coords = curve._to_affine_many(flat)
+        self.table = [coords[b * size:(b + 1) * size] for b in range(num_blocks)]
+
+    def multiply(self, k):
+        k = table_scalar(to_int(k), self.window_size, self.max_bits)
+        if self.table is None:
+            return self.curve.multiply(self.P, k)
+        curve = self.curve
+        mask = (1 << self.window_size) - 1
+        acc = curve.ZERO
+        block_idx = 0
+        while k:
+            idx = k & mask
+            if idx:
+                acc = curve._add_affine(acc, self.table[block_idx][idx])
+            k >>= self.window_size
+            block_idx += 1
+        return curve._to_affine_many([acc])[0]
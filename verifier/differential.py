@@ -0,0 +1,191 @@
+"""
+纯Python验证器与Sage路径的差分测试（需要Sage，在开发环境中运行）
+
+1. 原语：随机标量下的G1/G2点乘与求和、点字符串的解析与格式化、zr_hash、hash_to_g1
+2. 验证结果：用config/user中已有的用户密钥生成v1/v2签名，再对序列化后的签名做各种篡改
+   （消息、event、挑战、响应、承诺、G2承诺、负数与超长挑战、环的增减、二进制格式），
+   两边各自解析并验证，比较结果（True / False / 出错）；Sage路径另用CompactPowerTable环表
+   （--compact-tables）验证一次，结果也须相同
+
+用法: python -m verifier.differential -n 20 --seed 1
+"""
+import argparse
+import copy
+import io
+import os
+import random
+from core.entities import DEFAULT_PARAMS_PATH, DEFAULT_USER_KEYS_DIR, DEFAULT_USER_SINGLE_KEY_FILE_FMT
+from core.crypto.linkgroup import link_group
+from verifier.params import VerifierParams
+from verifier.signature import deserialize_signature, read_signature
+from verifier.verify import Verifier
+
+MESSAGE = "libTARS differential test message\n"
+
+
+def verdict(fn):
+    """验证结果归为 True / False / 'error'（两边的异常类型不要求相同）"""
+    try:
+        return bool(fn())
+    except Exception:
+        return "error"
+
+
+def available_users(user_dir=DEFAULT_USER_KEYS_DIR):
+    """有私钥文件的用户ID"""
+    users = []
+    for uid in sorted(name[len("user_"):-len("_key.json")] for name in os.listdir(user_dir)
+                      if name.startswith("user_") and name.endswith("_key.json")):
+        if os.path.isfile(DEFAULT_USER_SINGLE_KEY_FILE_FMT.format(uid)):
+            users.append(uid)
+    return users
+
+
+def check_primitives(pp, params, rng, trials):
+    from sage.all import Integer
+    from core.crypto.public_params import point_to_string
+    curve = params.curve
+    n = int(pp.n)
+    g2 = curve.parse_point(params.g2_string, trusted=True)
+    failures = []
+
+    def same(name, sage_point, pure_point):
+        if sage_point.is_zero() != (pure_point is None) or (pure_point is not None and point_to_string(sage_point) != curve.point_to_string(pure_point)):
+            failures.append(f"{name} mismatch")
+
+    for t in range(trials):
+        a, b = rng.randrange(n), rng.randrange(n)
+        P1 = pp.g1 * Integer(a)
+        P2 = pp.g2 * Integer(b)
+        same(f"g1 multiply (trial {t})", P1, params.g1_table.multiply(a))
+        same(f"Q multiply (trial {t})", pp.Q * Integer(a), params.Q_table.multiply(a))
+        same(f"g2 multiply (trial {t})", P2, curve.multiply(g2, b))
+        same(f"mixed sum (trial {t})", P1 + P2, curve.add(params.g1_table.multiply(a), curve.multiply(g2, b)))
+        scalars = [rng.randrange(-n, n) for _ in range(3)]
+        same(f"msm (trial {t})", sum((P * Integer(k) for P, k in zip((pp.g1, pp.Q, P1), scalars)), pp.E(0)),
+             curve.msm([params.g1, params.Q, params.g1_table.multiply(a)], scalars))
+        for name, P in (("G1", P1), ("G2", P2), ("mixed", P1 + P2)):
+            s = point_to_string(P)
+            if curve.point_to_string(curve.parse_point(s)) != s:
+                failures.append(f"{name} point string round trip mismatch (trial {t})")
+            if int(pp.zr_hash(P)) != params.zr_hash(curve.parse_point(s)):
+                failures.append(f"zr_hash {name} point mismatch (trial {t})")
+        data = bytes(rng.randrange(256) for _ in range(rng.randrange(1, 64)))
+        same(f"hash_to_g1 (trial {t})", pp.hash_to_g1(data), params.hash_to_g1(data))
+        text = f"message {a}"
+        if int(pp.zr_hash(text)) != params.zr_hash(text) or int(pp.zr_hash(text.encode())) != params.zr_hash(text.encode()):
+            failures.append(f"zr_hash message mismatch (trial {t})")
+    if int(pp.zr_hash(pp.E(0))) != params.zr_hash(None):
+        failures.append("zr_hash point at infinity mismatch")
+    return failures
+
+
+def tampered_cases(sig_dict, message, ring, event, pp, rng):
+    """产出 (名称, 签名dict, 消息, 环, event)"""
+    from core.crypto.public_params import point_to_string
+    n = int(pp.n)
+    yield "valid", sig_dict, message, ring, event
+    yield "wrong message", sig_dict, message + "x", ring, event
+    yield "wrong event", sig_dict, message, ring, event + "x"
+
+    def edit(fn):
+        d = copy.deepcopy(sig_dict)
+        fn(d)
+        return d
+
+    commits, challenge, responses = sig_dict["PID_signature"]
+    if challenge:
+        i = rng.randrange(len(challenge))
+        for name, value in (("challenge + 1", challenge[i] + 1), ("challenge + n", challenge[i] + n),
+                            ("long challenge", 1 << 460), ("float challenge", 1.5),
+                            ("negative challenge", -rng.randrange(1, 1 << 16)),
+                            ("negative challenge with 0b window", -2), ("negative challenge with 0b window", -(1 << 221))):
+            yield name, edit(lambda d: d["PID_signature"][1].__setitem__(i, value)), message, ring, event
+    i = rng.randrange(len(ring))
+    yield "response_schnorr + 1", edit(lambda d: d["PID_signature"][2][0].__setitem__(i, responses[0][i] + 1)), message, ring, event
+    yield "response_okamoto + n", edit(lambda d: d["PID_signature"][2][1].__setitem__(i, responses[1][i] + n)), message, ring, event
+    yield "negative response", edit(lambda d: d["PID_signature"][2][0].__setitem__(i, responses[0][i] - n)), message, ring, event
+    yield "G2 commitment", edit(lambda d: d["PID_signature"][0][0].__setitem__(i, point_to_string(pp.g2))), message, ring, event
+    yield "T replaced", edit(lambda d: d["PID_encryption"].__setitem__(2, point_to_string(pp.g1))), message, ring, event
+    yield "off-curve commitment", edit(lambda d: d["PID_signature"][0][1].__setitem__(i, "(1,1)")), message, ring, event
+    if len(ring) > 1:
+        yield "swapped commitments", edit(lambda d: d["PID_signature"][0][0].reverse()), message, ring, event
+        yield "truncated ring", sig_dict, message, ring[:-1], event
+    yield "extra ring member", sig_dict, message, ring + [ring[0]], event
+    if "version" in sig_dict:
+        yield "v2 without commit_link", edit(lambda d: d["PID_signature"][0].pop()), message, ring, event
+        yield "v2 as v1", edit(lambda d: (d["PID_signature"][0].pop(), d.pop("version"))), message, ring, event
+        p = link_group(n).p
+        tag = sig_dict["PID_encryption"][2]
+        yield "tag + 1", edit(lambda d: d["PID_encryption"].__setitem__(2, tag + 1)), message, ring, event
+        yield "tag as string", edit(lambda d: d["PID_encryption"].__setitem__(2, str(tag))), message, ring, event
+        yield "commit_link + p", edit(lambda d: d["PID_signature"][0][2].__setitem__(i, commits[2][i] + p)), message, ring, event
+
+
+def check_signatures(pp, params, rng, trials, user_dir=DEFAULT_USER_KEYS_DIR):
+    from core.crypto import codec
+    from core.entities.user import User
+    users = available_users(user_dir)
+    if not users:
+        return ["no user key files found"]
+    verifier_user = User(users[0], pp=pp, load_key=False)
+    compact_user = User(users[0], pp=pp, load_key=False, compact_tables=True)
+    verifier = Verifier(params)
+    failures = []
+    for t in range(trials):
+        ring = rng.sample(users, rng.randrange(1, len(users) + 1))
+        signer = User(rng.choice(ring), pp=pp)
+        event = rng.choice(["default", f"event-{t}"])
+        linkable = bool(t % 2)
+        message = MESSAGE + str(t)
+        signature = signer.sign(message, ring, event, user_dir, linkable=linkable)
+        sig_dict = User.serialize_signature(signature)
+        for name, d, msg, r, ev in tampered_cases(sig_dict, message, ring, event, pp, rng):
+            sage_result = verdict(lambda: verifier_user.verify(msg, User.deserialize_signature(d, pp), r, ev, user_dir))
+            pure_result = verdict(lambda: verifier.verify(msg, deserialize_signature(d, params), r, ev, user_dir))
+            compact_result = verdict(lambda: compact_user.verify(msg, User.deserialize_signature(d, pp), r, ev, user_dir))
+            if sage_result != pure_result:
+                failures.append(f"{name} (trial {t}, v{2 if linkable else 1}): sage={sage_result} pure={pure_result}")
+            if sage_result != compact_result:
+                failures.append(f"{name} (trial {t}, v{2 if linkable else 1}): sage={sage_result} compact tables={compact_result}")
+            if name == "valid" and sage_result is not True:
+                failures.append(f"fresh signature rejected by the Sage path (trial {t})")
+        if not linkable:
+            buffer = io.BytesIO()
+            codec.write_signature(signature, buffer, pp)
+            data = buffer.getvalue()
+            sage_result = verdict(lambda: verifier_user.verify(message, codec.read_signature(io.BytesIO(data), pp), ring, event, user_dir))
+            pure_result = verdict(lambda: verifier.verify(message, read_signature(io.BytesIO(data), params), ring, event, user_dir))
+            if sage_result != pure_result:
+                failures.append(f"binary signature (trial {t}): sage={sage_result} pure={pure_result}")
+    return failures
+
+
+def cross_check(params_file=None, trials=10, seed=None, user_dir=DEFAULT_USER_KEYS_DIR):
+    """返回不一致项的描述列表（空列表表示全部一致）"""
+    from core.crypto.public_params import load_full_public_params
+    params_file = params_file or DEFAULT_PARAMS_PATH
+    pp = load_full_public_params(params_file)
+    if seed is not None:
+        pp.seed_scalars(seed)
+    params = VerifierParams(params_file)
+    rng = random.Random(seed)
+    return check_primitives(pp, params, rng, trials) + check_signatures(pp, params, rng, trials, user_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m verifier.differential", description="Cross-check the Sage-free verifier against the Sage path")
+    parser.add_argument("-p", "--params", default=DEFAULT_PARAMS_PATH)
+    parser.add_argument("-d", "--user-dir", default=DEFAULT_USER_KEYS_DIR)
+    parser.add_argument("-n", "--trials", type=int, default=10)
+    parser.add_argument("--seed", help="Seed for the random test cases and signing scalars")
+    args = parser.parse_args(argv)
+    failures = cross_check(args.params, args.trials, args.seed, args.user_dir)
+    for failure in failures:
+        print(failure)
+    print("OK" if not failures else f"{len(failures)} mismatches")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,133 @@
+"""
+读取params.json（及同目录的tuning.json）的验证用公共参数
+
+与core.crypto.public_params.PublicParams中验证会用到的部分逐位一致：
+- zr_hash: sha224后对n取模，点取Sage的射影字符串 '(x : y : 1)'，字节串原样，其余对象取str编码
+- hash_to_g1: 与CurveContext.hash_to_g1相同的计数器试探、较小平方根和余因子
+- g1/Q固定底点表的窗口取自tuning.fixed_window，标量范围与PowerTable相同
+余因子 #E(F_q)/n 不做点计数：n整除#E(F_q)时，Hasse区间 [q+1-2√q, q+1+2√q] 中
+n的倍数唯一（n远大于4√q），由区间直接求出。
+"""
+import hashlib
+import json
+from math import isqrt
+from core.crypto.tuning import TuningProfile
+from core.entities import DEFAULT_PARAMS_PATH
+from verifier.curve import Curve, FixedBaseTable, to_int
+
+
+def sqrt_mod(value, q):
+    """F_q中的平方根（Tonelli-Shanks），value不是平方时返回None"""
+    value %= q
+    if value == 0:
+        return 0
+    if pow(value, (q - 1) // 2, q) != 1:
+        return None
+    if q % 4 == 3:
+        return pow(value, (q + 1) // 4, q)
+    s, m = 0, q - 1
+    while m % 2 == 0:
+        s, m = s + 1, m // 2
+    z = 2
+    while pow(z, (q - 1) // 2, q) != q - 1:
+        z += 1
+    c, t, r = pow(z, m, q), pow(value, m, q), pow(value, (m + 1) // 2, q)
+    while t != 1:
+        i, t2 = 0, t
+        while t2 != 1:
+            t2 = t2 * t2 % q
+            i += 1
+        b = pow(c, 1 << (s - i - 1), q)
+        s, c = i, b * b % q
+        t, r = t * c % q, r * b % q
+    return r
+
+
+class VerifierParams:
+    def __init__(self, params_file=None):
+        params_file = params_file or DEFAULT_PARAMS_PATH
+        with open(params_file, 'r') as f:
+            params = json.load(f)
+        curve = params['curve']
+        protocol = params['protocol']
+        self.params_file = params_file
+        self.q = int(curve['q'])
+        self.a = int(curve['a'])
+        self.b = int(curve['b'])
+        self.n = int(curve['n'])
+        self.r = int(curve['r'])
+        self.k = int(curve['k'])
+        self.threshold_tracers = int(protocol['threshold_tracers'])
+        self.num_tracers = int(protocol['num_tracers'])
+        self.tuning = TuningProfile.for_params(params_file)
+        self.curve = Curve(self.q, self.a, self.b, self.k)
+
+        public_kgc_keys = params.get('public_kgc_keys')
+        if public_kgc_keys is None:
+            raise ValueError("public_kgc_keys not found in params.json")
+        for name in ('g1', 'g2', 'Q'):
+            if name not in public_kgc_keys:
+                raise ValueError(f"{name} not found in public_kgc_keys")
+        self.g1 = self.curve.parse_point(public_kgc_keys['g1'], trusted=True)
+        self.Q = self.curve.parse_point(public_kgc_keys['Q'], trusted=True)
+        # g2只用于验证缓存等处的参数摘要，不参与验证运算，保留原字符串
+        self.g2_string = public_kgc_keys['g2']
+        self.g1_table = self.make_table(self.g1)
+        self.Q_table = self.make_table(self.Q)
+        self._g1_cofactor = None
+
+    def make_table(self, P, window_size=None):
+        return FixedBaseTable(self.curve, P, window_size or self.tuning.fixed_window)
+
+    @property
+    def g1_cofactor(self):
+        """#E(F_q) / n：Hasse区间内唯一的n的倍数"""
+        if self._g1_cofactor is None:
+            q, n = self.q, self.n
+            # 2√q向上取整，保证区间不漏掉端点
+            bound = isqrt(4 * q) + 1
+            low = -(-(q + 1 - bound) // n)
+            high = (q + 1 + bound) // n
+            if low != high:
+                raise ValueError("Cannot determine #E(F_q) / n from the Hasse bound")
+            self._g1_cofactor = low
+        return self._g1_cofactor
+
+    def zr_hash(self, element):
+        """
+        与CurveContext.zr_hash对单个对象的结果相同，返回 [0, n) 中的整数。
+        element为点（二元组或表示无穷远点的None）、字节串或其他对象。
+        Sage路径中点不是ell_point.EllipticCurvePoint的实例，实际按str(P)哈希
+        """
+        if element is None or isinstance(element, tuple):
+            message = self.curve.point_repr(element).encode()
+        elif isinstance(element, (bytes, bytearray)):
+            # Sage路径先调用element.decode()，非UTF-8字节串会在那里抛出异常
+            element.decode()
+            message = bytes(element)
+        else:
+            message = str(element).encode()
+        return self._digest(message)
+
+    def _digest(self, message):
+        return to_int(int.from_bytes(hashlib.sha224(message).digest(), 'big')) % self.n
+
+    def hash_to_g1(self, data):
+        """与CurveContext.hash_to_g1相同"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        q = self.q
+        cofactor = self.g1_cofactor
+        counter = 0
+        while True:
+            digest = hashlib.sha256(data + counter.to_bytes(4, 'big')).digest()
+            counter += 1
+            x = int.from_bytes(digest, 'big') % q
+            y = sqrt_mod(x ** 3 + self.a * x + self.b, q)
+            if y is None:
+                continue
+            y = min(y, q - y)
+            P = self.curve.multiply((to_int(x), to_int(y)), cofactor)
+            if P is None:
+                continue
+            return P
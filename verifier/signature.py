@@ -0,0 +1,143 @@
+"""
+签名的读取：JSON（User.serialize_signature的格式）与codec二进制格式
+
+返回与Sage路径相同的结构 (PID_encryption, PID_signature)，点为verifier.curve的仿射元组，
+标量为整数。签名中的点都做曲线方程检查，与point_from_string / codec.read_point相同。
+"""
+import json
+import struct
+
+# 与core.crypto.codec相同的二进制格式常量
+MAGIC = b'TARS'
+VERSION = 1
+HEADER = struct.Struct('>4sBBI')
+CHALLENGE_BYTES = 32
+RESPONSE_BYTES = 64
+POINT_INFINITY = 0
+POINT_BASE_FIELD = 1
+POINT_EXTENSION_FIELD = 2
+
+SIGNATURE_V1 = 1
+SIGNATURE_V2 = 2
+
+
+def to_scalar(value):
+    """与Sage的Integer(x)一致：整数、整数值的浮点数和十进制字符串可以转换，其他抛出TypeError"""
+    if isinstance(value, float) and not value.is_integer():
+        raise TypeError(f"Cannot convert {value} to an integer")
+    if isinstance(value, str):
+        return int(value.strip())
+    return int(value)
+
+
+def link_element(value):
+    """与core.entities.user._link_element相同：标签群元素必须是JSON整数"""
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"Invalid link group element: {value!r}")
+    return value
+
+
+def deserialize_signature(sig_dict, params):
+    """与User.deserialize_signature相同"""
+    curve = params.curve
+    enc = sig_dict["PID_encryption"]
+    sig = sig_dict["PID_signature"]
+    if len(enc) != 3:
+        raise ValueError("PID_encryption must have three items")
+    C1, C2 = (curve.parse_point(s) for s in enc[:2])
+    # v2签名的T是标签群中的整数
+    PID_encryption = (C1, C2, link_element(enc[2]) if len(sig[0]) > 2 else curve.parse_point(enc[2]))
+
+    commit_schnorr_str, commit_okamoto_str = sig[0][:2]
+    challenge = sig[1]
+    response_schnorr, response_okamoto = sig[2]
+
+    commit_schnorr = [curve.parse_point(s) for s in commit_schnorr_str]
+    commit_okamoto = [curve.parse_point(s) for s in commit_okamoto_str]
+    challenge = [to_scalar(x) for x in challenge]
+    response_schnorr = [to_scalar(x) for x in response_schnorr]
+    response_okamoto = [to_scalar(x) for x in response_okamoto]
+
+    commits = (commit_schnorr, commit_okamoto)
+    if len(sig[0]) > 2:
+        commits += ([link_element(x) for x in sig[0][2]],)
+    elif sig_dict.get("version", SIGNATURE_V1) != SIGNATURE_V1:
+        raise ValueError("v2 signature is missing commit_link")
+    return PID_encryption, [commits, challenge, (response_schnorr, response_okamoto)]
+
+
+def _read_exact(fp, size):
+    data = fp.read(size)
+    if len(data) != size:
+        raise ValueError("Unexpected end of binary signature")
+    return data
+
+
+def read_point(fp, params):
+    """与codec.read_point相同"""
+    curve = params.curve
+    tag = _read_exact(fp, 1)[0]
+    if tag == POINT_INFINITY:
+        return None
+    width = (params.q.bit_length() + 7) // 8
+    if tag == POINT_BASE_FIELD:
+        ncoef = 1
+    elif tag == POINT_EXTENSION_FIELD:
+        ncoef = params.k
+    else:
+        raise ValueError(f"Invalid point tag: {tag}")
+    data = _read_exact(fp, 2 * ncoef * width)
+    coords = []
+    for i in range(2):
+        coeffs = [int.from_bytes(data[(i * ncoef + j) * width:(i * ncoef + j + 1) * width], 'big') for j in range(ncoef)]
+        coords.append(curve.element(coeffs))
+    P = tuple(coords)
+    if not curve.on_curve(P):
+        raise ValueError("Point is not on the curve")
+    return P
+
+
+def read_signature(fp, params):
+    """与codec.read_signature相同"""
+    magic, version, _flags, n = HEADER.unpack(_read_exact(fp, HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("Not a binary libTARS signature")
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary signature version: {version}")
+    PID_encryption = tuple(read_point(fp, params) for _ in range(3))
+    commit_schnorr, commit_okamoto, challenge, response_schnorr, response_okamoto = [], [], [], [], []
+    for i in range(n):
+        commit_schnorr.append(read_point(fp, params))
+        commit_okamoto.append(read_point(fp, params))
+        ch = int.from_bytes(_read_exact(fp, CHALLENGE_BYTES), 'big')
+        if i < n - 1:
+            challenge.append(ch)
+        response_schnorr.append(int.from_bytes(_read_exact(fp, RESPONSE_BYTES), 'big'))
+        response_okamoto.append(int.from_bytes(_read_exact(fp, RESPONSE_BYTES), 'big'))
+    return PID_encryption, [(commit_schnorr, commit_okamoto), challenge, (response_schnorr, response_okamoto)]
+
+
+def is_binary_signature(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def load_signature_file(path, params):
+    """
+    读取签名文件（JSON或二进制）
+    :return: (signature, ring_user_ids, event)；二进制签名没有环和event，两者为None
+    """
+    if is_binary_signature(path):
+        with open(path, 'rb') as f:
+            return read_signature(f, params), None, None
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    sig_dict = {"PID_encryption": data["PID_encryption"], "PID_signature": data["PID_signature"]}
+    if "version" in data:
+        sig_dict["version"] = data["version"]
+    return deserialize_signature(sig_dict, params), data.get("ring_user_ids"), data.get("event")
+
+
+def signature_version(signature):
+    """带commit_link的证明为v2，否则为v1"""
+    return SIGNATURE_V2 if len(signature[1][0]) > 2 else SIGNATURE_V1
@@ -0,0 +1,175 @@
+"""
+环签名验证（与core.crypto.nizk.verify_ring_proof和User.verify逐位一致）
+
+验证顺序、标量范围检查与异常类型都与Sage路径相同：
+- 挑战的哈希链在Z_n中相乘（Sage路径中zr_hash返回Zmod(n)元素），异或推出最后一个挑战；
+  挑战与响应的求和不约简，只在最终点乘前对n取模
+- 环成员的挑战按PowerTable(member_window)的行为处理（见curve.table_scalar）
+- 环成员公钥文件读取失败时抛出RuntimeError
+"""
+import hashlib
+import json
+import os
+from core.crypto import instrument
+from core.crypto.linkgroup import link_group
+from core.entities import DEFAULT_USER_KEYS_DIR, DEFAULT_USER_SINGLE_PUBLIC_KEY_FILE_FMT
+from verifier.curve import table_scalar
+from verifier.params import VerifierParams
+from verifier.signature import SIGNATURE_V2, signature_version
+
+# 与core.entities.user.LINK_DOMAIN相同
+LINK_DOMAIN = b"libTARS/link/v2/"
+
+
+def event_to_hash(event):
+    """计算event字段的hash（sha256，作为整数）"""
+    if isinstance(event, str):
+        event_bytes = event.encode('utf-8')
+    else:
+        event_bytes = bytes(event)
+    return int(hashlib.sha256(event_bytes).hexdigest(), 16)
+
+
+def link_base(event, params):
+    """event对应的标签群底数 H(LINK_DOMAIN || event)（与core.entities.user.link_base相同）"""
+    event_bytes = event.encode('utf-8') if isinstance(event, str) else bytes(event)
+    return link_group(params.n).hash(LINK_DOMAIN + event_bytes)
+
+
+def verify_ring_proof(C2, proof, message, ring_pids, params, link=None):
+    """
+    :param C2: PID_encryption的第二项
+    :param ring_pids: 环成员的public_id列表
+    :param link: v2签名的 (h, tag)；带commit_link的证明必须给出link，反之亦然
+    """
+    curve = params.curve
+    n = params.n
+    commits, challenge, (response_schnorr, response_okamoto) = proof
+    commit_schnorr, commit_okamoto = commits[0], commits[1]
+    commit_link = commits[2] if len(commits) > 2 else None
+    if (commit_link is None) != (link is None):
+        return False
+    if commit_link is not None and len(commit_link) != len(commit_schnorr):
+        return False
+
+    c = params.zr_hash(message)
+    with instrument.phase("verify_ring_proof.hash"):
+        for com in commit_schnorr:
+            c = c * params.zr_hash(com) % n
+        for com in commit_okamoto:
+            c = c * params.zr_hash(com) % n
+        if link is not None:
+            c = c * params.zr_hash(link[1]) % n
+            for com in commit_link:
+                c = c * params.zr_hash(com) % n
+
+    c_sum = 0
+    challenge_sum = 0
+    for ch in challenge:
+        c_sum = c_sum ^ ch
+        challenge_sum += ch
+    last_challenge = c ^ c_sum
+    challenge = list(challenge) + [last_challenge]
+    challenge_sum += last_challenge
+
+    res_sch_sum = 0
+    res_oka_sum = 0
+    member_scalars, com_sch, com_oka = [], [], []
+    with instrument.phase("verify_ring_proof.accumulate"):
+        # 与Sage路径按相同下标取值：签名中的列表短于环时同样抛出IndexError
+        for i in range(len(ring_pids)):
+            member_scalars.append(table_scalar(challenge[i], params.tuning.member_window))
+            com_sch.append(commit_schnorr[i])
+            com_oka.append(commit_okamoto[i])
+            res_oka_sum += response_okamoto[i]
+            res_sch_sum += response_schnorr[i]
+        # 各成员的 c_i·pid_i 合成一次多项点乘，承诺之和整批求逆
+        pid_mul_c_sum = curve.msm(ring_pids, member_scalars)
+        com_sch_sum = curve.sum(com_sch)
+        com_oka_sum = curve.sum(com_oka)
+    with instrument.phase("verify_ring_proof.finalize"):
+        left_sch = params.g1_table.multiply(res_sch_sum % n)
+        left_oka = params.Q_table.multiply(res_oka_sum % n)
+        right_sch = curve.add(pid_mul_c_sum, com_sch_sum)
+        right_oka = curve.sub(curve.add(curve.multiply(C2, challenge_sum % n), com_oka_sum), pid_mul_c_sum)
+        if not (left_sch == right_sch and left_oka == right_oka):
+            return False
+        if link is not None:
+            return verify_link(link, commit_link, res_sch_sum, challenge_sum, params)
+        return True
+
+
+def verify_link(link, commit_link, res_sch_sum, challenge_sum, params):
+    """v2标签在标签群中的聚合检查：h^(Σz_sch) == Π commit_link · tag^(Σc) mod p"""
+    h, tag = link
+    group = link_group(params.n)
+    try:
+        commit_product = group.product(commit_link)
+    except ValueError:
+        return False
+    return group.check(h, tag, commit_product, res_sch_sum, challenge_sum)
+
+
+class Verifier:
+    """只做验证的用户：读取与User相同的params.json、环成员公钥文件和签名"""
+    def __init__(self, params=None, params_file=None):
+        self.params = params or VerifierParams(params_file)
+
+    @staticmethod
+    def member_key_file(uid, user_dir=DEFAULT_USER_KEYS_DIR):
+        """环成员公钥文件路径（与User.member_key_file相同）"""
+        return os.path.join(user_dir, DEFAULT_USER_SINGLE_PUBLIC_KEY_FILE_FMT.format(uid))
+
+    def load_member(self, uid, user_dir=DEFAULT_USER_KEYS_DIR):
+        """加载单个环成员的公钥文件，返回 (public_key, public_id)"""
+        uid = str(uid)
+        try:
+            with open(self.member_key_file(uid, user_dir), 'r') as f:
+                key_data = json.load(f)
+            key_info = key_data if 'user_id' in key_data else key_data[uid]
+            # 环成员公钥来自本地密钥库：与Sage路径相同，跳过曲线方程检查
+            pk = self.params.curve.parse_point(key_info['pk'], trusted=True)
+            pid = self.params.curve.parse_point(key_info['pid'], trusted=True)
+            return pk, pid
+        except Exception as e:
+            raise RuntimeError(f"Failed to load user key for {uid}: {e}")
+
+    @staticmethod
+    def iter_ring_ids(user_ids):
+        """逐个产出环用户ID；user_ids为ID的可迭代对象或每行一个ID的文件路径"""
+        if isinstance(user_ids, str) and os.path.isfile(user_ids):
+            with open(user_ids, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        yield line.strip()
+            return
+        for uid in user_ids:
+            yield str(uid)
+
+    def load_ring(self, user_ids, user_dir=DEFAULT_USER_KEYS_DIR):
+        """按顺序加载环成员的public_id列表"""
+        return [self.load_member(uid, user_dir)[1] for uid in self.iter_ring_ids(user_ids)]
+
+    def verify(self, message, signature, ring_user_ids, event="default", user_dir=DEFAULT_USER_KEYS_DIR):
+        """
+        验证环签名（与User.verify的结果相同，不使用验证缓存）
+        :param signature: (PID_encryption, PID_signature)，由verifier.signature读取
+        :return: True/False
+        """
+        params = self.params
+        PID_encryption, PID_signature = signature
+        event_hash = event_to_hash(event)
+
+        with instrument.phase("verify.load_ring"):
+            ring_pids = self.load_ring(ring_user_ids, user_dir)
+
+        C1, C2, T = PID_encryption
+        link = None
+        if signature_version(signature) == SIGNATURE_V2:
+            link = (link_base(event, params), T)
+        elif isinstance(T, int) or T != params.g1_table.multiply(event_hash):
+            return False
+
+        # C2的PowerTable(ephemeral_window)只会收到 Σc mod n，不会越界
+        with instrument.phase("verify.ring_proof"):
+            return verify_ring_proof(C2, PID_signature, message, ring_pids, params, link=link)